@@ -0,0 +1,55 @@
+"""Add llm_response_cache — shared content-addressed LLM response cache.
+
+Changes:
+  1. CREATE TABLE llm_response_cache (key PK, task, model, response, usage,
+     created_at, expires_at, last_hit_at, hit_count)
+  2. Indexes on expires_at (TTL sweep) and last_hit_at (LRU eviction)
+
+Only used when LLM_CACHE_BACKEND=postgres (see services/llm_cache.py). The
+table is a regenerable cache — truncating it at any time is safe.
+
+Deployment order:
+  1. Run `alembic upgrade head` BEFORE deploying new app code.
+  2. init_db() also creates the table IF NOT EXISTS on startup.
+
+Revision ID: 005
+Revises: 004
+Create Date: 2026-10-16
+"""
+
+from alembic import op
+
+revision = "005"
+down_revision = "004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS llm_response_cache (
+            key         TEXT PRIMARY KEY,
+            task        TEXT NOT NULL,
+            model       TEXT NOT NULL,
+            response    TEXT NOT NULL,
+            usage       JSONB,
+            created_at  TIMESTAMPTZ NOT NULL DEFAULT now(),
+            expires_at  TIMESTAMPTZ NOT NULL,
+            last_hit_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+            hit_count   INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS idx_llm_cache_expires "
+        "ON llm_response_cache(expires_at)"
+    )
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS idx_llm_cache_last_hit "
+        "ON llm_response_cache(last_hit_at DESC)"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS idx_llm_cache_last_hit")
+    op.execute("DROP INDEX IF EXISTS idx_llm_cache_expires")
+    op.execute("DROP TABLE IF EXISTS llm_response_cache")
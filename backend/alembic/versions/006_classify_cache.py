@@ -0,0 +1,56 @@
+"""Add classify_cache — pgvector semantic cache for plan_and_classify.
+
+Changes:
+  1. CREATE TABLE classify_cache (message_hash, message, research_mode,
+     video_enabled, result JSONB, embedding vector(1536), created_at)
+     PK (message_hash, research_mode, video_enabled)
+  2. HNSW cosine index on embedding, btree on created_at (TTL filter / pruning)
+
+Lives next to source_embeddings and needs the same pgvector extension. Rows are
+a regenerable cache — truncating the table at any time is safe.
+
+Deployment order:
+  1. Run `alembic upgrade head` BEFORE deploying new app code.
+  2. init_db() also creates the table IF NOT EXISTS on startup.
+
+Revision ID: 006
+Revises: 005
+Create Date: 2026-10-16
+"""
+
+from alembic import op
+
+revision = "006"
+down_revision = "005"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS vector")
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS classify_cache (
+            message_hash  TEXT NOT NULL,
+            message       TEXT NOT NULL,
+            research_mode TEXT NOT NULL,
+            video_enabled BOOLEAN NOT NULL,
+            result        JSONB NOT NULL,
+            embedding     vector(1536),
+            created_at    TIMESTAMPTZ NOT NULL DEFAULT now(),
+            PRIMARY KEY (message_hash, research_mode, video_enabled)
+        )
+    """)
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS idx_classify_cache_vec "
+        "ON classify_cache USING hnsw (embedding vector_cosine_ops)"
+    )
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS idx_classify_cache_created "
+        "ON classify_cache(created_at)"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS idx_classify_cache_created")
+    op.execute("DROP INDEX IF EXISTS idx_classify_cache_vec")
+    op.execute("DROP TABLE IF EXISTS classify_cache")
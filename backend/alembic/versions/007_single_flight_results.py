@@ -0,0 +1,45 @@
+"""Add single_flight_results — short-lived cross-worker single-flight results.
+
+Changes:
+  1. CREATE TABLE single_flight_results (key PK, result, created_at)
+  2. Index on created_at (expiry sweep)
+
+Only used when SINGLE_FLIGHT_CROSS_WORKER=true (see services/single_flight.py).
+The worker holding the pg advisory lock for a key writes its result here so
+workers waiting on the same call can reuse it. Rows are only valid for
+SINGLE_FLIGHT_RESULT_TTL_S seconds — truncating the table at any time is safe.
+
+Deployment order:
+  1. Run `alembic upgrade head` BEFORE deploying new app code.
+  2. init_db() also creates the table IF NOT EXISTS on startup.
+
+Revision ID: 007
+Revises: 006
+Create Date: 2026-10-16
+"""
+
+from alembic import op
+
+revision = "007"
+down_revision = "006"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS single_flight_results (
+            key        TEXT PRIMARY KEY,
+            result     JSONB,
+            created_at TIMESTAMPTZ NOT NULL DEFAULT now()
+        )
+    """)
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS idx_single_flight_created "
+        "ON single_flight_results(created_at)"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS idx_single_flight_created")
+    op.execute("DROP TABLE IF EXISTS single_flight_results")
@@ -0,0 +1,56 @@
+"""Add codegen_cache — content-addressed cache of interactive widget codegen.
+
+Changes:
+  1. CREATE TABLE codegen_cache (key PK, prompt_name, prompt_version, model,
+     html, usage, created_at, last_hit_at, hit_count)
+  2. Index on (prompt_name, prompt_version) (superseded-prompt pruning)
+  3. Index on last_hit_at DESC (LRU eviction)
+
+Used by services/interactive/codegen_cache.py when CODEGEN_CACHE_ENABLED=true.
+Every row can be regenerated — truncating the table at any time is safe.
+
+Deployment order:
+  1. Run `alembic upgrade head` BEFORE deploying new app code.
+  2. init_db() also creates the table IF NOT EXISTS on startup.
+
+Revision ID: 008
+Revises: 007
+Create Date: 2026-10-16
+"""
+
+from alembic import op
+
+revision = "008"
+down_revision = "007"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS codegen_cache (
+            key            TEXT PRIMARY KEY,
+            prompt_name    TEXT NOT NULL,
+            prompt_version TEXT NOT NULL,
+            model          TEXT NOT NULL,
+            html           TEXT NOT NULL,
+            usage          JSONB,
+            created_at     TIMESTAMPTZ NOT NULL DEFAULT now(),
+            last_hit_at    TIMESTAMPTZ NOT NULL DEFAULT now(),
+            hit_count      INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS idx_codegen_cache_prompt "
+        "ON codegen_cache(prompt_name, prompt_version)"
+    )
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS idx_codegen_cache_last_hit "
+        "ON codegen_cache(last_hit_at DESC)"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS idx_codegen_cache_last_hit")
+    op.execute("DROP INDEX IF EXISTS idx_codegen_cache_prompt")
+    op.execute("DROP TABLE IF EXISTS codegen_cache")
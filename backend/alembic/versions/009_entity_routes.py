@@ -0,0 +1,54 @@
+"""Add entity_routes — pgvector k-NN store for the local entity router.
+
+Changes:
+  1. CREATE TABLE entity_routes (prompt_hash, prompt, domain, entities JSONB,
+     visual_brief, model, source, embedding vector(1536), created_at)
+     PK (prompt_hash, domain)
+  2. HNSW cosine index on embedding
+
+Rows come from scripts/train_entity_router.py (mined from sessions.frames_meta)
+and from live entity_selector calls. Needs the pgvector extension.
+
+Deployment order:
+  1. Run `alembic upgrade head` BEFORE deploying new app code.
+  2. init_db() also creates the table IF NOT EXISTS on startup.
+  3. Run `python scripts/train_entity_router.py --rebuild` to seed it.
+
+Revision ID: 009
+Revises: 008
+Create Date: 2026-10-16
+"""
+
+from alembic import op
+
+revision = "009"
+down_revision = "008"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS vector")
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS entity_routes (
+            prompt_hash   TEXT NOT NULL,
+            prompt        TEXT NOT NULL,
+            domain        TEXT NOT NULL,
+            entities      JSONB NOT NULL,
+            visual_brief  TEXT,
+            model         TEXT,
+            source        TEXT NOT NULL,
+            embedding     vector(1536),
+            created_at    TIMESTAMPTZ NOT NULL DEFAULT now(),
+            PRIMARY KEY (prompt_hash, domain)
+        )
+    """)
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS idx_entity_routes_vec "
+        "ON entity_routes USING hnsw (embedding vector_cosine_ops)"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS idx_entity_routes_vec")
+    op.execute("DROP TABLE IF EXISTS entity_routes")
@@ -0,0 +1,56 @@
+"""Add search_cache — shared Tavily search responses with adaptive TTL.
+
+Changes:
+  1. CREATE TABLE search_cache (key PK, query, topic, results JSONB, ttl_s,
+     created_at, expires_at, last_hit_at, hit_count)
+  2. Index on expires_at (expiry sweep)
+  3. Index on last_hit_at DESC (LRU eviction)
+
+Used by services/research/search_cache.py when SEARCH_CACHE_ENABLED=true.
+Rows are a regenerable cache — truncating the table at any time is safe.
+
+Deployment order:
+  1. Run `alembic upgrade head` BEFORE deploying new app code.
+  2. init_db() also creates the table IF NOT EXISTS on startup.
+
+Revision ID: 010
+Revises: 009
+Create Date: 2026-10-16
+"""
+
+from alembic import op
+
+revision = "010"
+down_revision = "009"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS search_cache (
+            key         TEXT PRIMARY KEY,
+            query       TEXT NOT NULL,
+            topic       TEXT NOT NULL,
+            results     JSONB NOT NULL,
+            ttl_s       INTEGER NOT NULL,
+            created_at  TIMESTAMPTZ NOT NULL DEFAULT now(),
+            expires_at  TIMESTAMPTZ NOT NULL,
+            last_hit_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+            hit_count   INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS idx_search_cache_expires "
+        "ON search_cache(expires_at)"
+    )
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS idx_search_cache_last_hit "
+        "ON search_cache(last_hit_at DESC)"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS idx_search_cache_last_hit")
+    op.execute("DROP INDEX IF EXISTS idx_search_cache_expires")
+    op.execute("DROP TABLE IF EXISTS search_cache")
@@ -0,0 +1,50 @@
+"""Add extract_cache — Tavily /extract page content by canonical URL.
+
+Changes:
+  1. CREATE TABLE extract_cache (url_key PK, url, domain, content BYTEA
+     (zlib), content_chars, fetched_at, last_hit_at, hit_count)
+  2. Index on last_hit_at DESC (LRU eviction)
+
+Used by services/research/extract_cache.py when EXTRACT_CACHE_ENABLED=true.
+Freshness is checked against fetched_at with a per-domain TTL at lookup time.
+Rows are a regenerable cache — truncating the table at any time is safe.
+
+Deployment order:
+  1. Run `alembic upgrade head` BEFORE deploying new app code.
+  2. init_db() also creates the table IF NOT EXISTS on startup.
+
+Revision ID: 011
+Revises: 010
+Create Date: 2026-10-16
+"""
+
+from alembic import op
+
+revision = "011"
+down_revision = "010"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS extract_cache (
+            url_key       TEXT PRIMARY KEY,
+            url           TEXT NOT NULL,
+            domain        TEXT NOT NULL,
+            content       BYTEA NOT NULL,
+            content_chars INTEGER NOT NULL,
+            fetched_at    TIMESTAMPTZ NOT NULL DEFAULT now(),
+            last_hit_at   TIMESTAMPTZ NOT NULL DEFAULT now(),
+            hit_count     INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS idx_extract_cache_last_hit "
+        "ON extract_cache(last_hit_at DESC)"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS idx_extract_cache_last_hit")
+    op.execute("DROP TABLE IF EXISTS extract_cache")
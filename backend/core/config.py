@@ -8,6 +8,7 @@ HIGH-10: Required secrets are validated at import time. The process will refuse
 to start if JWT_SECRET_KEY is missing, rather than failing silently later.
 """
 
+import json
 import os
 from pathlib import Path
 
@@ -86,8 +87,25 @@ TASK_MODELS: dict = {
     "beat_codegen":    os.getenv("MODEL_BEAT_CODEGEN",     "gemini-2.5-flash"),
     "synthesiser":     os.getenv("MODEL_SYNTHESISER",      "claude-haiku-4-5-20251001"),
     "codegen":         os.getenv("MODEL_CODEGEN",          "gemini-2.5-flash"),
+    # Unified intent classification + search planning (first call of every request).
+    "plan_and_classify": os.getenv("MODEL_PLAN_AND_CLASSIFY", CLASSIFY_MODEL),
 }
 
+# ── Hedged requests ───────────────────────────────────────────────────────────
+# Opt-in per task: set a TASK_MODELS entry to "primary|secondary", e.g.
+#   MODEL_PLAN_AND_CLASSIFY="claude-haiku-4-5-20251001|gpt-4.1-mini"
+# If the primary has not answered within its observed p90 latency, the same
+# request is fired at the secondary; the first valid answer wins and the loser
+# is cancelled. Streamed tasks hedge on the p90 time to first chunk instead and
+# relay whichever stream yields first. Hedges are logged as `llm_hedge` lifecycle entries and their
+# extra cost is included in compute_session_cost.
+HEDGING_ENABLED:       bool  = os.getenv("HEDGING_ENABLED", "true").lower() != "false"
+# Latency samples needed per model before its p90 is trusted; until then the
+# default delay is used. The delay never drops below the floor.
+HEDGE_MIN_SAMPLES:     int   = int(os.getenv("HEDGE_MIN_SAMPLES", "20"))
+HEDGE_DEFAULT_DELAY_S: float = float(os.getenv("HEDGE_DEFAULT_DELAY_S", "2.5"))
+HEDGE_MIN_DELAY_S:     float = float(os.getenv("HEDGE_MIN_DELAY_S", "0.4"))
+
 # ── Refresh token bounding ────────────────────────────────────────────────────
 # Old tokens beyond this limit are pruned (oldest-first) on each new issuance.
 MAX_REFRESH_TOKENS_PER_USER: int = int(os.getenv("MAX_REFRESH_TOKENS_PER_USER", "5"))
@@ -97,11 +115,62 @@ MAX_REFRESH_TOKENS_PER_USER: int = int(os.getenv("MAX_REFRESH_TOKENS_PER_USER",
 # cache_control so repeated calls reuse cached tokens at 10% of normal cost.
 PROMPT_CACHE_ENABLED: bool = os.getenv("PROMPT_CACHE_ENABLED", "true").lower() != "false"
 
+# ── LLM response cache ────────────────────────────────────────────────────────
+# Content-addressed cache of full LLM responses (see services/llm_cache.py).
+# Keyed on model + normalised messages + max_tokens + json_mode/tool_schema, so
+# only byte-identical requests hit. Backends: "disk" (per-box, OUTPUTS_DIR),
+# "postgres" (shared across workers), or "off".
+LLM_CACHE_BACKEND:     str  = os.getenv("LLM_CACHE_BACKEND", "disk").lower()
+LLM_CACHE_DIR:         Path = OUTPUTS_DIR / "llm_cache"
+LLM_CACHE_MAX_ENTRIES: int  = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "20000"))
+# Per-task TTL in seconds. Only tasks listed here are cached — creative calls
+# (scene planning, codegen, synthesis) must never be served from cache.
+LLM_CACHE_TTL_SECS: dict[str, int] = {
+    "plan_and_classify": int(os.getenv("LLM_CACHE_TTL_CLASSIFY",   "21600")),   # 6 h
+    "gap_analysis":      int(os.getenv("LLM_CACHE_TTL_GAP",        "3600")),    # 1 h — results drift
+    "entity_selector":   int(os.getenv("LLM_CACHE_TTL_ENTITIES",   "86400")),   # 24 h
+    "vocab_plan":        int(os.getenv("LLM_CACHE_TTL_VOCAB_PLAN", "86400")),   # 24 h
+}
+
+# ── Single-flight coalescing ──────────────────────────────────────────────────
+# Concurrent identical LLM calls, Tavily search/extract calls and embedding
+# batches share one in-flight call (see services/single_flight.py). Cross-worker
+# mode also coordinates uvicorn workers via Postgres advisory locks and the
+# short-lived single_flight_results table; it needs the DB pool.
+SINGLE_FLIGHT_ENABLED:        bool  = os.getenv("SINGLE_FLIGHT_ENABLED", "true").lower() != "false"
+SINGLE_FLIGHT_CROSS_WORKER:   bool  = os.getenv("SINGLE_FLIGHT_CROSS_WORKER", "false").lower() == "true"
+# How long a non-leader worker polls for the leader's result before running the
+# call itself, and how long a stored result stays reusable (for LLM calls, only
+# tasks with an LLM_CACHE_TTL_SECS entry reuse a finished result).
+SINGLE_FLIGHT_WAIT_TIMEOUT_S: float = float(os.getenv("SINGLE_FLIGHT_WAIT_TIMEOUT_S", "30"))
+SINGLE_FLIGHT_RESULT_TTL_S:   int   = int(os.getenv("SINGLE_FLIGHT_RESULT_TTL_S", "30"))
+
+# ── LLM dispatch scheduler ────────────────────────────────────────────────────
+# Proactive per-model RPM/TPM token buckets in front of every async LLM call
+# (see services/llm_scheduler.py). Calls queue by priority — interactive first,
+# then default, video codegen, and bulk research work last — instead of all
+# colliding on a provider 429 and sleeping through retry-after.
+LLM_SCHEDULER_ENABLED: bool = os.getenv("LLM_SCHEDULER_ENABLED", "true").lower() != "false"
+# Per-provider defaults (requests / tokens per minute, per model). Set these to
+# this deployment's account tier; LLM_RATE_LIMITS_JSON overrides per model, e.g.
+# '{"claude-sonnet-4-6": {"rpm": 1000, "tpm": 80000}}'.
+LLM_PROVIDER_RATE_LIMITS: dict[str, dict[str, int]] = {
+    "anthropic": {"rpm": int(os.getenv("ANTHROPIC_RPM", "4000")), "tpm": int(os.getenv("ANTHROPIC_TPM", "400000"))},
+    "openai":    {"rpm": int(os.getenv("OPENAI_RPM",    "5000")), "tpm": int(os.getenv("OPENAI_TPM",    "800000"))},
+    "gemini":    {"rpm": int(os.getenv("GEMINI_RPM",    "2000")), "tpm": int(os.getenv("GEMINI_TPM",    "4000000"))},
+}
+LLM_MODEL_RATE_LIMITS: dict[str, dict[str, int]] = json.loads(os.getenv("LLM_RATE_LIMITS_JSON", "{}"))
+# A queued call gains one priority level per this many seconds waited, so bulk
+# work cannot be starved indefinitely by a stream of interactive calls.
+LLM_SCHEDULER_AGING_S: float = float(os.getenv("LLM_SCHEDULER_AGING_S", "10"))
+
 # ── Model pricing (USD per 1,000,000 tokens) ──────────────────────────────────
 # Used to compute per-session cost from the lifecycle log (see core/cost.py).
 # Keys are model IDs; `input`/`output` are the standard rates, `cache_write` /
-# `cache_read` are the Anthropic prompt-cache rates (1.25× / 0.1× of input).
-# For OpenAI/Gemini there is no cache split — those token counts are always 0.
+# `cache_read` are the prompt-cache rates — Anthropic 1.25× / 0.1× of input;
+# OpenAI/Gemini cache automatically (no write surcharge) and bill cached input
+# at their own discount. cached_tokens are split out of prompt_tokens by
+# services/llm_service.py, so prompt_tokens is always the uncached input.
 # Rates are estimates and intentionally overridable here without code changes.
 MODEL_PRICING: dict[str, dict[str, float]] = {
     # Anthropic Claude
@@ -109,15 +178,15 @@ MODEL_PRICING: dict[str, dict[str, float]] = {
     "claude-sonnet-4-6":         {"input": 3.00,  "output": 15.00, "cache_write": 3.75,  "cache_read": 0.30},
     "claude-opus-4-7":           {"input": 15.00, "output": 75.00, "cache_write": 18.75, "cache_read": 1.50},
     # OpenAI
-    "gpt-4.1":      {"input": 2.00, "output": 8.00},
-    "gpt-4.1-mini": {"input": 0.40, "output": 1.60},
-    "gpt-4o":       {"input": 2.50, "output": 10.00},
-    "gpt-4o-mini":  {"input": 0.15, "output": 0.60},
+    "gpt-4.1":      {"input": 2.00, "output": 8.00,  "cache_read": 0.50},
+    "gpt-4.1-mini": {"input": 0.40, "output": 1.60,  "cache_read": 0.10},
+    "gpt-4o":       {"input": 2.50, "output": 10.00, "cache_read": 1.25},
+    "gpt-4o-mini":  {"input": 0.15, "output": 0.60,  "cache_read": 0.075},
     # Google Gemini
-    "gemini-2.5-flash": {"input": 0.30,  "output": 2.50},
-    "gemini-2.0-flash": {"input": 0.10,  "output": 0.40},
-    "gemini-1.5-pro":   {"input": 1.25,  "output": 5.00},
-    "gemini-1.5-flash": {"input": 0.075, "output": 0.30},
+    "gemini-2.5-flash": {"input": 0.30,  "output": 2.50, "cache_read": 0.075},
+    "gemini-2.0-flash": {"input": 0.10,  "output": 0.40, "cache_read": 0.025},
+    "gemini-1.5-pro":   {"input": 1.25,  "output": 5.00, "cache_read": 0.3125},
+    "gemini-1.5-flash": {"input": 0.075, "output": 0.30, "cache_read": 0.01875},
     # Embeddings (input only; output rate 0)
     "text-embedding-3-small": {"input": 0.02, "output": 0.0},
 }
@@ -125,6 +194,40 @@ MODEL_PRICING: dict[str, dict[str, float]] = {
 # ── Embeddings ───────────────────────────────────────────────────────────────
 EMBEDDING_MODEL: str = os.getenv("EMBEDDING_MODEL", "text-embedding-3-small")
 
+# ── Semantic classify cache ──────────────────────────────────────────────────
+# First-turn plan_and_classify results are embedded and stored in the pgvector
+# classify_cache table. A paraphrased first-turn question (no conversation
+# context) whose cosine distance to a stored one is within the threshold reuses
+# that classification instead of waiting for the LLM round-trip.
+CLASSIFY_SEMANTIC_CACHE_ENABLED:   bool  = os.getenv("CLASSIFY_SEMANTIC_CACHE_ENABLED", "true").lower() != "false"
+CLASSIFY_SEMANTIC_CACHE_MAX_DIST:  float = float(os.getenv("CLASSIFY_SEMANTIC_CACHE_MAX_DIST", "0.08"))
+CLASSIFY_SEMANTIC_CACHE_TTL_HOURS: int   = int(os.getenv("CLASSIFY_SEMANTIC_CACHE_TTL_HOURS", "72"))
+# Upper bound on embed + lookup; the LLM stream runs alongside, and a late
+# embedding is still used to store the fresh result.
+CLASSIFY_SEMANTIC_CACHE_TIMEOUT_S: float = float(os.getenv("CLASSIFY_SEMANTIC_CACHE_TIMEOUT_S", "0.6"))
+
+# ── Speculative entity selection ─────────────────────────────────────────────
+# Interactive mode starts the entity selector on the raw user message as soon
+# as the streamed classifier emits its domain, overlapping it with the rest of
+# classification and search. Kept only when the final domain matches.
+SPECULATIVE_SELECTION_ENABLED: bool = os.getenv("SPECULATIVE_SELECTION_ENABLED", "true").lower() != "false"
+
+# ── Entity router ────────────────────────────────────────────────────────────
+# k-NN over past first-turn questions and the entities they used (see
+# services/interactive/entity_router.py; train with scripts/train_entity_router.py).
+# A confident vote replaces the entity_selector LLM call; otherwise it runs as before.
+ENTITY_ROUTER_ENABLED:        bool  = os.getenv("ENTITY_ROUTER_ENABLED", "true").lower() != "false"
+ENTITY_ROUTER_K:              int   = int(os.getenv("ENTITY_ROUTER_K", "7"))
+ENTITY_ROUTER_MAX_DIST:       float = float(os.getenv("ENTITY_ROUTER_MAX_DIST", "0.15"))
+ENTITY_ROUTER_MIN_NEIGHBOURS: int   = int(os.getenv("ENTITY_ROUTER_MIN_NEIGHBOURS", "3"))
+ENTITY_ROUTER_MIN_CONFIDENCE: float = float(os.getenv("ENTITY_ROUTER_MIN_CONFIDENCE", "0.8"))
+# How long the entity_selector call waits on embed + lookup before starting
+# anyway — a miss adds up to this much latency. The embedding keeps running
+# past it so the selector's answer can still be remembered.
+ENTITY_ROUTER_TIMEOUT_S:      float = float(os.getenv("ENTITY_ROUTER_TIMEOUT_S", "0.5"))
+# Rows kept per domain in entity_routes; remember() evicts the oldest beyond it.
+ENTITY_ROUTER_MAX_ROWS:       int   = int(os.getenv("ENTITY_ROUTER_MAX_ROWS", "20000"))
+
 # ── Deep research ────────────────────────────────────────────────────────────
 TAVILY_API_KEY:         str   = os.getenv("TAVILY_API_KEY", "")
 DEEP_SEARCH_ROUNDS:     int   = int(os.getenv("DEEP_SEARCH_ROUNDS", "2"))
@@ -133,6 +236,63 @@ DEEP_SEARCH_SOURCES:    int   = int(os.getenv("DEEP_SEARCH_SOURCES", "10"))
 DEEP_SOURCES_IN_ANSWER: int   = int(os.getenv("DEEP_SOURCES_IN_ANSWER", "5"))
 DEEP_MAX_TOKENS_SOURCE: int   = int(os.getenv("DEEP_MAX_TOKENS_SOURCE", "1200"))
 DEEP_TIMEOUT_SECONDS:   float = float(os.getenv("DEEP_TIMEOUT_SECONDS", "90"))
+# Wall-clock target for the whole search phase (searches, gap analysis,
+# extraction) — later rounds and extracts are cut to fit; see
+# services/research/search_budget.py.
+DEEP_SEARCH_BUDGET_S:    float = float(os.getenv("DEEP_SEARCH_BUDGET_S", "45"))
+INSTANT_SEARCH_BUDGET_S: float = float(os.getenv("INSTANT_SEARCH_BUDGET_S", "15"))
+
+# ── Tavily client ────────────────────────────────────────────────────────────
+# One pooled keep-alive async client per worker. Every stream's searches and
+# extracts are admitted through services/research/tavily_governor.py: at most
+# TAVILY_MAX_CONCURRENCY calls in flight and TAVILY_RPM started per minute
+# (token bucket), FIFO across users. Limits are per process — with N uvicorn
+# workers, give each roughly 1/N of the account's rate limit.
+TAVILY_MAX_CONCURRENCY:   int = int(os.getenv("TAVILY_MAX_CONCURRENCY", "8"))
+TAVILY_RPM:               int = int(os.getenv("TAVILY_RPM", "300"))
+# URLs per /extract request (the API accepts at most 20).
+TAVILY_EXTRACT_BATCH_MAX: int = int(os.getenv("TAVILY_EXTRACT_BATCH_MAX", "20"))
+
+# ── Search cache ─────────────────────────────────────────────────────────────
+# Tavily search responses shared across users and workers in Postgres (see
+# services/research/search_cache.py). TTL follows the newest result's
+# published_date: fresh results expire fast, undated/evergreen ones last long.
+SEARCH_CACHE_ENABLED:         bool = os.getenv("SEARCH_CACHE_ENABLED", "true").lower() != "false"
+SEARCH_CACHE_MAX_ENTRIES:     int  = int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", "20000"))
+SEARCH_CACHE_FRESH_DAYS:      int  = int(os.getenv("SEARCH_CACHE_FRESH_DAYS", "3"))
+SEARCH_CACHE_RECENT_DAYS:     int  = int(os.getenv("SEARCH_CACHE_RECENT_DAYS", "60"))
+SEARCH_CACHE_TTL_FRESH_S:     int  = int(os.getenv("SEARCH_CACHE_TTL_FRESH_S", "900"))         # 15 min
+SEARCH_CACHE_TTL_RECENT_S:    int  = int(os.getenv("SEARCH_CACHE_TTL_RECENT_S", "21600"))      # 6 h
+SEARCH_CACHE_TTL_EVERGREEN_S: int  = int(os.getenv("SEARCH_CACHE_TTL_EVERGREEN_S", "604800"))  # 7 d
+
+# ── Extract cache ────────────────────────────────────────────────────────────
+# Tavily /extract page content by canonical URL, shared in Postgres (see
+# services/research/extract_cache.py). Freshness is per domain, longest
+# matching suffix wins; anything unlisted gets EXTRACT_CACHE_TTL_DEFAULT_S.
+EXTRACT_CACHE_ENABLED:       bool = os.getenv("EXTRACT_CACHE_ENABLED", "true").lower() != "false"
+EXTRACT_CACHE_MAX_ENTRIES:   int  = int(os.getenv("EXTRACT_CACHE_MAX_ENTRIES", "10000"))
+EXTRACT_CACHE_TTL_DEFAULT_S: int  = int(os.getenv("EXTRACT_CACHE_TTL_DEFAULT_S", "86400"))     # 1 d
+EXTRACT_CACHE_DOMAIN_TTL_S: dict[str, int] = {
+    # Reference and documentation pages change rarely.
+    "wikipedia.org":          7 * 86400,
+    "britannica.com":         7 * 86400,
+    "developer.mozilla.org":  7 * 86400,
+    "docs.python.org":        7 * 86400,
+    "khanacademy.org":        7 * 86400,
+    "libretexts.org":         7 * 86400,
+    "arxiv.org":              30 * 86400,
+    "nih.gov":                3 * 86400,
+    "github.com":             86400,
+    # News front pages and articles are revised within hours.
+    "reuters.com":            900,
+    "apnews.com":             900,
+    "bbc.co.uk":              900,
+    "bbc.com":                900,
+    "cnn.com":                900,
+    "nytimes.com":            900,
+    "theguardian.com":        900,
+    "bloomberg.com":          900,
+}
 
 # ── External services ─────────────────────────────────────────────────────────
 
@@ -188,6 +348,14 @@ INTERACTIVE_DOMAINS: frozenset[str] = frozenset({"physics", "cs", "chemistry", "
 # Each session contributes its text blocks + entity summaries from scene_ir.json.
 INTERACTIVE_CONTEXT_TURNS: int = 3
 
+# Widget codegen (freeform_html / p5_sketch / slide_deck) runs in the
+# background while the scene plan keeps streaming; at most this many at once.
+CODEGEN_MAX_CONCURRENCY: int = int(os.getenv("CODEGEN_MAX_CONCURRENCY", "3"))
+# Content-addressed cache of widget codegen output in Postgres (see
+# services/interactive/codegen_cache.py); LRU-capped at CODEGEN_CACHE_MAX_ENTRIES.
+CODEGEN_CACHE_ENABLED:     bool = os.getenv("CODEGEN_CACHE_ENABLED", "true").lower() != "false"
+CODEGEN_CACHE_MAX_ENTRIES: int  = int(os.getenv("CODEGEN_CACHE_MAX_ENTRIES", "5000"))
+
 # ── Unified pipeline ──────────────────────────────────────────────────────────
 FOLLOWUP_CONTEXT_TURNS: int  = int(os.getenv("FOLLOWUP_CONTEXT_TURNS", "3"))
 INSTANT_MAX_QUERIES:    int  = int(os.getenv("INSTANT_MAX_QUERIES",    "3"))
@@ -204,6 +372,18 @@ THREAD_POOL_MAX_WORKERS: int = int(os.getenv("THREAD_POOL_MAX_WORKERS", "40"))
 # 'error'. Runs continuously (not just at startup) so disconnect-orphaned
 # sessions never linger between deployments.
 STALE_SWEEP_INTERVAL_SECS: int = int(os.getenv("STALE_SWEEP_INTERVAL_SECS", "300"))
+# Connection pools of the provider SDK clients (services/llm_service.py
+# _http_client). Keep-alive connections survive between requests so only the
+# first call per worker pays TCP + TLS setup — and services/warmup.py pays
+# that at startup.
+HTTP_POOL_MAX_CONNECTIONS: int   = int(os.getenv("HTTP_POOL_MAX_CONNECTIONS", "100"))
+HTTP_POOL_MAX_KEEPALIVE:   int   = int(os.getenv("HTTP_POOL_MAX_KEEPALIVE",   "20"))
+HTTP_KEEPALIVE_EXPIRY_S:   float = float(os.getenv("HTTP_KEEPALIVE_EXPIRY_S", "120"))
+# Startup pre-flight: one cheap authenticated request per configured provider
+# so /api/health only reports ready with warm connections. Turn off offline
+# (it is skipped automatically under REPLAY_ACTIVITY_LOG).
+WARMUP_PREFLIGHT:          bool  = os.getenv("WARMUP_PREFLIGHT", "true").lower() != "false"
+WARMUP_PREFLIGHT_TIMEOUT_S: float = float(os.getenv("WARMUP_PREFLIGHT_TIMEOUT_S", "10"))
 
 # ── Generation constants ──────────────────────────────────────────────────────
 HEARTBEAT_INTERVAL_SECS:      int = int(os.getenv("HEARTBEAT_INTERVAL_SECS", "20"))
@@ -214,6 +394,47 @@ SOURCES_SNIPPET_MAX_CHARS:    int = int(os.getenv("SOURCES_SNIPPET_MAX_CHARS", "
 SOURCES_TOP_K:                int = int(os.getenv("SOURCES_TOP_K", "8"))
 SCENE_PLANNER_MAX_TOKENS:     int = int(os.getenv("SCENE_PLANNER_MAX_TOKENS", "8192"))
 
+# ── Prompt token budgets ──────────────────────────────────────────────────────
+# Input-token ceilings per task, enforced by services/token_budget.py. System
+# prompt + question are always sent; conversation context, prior synthesis,
+# sources and the text-selection excerpt are packed into what is left.
+INPUT_TOKEN_BUDGETS: dict[str, int] = {
+    "scene_planner":     int(os.getenv("INPUT_BUDGET_SCENE_PLANNER",     "24000")),
+    "synthesiser":       int(os.getenv("INPUT_BUDGET_SYNTHESISER",       "16000")),
+    "vocab_plan":        int(os.getenv("INPUT_BUDGET_VOCAB_PLAN",        "12000")),
+    "plan_and_classify": int(os.getenv("INPUT_BUDGET_PLAN_AND_CLASSIFY", "8000")),
+}
+# Per-source cap inside the scene-planner sources block (was SOURCES_SNIPPET_MAX_CHARS chars).
+SOURCE_MAX_TOKENS:            int = int(os.getenv("SOURCE_MAX_TOKENS", str(SOURCES_SNIPPET_MAX_CHARS // 4)))
+# Per-source excerpt in the synthesiser evidence table.
+EVIDENCE_EXCERPT_MAX_TOKENS:  int = int(os.getenv("EVIDENCE_EXCERPT_MAX_TOKENS", "300"))
+# User text-selection excerpt appended to the conversation context.
+SELECTION_EXCERPT_MAX_TOKENS: int = int(os.getenv("SELECTION_EXCERPT_MAX_TOKENS", "500"))
+
+# ── Prompt registry ───────────────────────────────────────────────────────────
+# services/prompt_registry.py keeps every prompt template in memory. With hot
+# reload on, each lookup stats the file and re-reads it after an edit.
+PROMPT_HOT_RELOAD: bool = os.getenv(
+    "PROMPT_HOT_RELOAD", "false" if os.getenv("ENV", "development") == "production" else "true"
+).lower() == "true"
+
+# ── Activity log ──────────────────────────────────────────────────────────────
+# services/activity_log.py streams each request's lifecycle log to
+# activity_log.ndjson.gz. Fraction of LLM calls whose full prompt / response
+# text is written (the rest keep only their lengths). 1.0 keeps everything.
+ACTIVITY_LOG_PROMPT_SAMPLE_RATE:   float = float(os.getenv("ACTIVITY_LOG_PROMPT_SAMPLE_RATE",   "1.0"))
+ACTIVITY_LOG_RESPONSE_SAMPLE_RATE: float = float(os.getenv("ACTIVITY_LOG_RESPONSE_SAMPLE_RATE", "1.0"))
+
+# ── Replay (offline benchmarking) ─────────────────────────────────────────────
+# Path to a recorded activity_log.ndjson.gz (or legacy activity_log.json). When
+# set, services/replay.py serves every LLM and Tavily call from the recording
+# instead of the network. Latency is simulated: a fixed delay before the first
+# token, then REPLAY_TOKENS_PER_S output tokens per second (0 = no delay).
+REPLAY_ACTIVITY_LOG:     str   = os.getenv("REPLAY_ACTIVITY_LOG", "")
+REPLAY_LATENCY_S:        float = float(os.getenv("REPLAY_LATENCY_S",        "0.8"))
+REPLAY_TOKENS_PER_S:     float = float(os.getenv("REPLAY_TOKENS_PER_S",     "60"))
+REPLAY_SEARCH_LATENCY_S: float = float(os.getenv("REPLAY_SEARCH_LATENCY_S", "1.0"))
+
 # ── Beat pipeline ─────────────────────────────────────────────────────────────
 # Set BEAT_PIPELINE_ENABLED=false to fall back to legacy manim_generator_legacy.py
 BEAT_PIPELINE_ENABLED:        bool = os.getenv("BEAT_PIPELINE_ENABLED", "true").lower() != "false"
@@ -15,7 +15,16 @@ Token accounting:
                          cache tokens are reported separately below)
   - completion_tokens  → output rate
   - cache_creation_input_tokens → cache_write rate (Anthropic only; else 0)
-  - cache_read_input_tokens     → cache_read  rate (Anthropic only; else 0)
+  - cache_read_input_tokens     → cache_read  rate (Anthropic cache reads, and
+                         OpenAI/Gemini automatic prefix-cache hits)
+
+Entries flagged cache_hit=True were served by the LLM response cache
+(services/llm_cache.py) with no provider call, and always cost $0.
+
+Hedged calls (HedgedProvider in services/llm_service.py): the `llm_call` entry
+is priced at usage["hedge"]["winner_model"] when present, since the secondary
+may have answered. The losing call is billed from the matching `llm_hedge`
+entry (extra_model + extra_usage).
 """
 
 import structlog
@@ -76,10 +85,17 @@ def compute_session_cost(lifecycle_log: list) -> float:
     total = 0.0
     unknown: set[str] = set()
     for entry in lifecycle_log:
-        if entry.get("event") not in ("llm_call", "llm_call_fast"):
+        event = entry.get("event")
+        if event == "llm_hedge":
+            usage = entry.get("extra_usage") or {}
+            model = entry.get("extra_model") or ""
+        elif event in ("llm_call", "llm_call_fast"):
+            if entry.get("cache_hit"):
+                continue
+            usage = entry.get("usage") or {}
+            model = (usage.get("hedge") or {}).get("winner_model") or entry.get("model") or ""
+        else:
             continue
-        usage = entry.get("usage") or {}
-        model = entry.get("model") or ""
         if _rates_for(model) is None:
             if model:
                 unknown.add(model)
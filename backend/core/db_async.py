@@ -574,6 +574,73 @@ async def init_db() -> None:
             CREATE UNIQUE INDEX IF NOT EXISTS idx_sessions_conv_turn_user
                 ON sessions(conversation_id, turn_index, user_id)
                 WHERE conversation_id IS NOT NULL;
+
+            -- LLM response cache (services/llm_cache.py, LLM_CACHE_BACKEND=postgres).
+            CREATE TABLE IF NOT EXISTS llm_response_cache (
+                key         TEXT PRIMARY KEY,
+                task        TEXT NOT NULL,
+                model       TEXT NOT NULL,
+                response    TEXT NOT NULL,
+                usage       JSONB,
+                created_at  TIMESTAMPTZ NOT NULL DEFAULT now(),
+                expires_at  TIMESTAMPTZ NOT NULL,
+                last_hit_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+                hit_count   INTEGER NOT NULL DEFAULT 0
+            );
+            CREATE INDEX IF NOT EXISTS idx_llm_cache_expires  ON llm_response_cache(expires_at);
+            CREATE INDEX IF NOT EXISTS idx_llm_cache_last_hit ON llm_response_cache(last_hit_at DESC);
+
+            -- Cross-worker single-flight results (services/single_flight.py,
+            -- SINGLE_FLIGHT_CROSS_WORKER=true). Rows live ~30 s.
+            CREATE TABLE IF NOT EXISTS single_flight_results (
+                key        TEXT PRIMARY KEY,
+                result     JSONB,
+                created_at TIMESTAMPTZ NOT NULL DEFAULT now()
+            );
+            CREATE INDEX IF NOT EXISTS idx_single_flight_created ON single_flight_results(created_at);
+
+            -- Widget codegen cache (services/interactive/codegen_cache.py).
+            CREATE TABLE IF NOT EXISTS codegen_cache (
+                key            TEXT PRIMARY KEY,
+                prompt_name    TEXT NOT NULL,
+                prompt_version TEXT NOT NULL,
+                model          TEXT NOT NULL,
+                html           TEXT NOT NULL,
+                usage          JSONB,
+                created_at     TIMESTAMPTZ NOT NULL DEFAULT now(),
+                last_hit_at    TIMESTAMPTZ NOT NULL DEFAULT now(),
+                hit_count      INTEGER NOT NULL DEFAULT 0
+            );
+            CREATE INDEX IF NOT EXISTS idx_codegen_cache_prompt   ON codegen_cache(prompt_name, prompt_version);
+            CREATE INDEX IF NOT EXISTS idx_codegen_cache_last_hit ON codegen_cache(last_hit_at DESC);
+
+            -- Shared Tavily search cache (services/research/search_cache.py).
+            CREATE TABLE IF NOT EXISTS search_cache (
+                key         TEXT PRIMARY KEY,
+                query       TEXT NOT NULL,
+                topic       TEXT NOT NULL,
+                results     JSONB NOT NULL,
+                ttl_s       INTEGER NOT NULL,
+                created_at  TIMESTAMPTZ NOT NULL DEFAULT now(),
+                expires_at  TIMESTAMPTZ NOT NULL,
+                last_hit_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+                hit_count   INTEGER NOT NULL DEFAULT 0
+            );
+            CREATE INDEX IF NOT EXISTS idx_search_cache_expires  ON search_cache(expires_at);
+            CREATE INDEX IF NOT EXISTS idx_search_cache_last_hit ON search_cache(last_hit_at DESC);
+
+            -- Tavily /extract content by canonical URL (services/research/extract_cache.py).
+            CREATE TABLE IF NOT EXISTS extract_cache (
+                url_key       TEXT PRIMARY KEY,
+                url           TEXT NOT NULL,
+                domain        TEXT NOT NULL,
+                content       BYTEA NOT NULL,
+                content_chars INTEGER NOT NULL,
+                fetched_at    TIMESTAMPTZ NOT NULL DEFAULT now(),
+                last_hit_at   TIMESTAMPTZ NOT NULL DEFAULT now(),
+                hit_count     INTEGER NOT NULL DEFAULT 0
+            );
+            CREATE INDEX IF NOT EXISTS idx_extract_cache_last_hit ON extract_cache(last_hit_at DESC);
         """)
 
     # pgvector source-embeddings store — created in its own statement and wrapped
@@ -603,6 +670,40 @@ async def init_db() -> None:
                     ON source_embeddings(conversation_id);
                 CREATE INDEX IF NOT EXISTS idx_source_emb_vec
                     ON source_embeddings USING hnsw (embedding vector_cosine_ops);
+
+                -- Semantic cache of first-turn plan_and_classify results.
+                CREATE TABLE IF NOT EXISTS classify_cache (
+                    message_hash  TEXT NOT NULL,
+                    message       TEXT NOT NULL,
+                    research_mode TEXT NOT NULL,
+                    video_enabled BOOLEAN NOT NULL,
+                    result        JSONB NOT NULL,
+                    embedding     vector(1536),
+                    created_at    TIMESTAMPTZ NOT NULL DEFAULT now(),
+                    PRIMARY KEY (message_hash, research_mode, video_enabled)
+                );
+
+                CREATE INDEX IF NOT EXISTS idx_classify_cache_vec
+                    ON classify_cache USING hnsw (embedding vector_cosine_ops);
+                CREATE INDEX IF NOT EXISTS idx_classify_cache_created
+                    ON classify_cache(created_at);
+
+                -- Local entity-selection router (services/interactive/entity_router.py).
+                CREATE TABLE IF NOT EXISTS entity_routes (
+                    prompt_hash   TEXT NOT NULL,
+                    prompt        TEXT NOT NULL,
+                    domain        TEXT NOT NULL,
+                    entities      JSONB NOT NULL,
+                    visual_brief  TEXT,
+                    model         TEXT,
+                    source        TEXT NOT NULL,
+                    embedding     vector(1536),
+                    created_at    TIMESTAMPTZ NOT NULL DEFAULT now(),
+                    PRIMARY KEY (prompt_hash, domain)
+                );
+
+                CREATE INDEX IF NOT EXISTS idx_entity_routes_vec
+                    ON entity_routes USING hnsw (embedding vector_cosine_ops);
             """)
         logger.info("pgvector_store_initialised")
     except Exception as exc:
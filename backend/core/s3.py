@@ -13,7 +13,7 @@ Key structure (media bucket):
   meta/{session_id}/scene_ir.json        — interactive lesson JSON
   meta/{session_id}/frames.json          — video frame metadata
   meta/{session_id}/narration.txt        — TTS narration text
-  meta/{session_id}/activity_log.json    — generation activity log
+  meta/{session_id}/activity_log.ndjson.gz — generation activity log (gzip NDJSON)
 
 Keys are always derived from session_id/conversation_id — never stored as paths in the DB.
 The DB stores video_ready: bool (sessions) or a CDN URL (merged_video_path on conversations).
@@ -68,7 +68,7 @@ def narration_key(session_id: str) -> str:
     return meta_key(session_id, "narration.txt")
 
 def activity_log_key(session_id: str) -> str:
-    return meta_key(session_id, "activity_log.json")
+    return meta_key(session_id, "activity_log.ndjson.gz")
 
 def sources_raw_key(session_id: str) -> str:
     return meta_key(session_id, "sources_raw.json")
@@ -152,9 +152,9 @@ def upload_narration(text: str, session_id: str) -> str:
     return upload_bytes(text.encode(), narration_key(session_id), "text/plain")
 
 
-def upload_activity_log(data: bytes, session_id: str) -> str:
-    """Upload activity_log.json and return its CloudFront URL."""
-    return upload_bytes(data, activity_log_key(session_id), "application/json")
+def upload_activity_log(local_path: str | Path, session_id: str) -> str:
+    """Upload activity_log.ndjson.gz and return its CloudFront URL."""
+    return upload_file(local_path, activity_log_key(session_id), "application/gzip")
 
 
 def upload_sources_raw(data: bytes, session_id: str) -> str:
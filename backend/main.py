@@ -39,6 +39,7 @@ from core.config import (
     COOKIE_SECURE,
     CORS_ORIGINS,
     OPENAI_API_KEY,
+    REPLAY_ACTIVITY_LOG,
     STALE_SWEEP_INTERVAL_SECS,
     THREAD_POOL_MAX_WORKERS,
 )
@@ -46,6 +47,8 @@ from core.db_async import init_pool, close_pool, get_async_db, init_db, mark_sta
 from core.limiter import limiter
 from core.responses import success
 from routers import auth, conversations, export, generate, sessions, upload, video
+from services import warmup
+from services.research.search_provider import tavily
 
 logger = structlog.get_logger(__name__)
 
@@ -94,14 +97,32 @@ async def lifespan(app: FastAPI):
         # Run `alembic upgrade head` before deploying this version.
         logger.error("stale_session_sweep_failed", source="startup", error=str(exc))
 
+    try:
+        # Prompts, fonts and pooled SDK clients — no network.
+        await warmup.warm_local()
+    except Exception as exc:
+        logger.warning("warmup_failed", error=str(exc))
+
+    if REPLAY_ACTIVITY_LOG:
+        # Offline benchmarking: every LLM and Tavily call is served from a recording.
+        from services import replay
+        await asyncio.to_thread(replay.install, REPLAY_ACTIVITY_LOG)
+
+    # Provider pre-flight runs in the background; /api/health answers 503
+    # "warming" until it has finished.
+    preflight_task = asyncio.create_task(warmup.preflight()) if warmup.preflight_enabled() else None
+
     sweep_task = asyncio.create_task(_periodic_stale_sweep(STALE_SWEEP_INTERVAL_SECS))
     logger.info("paralyte_api_started")
     yield
+    if preflight_task is not None:
+        preflight_task.cancel()
     sweep_task.cancel()
     try:
         await sweep_task
     except asyncio.CancelledError:
         pass
+    await tavily.aclose()
     await close_pool()
     logger.info("paralyte_api_stopped")
 
@@ -236,8 +257,12 @@ async def unhandled_exception_handler(request: Request, exc: Exception) -> JSONR
 async def health_check():
     """
     Liveness + readiness probe. Checks DB, ChromaDB, and LLM key presence.
-    Returns 503 if the database is unreachable (hard dependency).
+    Returns 503 if the database is unreachable (hard dependency) or while the
+    worker is still warming up (services/warmup.py).
     """
+    if not warmup.is_ready():
+        return JSONResponse({"status": "warming", "warmup": warmup.status()}, status_code=503)
+
     checks: dict[str, bool] = {"db": False, "vector": False, "llm": False}
 
     try:
@@ -264,7 +289,7 @@ async def health_check():
         )
 
     overall = "ok" if all(checks.values()) else "degraded"
-    return success({"status": overall, "checks": checks})
+    return success({"status": overall, "checks": checks, "warmup": warmup.status()})
 
 
 # ── Dev server ────────────────────────────────────────────────────────────────
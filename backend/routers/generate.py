@@ -47,12 +47,16 @@ from core.config import (
     ALLOWED_OPENAI_MODELS,
     ALLOWED_GEMINI_MODELS,
     CONVERSATION_TITLE_MAX_CHARS,
+    DEEP_SEARCH_BUDGET_S,
     DEEP_SEARCH_SOURCES,
     DEEP_SOURCES_IN_ANSWER,
     FOLLOWUP_CONTEXT_TURNS,
     FOLLOWUP_TOP_K_SOURCES,
     HEARTBEAT_INTERVAL_SECS,
+    SELECTION_EXCERPT_MAX_TOKENS,
+    SPECULATIVE_SELECTION_ENABLED,
     INSTANT_MAX_QUERIES,
+    INSTANT_SEARCH_BUDGET_S,
     DEEP_MAX_QUERIES,
     UPLOAD_DIR,
 )
@@ -67,7 +71,8 @@ from core.db_async import (
 )
 from core.db_models import User
 from services.frame_generation.planner import (
-    plan_and_classify,
+    cache_ratios,
+    plan_and_classify_stream,
     request_log,
     token_usage,
     request_llm_service,
@@ -79,10 +84,15 @@ from services.generation_service import (
     build_interactive_context,
     run_video_pipeline_from_intent,
 )
+from services import token_budget
+from services.activity_log import ActivityLog
+from services.llm_scheduler import Priority
 from services.llm_service import LLMService, OpenAIProvider, ClaudeProvider, GeminiProvider
 from services.research.file_extractor import extract_urls_from_text, extract_text
 from services.research.search_provider import SearchResult, tavily
-from services.research.source_processor import rank_and_deduplicate
+from services.research import search_budget
+from services.research.search_budget import SearchBudget
+from services.research.source_processor import IncrementalRanker, log_ranked
 from services.research.source_processor import source_summary, source_full
 from services.research.vector_store import upsert_sources, retrieve_sources
 from dependencies.auth import get_current_user
@@ -110,16 +120,20 @@ def _sse(data: dict) -> str:
     return f"data: {json.dumps(data)}\n\n"
 
 
-def _write_activity_log(output_dir: str, lifecycle_log: list, session_id: str = "") -> None:
-    try:
-        data = json.dumps(lifecycle_log, indent=2).encode()
-        with open(f"{output_dir}/activity_log.json", "wb") as f:
-            f.write(data)
-        if session_id:
+def _finish_activity_log(lifecycle_log: ActivityLog, session_id: str = "") -> None:
+    """Close the streamed log and upload it to S3, both off the request path."""
+
+    def _close_and_upload() -> None:
+        # close() waits for the log's queued writes — never on the event loop.
+        if not lifecycle_log.close() or not session_id:
+            return
+        try:
             from core.s3 import upload_activity_log
-            upload_activity_log(data, session_id)
-    except Exception as exc:
-        logger.warning("activity_log_write_failed", output_dir=output_dir, error=str(exc))
+            upload_activity_log(lifecycle_log.path, session_id)
+        except Exception as exc:
+            logger.warning("activity_log_upload_failed", session=session_id, error=str(exc))
+
+    _spawn_bg(asyncio.to_thread(_close_and_upload))
 
 
 @router.post("/generate")
@@ -258,7 +272,7 @@ async def _generate_stream(p: dict):
     selected_text     = p.get("selected_text") or None
 
     # ContextVars must be set inside the generator
-    lifecycle_log: list = []
+    lifecycle_log = ActivityLog(output_dir)
     log_token   = request_log.set(lifecycle_log)
     usage_acc   = {
         "prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0,
@@ -294,6 +308,8 @@ async def _generate_stream(p: dict):
                 if s["id"] == event["stage"]:
                     s["status"]     = "done"
                     s["duration_s"] = event.get("duration_s")
+                    if event.get("metrics"):
+                        s["metrics"] = event["metrics"]
                     break
 
     _log({"event": "request_received", "prompt": message, "session_id": session_id,
@@ -317,6 +333,8 @@ async def _generate_stream(p: dict):
             await out_q.put({"type": "heartbeat", "elapsed_s": round(time.time() - start_time, 1)})
 
     async def _produce():
+        prefetch: Optional[_SearchPrefetch] = None
+        speculative = None
         try:
             # ── 0. Init event — URL updates immediately ───────────────────────
             await _emit({"type": "init", "conversation_id": conversation_id})
@@ -342,10 +360,10 @@ async def _generate_stream(p: dict):
 
             # Append user text-selection context after the conversation history block
             if selected_text and selected_text.strip():
-                _excerpt = selected_text.strip()
-                _max_chars = 2000
-                if len(_excerpt) > _max_chars:
-                    _excerpt = _excerpt[:_max_chars] + "…"
+                _full = selected_text.strip()
+                _excerpt = token_budget.truncate(_full, SELECTION_EXCERPT_MAX_TOKENS)
+                if _excerpt != _full:
+                    _excerpt += "…"
                 conversation_context += (
                     "\n## USER TEXT SELECTION CONTEXT\n"
                     "The user has highlighted the following excerpt from the lesson:\n"
@@ -366,13 +384,32 @@ async def _generate_stream(p: dict):
             await _emit(think_evt)
             t_think = time.time()
 
-            intent = await plan_and_classify(
+            # Classification streams: Tavily queries start as soon as they are
+            # complete in the classifier output instead of after the whole JSON.
+            # Instant follow-ups skip this — they may be served from ChromaDB.
+            if not (parent_session_id and research_mode == "instant"):
+                prefetch = _SearchPrefetch(research_mode)
+            # Interactive mode: the entity selector starts on the raw message as
+            # soon as the classifier's domain arrives (see SpeculativeSelection).
+            if not video_enabled and SPECULATIVE_SELECTION_ENABLED:
+                from services.interactive.interactive_service import SpeculativeSelection
+                speculative = SpeculativeSelection(message, conversation_context)
+            intent: dict = {}
+            async for cls_event in plan_and_classify_stream(
                 message=message,
                 research_mode=research_mode,
                 video_enabled=video_enabled,
                 conversation_context=conversation_context,
                 prior_synthesis=prior_synthesis,
-            )
+            ):
+                if cls_event["type"] == "intent":
+                    intent = cls_event["intent"]
+                    continue
+                if prefetch is not None:
+                    prefetch.observe(cls_event)
+                if (speculative is not None and cls_event["type"] == "field"
+                        and cls_event["key"] == "domain" and isinstance(cls_event["value"], str)):
+                    speculative.start(cls_event["value"])
 
             think_done = {"type": "stage_done", "stage": "thinking", "duration_s": round(time.time() - t_think, 2)}
             _apply_stage_log(think_done)
@@ -396,6 +433,9 @@ async def _generate_stream(p: dict):
                     should_search = False
                     logger.info("chromadb_cache_hit", conv=conversation_id[:8], n=len(cached))
 
+            if not should_search and prefetch is not None:
+                prefetch.close()
+
             if should_search:
                 file_paths = _resolve_file_ids(uploaded_file_ids, current_user.id)
                 extra_urls = extract_urls_from_text(message)
@@ -408,11 +448,15 @@ async def _generate_stream(p: dict):
                     file_paths=file_paths,
                     extra_urls=extra_urls,
                     output_dir=output_dir,
+                    prefetch=prefetch,
                 ):
                     if event["type"] == "_sources_ready":
                         sources      = event["sources"]
                         sources_full = event["sources_for_llm"]
                         sources_all  = event["sources_all"]
+                        for s in stages_log:
+                            if s["id"] == "searching":
+                                s.setdefault("metrics", {})["budget"] = event["budget"]
                         try:
                             from core.s3 import upload_sources_raw
                             raw_bytes = json.dumps(sources_all, indent=2).encode()
@@ -496,6 +540,7 @@ async def _generate_stream(p: dict):
                     conversation_context=conversation_context,
                     domain=intent.get("domain", "general"),
                     sources=sources_full,  # full content for scene planner citations
+                    speculative=speculative,
                 ):
                     if event["type"] == "meta":
                         result_payload["suggested_followups"] = event.get("follow_ups", [])
@@ -523,7 +568,10 @@ async def _generate_stream(p: dict):
             # C4: compute the dollar cost of every LLM call in this session from
             # the per-call model + usage recorded in the lifecycle log.
             cost_usd       = compute_session_cost(lifecycle_log)
+            prompt_cache   = cache_ratios(final_usage)
 
+            if prompt_cache:
+                _log({"event": "prompt_cache", "tasks": prompt_cache})
             _log({"event": "request_complete", "duration_ms": duration_ms, "session_id": session_id})
             logger.info(
                 "generate_complete",
@@ -535,9 +583,10 @@ async def _generate_stream(p: dict):
                 llm_calls=api_call_count,
                 tokens=final_usage.get("total_tokens", 0),
                 cost_usd=cost_usd,
+                prompt_cache={t: r["cached_ratio"] for t, r in prompt_cache.items()},
             )
 
-            await asyncio.to_thread(_write_activity_log, output_dir, lifecycle_log, session_id)
+            _finish_activity_log(lifecycle_log, session_id)
 
             for s in stages_log:
                 if s.get("status") == "active":
@@ -602,11 +651,18 @@ async def _generate_stream(p: dict):
         except Exception as exc:
             logger.error("generate_failed", session=session_id, error=str(exc), exc_info=True)
             _log({"event": "error", "error": str(exc)})
-            await asyncio.to_thread(_write_activity_log, output_dir, lifecycle_log, session_id)
+            _finish_activity_log(lifecycle_log, session_id)
             await update_session(session_id, status="error")
             await _emit({"type": "error", "message": "Generation failed. Please try again."})
 
         finally:
+            if prefetch is not None:
+                prefetch.close()
+            if speculative is not None:
+                speculative.cancel()
+            # Releases the file on cancel; close() is idempotent, so when
+            # _finish_activity_log got there first this just shares its result.
+            _spawn_bg(asyncio.to_thread(lifecycle_log.close))
             await out_q.put(_STREAM_DONE)
 
     # ── Consumer loop ─────────────────────────────────────────────────────────
@@ -642,6 +698,93 @@ async def _generate_stream(p: dict):
 
 _DEEP_MAX_ROUNDS = 3  # maximum search rounds for deep_research mode
 
+# Full page content replaces the snippet for the top _EXTRACT_TOP_N sources.
+# A source is sent to /extract while searching is still running as soon as it
+# ranks there with a score (Tavily score + domain boost) of at least
+# _EARLY_EXTRACT_SCORE; the rest of the final top-N is extracted once the last
+# round has returned.
+_EXTRACT_TOP_N       = 3
+_EARLY_EXTRACT_SCORE = 0.75
+
+
+class _SearchPrefetch:
+    """
+    Tavily searches started while plan_and_classify is still streaming.
+
+    observe() is fed the classifier's stream events. Each complete
+    search_queries[i] is dispatched immediately in deep_research mode (which
+    always searches) and once needs_search=true has arrived in instant mode.
+    The domain field is emitted first, so economics questions normally get
+    their financial include_domains bias; a query that arrives before it is
+    searched unbiased.
+
+    Tasks are admitted by the process-wide Tavily governor like every other
+    search; _search_phase's first round claims them via take(). close() cancels whatever was not claimed
+    (classifier changed its mind, query beyond the mode's cap, no search) and
+    records a search_prefetch lifecycle entry.
+    """
+
+    def __init__(self, research_mode: str):
+        self.domain = ""
+        self._armed = research_mode == "deep_research"
+        self._limit = DEEP_MAX_QUERIES if research_mode == "deep_research" else INSTANT_MAX_QUERIES
+        self._held: list[str] = []
+        self._tasks: dict[str, asyncio.Task] = {}
+        self._used  = 0
+        self._first_dispatch: Optional[float] = None
+        self._head_start_ms: Optional[int]    = None
+        self._closed = False
+
+    def observe(self, event: dict) -> None:
+        if event["type"] == "field":
+            if event["key"] == "domain" and isinstance(event["value"], str):
+                self.domain = event["value"]
+            elif event["key"] == "needs_search" and event["value"] is True:
+                self._armed = True
+                for q in self._held:
+                    self._dispatch(q)
+                self._held.clear()
+        elif event["type"] == "search_query":
+            if self._armed:
+                self._dispatch(event["query"])
+            else:
+                self._held.append(event["query"])
+
+    def _dispatch(self, query: str) -> None:
+        if self._closed or query in self._tasks or len(self._tasks) >= self._limit:
+            return
+        from services.research.source_processor import FINANCIAL_PRIORITY_DOMAINS
+        include = list(FINANCIAL_PRIORITY_DOMAINS) if self.domain == "economics" else []
+
+        if self._first_dispatch is None:
+            self._first_dispatch = time.monotonic()
+        self._tasks[query] = asyncio.create_task(
+            tavily.search(query, max_results=5, include_domains=include))
+
+    def take(self, query: str) -> Optional[asyncio.Task]:
+        task = self._tasks.pop(query, None)
+        if task is not None:
+            self._used += 1
+            if self._head_start_ms is None:
+                self._head_start_ms = int((time.monotonic() - self._first_dispatch) * 1000)
+        return task
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        for task in self._tasks.values():
+            task.cancel()
+        dispatched = self._used + len(self._tasks)
+        if dispatched:
+            _log({
+                "event":         "search_prefetch",
+                "dispatched":    dispatched,
+                "used":          self._used,
+                "head_start_ms": self._head_start_ms,
+            })
+        self._tasks.clear()
+
 _GAP_ANALYSIS_SYSTEM = """\
 You are a research gap analyzer. Given a user question, the queries already run, and a summary of what was found, identify what important angles are still missing and generate new targeted search queries to fill those gaps.
 
@@ -675,8 +818,9 @@ async def _gap_analysis(
     Returns an empty list if coverage is already sufficient.
     """
     from services.llm_service import get_task_service
-    from services.frame_generation.planner import _extract_json
+    from services.frame_generation.planner import _extract_json, _record_llm_call
     llm_svc = get_task_service("synthesiser")  # Haiku — fast classification-class call
+    _model  = getattr(llm_svc.provider, "model", "unknown")
 
     prev_q_str   = "\n".join(f"- {q}" for q in prev_queries)
     results_text = _build_results_summary(results)
@@ -689,11 +833,18 @@ async def _gap_analysis(
     )
 
     try:
-        raw, _ = await llm_svc.make_system_user_request_async(
+        raw, usage = await llm_svc.make_system_user_request_async(
             _GAP_ANALYSIS_SYSTEM,
             user_msg,
             max_tokens=300,
+            cache_task="gap_analysis",
+            priority=Priority.BULK,
+            task="gap_analysis",
         )
+        if raw is None:
+            raise RuntimeError("LLM service returned None")
+        _record_llm_call("gap_analysis", _model, f"{_GAP_ANALYSIS_SYSTEM}\n\n{user_msg}",
+                         raw, usage or {}, "gap_analysis")
         data    = _extract_json(raw)
         queries = data.get("new_queries", [])
         return [q.strip() for q in queries if isinstance(q, str) and q.strip()][:3]
@@ -710,34 +861,55 @@ async def _search_phase(
     file_paths:      list[str],
     extra_urls:      list[str],
     output_dir:      str,
+    prefetch:        Optional["_SearchPrefetch"] = None,
+    budget_s:        Optional[float] = None,
 ):
     """
     Unified search pipeline for instant (light) and deep_research (full) modes.
 
-    For deep_research: runs up to _DEEP_MAX_ROUNDS iterative rounds. After each
-    round an LLM gap-analysis call identifies what is still missing and generates
-    new targeted queries for the next round. Stops early when gap analysis returns
-    no new queries (sufficient coverage) or the round limit is reached.
+    Runs as a stream rather than in lock-step rounds. Every search, extract
+    and gap-analysis call is its own task, and each result is handled as it
+    arrives:
+
+      search returns   → its results go into an IncrementalRanker and out as
+                         source events; any source that now ranks in the top
+                         _EXTRACT_TOP_N with score >= _EARLY_EXTRACT_SCORE is
+                         sent to /extract straight away
+      round complete   → (deep_research) gap analysis for the next round
+                         starts while that round's extractions are in flight
+      gap analysis     → next round's searches start; no new queries (or
+                         _DEEP_MAX_ROUNDS reached) ends searching
+      searching over   → whatever of the final top-N is not extracted yet
+                         goes out in one batch
+
+    The whole phase runs against a wall-clock budget (budget_s, default
+    DEEP_SEARCH_BUDGET_S / INSTANT_SEARCH_BUDGET_S by mode). SearchBudget is
+    asked before each gap analysis, later round and extract, and may skip or
+    shrink them; at the deadline everything still pending is abandoned and the
+    sources ranked so far are returned. Its decisions ride on _sources_ready
+    as "budget" (the caller stores them on the searching stage in stages_log).
 
     Yields SSE events and one internal sentinel:
-      {type: '_sources_ready', sources, sources_for_llm, sources_all}
+      {type: '_sources_ready', sources, sources_for_llm, sources_all, budget}
 
     sources          — summaries of ALL found results (for UI display and DB storage)
     sources_for_llm  — top-N for LLM injection (scene planner / synthesiser)
     sources_all      — all results for ChromaDB embedding
 
     The caller forwards all non-internal events to the client.
+
+    prefetch — searches already dispatched while plan_and_classify streamed;
+    round 1 awaits those tasks instead of issuing the same query again.
     """
     search_queries = intent.get("search_queries", [])
     max_queries    = DEEP_MAX_QUERIES if research_mode == "deep_research" else INSTANT_MAX_QUERIES
     queries_used   = search_queries[:max_queries]
 
-    all_results:   list[SearchResult] = []
-    all_queries_run: list[str]        = []
-
-    # One semaphore for the entire request — caps total concurrent Tavily calls
-    _tavily_sem = asyncio.Semaphore(3)
+    # Tavily concurrency and rate are capped process-wide by the provider's
+    # governor (services/research/tavily_governor.py), across all streams.
     _intent_domain = intent.get("domain", "")
+    ranker         = IncrementalRanker(_intent_domain)
+    all_queries_run: list[str] = []
 
     # For economics queries, bias Tavily toward financial data sources
     from services.research.source_processor import FINANCIAL_PRIORITY_DOMAINS
@@ -745,73 +917,184 @@ async def _search_phase(
         list(FINANCIAL_PRIORITY_DOMAINS) if _intent_domain == "economics" else []
     )
 
-    async def _bounded_search(q: str) -> list:
-        async with _tavily_sem:
-            return await tavily.search(q, max_results=5, include_domains=_include_domains)
-
     max_rounds = _DEEP_MAX_ROUNDS if research_mode == "deep_research" else 1
-
-    # ── Iterative search rounds ───────────────────────────────────────────────
-    for round_n in range(max_rounds):
-        if not queries_used:
-            break
-
-        n_q = len(queries_used)
-        search_evt = {
+    if budget_s is None:
+        budget_s = DEEP_SEARCH_BUDGET_S if research_mode == "deep_research" else INSTANT_SEARCH_BUDGET_S
+    budget = SearchBudget(budget_s)
+
+    pending:   dict[asyncio.Task, tuple[str, list]] = {}   # task → (kind, payload)
+    started:   dict[asyncio.Task, float] = {}               # task → dispatch time (latency estimates)
+    in_round:  set[asyncio.Task] = set()
+    extracting: set[str] = set()                             # URLs already sent to /extract
+    n_early = n_late = 0
+
+    def _start_round(round_n: int, queries: list[str]) -> dict:
+        for q in queries:
+            task = prefetch.take(q) if prefetch is not None else None
+            if task is None:
+                task = asyncio.create_task(tavily.search(
+                    q, max_results=5, include_domains=_include_domains, timeout=budget.timeout(20.0)))
+                started[task] = time.monotonic()
+            pending[task] = ("search", [q])
+            in_round.add(task)
+        all_queries_run.extend(queries)
+        n_q = len(queries)
+        return {
             "type":    "stage",
             "stage":   "searching",
             "label":   f"Searching {n_q} {'query' if n_q == 1 else 'queries'}…" if round_n == 0
                        else f"Round {round_n + 1}: filling {n_q} gap{'s' if n_q != 1 else ''}…",
             "round":   round_n + 1,
-            "queries": queries_used,
+            "queries": queries,
         }
-        yield search_evt
-        t_search = time.time()
 
-        batches = await asyncio.gather(*[_bounded_search(q) for q in queries_used])
+    def _extract(results: list[SearchResult]) -> None:
+        extracting.update(r.url for r in results)
+        task = asyncio.create_task(
+            tavily.extract_many([r.url for r in results], timeout=budget.timeout(20.0)))
+        started[task] = time.monotonic()
+        pending[task] = ("extract", results)
 
-        round_results: list[SearchResult] = []
-        for batch in batches:
-            round_results.extend(batch)
+    def _outcome(task: asyncio.Task, default):
+        if task.cancelled() or task.exception() is not None:
+            logger.warning("search_task_failed", error=None if task.cancelled() else str(task.exception()))
+            return default
+        return task.result()
 
-        seen = {r.url for r in all_results}
-        new_results = [r for r in round_results if r.url not in seen]
-        all_results.extend(new_results)
-        all_queries_run.extend(queries_used)
+    url_task = asyncio.create_task(
+        tavily.extract_many(extra_urls, timeout=budget.timeout(20.0))) if extra_urls else None
 
-        # Emit source events for every new result — UI shows all, not just what LLM uses
-        for r in new_results:
-            yield {"type": "source", "source": source_summary(r)}
+    # ── Streaming search / extract / gap-analysis pipeline ────────────────────
+    try:
+        round_n, round_new = 0, 0
+        searching = bool(queries_used)
+        if searching:
+            yield _start_round(round_n, queries_used)
+            t_search = time.time()
+        if prefetch is not None:
+            prefetch.close()
+
+        t_extract: Optional[float] = None
+        topped_up = False
+        while True:
+            if not searching and not topped_up:
+                topped_up = True
+                late = [r for r in ranker.top(_EXTRACT_TOP_N) if r.url not in extracting]
+                if late and budget.allow_extract(len(late), "final"):
+                    n_late = len(late)
+                    _extract(late)
+            if t_extract is None and extracting:
+                # Tavily snippets are short query-relevant excerpts; full extraction
+                # gives the LLM the actual page content (tables, data, full text).
+                yield {"type": "stage", "stage": "reading", "label": f"Reading {len(ranker)} sources…"}
+                t_extract = time.time()
+            if not pending:
+                break
 
-        yield {
-            "type":          "stage_done",
-            "stage":         "searching",
-            "duration_s":    round(time.time() - t_search, 2),
-            "sources_found": len(new_results),
-        }
+            done, _ = await asyncio.wait(
+                pending, timeout=budget.remaining(), return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                # Out of time: keep what has been found, abandon the rest.
+                kinds = [kind for kind, _ in pending.values()]
+                budget.deadline({k: kinds.count(k) for k in ("search", "gap", "extract")})
+                if in_round:
+                    yield {
+                        "type":          "stage_done",
+                        "stage":         "searching",
+                        "duration_s":    round(time.time() - t_search, 2),
+                        "sources_found": round_new,
+                    }
+                    in_round.clear()
+                break
 
-        # For deep research, run gap analysis to decide whether another round is needed
-        if research_mode == "deep_research" and round_n < max_rounds - 1:
-            queries_used = await _gap_analysis(message, all_results, all_queries_run)
-            if not queries_used:
-                break  # gap analysis says coverage is sufficient
-        else:
-            break
+            for task in done:
+                kind, payload = pending.pop(task)
+                if task in started and not task.cancelled():
+                    search_budget.observe(kind, time.monotonic() - started.pop(task))
+
+                if kind == "search":
+                    in_round.discard(task)
+                    new_results = ranker.add(_outcome(task, []))
+                    round_new += len(new_results)
+                    # Emit source events for every new result — UI shows all, not just what LLM uses
+                    for r in new_results:
+                        yield {"type": "source", "source": source_summary(r)}
+
+                    early = [r for r in ranker.top(_EXTRACT_TOP_N)
+                             if r.url not in extracting and ranker.score(r) >= _EARLY_EXTRACT_SCORE]
+                    if early and budget.allow_extract(len(early), "early"):
+                        n_early += len(early)
+                        _extract(early)
+
+                    if not in_round:
+                        yield {
+                            "type":          "stage_done",
+                            "stage":         "searching",
+                            "duration_s":    round(time.time() - t_search, 2),
+                            "sources_found": round_new,
+                        }
+                        # For deep research, gap analysis decides whether another
+                        # round is needed — while this round's extracts still run.
+                        if (research_mode == "deep_research" and round_n < max_rounds - 1
+                                and budget.allow_gap_analysis(round_n)):
+                            gap = asyncio.create_task(
+                                _gap_analysis(message, ranker.results(), list(all_queries_run)))
+                            started[gap] = time.monotonic()
+                            pending[gap] = ("gap", [])
+                        else:
+                            searching = False
+
+                elif kind == "gap":
+                    queries = budget.plan_round(round_n + 1, _outcome(task, []))
+                    if queries:
+                        round_n, round_new = round_n + 1, 0
+                        yield _start_round(round_n, queries)
+                        t_search = time.time()
+                    else:
+                        searching = False   # gap analysis says coverage is sufficient
+
+                else:
+                    for result, content in zip(payload, _outcome(task, [""] * len(payload))):
+                        if content.strip():
+                            result.snippet = content
+                            logger.info("tavily_extract_applied", url=result.url[:80], chars=len(content))
+                        else:
+                            logger.info("tavily_extract_empty", url=result.url[:80], reason="empty_response")
+
+        if t_extract is not None:
+            yield {"type": "stage_done", "stage": "reading", "duration_s": round(time.time() - t_extract, 2)}
+
+        # ── Extra URLs (extracted alongside the searches) ─────────────────────
+        url_contents = await url_task if url_task is not None else []
+        budget_summary = budget.summary({"rounds": round_n + 1 if all_queries_run else 0})
+    finally:
+        for task in pending:
+            task.cancel()
+        if url_task is not None and not url_task.done():
+            url_task.cancel()
+
+    if all_queries_run:
+        _log({
+            "event":           "search_pipeline",
+            "rounds":          round_n + 1,
+            "queries":         len(all_queries_run),
+            "sources":         len(ranker),
+            "extracted_early": n_early,
+            "extracted_late":  n_late,
+            "budget":          budget_summary,
+        })
 
-    # ── Extra URLs + uploaded files ───────────────────────────────────────────
     url_sources:  list[SearchResult] = []
     file_sources: list[SearchResult] = []
 
-    if extra_urls:
-        url_contents = await asyncio.gather(*[tavily.extract(u) for u in extra_urls])
-        for url, content in zip(extra_urls, url_contents):
-            if content:
-                domain = urlparse(url).netloc.lstrip("www.")
-                url_sources.append(SearchResult(
-                    title=f"User-provided: {domain}",
-                    url=url, snippet=content[:300],
-                    content=content, domain=domain, score=1.0,
-                ))
+    for url, content in zip(extra_urls, url_contents):
+        if content:
+            domain = urlparse(url).netloc.lstrip("www.")
+            url_sources.append(SearchResult(
+                title=f"User-provided: {domain}",
+                url=url, snippet=content[:300],
+                content=content, domain=domain, score=1.0,
+            ))
 
     for fp in file_paths:
         text = extract_text(fp)
@@ -824,35 +1107,8 @@ async def _search_phase(
             ))
 
     # ── Rank ─────────────────────────────────────────────────────────────────
-    ranked    = rank_and_deduplicate(all_results, DEEP_SEARCH_SOURCES, intent_domain=_intent_domain)
-
-    # ── Extract: replace snippets with full page content for top sources ─────
-    # Tavily snippets are short query-relevant excerpts; full extraction gives
-    # the LLM the actual page content (tables, data, full text).
-    _EXTRACT_TOP_N = 3
-    if ranked:
-        to_extract = ranked[:_EXTRACT_TOP_N]
-
-        async def _bounded_extract(r: SearchResult) -> str:
-            async with _tavily_sem:
-                return await tavily.extract(r.url)
-
-        yield {"type": "stage", "stage": "reading", "label": f"Reading {len(ranked)} sources…"}
-        t_extract = time.time()
-
-        extracted = await asyncio.gather(
-            *[_bounded_extract(r) for r in to_extract],
-            return_exceptions=True,
-        )
-        for result, content in zip(to_extract, extracted):
-            if isinstance(content, str) and content.strip():
-                result.snippet = content
-                logger.info("tavily_extract_applied", url=result.url[:80], chars=len(content))
-            else:
-                logger.info("tavily_extract_empty", url=result.url[:80],
-                            reason="exception" if isinstance(content, Exception) else "empty_response")
-
-        yield {"type": "stage_done", "stage": "reading", "duration_s": round(time.time() - t_extract, 2)}
+    ranked = ranker.top(DEEP_SEARCH_SOURCES)
+    log_ranked(ranker, ranked)
 
     all_final = file_sources + url_sources + ranked
 
@@ -870,6 +1126,7 @@ async def _search_phase(
         "sources":         [source_summary(s) for s in all_final],   # UI display + DB
         "sources_for_llm": [source_full(s)    for s in final],        # top-N for LLM
         "sources_all":     [source_full(s)    for s in all_final],    # all N for ChromaDB
+        "budget":          budget_summary,
     }
 
 
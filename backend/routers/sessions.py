@@ -25,6 +25,7 @@ from core.s3 import meta_key, download_json as _s3_download_json
 from core.utils import safe_resolve, read_json_file
 from dependencies.auth import get_current_user, resolve_media_user
 from schemas.sessions import SessionSummary, SessionOutputResponse
+from services import activity_log
 
 _bearer = HTTPBearer(auto_error=False)
 
@@ -132,12 +133,17 @@ async def get_session_log(session_id: str, current_user: User = Depends(get_curr
 
     # CRIT-3: validate the directory, then build a child path
     safe_dir  = safe_resolve(row["output_dir"], label="output_dir")
-    log_path  = safe_dir / "activity_log.json"
-    log_exists = await asyncio.to_thread(log_path.exists)
-    if not log_exists:
+    log_path  = safe_dir / activity_log.FILENAME
+    if await asyncio.to_thread(log_path.exists):
+        entries = await asyncio.to_thread(lambda: list(activity_log.read(str(log_path))))
+        return success({"log": entries})
+
+    # Sessions generated before the streamed log wrote a single JSON array.
+    legacy_path = safe_dir / "activity_log.json"
+    if not await asyncio.to_thread(legacy_path.exists):
         raise HTTPException(status_code=404, detail="Log not available")
 
-    raw = await asyncio.to_thread(log_path.read_text, encoding="utf-8")
+    raw = await asyncio.to_thread(legacy_path.read_text, encoding="utf-8")
     return success({"log": json.loads(raw)})
 
 
@@ -0,0 +1,288 @@
+"""
+End-to-end latency benchmark for POST /api/v1/generate.
+
+Drives the real FastAPI app in-process (httpx ASGI transport, full lifespan)
+against a local Postgres, with every external service stubbed:
+  LLM + Tavily — services/replay.py, one recorded activity log per mode
+  S3           — a null client (nothing leaves the machine)
+  embeddings   — deterministic hash vectors (pgvector paths still run)
+
+Per run it records, from the SSE stream:
+  ttfb_s        first byte of the response
+  ttf_block_s   first `block` event (interactive lessons)
+  done_s        the `done` event
+  stages        per-stage duration_s from the session's stages_json — the
+                stages_log that _apply_stage_log builds
+
+Results (p50 / p90 per metric and mode) are written as JSON. With --baseline
+the run fails (exit 1) when any p50 is slower than the baseline's by more
+than --threshold (relative) and --min-delta-s (absolute, to ignore noise).
+
+Run from the backend/ directory with DATABASE_URL pointing at a scratch DB:
+    python scripts/bench_generate.py \\
+        --recording interactive=outputs/<sid>/activity_log.ndjson.gz \\
+        --recording deep=outputs/<sid2>/activity_log.ndjson.gz \\
+        --runs 5 --out bench/latest.json --baseline bench/baseline.json
+
+Record a mode by running that request once for real; its session's
+activity_log.ndjson.gz is the recording. Modes:
+  interactive — interactive lesson, research_mode=instant, no search recorded
+  instant     — interactive lesson, research_mode=instant with search
+  deep        — interactive lesson, research_mode=deep_research
+Add --video to run the video pipeline instead of interactive lessons.
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Optional
+
+# Ensure backend/ is on the path when run from the repo root.
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+MODES: dict[str, dict] = {
+    "interactive": {"research_mode": "instant"},
+    "instant":     {"research_mode": "instant"},
+    "deep":        {"research_mode": "deep_research"},
+}
+
+_PROMPTS: dict[str, str] = {
+    "interactive": "Explain how a capacitor charges in an RC circuit",
+    "instant":     "What changed in the latest TLS 1.3 handshake?",
+    "deep":        "Compare the economic effects of carbon taxes and cap-and-trade",
+}
+
+_BENCH_USER_ID = "bench-user"
+
+
+# ── Stubs ─────────────────────────────────────────────────────────────────────
+
+class _NullS3Client:
+    """Accepts every upload boto3's client would, stores nothing."""
+
+    def upload_file(self, *args, **kwargs) -> None:
+        pass
+
+    def put_object(self, *args, **kwargs) -> dict:
+        return {}
+
+    def get_object(self, *args, **kwargs):
+        raise FileNotFoundError("bench: S3 is stubbed")
+
+    def generate_presigned_url(self, *args, **kwargs) -> str:
+        return "http://localhost/bench-presigned"
+
+
+def _fake_embed(texts: list[str]) -> list[list[float]]:
+    vectors = []
+    for text in texts:
+        seed = hashlib.sha256(text.encode()).digest()
+        vectors.append([(seed[i % len(seed)] - 128) / 128.0 for i in range(1536)])
+    return vectors
+
+
+def _install_stubs() -> None:
+    import core.s3
+    from core.limiter import limiter
+    from services.research import vector_store
+
+    core.s3._s3 = _NullS3Client()
+    vector_store._embed = _fake_embed
+    limiter.enabled = False   # 10/minute per user would cap the run count
+
+
+# ── One request ───────────────────────────────────────────────────────────────
+
+async def _run_once(client, mode: str, video: bool) -> dict:
+    form = {
+        "message":       _PROMPTS[mode],
+        "research_mode": MODES[mode]["research_mode"],
+        "video_enabled": "true" if video else "false",
+    }
+    result: dict = {"ttfb_s": None, "ttf_block_s": None, "done_s": None,
+                    "session_id": None, "error": None}
+    t0 = time.perf_counter()
+    async with client.stream("POST", "/api/v1/generate", data=form) as resp:
+        if resp.status_code != 200:
+            result["error"] = f"http {resp.status_code}"
+            return result
+        async for line in resp.aiter_lines():
+            if result["ttfb_s"] is None:
+                result["ttfb_s"] = time.perf_counter() - t0
+            if not line.startswith("data: "):
+                continue
+            event = json.loads(line[6:])
+            kind = event.get("type")
+            if kind == "block" and result["ttf_block_s"] is None:
+                result["ttf_block_s"] = time.perf_counter() - t0
+            elif kind == "done":
+                result["done_s"] = time.perf_counter() - t0
+                result["session_id"] = event.get("session_id")
+            elif kind == "error":
+                result["error"] = event.get("message", "error")
+    return result
+
+
+async def _stages(session_id: Optional[str]) -> dict[str, float]:
+    if not session_id:
+        return {}
+    from core.db_async import get_async_db_read
+    async with get_async_db_read() as conn:
+        stages = await conn.fetchval("SELECT stages_json FROM sessions WHERE id = $1", session_id)
+    return {s["id"]: s["duration_s"] for s in (stages or []) if s.get("duration_s") is not None}
+
+
+# ── Aggregation + regression check ────────────────────────────────────────────
+
+def _percentile(values: list[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+def summarise(runs: list[dict]) -> dict:
+    """p50 / p90 per top-level metric and per stage over the successful runs."""
+    ok = [r for r in runs if not r.get("error")]
+    summary: dict = {"runs": len(runs), "errors": len(runs) - len(ok), "metrics": {}, "stages": {}}
+    for metric in ("ttfb_s", "ttf_block_s", "done_s"):
+        values = [r[metric] for r in ok if r.get(metric) is not None]
+        if values:
+            summary["metrics"][metric] = {
+                "p50": round(statistics.median(values), 4),
+                "p90": round(_percentile(values, 0.9), 4),
+            }
+    stage_ids = sorted({sid for r in ok for sid in r.get("stages", {})})
+    for sid in stage_ids:
+        values = [r["stages"][sid] for r in ok if sid in r.get("stages", {})]
+        summary["stages"][sid] = {
+            "p50": round(statistics.median(values), 4),
+            "p90": round(_percentile(values, 0.9), 4),
+        }
+    return summary
+
+
+def regressions(current: dict, baseline: dict, threshold: float, min_delta_s: float) -> list[str]:
+    """Every p50 in `current` slower than `baseline` by both threshold and min_delta_s."""
+    found = []
+    for mode, summary in current.get("modes", {}).items():
+        base = baseline.get("modes", {}).get(mode)
+        if not base:
+            continue
+        for group in ("metrics", "stages"):
+            for name, stats in summary.get(group, {}).items():
+                ref = base.get(group, {}).get(name)
+                if not ref:
+                    continue
+                now, was = stats["p50"], ref["p50"]
+                if now - was > min_delta_s and now > was * (1 + threshold):
+                    found.append(f"{mode}.{name}: p50 {was:.3f}s → {now:.3f}s")
+        if summary.get("errors", 0) > base.get("errors", 0):
+            found.append(f"{mode}: errors {base.get('errors', 0)} → {summary['errors']}")
+    return found
+
+
+# ── Driver ────────────────────────────────────────────────────────────────────
+
+async def bench(recordings: dict[str, str], runs: int, video: bool,
+                latency_s: float, tokens_per_s: float) -> dict:
+    import httpx
+    from core.db_async import upsert_user
+    from core.db_models import User
+    from dependencies.auth import get_current_user
+    from main import app
+    from services import replay
+
+    _install_stubs()
+
+    user = User(id=_BENCH_USER_ID, email="bench@localhost", name="bench")
+    app.dependency_overrides[get_current_user] = lambda: user
+
+    results: dict = {
+        "meta": {"runs": runs, "video": video, "latency_s": latency_s,
+                 "tokens_per_s": tokens_per_s, "started_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())},
+        "modes": {},
+    }
+    async with app.router.lifespan_context(app):
+        await upsert_user(user)
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            for mode, path in recordings.items():
+                recording = replay.install(path, latency_s=latency_s, tokens_per_s=tokens_per_s,
+                                           search_latency_s=latency_s)
+                mode_runs = []
+                for i in range(runs):
+                    recording.rewind()
+                    run = await _run_once(client, mode, video)
+                    run["stages"] = await _stages(run["session_id"])
+                    mode_runs.append(run)
+                    print(f"{mode} #{i + 1}: done in {run['done_s'] or float('nan'):.2f}s"
+                          + (f" ({run['error']})" if run["error"] else ""), file=sys.stderr)
+                results["modes"][mode] = summarise(mode_runs)
+                replay.uninstall()
+    return results
+
+
+def _parse_recordings(values: list[str]) -> dict[str, str]:
+    recordings = {}
+    for value in values:
+        mode, _, path = value.partition("=")
+        if mode not in MODES or not path:
+            raise SystemExit(f"--recording expects MODE=PATH with MODE in {sorted(MODES)}: {value!r}")
+        recordings[mode] = path
+    return recordings
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--recording", action="append", required=True, metavar="MODE=PATH")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--video", action="store_true")
+    parser.add_argument("--latency-s", type=float, default=0.0,
+                        help="simulated provider latency (0 measures only our own overhead)")
+    parser.add_argument("--tokens-per-s", type=float, default=0.0)
+    parser.add_argument("--out", default="bench/latest.json")
+    parser.add_argument("--baseline", help="compare against this JSON and fail on regressions")
+    parser.add_argument("--write-baseline", action="store_true", help="also save results as --baseline")
+    parser.add_argument("--threshold", type=float, default=0.15)
+    parser.add_argument("--min-delta-s", type=float, default=0.05)
+    args = parser.parse_args()
+
+    # Before config is imported: a response-, codegen-, search- or extract-cache hit (or
+    # an entity router vote) would skip the replayed call, and the classify
+    # semantic cache would serve every run after the first.
+    os.environ["LLM_CACHE_BACKEND"] = "off"
+    os.environ["CODEGEN_CACHE_ENABLED"] = "false"
+    os.environ["ENTITY_ROUTER_ENABLED"] = "false"
+    os.environ["SEARCH_CACHE_ENABLED"] = "false"
+    os.environ["EXTRACT_CACHE_ENABLED"] = "false"
+    os.environ.setdefault("CLASSIFY_SEMANTIC_CACHE_ENABLED", "false")
+    from dotenv import load_dotenv
+    load_dotenv()
+
+    results = asyncio.run(bench(_parse_recordings(args.recording), args.runs, args.video,
+                                args.latency_s, args.tokens_per_s))
+    Path(args.out).parent.mkdir(parents=True, exist_ok=True)
+    Path(args.out).write_text(json.dumps(results, indent=2))
+    print(json.dumps(results["modes"], indent=2))
+
+    if not args.baseline:
+        return 0
+    baseline_path = Path(args.baseline)
+    if args.write_baseline or not baseline_path.exists():
+        baseline_path.parent.mkdir(parents=True, exist_ok=True)
+        baseline_path.write_text(json.dumps(results, indent=2))
+        print(f"baseline written to {baseline_path}", file=sys.stderr)
+        return 0
+    found = regressions(results, json.loads(baseline_path.read_text()), args.threshold, args.min_delta_s)
+    for line in found:
+        print(f"REGRESSION {line}", file=sys.stderr)
+    return 1 if found else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,155 @@
+"""
+Micro-benchmark: streamed scene-plan parsing, old rescan driver vs
+_PlanStreamParser (services/interactive/interactive_service.py).
+
+The previous driver appended each token to the buffer and re-ran a regex
+search for `"blocks": [` over the whole buffer (until meta was found) and a
+char-by-char brace scan from the start of the current block — quadratic in
+plan size. It is kept here, verbatim in behaviour, as the reference.
+
+Synthetic plans of increasing size are streamed in fixed-size tokens (LLM
+tokens average ~4 characters). Both implementations must produce the same
+blocks; the script reports the best-of-N wall time for each.
+
+Run from the backend/ directory:
+    python scripts/bench_plan_parser.py
+    python scripts/bench_plan_parser.py --blocks 4 16 64 --token-chars 4 --repeat 5
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import time
+from pathlib import Path
+
+# Ensure backend/ is on the path when run from the repo root.
+sys.path.insert(0, str(Path(__file__).parent.parent))
+os.environ.setdefault("JWT_SECRET_KEY", "bench")
+
+from services.interactive.interactive_service import _PlanStreamParser
+
+
+# ── Reference: the per-token rescan driver ────────────────────────────────────
+
+def _legacy_scan_next_block(buf: str, pos: int) -> tuple[int, "str | None"]:
+    n = len(buf)
+    while pos < n and buf[pos] in " \t\n\r,":
+        pos += 1
+    if pos >= n:
+        return pos, None
+    if buf[pos] == "]":
+        return -1, None
+    if buf[pos] != "{":
+        return pos + 1, None
+    depth, in_string, escape_next, start, i = 0, False, False, pos, pos
+    while i < n:
+        c = buf[i]
+        if escape_next:
+            escape_next = False
+        elif in_string:
+            if c == "\\":
+                escape_next = True
+            elif c == '"':
+                in_string = False
+        elif c == '"':
+            in_string = True
+        elif c == "{":
+            depth += 1
+        elif c == "}":
+            depth -= 1
+            if depth == 0:
+                return i + 1, buf[start : i + 1]
+        i += 1
+    return start, None
+
+
+def _legacy_stream(tokens: list[str]) -> list[dict]:
+    blocks: list[dict] = []
+    buf, meta_emitted, scan_pos = "", False, 0
+    for token in tokens:
+        buf += token
+        if not meta_emitted:
+            m = re.search(r'"blocks"\s*:\s*\[', buf)
+            if m:
+                meta_emitted, scan_pos = True, m.end()
+        if meta_emitted:
+            while True:
+                new_pos, block_json = _legacy_scan_next_block(buf, scan_pos)
+                if new_pos == -1 or block_json is None:
+                    break
+                scan_pos = new_pos
+                blocks.append(json.loads(block_json))
+    return blocks
+
+
+def _parser_stream(tokens: list[str]) -> list[dict]:
+    parser = _PlanStreamParser()
+    blocks: list[dict] = []
+    for token in tokens:
+        for event in parser.feed(token):
+            if event["type"] == "_block":
+                blocks.append(event["block"].model_dump(exclude_none=True, exclude_defaults=True))
+    return blocks
+
+
+# ── Synthetic plans ───────────────────────────────────────────────────────────
+
+def make_plan(n_blocks: int) -> str:
+    """A scene plan shaped like real planner output: prose + nested entity props."""
+    blocks = []
+    for i in range(n_blocks):
+        if i % 2 == 0:
+            blocks.append({"id": f"b{i}", "type": "text",
+                           "content": ("Ohm's law {V = IR} relates \"voltage\" and current. " * 12).strip()})
+        else:
+            blocks.append({"id": f"b{i}", "type": "entity", "entity_type": "freeform_html",
+                           "props": {"spec": "A slider-driven circuit with {braces} and [brackets]. " * 8,
+                                     "series": [{"x": x, "y": x * x, "label": f"p{x}"} for x in range(20)]}})
+    return json.dumps({
+        "title": "Resistors and the blocks of a circuit",
+        "intent": "explain",
+        "learning_objective": "Relate V, I and R",
+        "follow_ups": ["What about capacitors?", "How does power scale?"],
+        "blocks": blocks,
+    }, indent=2)
+
+
+def tokenize(text: str, token_chars: int) -> list[str]:
+    return [text[i:i + token_chars] for i in range(0, len(text), token_chars)]
+
+
+def _best_of(fn, tokens: list[str], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(tokens)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--blocks", type=int, nargs="+", default=[4, 8, 16, 32])
+    parser.add_argument("--token-chars", type=int, default=4)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'blocks':>6} {'chars':>8} {'tokens':>7} {'rescan ms':>10} {'parser ms':>10} {'speedup':>8}")
+    for n_blocks in args.blocks:
+        plan = make_plan(n_blocks)
+        tokens = tokenize(plan, args.token_chars)
+        expected = json.loads(plan)["blocks"]
+        if _legacy_stream(tokens) != expected or _parser_stream(tokens) != expected:
+            print(f"MISMATCH at {n_blocks} blocks", file=sys.stderr)
+            return 1
+        legacy = _best_of(_legacy_stream, tokens, args.repeat)
+        new = _best_of(_parser_stream, tokens, args.repeat)
+        print(f"{n_blocks:>6} {len(plan):>8} {len(tokens):>7} {legacy * 1000:>10.1f} "
+              f"{new * 1000:>10.1f} {legacy / new:>7.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,197 @@
+"""
+Train and evaluate the local entity router (services/interactive/entity_router.py).
+
+  --rebuild     Mine every completed first-turn interactive session: its raw
+                question (sessions.prompt), domain and the entity types its
+                scene used (sessions.frames_meta blocks). Embed the questions
+                in batches and upsert them into entity_routes as
+                source="history". Rows written by live selector calls are kept.
+
+  --evaluate N  Leave-one-out over N random stored rows: route each row's
+                question against all *other* rows and compare with its own
+                entities. Reports, per confidence threshold, coverage (share
+                routed locally), exact-set match, precision, recall and
+                Jaccard on the routed share, plus k-NN lookup latency
+                (p50 / p90). Embedding latency is reported separately from
+                a small live sample (--embed-sample) — it is the other half
+                of the router's cost on the request path.
+
+Run from the backend/ directory with DATABASE_URL and OPENAI_API_KEY set:
+    python scripts/train_entity_router.py --rebuild
+    python scripts/train_entity_router.py --evaluate 500 --out bench/entity_router.json
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+# Ensure backend/ is on the path when run from the repo root.
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import structlog
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from core.config import ENTITY_ROUTER_MAX_DIST, ENTITY_ROUTER_MIN_NEIGHBOURS
+from core.db_async import close_pool, get_async_db_read, init_pool
+from services.interactive import entity_router
+
+logger = structlog.get_logger(__name__)
+
+_EMBED_BATCH = 100
+_THRESHOLDS = (0.6, 0.7, 0.8, 0.9)
+
+
+def scene_entities(frames_meta: dict) -> list[str]:
+    """Entity types a stored SceneIR used, in first-use order."""
+    seen: list[str] = []
+    for block in (frames_meta or {}).get("blocks", []):
+        if block.get("type") == "entity" and block.get("entity_type") and block["entity_type"] not in seen:
+            seen.append(block["entity_type"])
+    return seen
+
+
+# ── Rebuild ───────────────────────────────────────────────────────────────────
+
+async def rebuild() -> int:
+    from services.research.vector_store import _embed_async
+
+    async with get_async_db_read() as conn:
+        rows = await conn.fetch(
+            """
+            SELECT prompt, frames_meta FROM sessions
+            WHERE render_path = 'interactive' AND status = 'done'
+              AND frames_meta IS NOT NULL
+              AND COALESCE(turn_index, 1) = 1 AND parent_session_id IS NULL
+            ORDER BY created_at DESC
+            """
+        )
+    samples: dict[tuple[str, str], tuple[str, list[str]]] = {}
+    for r in rows:
+        meta = r["frames_meta"] or {}
+        entities = scene_entities(meta)
+        if r["prompt"] and entities:
+            key = (entity_router.prompt_hash(r["prompt"]), meta.get("domain", "general"))
+            samples.setdefault(key, (r["prompt"], entities))   # newest session wins
+    logger.info("entity_router_mined", sessions=len(rows), samples=len(samples))
+
+    items = [(domain, prompt, entities) for (_, domain), (prompt, entities) in samples.items()]
+    stored = 0
+    for i in range(0, len(items), _EMBED_BATCH):
+        batch = items[i:i + _EMBED_BATCH]
+        embeddings = await _embed_async([prompt for _, prompt, _ in batch])
+        if not embeddings:
+            logger.warning("entity_router_embed_failed", batch=i // _EMBED_BATCH)
+            continue
+        for (domain, prompt, entities), emb in zip(batch, embeddings):
+            await entity_router.remember(prompt, emb, domain, entities, source="history")
+            stored += 1
+    logger.info("entity_router_rebuilt", stored=stored)
+    return stored
+
+
+# ── Evaluate ──────────────────────────────────────────────────────────────────
+
+def _pct(values: list[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+def score(cases: list[tuple[list[str], list[entity_router.Neighbour]]], threshold: float) -> dict:
+    """Coverage and accuracy of vote() at one confidence threshold."""
+    routed = exact = 0
+    precision, recall, jaccard = [], [], []
+    for truth, found in cases:
+        route = entity_router.vote(found, ENTITY_ROUTER_MAX_DIST, threshold, ENTITY_ROUTER_MIN_NEIGHBOURS)
+        if route is None:
+            continue
+        routed += 1
+        got, want = set(route.entities), set(truth)
+        exact += got == want
+        precision.append(len(got & want) / len(got))
+        recall.append(len(got & want) / len(want))
+        jaccard.append(len(got & want) / len(got | want))
+    n = len(cases) or 1
+    return {
+        "threshold": threshold,
+        "coverage":  round(routed / n, 4),
+        "exact":     round(exact / routed, 4) if routed else None,
+        "precision": round(statistics.mean(precision), 4) if precision else None,
+        "recall":    round(statistics.mean(recall), 4) if recall else None,
+        "jaccard":   round(statistics.mean(jaccard), 4) if jaccard else None,
+    }
+
+
+async def evaluate(sample: int, embed_sample: int) -> dict:
+    from services.research.vector_store import _embed_async
+
+    async with get_async_db_read() as conn:
+        rows = await conn.fetch(
+            "SELECT prompt_hash, prompt, domain, entities, embedding FROM entity_routes "
+            "ORDER BY random() LIMIT $1",
+            sample,
+        )
+    cases = []
+    lookup_ms: list[float] = []
+    for r in rows:
+        t0 = time.perf_counter()
+        found = await entity_router.neighbours(r["embedding"], r["domain"], exclude_hash=r["prompt_hash"])
+        lookup_ms.append((time.perf_counter() - t0) * 1000)
+        cases.append((list(r["entities"]), found))
+
+    embed_ms: list[float] = []
+    for r in random.sample(list(rows), min(embed_sample, len(rows))):
+        t0 = time.perf_counter()
+        await _embed_async([r["prompt"] + " "])   # defeat single-flight reuse
+        embed_ms.append((time.perf_counter() - t0) * 1000)
+
+    report = {
+        "rows":       len(rows),
+        "thresholds": [score(cases, t) for t in _THRESHOLDS],
+        "lookup_ms":  {"p50": round(statistics.median(lookup_ms), 2),
+                       "p90": round(_pct(lookup_ms, 0.9), 2)} if lookup_ms else {},
+        "embed_ms":   {"p50": round(statistics.median(embed_ms), 2),
+                       "p90": round(_pct(embed_ms, 0.9), 2)} if embed_ms else {},
+    }
+    return report
+
+
+async def _main(args) -> dict:
+    await init_pool()
+    try:
+        result: dict = {}
+        if args.rebuild:
+            result["stored"] = await rebuild()
+        if args.evaluate:
+            result["evaluation"] = await evaluate(args.evaluate, args.embed_sample)
+        return result
+    finally:
+        await close_pool()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rebuild", action="store_true")
+    parser.add_argument("--evaluate", type=int, metavar="N", default=0)
+    parser.add_argument("--embed-sample", type=int, default=20)
+    parser.add_argument("--out", help="also write the report as JSON")
+    args = parser.parse_args()
+    if not args.rebuild and not args.evaluate:
+        parser.error("nothing to do: pass --rebuild and/or --evaluate N")
+
+    result = asyncio.run(_main(args))
+    print(json.dumps(result, indent=2))
+    if args.out:
+        Path(args.out).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.out).write_text(json.dumps(result, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -23,7 +23,8 @@ import sys
 from pathlib import Path
 from typing import Optional, Tuple
 
-from services.frame_generation.planner import GenerationPlan, FramePlan, call_llm
+from services.frame_generation.planner import GenerationPlan, FramePlan, call_llm_async
+from services.llm_scheduler import Priority
 
 logger = structlog.get_logger(__name__)
 
@@ -250,12 +251,12 @@ def _build_fallback_prompt(
 # Single frame: LLM call → Manim code string
 # ---------------------------------------------------------------------------
 
-def _generate_manim_code(
+async def _generate_manim_code(
     frame: FramePlan,
     plan: GenerationPlan,
     prompt_template: str,
 ) -> str:
-    """Synchronous LLM call. Returns raw Manim Python code string."""
+    """Async LLM call. Returns raw Manim Python code string."""
     primary_color = getattr(plan.shared_style, "strokeColor", "#4F86C6")
 
     all_captions = [f.caption for f in plan.frames]
@@ -323,10 +324,11 @@ def _generate_manim_code(
     if cache_prefix:
         cache_prefix = cache_prefix.replace("{{PRIMARY_COLOR}}", primary_color)
 
-    return call_llm(
+    return await call_llm_async(
         prompt, 5000,
         prompt_name=f"manim_prompt.md (frame {frame.index})",
         cache_prefix=cache_prefix,
+        priority=Priority.VIDEO,
     )
 
 
@@ -401,9 +403,10 @@ async def _generate_one_manim_frame(
     plan: GenerationPlan,
     prompt_template: str,
     output_dir: str,
-) -> Optional[str]:
+) -> tuple[Optional[str], str]:
+    """(mp4 path or None, the code that produced it — or was tried last)."""
     # Attempt 1 — normal generation
-    raw = await asyncio.to_thread(_generate_manim_code, frame, plan, prompt_template)
+    raw = await _generate_manim_code(frame, plan, prompt_template)
     code = _extract_code(raw)
     code, fixes = _sanitize_manim_code(code)
     if fixes:
@@ -411,7 +414,7 @@ async def _generate_one_manim_frame(
 
     mp4, stderr = await asyncio.to_thread(_render_frame, code, frame_index, output_dir)
     if mp4 is not None:
-        return mp4
+        return mp4, code
 
     error_category = _classify_render_error(stderr)
     bad_name = _extract_bad_name(stderr)
@@ -427,11 +430,11 @@ async def _generate_one_manim_frame(
             mp4_fast, _ = await asyncio.to_thread(_render_frame, stripped, frame_index, fast_dir)
             if mp4_fast is not None:
                 logger.info("manim_frame_recovered_kwarg_strip", frame=frame_index)
-                return mp4_fast
+                return mp4_fast, stripped
             code = stripped  # carry the partial fix into the full LLM retry
 
     fallback_template = _build_fallback_prompt(prompt_template, error_category, bad_name)
-    raw2 = await asyncio.to_thread(_generate_manim_code, frame, plan, fallback_template)
+    raw2 = await _generate_manim_code(frame, plan, fallback_template)
     code2 = _extract_code(raw2)
     code2, fixes2 = _sanitize_manim_code(code2)
     if fixes2:
@@ -443,7 +446,7 @@ async def _generate_one_manim_frame(
         logger.info("manim_frame_recovered_retry", frame=frame_index, category=error_category)
     else:
         logger.error("manim_frame_failed_both_attempts", frame=frame_index, category=error_category)
-    return mp4_2
+    return mp4_2, code2
 
 
 # ---------------------------------------------------------------------------
@@ -454,7 +457,7 @@ async def generate_manim_frames(
     plan: GenerationPlan,
     prompt_template: str,
     output_dir: str,
-) -> list[Optional[str]]:
+) -> tuple[list[Optional[str]], list[str]]:
     """
     Generate one PNG per frame using Manim.
 
@@ -464,8 +467,9 @@ async def generate_manim_frames(
         output_dir:      Directory where per-frame subdirectories will be created.
 
     Returns:
-        List of absolute .mp4 paths, one per frame.
-        None entries indicate frames that failed to render.
+        (paths, codes): absolute .mp4 paths, one per frame — None entries
+        indicate frames that failed to render — and each frame's Manim source
+        (the attempt that rendered, or the last one tried; "" on exception).
     """
     tasks = [
         _generate_one_manim_frame(frame, i, plan, prompt_template, output_dir)
@@ -475,13 +479,16 @@ async def generate_manim_frames(
     results = await asyncio.gather(*tasks, return_exceptions=True)
 
     paths: list[Optional[str]] = []
+    codes: list[str] = []
     for i, result in enumerate(results):
         if isinstance(result, Exception):
             logger.error("manim_frame_exception", frame=i, error=str(result), exc_info=True)
             paths.append(None)
+            codes.append("")
         else:
-            paths.append(result)
+            paths.append(result[0])
+            codes.append(result[1])
 
     ok = sum(1 for p in paths if p)
     logger.info("manim_generation_complete", ok=ok, total=len(paths))
-    return paths
+    return paths, codes
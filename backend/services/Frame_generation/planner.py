@@ -20,25 +20,39 @@ import time
 from contextvars import ContextVar
 
 logger = structlog.get_logger(__name__)
-from typing import List, Union
+from typing import AsyncIterator, List, Union
 
 from pydantic import BaseModel, field_validator
 
-from core.config import CLASSIFY_MODEL
-from services.llm_service import LLMService, ClaudeProvider, default_llm_service, _make_service_for_model
-
-# Per-request lifecycle log. main.py sets this before each pipeline run.
-request_log: ContextVar[list | None] = ContextVar("request_log", default=None)
-
-# Per-request token accumulator. main.py resets this before each pipeline run.
-# Holds prompt/completion/total token counts + Anthropic cache token counts.
-token_usage: ContextVar[dict | None] = ContextVar("token_usage", default=None)
+from core.config import (
+    CLASSIFY_SEMANTIC_CACHE_ENABLED,
+    CLASSIFY_SEMANTIC_CACHE_TIMEOUT_S,
+)
+from services import llm_scheduler, prompt_registry, token_budget
+from services.json_stream import JsonFieldStream
+from services.llm_scheduler import Priority
+from services.llm_service import LLMService, ClaudeProvider, default_llm_service, get_task_service
+# request_log / token_usage and their helpers live in services/request_context.py.
+from services.request_context import (
+    accumulate_tokens as _accumulate_tokens,
+    log as _log,
+    request_log,
+    token_usage,
+)
+
+_PROMPTS_DIR = os.path.join(os.path.dirname(__file__), "prompts")
 
 # Per-request LLM service override. When set, call_llm() uses this instead of
 # default_llm_service — allows the UI to choose Claude vs OpenAI per request.
 request_llm_service: ContextVar[LLMService | None] = ContextVar("request_llm_service", default=None)
 
-_classify_service = _make_service_for_model(CLASSIFY_MODEL)
+# TASK_MODELS["plan_and_classify"] (CLASSIFY_MODEL by default). A
+# "primary|secondary" entry makes this a hedged service (see HedgedProvider).
+_classify_service = get_task_service("plan_and_classify")
+
+# Strong references to fire-and-forget semantic-cache writes so they are not
+# garbage-collected before they run.
+_BACKGROUND_TASKS: set = set()
 
 # Calibrated max_tokens per planning call type.
 # These are generous upper bounds based on observed output sizes; setting them
@@ -55,23 +69,23 @@ _VOCAB_PLAN_MAX_TOKENS: dict[str, int] = {
 }
 
 
-def _accumulate_tokens(usage: dict):
-    """Add one call's usage into the per-request running total."""
-    acc = token_usage.get()
-    if acc is None or not usage:
-        return
-    acc["prompt_tokens"]              += usage.get("prompt_tokens", 0)
-    acc["completion_tokens"]          += usage.get("completion_tokens", 0)
-    acc["total_tokens"]               += usage.get("total_tokens", 0)
-    acc["cache_creation_input_tokens"] += usage.get("cache_creation_input_tokens", 0)
-    acc["cache_read_input_tokens"]     += usage.get("cache_read_input_tokens", 0)
-
-
-def _log(entry: dict):
-    """Append a timestamped entry to the active request log (no-op if not set)."""
-    log = request_log.get()
-    if log is not None:
-        log.append({"timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()), **entry})
+def cache_ratios(acc: dict | None) -> dict[str, dict]:
+    """
+    Per-task prompt-cache effectiveness from a token_usage accumulator:
+    {task: {"calls", "input_tokens", "cached_tokens", "cached_ratio"}}, where
+    input_tokens counts uncached, cache-write and cache-read input alike.
+    Response-cache hits (no provider call) are excluded.
+    """
+    out: dict[str, dict] = {}
+    for task, t in ((acc or {}).get("by_task") or {}).items():
+        total = t["prompt_tokens"] + t["cache_creation_input_tokens"] + t["cache_read_input_tokens"]
+        out[task] = {
+            "calls":         t["calls"],
+            "input_tokens":  total,
+            "cached_tokens": t["cache_read_input_tokens"],
+            "cached_ratio":  round(t["cache_read_input_tokens"] / total, 3) if total else 0.0,
+        }
+    return out
 
 
 # ---------------------------------------------------------------------------
@@ -176,7 +190,10 @@ def call_llm(
     task: str = "",
 ) -> str:
     """
-    Single entry point for all LLM calls in the pipeline.
+    Blocking LLM call, kept for scripts and other sync callers. Pipeline code
+    must use call_llm_async() — wrapping this in asyncio.to_thread ties up a
+    default-executor thread for the whole round-trip (see
+    tests/test_no_sync_llm.py).
 
     max_tokens: calibrated per call-type — see _VOCAB_PLAN_MAX_TOKENS and
         per-generator constants. Default 8192 kept for backwards compat.
@@ -209,7 +226,7 @@ def call_llm(
     )
     if result is None:
         raise RuntimeError("LLM service returned None — check server connectivity and credentials.")
-    _accumulate_tokens(usage)
+    _accumulate_tokens(usage, label)
     total_tokens = (usage or {}).get("total_tokens", 0)
     cache_read   = (usage or {}).get("cache_read_input_tokens", 0)
     cache_create = (usage or {}).get("cache_creation_input_tokens", 0)
@@ -217,6 +234,7 @@ def call_llm(
     _log({
         "event": "llm_call",
         "prompt_name": label,
+        "task": task or label,
         "model": model,
         "prompt_preview": prompt[:600] + ("…" if len(prompt) > 600 else ""),
         "response_preview": result[:600] + ("…" if len(result) > 600 else ""),
@@ -236,11 +254,19 @@ async def call_llm_async(
     tool_schema: dict = None,
     json_mode: bool = False,
     task: str = "",
+    cache_task: str = "",
+    priority: int = Priority.DEFAULT,
 ) -> str:
     """
     Async version of call_llm() — uses provider.complete_async() so the event
     loop is never blocked and the thread pool is never saturated.
     Drop-in replacement for `await asyncio.to_thread(call_llm, ...)`.
+
+    cache_task: opt into the LLM response cache under this task's TTL
+        (LLM_CACHE_TTL_SECS). Hits are logged with cache_hit=True and cost $0.
+
+    priority: dispatch tier in services/llm_scheduler.py — video pipelines
+        pass Priority.VIDEO so they queue behind interactive traffic.
     """
     label = prompt_name or "unknown"
     from services.llm_service import get_task_service
@@ -253,25 +279,97 @@ async def call_llm_async(
         max_tokens=max_tokens,
         tool_schema=tool_schema,
         json_mode=json_mode,
+        cache_task=cache_task,
+        priority=priority,
+        task=task or label,
     )
     if result is None:
         raise RuntimeError("LLM service returned None — check server connectivity and credentials.")
-    _accumulate_tokens(usage)
+    _record_llm_call(label, model, prompt, result, usage, task or label)
+    return result
+
+
+async def call_llm_stream_async(
+    prompt: str,
+    max_tokens: int = 8192,
+    prompt_name: str = "",
+    override_service: LLMService = None,
+    json_mode: bool = False,
+    task: str = "",
+    cache_task: str = "",
+    priority: int = Priority.DEFAULT,
+) -> AsyncIterator[str]:
+    """
+    Streaming counterpart of call_llm_async() — yields text chunks as the
+    provider produces them. The llm_call lifecycle entry and token totals are
+    recorded once the stream is exhausted, exactly as call_llm_async() does.
+
+    Raises on provider errors (possibly after some chunks were yielded);
+    callers are expected to fall back to call_llm_async().
+    """
+    label = prompt_name or "unknown"
+    svc   = override_service or request_llm_service.get() or (get_task_service(task) if task else default_llm_service)
+    model = getattr(svc.provider, "model", "unknown")
+    logger.info("llm_call", prompt=label, model=model, chars=len(prompt), cache="no", stream=True)
+    usage: dict = {}
+    chunks: list[str] = []
+    stream = svc.stream_single_prompt_async(
+        prompt,
+        usage,
+        cache_task=cache_task,
+        priority=priority,
+        task=task or label,
+        max_tokens=max_tokens,
+        json_mode=json_mode,
+    )
+    try:
+        async for text in stream:
+            chunks.append(text)
+            yield text
+    except (GeneratorExit, asyncio.CancelledError):
+        # Abandoned mid-stream: the provider still bills the prompt and the
+        # output so far. Streams only report usage at the end, so estimate it.
+        partial = "".join(chunks)
+        _record_llm_call(label, model, prompt, partial,
+                         usage or _estimated_usage(prompt, partial), task or label)
+        raise
+    finally:
+        await stream.aclose()
+    result = "".join(chunks)
+    if not result:
+        raise RuntimeError("LLM stream returned no text — check server connectivity and credentials.")
+    _record_llm_call(label, model, prompt, result, usage, task or label)
+
+
+def _estimated_usage(prompt: str, partial: str) -> dict:
+    """Usage for a stream abandoned before the provider reported any (~4 chars/token)."""
+    prompt_tokens = llm_scheduler.estimate_tokens([{"role": "user", "content": prompt}], 0)
+    completion_tokens = len(partial) // 4
+    return {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens, "estimated": True}
+
+
+def _record_llm_call(label: str, model: str, prompt: str, result: str, usage: dict, task: str) -> None:
+    """Accumulate usage and append the llm_call lifecycle entry for one call."""
+    _accumulate_tokens(usage, label)
+    cache_hit = bool((usage or {}).get("cache_hit"))
     logger.info("llm_done", prompt=label, model=model,
                 tokens=(usage or {}).get("total_tokens", 0),
                 cache_read=(usage or {}).get("cache_read_input_tokens", 0),
-                cache_create=(usage or {}).get("cache_creation_input_tokens", 0))
+                cache_create=(usage or {}).get("cache_creation_input_tokens", 0),
+                cache_hit=cache_hit)
     _log({
         "event": "llm_call",
         "prompt_name": label,
+        "task": task,
         "model": model,
         "prompt_preview": prompt[:600] + ("…" if len(prompt) > 600 else ""),
         "response_preview": result[:600] + ("…" if len(result) > 600 else ""),
         "full_prompt": prompt,
         "full_response": result,
         "usage": usage,
+        "cache_hit": cache_hit,
     })
-    return result
 
 
 # ---------------------------------------------------------------------------
@@ -481,28 +579,221 @@ biology to "illustration" unless clearly analytical. "notes" = ordered key facts
 per frame.""",
 }
 
-async def plan_and_classify(
+async def plan_and_classify_stream(
     message:              str,
     research_mode:        str,
     video_enabled:        bool,
     conversation_context: str = "",
     prior_synthesis:      str = "",
-) -> dict:
+) -> AsyncIterator[dict]:
     """
-    Unified first Haiku call — single intent classification + search planning call.
-
-    Returns a dict with all fields needed by the generation pipeline:
-      Interactive: domain, enriched_prompt, suggested_followups, needs_search?, search_queries?
-      Video:       + intent_type, frame_count, notes
-    Always uses _classify_service (CLASSIFY_MODEL from config) regardless of the per-request model.
+    Unified first Haiku call — single intent classification + search planning call,
+    streamed so callers can act on fields before the whole JSON has arrived.
+
+    Yields, in arrival order:
+      {"type": "field", "key": ..., "value": ...}
+          A top-level field is complete (needs_search, domain, enriched_prompt, ...).
+      {"type": "search_query", "index": i, "query": ...}
+          search_queries[i] is complete — safe to dispatch to Tavily right away.
+      {"type": "intent", "intent": dict}
+          Always last: the normalised result parsed from the full response.
+          Interactive: domain, enriched_prompt, suggested_followups, needs_search?, search_queries?
+          Video:       + intent_type, frame_count, notes
+
+    Always uses _classify_service (TASK_MODELS["plan_and_classify"], optionally
+    hedged on time to first chunk) regardless of the per-request model. If the stream fails, the non-streaming path is
+    retried; partial events already yielded stay valid hints.
+
+    First-turn questions (no conversation context / prior synthesis) also consult
+    the pgvector semantic cache, concurrently with the LLM stream so a miss costs
+    nothing. The lookup is bounded by CLASSIFY_SEMANTIC_CACHE_TIMEOUT_S and
+    raced against every chunk; a hit that lands before the stream completes
+    abandons it (its partial usage is still logged) and yields the stored
+    classification as the intent. The query embedding runs as its own
+    task, so a fresh result is stored even when the lookup timed out.
     """
-    _prompts_dir = os.path.join(os.path.dirname(__file__), "prompts")
-    with open(os.path.join(_prompts_dir, "planning_classify.md")) as f:
-        template = f.read()
+    semantic_ok = CLASSIFY_SEMANTIC_CACHE_ENABLED and not conversation_context and not prior_synthesis
+    embedding: asyncio.Task | None = None
+    lookup: asyncio.Task | None = None
+    if semantic_ok:
+        from services.research.vector_store import embed_query
+        embedding = asyncio.create_task(embed_query(message))
+        lookup = asyncio.create_task(
+            _semantic_lookup(message, embedding, research_mode, video_enabled))
+
+    prompt = _build_classify_prompt(
+        message, research_mode, video_enabled, conversation_context, prior_synthesis)
+
+    raw = ""
+    fields = JsonFieldStream()
+    t0 = time.monotonic()
+    first_query_ms: int | None = None
+    stream = call_llm_stream_async(
+        prompt, 2048,
+        prompt_name="plan_and_classify",
+        override_service=_classify_service,
+        json_mode=True,
+        cache_task="plan_and_classify",
+    )
+    hit: tuple[dict, int] | None = None
+    pending: asyncio.Task | None = None
+    try:
+        while True:
+            if lookup is not None and not lookup.done():
+                # Race the lookup against the next chunk, so a hit can win
+                # while the stream is idle (or a hedged reply is still coming).
+                pending = asyncio.ensure_future(_next_chunk(stream))
+                await asyncio.wait({lookup, pending}, return_when=asyncio.FIRST_COMPLETED)
+            if lookup is not None and lookup.done() and lookup.result() is not None:
+                hit = lookup.result()
+                break
+            chunk = await pending if pending is not None else await _next_chunk(stream)
+            pending = None
+            if chunk is None:
+                break
+            raw += chunk
+            for key, index, value in fields.feed(chunk):
+                if index is None:
+                    yield {"type": "field", "key": key, "value": value}
+                elif key == "search_queries" and isinstance(value, str) and value.strip():
+                    if first_query_ms is None:
+                        first_query_ms = int((time.monotonic() - t0) * 1000)
+                    yield {"type": "search_query", "index": index, "query": value}
+    except Exception as exc:
+        logger.warning("classify_stream_failed", error=str(exc), partial_chars=len(raw))
+        raw = None
+    finally:
+        if pending is not None:
+            # Cancelling the step closes the stream, which logs its partial usage.
+            pending.cancel()
+            await asyncio.gather(pending, return_exceptions=True)
+        await stream.aclose()
+
+    if hit is not None:
+        # A near-duplicate's classification arrived first — use it.
+        cached, lookup_ms = hit
+        distance = cached.pop("_semantic_distance", None)
+        _log({
+            "event":       "classify_semantic_cache_hit",
+            "prompt_name": "plan_and_classify",
+            "distance":    distance,
+            "lookup_ms":   lookup_ms,
+        })
+        yield {"type": "intent", "intent": cached}
+        return
+    if lookup is not None:
+        lookup.cancel()     # the embedding task is shielded and keeps running
+
+    if raw is None:
+        raw = await call_llm_async(
+            prompt, 2048,
+            prompt_name="plan_and_classify",
+            override_service=_classify_service,
+            json_mode=True,
+            cache_task="plan_and_classify",
+        )
+    logger.info("classify_streamed", first_query_ms=first_query_ms,
+                total_ms=int((time.monotonic() - t0) * 1000))
+
+    result = _normalise_intent(_extract_json(raw), message, video_enabled)
+
+    if embedding is not None:
+        task = asyncio.create_task(
+            _store_when_embedded(message, embedding, research_mode, video_enabled, result)
+        )
+        _BACKGROUND_TASKS.add(task)
+        task.add_done_callback(_BACKGROUND_TASKS.discard)
+    yield {"type": "intent", "intent": result}
+
+
+async def _next_chunk(stream: AsyncIterator[str]) -> str | None:
+    """The stream's next chunk, or None once it is exhausted."""
+    try:
+        return await stream.__anext__()
+    except StopAsyncIteration:
+        return None
+
+
+async def _semantic_lookup(
+    message: str,
+    embedding: asyncio.Task,
+    research_mode: str,
+    video_enabled: bool,
+) -> tuple[dict, int] | None:
+    """(cached intent, lookup_ms) for a near-duplicate question, or None. Only the
+    wait is bounded by the timeout — the shielded embedding task outlives it."""
+    from services.research.vector_store import lookup_classification
+    t_lookup = time.monotonic()
+
+    async def _lookup() -> dict | None:
+        q_emb = await asyncio.shield(embedding)
+        if not q_emb:
+            return None
+        return await lookup_classification(message, q_emb, research_mode, video_enabled)
+
+    try:
+        cached = await asyncio.wait_for(_lookup(), timeout=CLASSIFY_SEMANTIC_CACHE_TIMEOUT_S)
+    except asyncio.TimeoutError:
+        logger.info("classify_cache_lookup_timeout", timeout_s=CLASSIFY_SEMANTIC_CACHE_TIMEOUT_S)
+        return None
+    if cached is None:
+        return None
+    return cached, int((time.monotonic() - t_lookup) * 1000)
+
+
+async def _store_when_embedded(
+    message: str,
+    embedding: asyncio.Task,
+    research_mode: str,
+    video_enabled: bool,
+    result: dict,
+) -> None:
+    """Store a fresh classification once its query embedding arrives."""
+    from services.research.vector_store import store_classification
+    q_emb = await embedding
+    if q_emb:
+        await store_classification(message, q_emb, research_mode, video_enabled, result)
+
+
+async def plan_and_classify(
+    message:              str,
+    research_mode:        str,
+    video_enabled:        bool,
+    conversation_context: str = "",
+    prior_synthesis:      str = "",
+) -> dict:
+    """plan_and_classify_stream() for callers that only need the final intent."""
+    intent: dict = {}
+    async for event in plan_and_classify_stream(
+        message, research_mode, video_enabled, conversation_context, prior_synthesis,
+    ):
+        if event["type"] == "intent":
+            intent = event["intent"]
+    return intent
+
+
+def _build_classify_prompt(
+    message: str,
+    research_mode: str,
+    video_enabled: bool,
+    conversation_context: str,
+    prior_synthesis: str,
+) -> str:
+    template = prompt_registry.get(os.path.join(_PROMPTS_DIR, "planning_classify.md"))
 
     mode_key = (research_mode, video_enabled)
     mode_rules = _MODE_RULES.get(mode_key, _MODE_RULES[("instant", video_enabled)])
 
+    # Newest conversation turns matter most for resolving a follow-up; the
+    # prior answer's opening is its summary, so that end is kept.
+    packed = token_budget.pack(
+        "plan_and_classify", _classify_service.provider.name, [mode_rules, message],
+        [token_budget.Section("context", conversation_context, keep="tail"),
+         token_budget.Section("prior", prior_synthesis)],
+        static=[template],
+    )
+    conversation_context, prior_synthesis = packed["context"], packed["prior"]
+
     context_parts: list[str] = []
     if prior_synthesis:
         context_parts.append(f"Prior answer context:\n{prior_synthesis}")
@@ -511,7 +802,7 @@ async def plan_and_classify(
     context_block = ("\n\n".join(context_parts) + "\n\n") if context_parts else ""
 
     current_year = time.strftime("%Y", time.gmtime())
-    prompt = (
+    return (
         template
         .replace("{{MODE_RULES}}", mode_rules)
         .replace("{{CURRENT_YEAR}}", current_year)
@@ -519,15 +810,9 @@ async def plan_and_classify(
         .replace("{{CONVERSATION_CONTEXT}}", context_block)
     )
 
-    raw = await call_llm_async(
-        prompt, 2048,
-        prompt_name="plan_and_classify",
-        override_service=_classify_service,
-        json_mode=True,
-    )
-    data = _extract_json(raw)
 
-    # Normalise and validate fields
+def _normalise_intent(data: dict, message: str, video_enabled: bool) -> dict:
+    """Normalise and validate the classifier's JSON fields."""
     result: dict = {
         "domain":              data.get("domain", "general"),
         "enriched_prompt":     data.get("enriched_prompt", message),
@@ -554,9 +839,6 @@ async def create_vocab_plan(
     Routes to planning_math.md (math) or planning_svg.md (all non-math intents).
     intent_type and frame_count come from plan_and_classify().
     """
-    _prompts_dir = os.path.join(os.path.dirname(__file__), "prompts")
-    context_block = f"Conversation context:\n{conversation_context}\n\n" if conversation_context else ""
-
     if intent_type == "math":
         prompt_file = "planning_math.md"
     else:
@@ -564,8 +846,16 @@ async def create_vocab_plan(
         # process, architecture, timeline) → SVG animated path
         prompt_file = "planning_svg.md"
 
-    with open(os.path.join(_prompts_dir, prompt_file)) as f:
-        template = f.read()
+    template_path = os.path.join(_PROMPTS_DIR, prompt_file)
+    template = prompt_registry.get(template_path)
+
+    _svc = request_llm_service.get() or get_task_service("vocab_plan")
+    conversation_context = token_budget.pack(
+        "vocab_plan", getattr(_svc.provider, "name", None), [user_prompt],
+        [token_budget.Section("context", conversation_context, keep="tail")],
+        static=[template],
+    )["context"]
+    context_block = f"Conversation context:\n{conversation_context}\n\n" if conversation_context else ""
 
     prompt = (
         template
@@ -579,21 +869,14 @@ async def create_vocab_plan(
     # Split at {{CONVERSATION_CONTEXT}} (or {{USER_PROMPT}}) — everything
     # before these markers is pure instructions that never changes between
     # requests, so Anthropic can reuse it at 10% of normal token cost.
-    _split_markers = ("{{CONVERSATION_CONTEXT}}", "{{USER_PROMPT}}")
-    cache_prefix = ""
-    for marker in _split_markers:
-        split_idx = template.find(marker)
-        if split_idx != -1:
-            # Substitute the small header tokens (INTENT_TYPE, FRAME_COUNT)
-            # that appear before the split point, so the cached text matches
-            # the assembled prompt exactly.
-            static_raw = template[:split_idx]
-            cache_prefix = (
-                static_raw
-                .replace("{{INTENT_TYPE}}", intent_type)
-                .replace("{{FRAME_COUNT}}", str(frame_count))
-            )
-            break
+    # The small header tokens (INTENT_TYPE, FRAME_COUNT) that appear before
+    # the split point are substituted so the cached text matches the
+    # assembled prompt exactly; the registry memoizes each variant.
+    cache_prefix = prompt_registry.static_prefix(
+        template_path,
+        ("{{CONVERSATION_CONTEXT}}", "{{USER_PROMPT}}"),
+        {"{{INTENT_TYPE}}": intent_type, "{{FRAME_COUNT}}": str(frame_count)},
+    )
 
     max_tokens = _VOCAB_PLAN_MAX_TOKENS.get(intent_type, 2500)
     raw = await call_llm_async(
@@ -602,6 +885,7 @@ async def create_vocab_plan(
         cache_prefix=cache_prefix,
         json_mode=True,
         task="vocab_plan",
+        cache_task="vocab_plan",
     )
 
     plan_dict = _extract_json(raw)
@@ -37,6 +37,8 @@ import hashlib
 import structlog
 import os
 import re
+from functools import lru_cache
+from typing import Optional
 
 logger = structlog.get_logger(__name__)
 
@@ -66,14 +68,24 @@ _FONT_CANDIDATES = [
 ]
 
 
-def _load_font(size: int):
+@lru_cache(maxsize=1)
+def font_path() -> Optional[str]:
+    """First usable font in _FONT_CANDIDATES — probed once per process."""
+    if not _PILLOW_AVAILABLE:
+        return None
     for path in _FONT_CANDIDATES:
         if os.path.exists(path):
             try:
-                return ImageFont.truetype(path, size)
+                ImageFont.truetype(path, 12)
+                return path
             except Exception:
                 continue
-    return ImageFont.load_default()
+    return None
+
+
+def _load_font(size: int):
+    path = font_path()
+    return ImageFont.truetype(path, size) if path else ImageFont.load_default()
 
 
 # ---------------------------------------------------------------------------
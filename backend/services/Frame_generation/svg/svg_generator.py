@@ -59,7 +59,8 @@ try:
 except ImportError:
     _PLAYWRIGHT_AVAILABLE = False
 
-from services.frame_generation.planner import GenerationPlan, FramePlan, call_llm
+from services.frame_generation.planner import GenerationPlan, FramePlan, call_llm_async
+from services.llm_scheduler import Priority
 
 
 # ── Animation constants ───────────────────────────────────────────────────────
@@ -134,7 +135,7 @@ def _extract_svg(text: str) -> str:
 
 # ── Single frame: build prompt with style injection ───────────────────────────
 
-def _generate_svg_code(
+async def _generate_svg_code(
     frame: FramePlan,
     plan: GenerationPlan,
     prompt_template: str,
@@ -181,11 +182,12 @@ def _generate_svg_code(
     split_idx = prompt_template.find("{{DIAGRAM_DESCRIPTION}}")
     cache_prefix = prompt_template[:split_idx] if split_idx != -1 else ""
 
-    return call_llm(
+    return await call_llm_async(
         prompt, 8000,
         prompt_name=f"svg_prompt.md (frame {frame_index})",
         cache_prefix=cache_prefix,
         task="svg_frame",
+        priority=Priority.VIDEO,
     )
 
 
@@ -220,7 +222,7 @@ def _render_frame(svg_text: str, frame_index: int, output_dir: str) -> tuple[Opt
 
 # ── Single frame: correction retry prompt ────────────────────────────────────
 
-def _generate_svg_code_retry(
+async def _generate_svg_code_retry(
     frame: FramePlan,
     plan: GenerationPlan,
     failure_reason: str,
@@ -259,7 +261,12 @@ def _generate_svg_code_retry(
         f"- Never use HTML entities (&nbsp; &copy; &rarr; etc) — use the Unicode character directly\n"
         f"- If complexity risks truncation, simplify shapes — a complete simple SVG beats an incomplete complex one\n"
     )
-    return call_llm(correction_prompt, 8000, prompt_name=f"svg_prompt.md (frame {frame.index} retry)", task="svg_frame")
+    return await call_llm_async(
+        correction_prompt, 8000,
+        prompt_name=f"svg_prompt.md (frame {frame.index} retry)",
+        task="svg_frame",
+        priority=Priority.VIDEO,
+    )
 
 
 # ── Animated rendering: timing + HTML builder ────────────────────────────────
@@ -532,19 +539,19 @@ async def _generate_one_svg_frame(
     """
     Generate and render one SVG frame. Returns absolute path (PNG or MP4) or None.
 
-    Runs the synchronous LLM call and render in threads so the event loop is
-    never blocked.
+    The LLM calls go through call_llm_async; only the CPU-bound render runs in
+    a thread, so in-flight LLM calls never hold a default-executor worker.
 
     On failure (bad extraction OR render crash) a single corrective retry is
     attempted with the specific error included in the prompt.
     """
-    raw = await asyncio.to_thread(_generate_svg_code, frame, plan, prompt_template, frame_index)
+    raw = await _generate_svg_code(frame, plan, prompt_template, frame_index)
     svg_text = _extract_svg(raw)
 
     if not svg_text.lower().startswith("<svg"):
         logger.warning("svg_no_valid_svg_retrying", frame=frame_index)
-        raw = await asyncio.to_thread(
-            _generate_svg_code_retry, frame, plan,
+        raw = await _generate_svg_code_retry(
+            frame, plan,
             failure_reason="Your response did not contain valid SVG markup. "
                            "The response must start with <svg and end with </svg>. "
                            "Do not include markdown fences, prose, or any text outside the SVG tags.",
@@ -575,8 +582,8 @@ async def _generate_one_svg_frame(
 
     if out_path is None:
         logger.warning("svg_render_failed_retrying", frame=frame_index)
-        raw = await asyncio.to_thread(
-            _generate_svg_code_retry, frame, plan,
+        raw = await _generate_svg_code_retry(
+            frame, plan,
             failure_reason=(
                 f"The renderer failed to process your SVG. Error: {render_error}. "
                 "Common causes: gradients (<linearGradient>/<radialGradient>), "
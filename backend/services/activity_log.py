@@ -0,0 +1,182 @@
+"""
+Streaming, bounded lifecycle log for one generation request.
+
+ActivityLog is what routers/generate.py puts in the request_log ContextVar.
+It is a list, so planner._log(), count_llm_calls() and compute_session_cost()
+work unchanged — but append() splits every entry in two (extend() and += go
+through append(); the log is append-only, so insert, item assignment and
+deletion raise TypeError):
+
+  disk    — the full entry, queued for the shared writer thread, which
+            serialises it as one line of gzip-compressed NDJSON to
+            {output_dir}/activity_log.ndjson.gz. Heavy fields —
+            full_prompt, and the provider responses full_response,
+            search_results, extracted_content — are kept per
+            ACTIVITY_LOG_PROMPT_SAMPLE_RATE / ACTIVITY_LOG_RESPONSE_SAMPLE_RATE
+            (decided per entry); unsampled entries record only their lengths.
+  memory  — a summary: the same entry with each heavy field replaced by its
+            length and any other string over _SUMMARY_MAX_CHARS cut short.
+            Cost, call counts and usage only need the summary.
+
+append() never touches the disk itself: json.dumps and gzip run on
+_writer, a single thread shared by every request, so the event loop only pays
+for the summary. One worker keeps each file's lines in append order.
+
+close() waits for the queued entries and finishes the gzip stream before the
+file is uploaded to S3 (core/s3.upload_activity_log). It blocks, so the caller
+runs it in a thread; repeated calls share the first one's result.
+full_entries() drains the queue and reads the file back for the rare consumer
+that needs full responses after the fact.
+"""
+
+import gzip
+import json
+import os
+import random
+import structlog
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Iterator
+
+from core.config import ACTIVITY_LOG_PROMPT_SAMPLE_RATE, ACTIVITY_LOG_RESPONSE_SAMPLE_RATE
+
+logger = structlog.get_logger(__name__)
+
+FILENAME = "activity_log.ndjson.gz"
+
+# Strings longer than this are cut in the in-memory summary (not on disk).
+_SUMMARY_MAX_CHARS = 2000
+
+# heavy field → length key kept in its place (chars, or items for lists)
+_HEAVY_FIELDS = {
+    "full_prompt":       "prompt_chars",
+    "full_response":     "response_chars",
+    "search_results":    "result_count",
+    "extracted_content": "content_chars",
+}
+
+
+# Serialises and compresses every request's entries off the event loop.
+_writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="activity-log")
+
+
+def _sampled(field: str) -> bool:
+    rate = ACTIVITY_LOG_PROMPT_SAMPLE_RATE if field == "full_prompt" else ACTIVITY_LOG_RESPONSE_SAMPLE_RATE
+    return rate >= 1.0 or random.random() < rate
+
+
+def _summarise(value):
+    if isinstance(value, str) and len(value) > _SUMMARY_MAX_CHARS:
+        return value[:_SUMMARY_MAX_CHARS] + "…"
+    return value
+
+
+class ActivityLog(list):
+    """request_log list that streams full entries to disk and keeps summaries."""
+
+    def __init__(self, output_dir: str):
+        super().__init__()
+        self.path = os.path.join(output_dir, FILENAME)
+        self._fh = None
+        self._closed = False    # no further entries are queued
+        self._failed = False    # a write failed; the file is incomplete
+        self._finished: Future | None = None    # the first close()'s _finish
+        self._close_lock = threading.Lock()
+
+    def append(self, entry: dict) -> None:  # type: ignore[override]
+        full = dict(entry)
+        summary = {}
+        for key, value in entry.items():
+            length_key = _HEAVY_FIELDS.get(key)
+            if length_key is None:
+                summary[key] = _summarise(value)
+                continue
+            length = len(value) if isinstance(value, (str, list)) else 0
+            summary[length_key] = length
+            if not _sampled(key):
+                del full[key]
+                full[length_key] = length
+        if not self._closed:
+            _writer.submit(self._write, full)
+        super().append(summary)
+
+    def extend(self, entries) -> None:  # type: ignore[override]
+        for entry in entries:
+            self.append(entry)
+
+    def __iadd__(self, entries):  # type: ignore[override]
+        self.extend(entries)
+        return self
+
+    def _append_only(self, *args, **kwargs):
+        raise TypeError("ActivityLog is append-only — entries on disk cannot be changed")
+
+    insert = __setitem__ = __delitem__ = pop = remove = clear = sort = reverse = _append_only  # type: ignore[assignment]
+    __imul__ = _append_only  # type: ignore[assignment]
+
+    # ── Writer thread ─────────────────────────────────────────────────────────
+
+    def _write(self, entry: dict) -> None:
+        if self._failed:
+            return
+        try:
+            if self._fh is None:
+                self._fh = gzip.open(self.path, "wt", encoding="utf-8")
+            self._fh.write(json.dumps(entry, default=str) + "\n")
+        except Exception as exc:
+            # A full disk must not fail the generation — the summaries remain.
+            logger.warning("activity_log_write_failed", path=self.path, error=str(exc))
+            self._failed = True
+
+    def _finish(self) -> bool:
+        if self._fh is None:
+            return False
+        wrote = not self._failed
+        try:
+            self._fh.close()
+        except Exception as exc:
+            logger.warning("activity_log_close_failed", path=self.path, error=str(exc))
+            wrote = False
+        self._fh = None
+        self._failed = True
+        return wrote
+
+    def _flush(self) -> None:
+        if self._fh is not None:
+            self._fh.flush()
+
+    # ── Blocking — call from a thread when on the event loop ─────────────────
+
+    def close(self) -> bool:
+        """Write the queued entries and finish the gzip stream. Returns True
+        when a complete file is on disk.
+
+        Idempotent: every call waits on the first call's _finish and returns
+        its result, so a second closer never sees an already-released file."""
+        with self._close_lock:
+            self._closed = True
+            if self._finished is None:
+                self._finished = _writer.submit(self._finish)
+        return self._finished.result()
+
+    def full_entries(self) -> list[dict]:
+        """Every entry appended so far, read back from disk (close() not required)."""
+        _writer.submit(self._flush).result()
+        return list(read(self.path)) if os.path.exists(self.path) else []
+
+
+def read(path: str) -> Iterator[dict]:
+    """Entries of an activity_log.ndjson.gz file, tolerating a truncated tail."""
+    try:
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+    except (EOFError, OSError, json.JSONDecodeError) as exc:
+        # An unfinished stream (crash mid-request) still yields what it has.
+        logger.warning("activity_log_read_truncated", path=path, error=str(exc))
+
+
+def full_entries(log: list) -> list[dict]:
+    """Full entries for the active request log, whatever its type."""
+    return log.full_entries() if isinstance(log, ActivityLog) else list(log)
@@ -24,7 +24,8 @@ from core.config import (
     BEAT_RENDER_TIMEOUT_S,
     BEAT_RENDER_QUALITY,
 )
-from services.frame_generation.planner import call_llm, _log
+from services.frame_generation.planner import call_llm_async, _log
+from services.llm_scheduler import Priority
 from services.frame_generation.manim.manim_generator import (
     _manim_cmd, _extract_code, _sanitize_manim_code,
     _classify_render_error, _extract_bad_name, _build_fallback_prompt,
@@ -128,22 +129,23 @@ def _render_beat_sync(
 
 
 # ---------------------------------------------------------------------------
-# Code-gen helper (sync, called via asyncio.to_thread)
+# Code-gen helper (async — never holds a default-executor thread)
 # ---------------------------------------------------------------------------
 
-def _codegen(beat_description: str, narration: str, prompt_template: str) -> str:
+async def _codegen(beat_description: str, narration: str, prompt_template: str) -> str:
     """One LLM call → raw Manim Python code string (a narrated VoiceoverScene)."""
     prompt = (
         prompt_template
         .replace("{{BEAT_DESCRIPTION}}", beat_description)
         .replace("{{NARRATION}}", narration or "")
     )
-    raw = call_llm(
+    raw = await call_llm_async(
         prompt,
         4000,   # voiceover scenes are longer than bare scenes — avoid truncation
         "manim_codegen_prompt.md",
         _STATIC_PREFIX,
         task="beat_codegen",
+        priority=Priority.VIDEO,
     )
     code = _extract_code(raw)
     code, fixes = _sanitize_manim_code(code)
@@ -215,7 +217,7 @@ async def _generate_one_beat(beat: BeatPlan, output_dir: str) -> BeatResult:
 
         # 3. Visualization beats: attempt 1
         method = "codegen"
-        code = await asyncio.to_thread(_codegen, beat.description, beat.narration, _CODEGEN_PROMPT_TEMPLATE)
+        code = await _codegen(beat.description, beat.narration, _CODEGEN_PROMPT_TEMPLATE)
 
         valid, syn_err = _is_valid_syntax(code)
         if not valid:
@@ -225,7 +227,7 @@ async def _generate_one_beat(beat: BeatPlan, output_dir: str) -> BeatResult:
                 f"⚠️ RETRY — previous attempt had a syntax error: {syn_err}\n"
                 "Write simpler code: fewer objects, shorter animation sequences, no complex string formatting.\n\n"
             ) + _CODEGEN_PROMPT_TEMPLATE
-            code = await asyncio.to_thread(_codegen, beat.description, beat.narration, retry_template)
+            code = await _codegen(beat.description, beat.narration, retry_template)
             valid, syn_err2 = _is_valid_syntax(code)
             if not valid:
                 logger.error("beat_syntax_error_attempt2", beat=beat.index, err=syn_err2)
@@ -255,7 +257,7 @@ async def _generate_one_beat(beat: BeatPlan, output_dir: str) -> BeatResult:
               "reason": error_cat, "stderr": stderr[-300:]})
 
         retry_template = _build_fallback_prompt(_CODEGEN_PROMPT_TEMPLATE, error_cat, bad_name)
-        code2 = await asyncio.to_thread(_codegen, beat.description, beat.narration, retry_template)
+        code2 = await _codegen(beat.description, beat.narration, retry_template)
 
         valid2, syn_err3 = _is_valid_syntax(code2)
         if not valid2:
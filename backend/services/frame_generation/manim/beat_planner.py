@@ -6,11 +6,11 @@ mathematical thinking once, producing detailed shot-by-shot descriptions for
 every beat. Subsequent code-gen calls are pure Manim API translation.
 """
 
-import asyncio
 import structlog
 from pathlib import Path
 
-from services.frame_generation.planner import call_llm, _extract_json, _log
+from services.frame_generation.planner import call_llm_async, _extract_json, _log
+from services.llm_scheduler import Priority
 from .beat_types import BeatScript
 
 logger = structlog.get_logger(__name__)
@@ -43,13 +43,13 @@ async def plan_beats(user_prompt: str, conversation_context: str = "") -> BeatSc
 
     _log({"event": "beat_planner_start", "prompt_chars": len(prompt)})
 
-    raw = await asyncio.to_thread(
-        call_llm,
+    raw = await call_llm_async(
         prompt,
         9000,
         "planning_beats.md",
         _STATIC_PREFIX,
         planner_svc,   # override_service — already resolved above
+        priority=Priority.VIDEO,
     )
 
     plan_dict = _extract_json(raw)
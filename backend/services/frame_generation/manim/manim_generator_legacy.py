@@ -23,7 +23,8 @@ import sys
 from pathlib import Path
 from typing import Optional, Tuple
 
-from services.frame_generation.planner import GenerationPlan, FramePlan, call_llm
+from services.frame_generation.planner import GenerationPlan, FramePlan, call_llm_async
+from services.llm_scheduler import Priority
 
 logger = structlog.get_logger(__name__)
 
@@ -250,12 +251,12 @@ def _build_fallback_prompt(
 # Single frame: LLM call → Manim code string
 # ---------------------------------------------------------------------------
 
-def _generate_manim_code(
+async def _generate_manim_code(
     frame: FramePlan,
     plan: GenerationPlan,
     prompt_template: str,
 ) -> str:
-    """Synchronous LLM call. Returns raw Manim Python code string."""
+    """Async LLM call. Returns raw Manim Python code string."""
     primary_color = getattr(plan.shared_style, "strokeColor", "#4F86C6")
 
     all_captions = [f.caption for f in plan.frames]
@@ -323,10 +324,11 @@ def _generate_manim_code(
     if cache_prefix:
         cache_prefix = cache_prefix.replace("{{PRIMARY_COLOR}}", primary_color)
 
-    return call_llm(
+    return await call_llm_async(
         prompt, 5000,
         prompt_name=f"manim_prompt.md (frame {frame.index})",
         cache_prefix=cache_prefix,
+        priority=Priority.VIDEO,
     )
 
 
@@ -403,7 +405,7 @@ async def _generate_one_manim_frame(
     output_dir: str,
 ) -> Optional[str]:
     # Attempt 1 — normal generation
-    raw = await asyncio.to_thread(_generate_manim_code, frame, plan, prompt_template)
+    raw = await _generate_manim_code(frame, plan, prompt_template)
     code = _extract_code(raw)
     code, fixes = _sanitize_manim_code(code)
     if fixes:
@@ -435,7 +437,7 @@ async def _generate_one_manim_frame(
             code = stripped  # carry the partial fix into the full LLM retry
 
     fallback_template = _build_fallback_prompt(prompt_template, error_category, bad_name)
-    raw2 = await asyncio.to_thread(_generate_manim_code, frame, plan, fallback_template)
+    raw2 = await _generate_manim_code(frame, plan, fallback_template)
     code2 = _extract_code(raw2)
     code2, fixes2 = _sanitize_manim_code(code2)
     if fixes2:
@@ -63,7 +63,11 @@ _SVG_PROMPT_TEMPLATE   = _load_prompt("svg_prompt.md")
 # ── Utilities ─────────────────────────────────────────────────────────────────
 
 def count_llm_calls(log: list) -> int:
-    return sum(1 for e in log if e.get("event") in ("llm_call", "llm_call_fast"))
+    """Count provider round-trips — response-cache hits are not API calls."""
+    return sum(
+        1 for e in log
+        if e.get("event") in ("llm_call", "llm_call_fast") and not e.get("cache_hit")
+    )
 
 
 def _parse_narrations_from_file(narration_path: str) -> list[str]:
@@ -612,13 +616,9 @@ async def _run_frame_generation(
     if plan.intent_type in MANIM_INTENT_TYPES and manim_available():
         _log({"event": "stage_start", "stage": "frame_generation", "path": "manim"})
         manim_dir  = os.path.join(output_dir, "manim")
-        png_paths  = await generate_manim_frames(plan, _MANIM_PROMPT_TEMPLATE, manim_dir)
+        png_paths, frame_codes = await generate_manim_frames(plan, _MANIM_PROMPT_TEMPLATE, manim_dir)
         _log({"event": "stage_complete", "stage": "frame_generation", "path": "manim"})
 
-        from services.frame_generation.planner import request_log
-        lifecycle_log = request_log.get() or []
-        manim_calls   = [e for e in lifecycle_log if e.get("event") == "llm_call"]
-        frame_codes   = [e["full_response"] for e in manim_calls[1:]]
         py_content    = "\n\n# " + "=" * 70 + "\n\n".join(
             f"# Frame {i+1}: {captions[i] if i < len(captions) else ''}\n\n{code}"
             for i, code in enumerate(frame_codes)
@@ -0,0 +1,130 @@
+"""
+Content-addressed cache of widget codegen output (freeform_html, p5_sketch,
+slide_deck), shared across workers in the Postgres codegen_cache table
+(created by init_db / migration 008).
+
+Sits behind _run_codegen_with_prompt in interactive_service. Cache key =
+sha256(prompt file + prompt version + model + canonical spec + user prompt):
+
+  prompt file     — one codegen template per entity type
+  prompt version  — sha256 of the template text. Editing a codegen prompt
+                    changes every key for it, and the first store under the
+                    new version deletes the rows written under older ones.
+  canonical spec  — NFKC-normalised, whitespace collapsed; the planner's
+                    specs for popular topics often differ only there. Case is
+                    kept: labels, identifiers and code in a spec are visible.
+  user prompt     — the templates substitute {{USER_PROMPT}}, so the widget
+                    depends on the question too; canonicalised like the spec.
+
+last_hit_at drives LRU eviction down to CODEGEN_CACHE_MAX_ENTRIES, run once
+every _EVICT_EVERY stores. Degrades gracefully: any DB error is logged and
+treated as a miss.
+"""
+
+import hashlib
+import json
+import structlog
+import unicodedata
+from typing import Optional
+
+from core.config import CODEGEN_CACHE_ENABLED, CODEGEN_CACHE_MAX_ENTRIES
+from services import prompt_registry
+
+logger = structlog.get_logger(__name__)
+
+# Run LRU eviction once every N stores rather than on every write.
+_EVICT_EVERY = 50
+
+_stores = 0
+# (prompt_name, version) pairs whose older-version rows this worker already dropped.
+_pruned: set[tuple[str, str]] = set()
+
+
+# ── Key derivation ────────────────────────────────────────────────────────────
+
+def canonical_spec(spec: str) -> str:
+    return " ".join(unicodedata.normalize("NFKC", spec).split())
+
+
+def prompt_version(path: str) -> str:
+    """sha256 of the codegen template's current text (memoized until it reloads)."""
+    return prompt_registry.derived(
+        ("codegen_version", path),
+        lambda: hashlib.sha256(prompt_registry.get(path).encode()).hexdigest(),
+        deps=(path,),
+    )
+
+
+def cache_key(prompt_name: str, version: str, model: str, spec: str, user_prompt: str) -> str:
+    payload = json.dumps(
+        {"prompt": prompt_name, "version": version, "model": model,
+         "spec": canonical_spec(spec), "user_prompt": canonical_spec(user_prompt)},
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+# ── Public API ────────────────────────────────────────────────────────────────
+
+async def lookup(key: str) -> Optional[str]:
+    """Cached codegen output for key, or None on miss/error."""
+    if not CODEGEN_CACHE_ENABLED:
+        return None
+    from core.db_async import get_async_db
+    try:
+        async with get_async_db() as conn:
+            html = await conn.fetchval(
+                "UPDATE codegen_cache "
+                "SET last_hit_at = now(), hit_count = hit_count + 1 "
+                "WHERE key = $1 RETURNING html",
+                key,
+            )
+    except Exception as exc:
+        logger.warning("codegen_cache_lookup_failed", error=str(exc))
+        return None
+    logger.info("codegen_cache_hit" if html is not None else "codegen_cache_miss", key=key[:12])
+    return html
+
+
+async def store(key: str, prompt_name: str, version: str, model: str, html: str, usage: dict) -> None:
+    """Persist fresh codegen output; prunes superseded prompt versions and LRU overflow."""
+    global _stores
+    if not CODEGEN_CACHE_ENABLED or not html:
+        return
+    from core.db_async import get_async_db
+    try:
+        async with get_async_db() as conn:
+            await conn.execute(
+                "INSERT INTO codegen_cache "
+                "(key, prompt_name, prompt_version, model, html, usage, created_at, last_hit_at) "
+                "VALUES ($1, $2, $3, $4, $5, $6, now(), now()) "
+                "ON CONFLICT (key) DO UPDATE SET html = EXCLUDED.html, "
+                "usage = EXCLUDED.usage, last_hit_at = now()",
+                key, prompt_name, version, model, html, usage or {},
+            )
+            if (prompt_name, version) not in _pruned:
+                dropped = await conn.execute(
+                    "DELETE FROM codegen_cache WHERE prompt_name = $1 AND prompt_version <> $2",
+                    prompt_name, version,
+                )
+                _pruned.add((prompt_name, version))
+                logger.info("codegen_cache_pruned", prompt=prompt_name, version=version[:12],
+                            result=dropped)
+        _stores += 1
+        if _stores % _EVICT_EVERY == 0:
+            await _evict()
+    except Exception as exc:
+        logger.warning("codegen_cache_store_failed", prompt=prompt_name, error=str(exc))
+
+
+async def _evict() -> None:
+    from core.db_async import get_async_db
+    async with get_async_db() as conn:
+        await conn.execute(
+            "DELETE FROM codegen_cache WHERE key IN ("
+            "  SELECT key FROM codegen_cache "
+            "  ORDER BY last_hit_at DESC OFFSET $1"
+            ")",
+            CODEGEN_CACHE_MAX_ENTRIES,
+        )
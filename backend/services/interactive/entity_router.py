@@ -0,0 +1,232 @@
+"""
+Local entity-selection router — k-NN over past (question, entities, domain)
+tuples, tried before the entity_selector LLM call.
+
+The `entity_routes` table (pgvector, created by init_db / migration 009) holds
+one row per first-turn question:
+
+  source = "history"   mined from sessions.frames_meta by
+                       scripts/train_entity_router.py — the entity types the
+                       scene actually used; no visual brief
+  source = "selector"  written after every live entity_selector call, with
+                       its visual_brief and recommended model
+
+route() takes embed() of the user's raw question (the only text history has
+for past sessions), fetches its ENTITY_ROUTER_K nearest rows in the same domain and
+votes (vote()): each neighbour within ENTITY_ROUTER_MAX_DIST counts with
+weight 1 − distance, an entity is kept when it carries ≥ half the weight, and
+confidence is the weighted mean Jaccard overlap between the kept set and each
+neighbour's set. Below ENTITY_ROUTER_MIN_NEIGHBOURS neighbours or
+ENTITY_ROUTER_MIN_CONFIDENCE it returns None and the caller falls back to the
+LLM. The nearest neighbour's visual brief and model are reused when it has
+them.
+
+Only first turns are routed — a follow-up's raw text means little without its
+conversation. Degrades gracefully: embedding or DB errors are a miss.
+
+The table is capped at ENTITY_ROUTER_MAX_ROWS per domain: every _PRUNE_EVERY
+remember() calls, the oldest rows of that domain beyond the cap are deleted.
+"""
+
+import asyncio
+import hashlib
+import structlog
+from dataclasses import dataclass, field
+from typing import Optional
+
+from core.config import (
+    ENTITY_ROUTER_K,
+    ENTITY_ROUTER_MAX_DIST,
+    ENTITY_ROUTER_MAX_ROWS,
+    ENTITY_ROUTER_MIN_CONFIDENCE,
+    ENTITY_ROUTER_MIN_NEIGHBOURS,
+)
+
+logger = structlog.get_logger(__name__)
+
+# The entity selector picks 2–5 entities; never route more than it would.
+_MAX_ENTITIES = 5
+
+# Trim a domain to ENTITY_ROUTER_MAX_ROWS once every N stores, not on every write.
+_PRUNE_EVERY = 50
+_stores = 0
+
+
+@dataclass
+class Neighbour:
+    entities:     list[str]
+    distance:     float
+    visual_brief: str = ""
+    model:        str = ""
+
+
+@dataclass
+class Route:
+    entities:     list[str]
+    confidence:   float
+    neighbours:   int
+    distance:     float                 # nearest neighbour's
+    visual_brief: str = ""
+    model:        str = ""
+    scores:       dict = field(default_factory=dict)
+
+
+def prompt_hash(message: str) -> str:
+    return hashlib.sha256(" ".join(message.split()).lower().encode()).hexdigest()
+
+
+def vote(
+    neighbours: list[Neighbour],
+    max_distance: float = ENTITY_ROUTER_MAX_DIST,
+    min_confidence: float = ENTITY_ROUTER_MIN_CONFIDENCE,
+    min_neighbours: int = ENTITY_ROUTER_MIN_NEIGHBOURS,
+) -> Optional[Route]:
+    """Weighted k-NN vote over `neighbours` (nearest first); None when not confident."""
+    close = [n for n in neighbours if n.distance <= max_distance and n.entities]
+    if len(close) < min_neighbours:
+        return None
+
+    weights = [max(1e-6, 1.0 - n.distance) for n in close]
+    total = sum(weights)
+    scores: dict[str, float] = {}
+    for n, w in zip(close, weights):
+        for entity in dict.fromkeys(n.entities):
+            scores[entity] = scores.get(entity, 0.0) + w / total
+    # Stable sort: ties keep the nearest neighbour's entity order.
+    chosen = sorted((e for e, s in scores.items() if s >= 0.5), key=lambda e: -scores[e])
+    chosen = chosen[:_MAX_ENTITIES]
+    if not chosen:
+        return None
+
+    kept = set(chosen)
+    confidence = sum(
+        w * len(kept & set(n.entities)) / len(kept | set(n.entities))
+        for n, w in zip(close, weights)
+    ) / total
+    if confidence < min_confidence:
+        return None
+
+    nearest = close[0]
+    return Route(
+        entities     = chosen,
+        confidence   = round(confidence, 4),
+        neighbours   = len(close),
+        distance     = round(nearest.distance, 4),
+        visual_brief = nearest.visual_brief,
+        model        = nearest.model,
+        scores       = {e: round(scores[e], 4) for e in chosen},
+    )
+
+
+async def neighbours(
+    embedding: list[float],
+    domain: str,
+    k: int = ENTITY_ROUTER_K,
+    exclude_hash: Optional[str] = None,
+) -> list[Neighbour]:
+    """The k nearest stored questions in `domain`, nearest first."""
+    from core.db_async import get_async_db_read
+    async with get_async_db_read() as conn:
+        rows = await conn.fetch(
+            """
+            SELECT entities, visual_brief, model, embedding <=> $1 AS distance
+            FROM entity_routes
+            WHERE domain = $2 AND prompt_hash IS DISTINCT FROM $4
+            ORDER BY embedding <=> $1
+            LIMIT $3
+            """,
+            embedding, domain, k, exclude_hash,
+        )
+    return [
+        Neighbour(entities=list(r["entities"] or []), distance=float(r["distance"]),
+                  visual_brief=r["visual_brief"] or "", model=r["model"] or "")
+        for r in rows if r["distance"] is not None
+    ]
+
+
+async def embed(message: str) -> Optional[list[float]]:
+    """The router's query vector for `message`, or None if embedding failed."""
+    from services.research.vector_store import _embed_async
+    embeddings = await _embed_async([message])
+    return embeddings[0] if embeddings else None
+
+
+async def route(embedding: list[float], domain: str) -> Optional[Route]:
+    """
+    Route a question by its embed() vector; None on a miss. Embedding is
+    split out so the caller can keep the vector for remember_later() even
+    when it stops waiting for the route.
+    """
+    try:
+        found = await neighbours(embedding, domain)
+    except Exception as exc:
+        logger.debug("entity_router_lookup_skipped", error=str(exc))
+        return None
+    return vote(found)
+
+
+async def remember(
+    message: str,
+    embedding: list[float],
+    domain: str,
+    entities: list[str],
+    visual_brief: str = "",
+    model: str = "",
+    source: str = "selector",
+) -> None:
+    """Store one labelled question. A live selector answer replaces a mined one."""
+    global _stores
+    if not embedding or not entities:
+        return
+    from core.db_async import get_async_db
+    try:
+        async with get_async_db() as conn:
+            await conn.execute(
+                """
+                INSERT INTO entity_routes
+                    (prompt_hash, prompt, domain, entities, visual_brief, model, source, embedding)
+                VALUES ($1, $2, $3, $4, $5, $6, $7, $8)
+                ON CONFLICT (prompt_hash, domain) DO UPDATE SET
+                    entities     = EXCLUDED.entities,
+                    visual_brief = EXCLUDED.visual_brief,
+                    model        = EXCLUDED.model,
+                    source       = EXCLUDED.source,
+                    embedding    = EXCLUDED.embedding,
+                    created_at   = now()
+                WHERE EXCLUDED.source = 'selector' OR entity_routes.source = 'history'
+                """,
+                prompt_hash(message), message[:2000], domain, entities,
+                visual_brief or None, model or None, source, embedding,
+            )
+            _stores += 1
+            if _stores % _PRUNE_EVERY == 0:
+                pruned = await conn.execute(
+                    """
+                    DELETE FROM entity_routes
+                    WHERE domain = $1 AND prompt_hash IN (
+                        SELECT prompt_hash FROM entity_routes
+                        WHERE domain = $1
+                        ORDER BY created_at DESC
+                        OFFSET $2
+                    )
+                    """,
+                    domain, ENTITY_ROUTER_MAX_ROWS,
+                )
+                logger.info("entity_routes_pruned", domain=domain, result=pruned)
+    except Exception as exc:
+        logger.warning("entity_router_store_failed", error=str(exc))
+
+
+_BACKGROUND_TASKS: set = set()
+
+
+def remember_later(message: str, embedding: "asyncio.Future", *args, **kwargs) -> None:
+    """remember() off the critical path, once the embed() task finishes."""
+    async def _remember() -> None:
+        q_emb = await embedding
+        if q_emb:
+            await remember(message, q_emb, *args, **kwargs)
+
+    task = asyncio.create_task(_remember())
+    _BACKGROUND_TASKS.add(task)
+    task.add_done_callback(_BACKGROUND_TASKS.discard)
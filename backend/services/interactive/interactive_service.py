@@ -4,12 +4,14 @@ Interactive Mode pipeline — produces a Scene IR via SSE events.
 SSE event sequence:
   { type: "meta",  title, follow_ups }          ← emitted right after scene planning
   { type: "block", block: { id, type, ... } }   ← one per block in order
+  { type: "block_update", block: { ... } }      ← widget html, once its codegen finishes
   { type: "done",  session_id }
 
 Pipeline stages:
   1. _select_entities   → 2–5 entity names best suited to the question
   2. _plan_scene        → SceneIR (uses full schemas for selected entities + injects sources)
-  3. codegen (if needed) for freeform_html / p5_sketch blocks
+  3. codegen (if needed) for freeform_html / p5_sketch / slide_deck blocks, in the
+     background — their blocks stream first as placeholders (html=None)
 
 Entity selector receives enriched_prompt from plan_and_classify + domain; outputs visual_brief + entities.
 Scene planner receives enriched_prompt (from plan_and_classify) + visual_brief + raw research sources.
@@ -33,10 +35,23 @@ import time
 from dataclasses import dataclass, field
 from typing import AsyncGenerator
 
-from core.config import SCENE_PLANNER_MAX_TOKENS, SOURCES_SNIPPET_MAX_CHARS
+from core.config import (
+    CODEGEN_MAX_CONCURRENCY,
+    ENTITY_ROUTER_ENABLED,
+    ENTITY_ROUTER_TIMEOUT_S,
+    SCENE_PLANNER_MAX_TOKENS,
+    SOURCE_MAX_TOKENS,
+)
 from services.frame_generation.planner import _extract_json, request_llm_service, _log, _accumulate_tokens
 from services.interactive.scene_ir import SceneIR, SceneBlock
-from services.llm_service import LLMService, OpenAIProvider, ClaudeProvider, GeminiProvider, default_llm_service
+from services.json_stream import JsonFieldStream
+from services import llm_cache, llm_metrics, llm_scheduler, prompt_registry, token_budget
+from services.interactive import codegen_cache, entity_router
+from services.llm_scheduler import Priority
+from services.llm_service import (
+    LLMService, OpenAIProvider, ClaudeProvider, GeminiProvider, default_llm_service,
+    has_native_stream, scoped_stream,
+)
 
 logger = structlog.get_logger(__name__)
 
@@ -90,60 +105,139 @@ _CATALOG_DIR = os.path.join(_PROMPTS_DIR, "catalog")
 
 
 def _load_prompt(filename: str) -> str:
-    with open(os.path.join(_PROMPTS_DIR, filename), encoding="utf-8") as f:
-        return f.read()
+    return prompt_registry.get(os.path.join(_PROMPTS_DIR, filename))
 
 
 def _load_domain_file(domain: str) -> str:
-    path = os.path.join(_DOMAINS_DIR, f"{domain}.md")
-    if os.path.exists(path):
-        with open(path, encoding="utf-8") as f:
-            return f.read()
-    return ""
+    return prompt_registry.get(os.path.join(_DOMAINS_DIR, f"{domain}.md"), optional=True)
 
 
 def _load_entity_schema(entity_name: str) -> str:
-    path = os.path.join(_CATALOG_DIR, f"{entity_name}.md")
-    if os.path.exists(path):
-        with open(path, encoding="utf-8") as f:
-            return f.read()
-    return ""
+    return prompt_registry.get(os.path.join(_CATALOG_DIR, f"{entity_name}.md"), optional=True)
+
+
+_CATALOG_HEADER = (
+    "## Component Catalog\n\n"
+    "### Entity block format — always use this exact shape\n\n"
+    '```json\n{ "id": "<b1>", "type": "entity", "entity_type": "<name>", "props": {} }\n```\n\n'
+    '`"type"` is ALWAYS the literal `"entity"`. `"entity_type"` holds the component name.\n'
+)
 
 
 def _build_catalog(selected_entities: list[str]) -> str:
     """
-    Build the catalog section for the planner prompt.
+    Full schemas for selected_entities, the variable part of the catalog.
 
-    Full schemas are loaded only for selected_entities.
-    slim_index is appended so the planner knows all types exist.
+    Memoized per entity set: schemas are emitted in sorted (canonical) order,
+    so any ordering of the same selection yields the identical string.
     """
-    header = (
-        "## Component Catalog\n\n"
-        "### Entity block format — always use this exact shape\n\n"
-        '```json\n{ "id": "<b1>", "type": "entity", "entity_type": "<name>", "props": {} }\n```\n\n'
-        '`"type"` is ALWAYS the literal `"entity"`. `"entity_type"` holds the component name.\n'
-    )
-    schemas = [_load_entity_schema(e) for e in selected_entities]
-    schemas = [s for s in schemas if s]
-    slim_fallback = _load_prompt("slim_index.md")
-    parts = [header] + schemas + [slim_fallback]
-    return "\n\n---\n\n".join(parts)
+    entities = tuple(sorted(set(selected_entities)))
+    deps = [os.path.join(_CATALOG_DIR, f"{e}.md") for e in entities]
+
+    def _assemble() -> str:
+        schemas = [_load_entity_schema(e) for e in entities]
+        return "\n\n---\n\n".join(s for s in schemas if s)
+
+    return prompt_registry.derived(("catalog", entities), _assemble, deps)
+
+
+def _planner_system_blocks(domain: str, selected_entities: list[str]) -> list[str]:
+    """
+    The scene planner system prompt, split at its cache breakpoints and
+    ordered most-static first so every request shares the longest possible
+    byte-identical prefix:
+
+      1. base_planner.md + catalog header + slim_index — identical for every
+         request with selected entities (base + component_catalog.md without)
+      2. the domain file — one variant per domain
+      3. the selected entities' schemas, in canonical order
+
+    "".join(blocks) is the system prompt. ClaudeProvider marks a cache
+    breakpoint at the end of each block (system_blocks=); OpenAI and Gemini
+    cache the shared prefix automatically.
+    """
+    base_path = os.path.join(_PROMPTS_DIR, "base_planner.md")
+    if selected_entities:
+        slim_path = os.path.join(_PROMPTS_DIR, "slim_index.md")
+        static = prompt_registry.derived(
+            ("planner_static", "slim"),
+            lambda: "\n\n".join([_load_prompt("base_planner.md"), _CATALOG_HEADER])
+                    + "\n\n---\n\n" + _load_prompt("slim_index.md"),
+            [base_path, slim_path],
+        )
+        schemas = _build_catalog(selected_entities)
+    else:
+        full_path = os.path.join(_PROMPTS_DIR, "component_catalog.md")
+        static = prompt_registry.derived(
+            ("planner_static", "full"),
+            lambda: "\n\n".join([_load_prompt("base_planner.md"),
+                                  _load_prompt("component_catalog.md")]),
+            [base_path, full_path],
+        )
+        schemas = ""
+
+    domain_ctx = _load_domain_file(domain)
+    blocks = [static]
+    if domain_ctx:
+        blocks.append("\n\n" + domain_ctx)
+    if schemas:
+        blocks.append("\n\n---\n\n" + schemas)
+    return blocks
+
 
+def _format_source(i: int, s: dict, provider: str | None = None) -> str:
+    """One [N] entry of the sources block, content capped at SOURCE_MAX_TOKENS."""
+    # Top sources carry full page content; lower-ranked carry snippet only.
+    # Prefer content (full page) when present, fall back to snippet.
+    content = token_budget.truncate(
+        s.get("content") or s.get("snippet") or "", SOURCE_MAX_TOKENS, provider)
+    return (f"[{i}] **{s.get('title', '')}** ({s.get('domain', '')})\n"
+            f"URL: {s.get('url', '')}\n{content}\n")
 
-def _build_sources_block(sources: list[dict]) -> str:
+
+def _join_sources(entries: list[str]) -> str:
     """Format research sources for injection into the scene planner user prompt."""
-    if not sources:
+    entries = [e for e in entries if e]
+    if not entries:
         return ""
-    lines = ["## Research Sources\n\nUse [N] inline citations in text blocks for factual claims.\n"]
-    for i, s in enumerate(sources, 1):
-        # Top sources carry full page content; lower-ranked carry snippet only.
-        # Prefer content (full page) when present, fall back to snippet.
-        content = (s.get("content") or s.get("snippet") or "")[:SOURCES_SNIPPET_MAX_CHARS]
-        lines.append(f"[{i}] **{s.get('title', '')}** ({s.get('domain', '')})")
-        lines.append(f"URL: {s.get('url', '')}")
-        lines.append(content)
-        lines.append("")
-    return "\n".join(lines)
+    header = "## Research Sources\n\nUse [N] inline citations in text blocks for factual claims.\n"
+    return "\n".join([header] + entries)
+
+
+def _build_planner_user_msg(
+    system_parts: list[str],
+    enriched_prompt: str,
+    conversation_context: str,
+    sources: list[dict],
+    visual_brief: str,
+    provider: str | None,
+) -> str:
+    """
+    Assemble the scene planner user message within INPUT_TOKEN_BUDGETS["scene_planner"].
+
+    The question, visual brief and system prompt always go out; sources are
+    kept in rank order and conversation context (newest turns first, so a
+    selection excerpt appended to it survives) gets whatever is left. Source
+    numbering is preserved when lower-ranked sources are dropped so [N]
+    citations still match the sources list sent to the client.
+    """
+    visual_brief_block = f"Visual brief: {visual_brief}\n\n" if visual_brief else ""
+    question = f"USER QUESTION: {enriched_prompt}"
+    source_sections = [
+        token_budget.Section(f"source:{i}", _format_source(i, s, provider))
+        for i, s in enumerate(sources or [], 1)
+    ]
+    packed = token_budget.pack(
+        "scene_planner", provider, [visual_brief_block, question],
+        source_sections + [token_budget.Section("context", conversation_context, keep="tail")],
+        static=system_parts,
+    )
+    context = packed["context"]
+    context_block = f"Conversation context:\n{context}\n\n" if context else ""
+    sources_block = _join_sources([packed[sec.name] for sec in source_sections])
+    if sources_block:
+        sources_block += "\n"
+    return f"{context_block}{sources_block}{visual_brief_block}{question}"
 
 
 # ── Streaming JSON helpers ─────────────────────────────────────────────────────
@@ -153,10 +247,10 @@ def _build_sources_block(sources: list[dict]) -> str:
 # waiting for the full response before emitting anything, we stream the raw
 # token output and yield each block as soon as its closing `}` arrives.
 #
-# Three building-block functions:
+# Building blocks:
 #   _extract_meta_fields  — parse title/follow_ups/etc. from the JSON prefix
-#   _scan_next_block      — brace-depth scanner to find the next complete object
-#   _extract_events_from_buffer — stateless driver called on each new token
+#   _PlanStreamParser     — fed each token; emits meta and every complete
+#                           block (services/json_stream.JsonFieldStream)
 #
 # Two per-provider token streamers (mirrors synthesiser.py):
 #   _stream_tokens_anthropic
@@ -249,139 +343,69 @@ def _extract_meta_anywhere(buf: str) -> dict:
     return out
 
 
-def _scan_next_block(buf: str, pos: int) -> tuple[int, "str | None"]:
-    """
-    Scan `buf` starting at `pos` for the next complete JSON object.
-
-    Handles nested objects, JSON strings (including escape sequences), and
-    ignores structural characters inside strings.
-
-    Returns:
-        (new_pos, json_str)  — complete object found; new_pos is right after `}`
-        (pos,     None)      — object not yet complete; caller should wait for
-                               more tokens and retry with the same `pos`
-        (-1,      None)      — `]` found at depth 0 — the blocks array has ended
-    """
-    n = len(buf)
-
-    # Skip inter-object whitespace / commas
-    while pos < n and buf[pos] in " \t\n\r,":
-        pos += 1
-
-    if pos >= n:
-        return pos, None          # need more data
-
-    if buf[pos] == "]":
-        return -1, None           # array closed
-
-    if buf[pos] != "{":
-        return pos + 1, None      # unexpected char — skip it and keep going
-
-    depth = 0
-    in_string = False
-    escape_next = False
-    start = pos
-    i = pos
-
-    while i < n:
-        c = buf[i]
-
-        if escape_next:
-            escape_next = False
-            i += 1
-            continue
-
-        if in_string:
-            if c == "\\":
-                escape_next = True
-            elif c == '"':
-                in_string = False
-            i += 1
-            continue
-
-        # Outside a string
-        if c == '"':
-            in_string = True
-        elif c == "{":
-            depth += 1
-        elif c == "}":
-            depth -= 1
-            if depth == 0:
-                return i + 1, buf[start : i + 1]
-
-        i += 1
-
-    return start, None            # object incomplete — wait for more tokens
-
-
-def _extract_events_from_buffer(
-    buf: str,
-    meta_emitted: bool,
-    scan_pos: int,
-) -> tuple[list[dict], bool, int]:
+class _PlanStreamParser:
     """
-    Stateless driver: given the accumulated token buffer and current parse
-    state, return any new events that can be yielded right now.
-
-    Called on every new token — only O(new_chars) work after meta is found
-    because scan_pos advances past already-processed content.
+    Scene-planner events from services/json_stream.JsonFieldStream.
 
-    Returns:
-        events        — list of {"type": "_meta", ...} and/or {"type": "_block", "block": SceneBlock}
-        meta_emitted  — updated flag
-        scan_pos      — updated position inside the blocks array
+    feed() takes each raw token as it arrives and returns the events it
+    completes — a single {"type": "_meta", ...} with the top-level fields seen
+    once the `blocks` array opens, then one {"type": "_block", "block":
+    SceneBlock} per element of that array. Anything after the array closes
+    is ignored.
     """
-    events: list[dict] = []
 
-    # Phase 1 — find "blocks": [ and extract meta fields from the prefix
-    if not meta_emitted:
-        m = re.search(r'"blocks"\s*:\s*\[', buf)
-        if m:
-            meta_emitted = True
-            scan_pos = m.end()          # position right after the '['
-            meta_fields = _extract_meta_fields(buf, m.start())
-            events.append({"type": "_meta", **meta_fields})
-
-    # Phase 2 — extract every complete block object we can find from scan_pos
-    if meta_emitted:
-        while True:
-            new_pos, block_json = _scan_next_block(buf, scan_pos)
-
-            if new_pos == -1:           # ']' reached — array closed
-                break
-
-            if block_json is None:      # incomplete — wait for more tokens
+    def __init__(self) -> None:
+        self._fields = JsonFieldStream()
+        self._meta: "dict | None" = {}           # None once emitted
+        self._done = False
+
+    def feed(self, chunk: str) -> list[dict]:
+        events: list[dict] = []
+        if self._done:
+            return events
+        for key, index, value in self._fields.feed(chunk):
+            if key != "blocks":
+                if self._meta is not None and index is None:
+                    self._meta[key] = value
+                continue
+            self._emit_meta(events)
+            if index is None:
+                self._done = True           # blocks array closed
                 break
-
-            scan_pos = new_pos
-
             try:
-                block_data = json.loads(block_json)
-                block = SceneBlock(**block_data)
-                events.append({"type": "_block", "block": block})
+                events.append({"type": "_block", "block": SceneBlock(**value)})
             except Exception as exc:
                 logger.warning("streaming_block_invalid", error=str(exc),
-                               preview=block_json[:120])
+                               preview=json.dumps(value, default=str)[:120])
+        if self._fields.open_array == "blocks":
+            self._emit_meta(events)
+        return events
 
-    return events, meta_emitted, scan_pos
+    def _emit_meta(self, events: list[dict]) -> None:
+        if self._meta is not None:
+            events.append({"type": "_meta", **self._meta})
+            self._meta = None
 
 
 async def _stream_tokens_anthropic(
     svc: LLMService,
-    system_prompt: str,
+    system_blocks: list[str],
     user_msg: str,
     usage_sink: dict,
     max_tokens: int,
 ) -> AsyncGenerator[str, None]:
-    """Yield raw text tokens from the Anthropic streaming API."""
-    from services.llm_service import _get_async_anthropic_client
+    """
+    Yield raw text tokens from the Anthropic streaming API. system_blocks is
+    the system prompt split at its cache breakpoints (see _planner_system_blocks).
+    """
+    from services.llm_service import _claude_system, _get_async_anthropic_client
     client = _get_async_anthropic_client()
     model = getattr(svc.provider, "model", "claude-haiku-4-5-20251001")
 
     async with client.messages.stream(
         model=model,
         max_tokens=max_tokens,
-        system=system_prompt,
+        system=_claude_system("".join(system_blocks), system_blocks),
         messages=[{"role": "user", "content": user_msg}],
     ) as s:
         async for text in s.text_stream:
@@ -410,7 +434,7 @@ async def _stream_tokens_openai_compat(
 ) -> AsyncGenerator[str, None]:
     """Yield raw text tokens from OpenAI or Gemini (OpenAI-compatible) streaming API."""
     from services.llm_service import (
-        _get_async_openai_client, _get_async_gemini_client,
+        _chat_usage, _get_async_openai_client, _get_async_gemini_client,
     )
     provider = svc.provider
     client = (
@@ -445,11 +469,7 @@ async def _stream_tokens_openai_compat(
             yield chunk.choices[0].delta.content
         # Final chunk carries usage when stream_options is supported
         if getattr(chunk, "usage", None):
-            usage_sink.update({
-                "prompt_tokens":     getattr(chunk.usage, "prompt_tokens",     0),
-                "completion_tokens": getattr(chunk.usage, "completion_tokens", 0),
-                "total_tokens":      getattr(chunk.usage, "total_tokens",      0),
-            })
+            usage_sink.update(_chat_usage(chunk.usage))
 
 
 def _wrap_in_sandbox(raw_html: str) -> str:
@@ -481,25 +501,45 @@ async def _run_codegen_with_prompt(
         .replace("{{ENTITY_SPEC}}", spec)
         .replace("{{USER_PROMPT}}", user_prompt)
     )
+    # Everything before the first placeholder is the same for every request.
+    cache_prefix = prompt_registry.static_prefix(
+        os.path.join(_PROMPTS_DIR, prompt_file), ("{{ENTITY_SPEC}}", "{{USER_PROMPT}}"))
     svc = svc or default_llm_service
     model = getattr(svc.provider, "model", "unknown")
     label = prompt_file.replace(".md", "")
-    logger.info("llm_call", prompt=label, model=model, chars=len(prompt), cache="no")
+
+    # Same template version + model + (canonicalised) spec and question → reuse the widget.
+    version = codegen_cache.prompt_version(os.path.join(_PROMPTS_DIR, prompt_file))
+    cache_key = codegen_cache.cache_key(label, version, model, spec, user_prompt)
+    cached = await codegen_cache.lookup(cache_key)
+    if cached is not None:
+        logger.info("llm_done", prompt=label, model=model, tokens=0, cache_hit=True)
+        _log({"event": "llm_call", "prompt_name": label, "model": model,
+              "usage": llm_cache.hit_usage(), "cache_hit": True,
+              "full_prompt": prompt, "full_response": cached})
+        return cached
+
+    logger.info("llm_call", prompt=label, model=model, chars=len(prompt), cache="prefix")
     max_tokens = _CODEGEN_MAX_TOKENS.get(label, 4000)
-    result, usage = await svc.make_single_prompt_request_async(prompt, max_tokens=max_tokens)
+    result, usage = await svc.make_single_prompt_request_async(
+        prompt, cache_prefix=cache_prefix, max_tokens=max_tokens, priority=Priority.INTERACTIVE,
+        task=label)
     if result is None:
         raise RuntimeError("Codegen LLM returned None")
-    _accumulate_tokens(usage or {})
+    _accumulate_tokens(usage or {}, label)
     logger.info("llm_done", prompt=label, model=model,
                 tokens=(usage or {}).get("total_tokens", 0),
                 cache_read=(usage or {}).get("cache_read_input_tokens", 0),
                 cache_create=(usage or {}).get("cache_creation_input_tokens", 0))
-    _log({"event": "llm_call", "prompt_name": label, "model": model, "usage": usage or {}})
+    _log({"event": "llm_call", "prompt_name": label, "model": model, "usage": usage or {},
+          "full_prompt": prompt, "full_response": result})
     result = result.strip()
     if result.startswith("```"):
         result = result.split("\n", 1)[-1]
         result = result.rsplit("```", 1)[0]
-    return result.strip()
+    result = result.strip()
+    await codegen_cache.store(cache_key, label, version, model, result, usage or {})
+    return result
 
 
 async def _run_codegen(spec: str, user_prompt: str, svc: LLMService = None) -> str:
@@ -514,16 +554,86 @@ async def _run_slide_codegen(spec: str, user_prompt: str, svc: LLMService = None
     return await _run_codegen_with_prompt("canvas_codegen_slides.md", spec, user_prompt, svc=svc)
 
 
+# Entity types whose HTML is generated by a separate codegen call.
+_CODEGEN_ENTITY_TYPES = ("freeform_html", "p5_sketch", "slide_deck")
+
+_CODEGEN_FAILED_HTML = ("<p style='color:#f03e3e;font-family:system-ui'>"
+                        "Widget generation failed.</p>")
+
+
+async def _build_widget_html(block: SceneBlock, user_prompt: str, svc: LLMService = None) -> str:
+    """Codegen HTML for one widget block; a sandboxed error notice if it fails."""
+    spec = block.props.get("spec", "an interactive widget")
+    try:
+        if block.entity_type == "p5_sketch":
+            return _wrap_in_sandbox(await _run_p5_codegen(spec, user_prompt, svc=svc))
+        if block.entity_type == "slide_deck":
+            return await _run_slide_codegen(spec, user_prompt, svc=svc)
+        return _wrap_in_sandbox(await _run_codegen(spec, user_prompt, svc=svc))
+    except Exception as exc:
+        logger.error("codegen_failed", block=block.id, error=str(exc))
+        return _wrap_in_sandbox(_CODEGEN_FAILED_HTML)
+
+
+async def _route_entities(message: str, domain: str) -> tuple["SelectionResult | None", "asyncio.Task | None"]:
+    """
+    Try the local k-NN entity router (entity_router.py) within
+    ENTITY_ROUTER_TIMEOUT_S. Returns (selection, embedding); selection is None
+    when the router is not confident, disabled, or too slow. embedding is the
+    entity_router.embed() task — it keeps running past the timeout so the
+    selector's answer can still be remembered.
+    """
+    if not ENTITY_ROUTER_ENABLED or not message:
+        return None, None
+    t0 = time.monotonic()
+    embedding = asyncio.create_task(entity_router.embed(message))
+
+    async def _route() -> "entity_router.Route | None":
+        q_emb = await asyncio.shield(embedding)
+        return await entity_router.route(q_emb, domain) if q_emb else None
+
+    try:
+        route = await asyncio.wait_for(_route(), timeout=ENTITY_ROUTER_TIMEOUT_S)
+    except asyncio.TimeoutError:
+        logger.info("entity_router_timeout", timeout_s=ENTITY_ROUTER_TIMEOUT_S)
+        return None, embedding
+    if route is None:
+        return None, embedding
+    model = route.model if route.model in ("gpt-4.1", "claude-sonnet-4-6") else "claude-sonnet-4-6"
+    _log({
+        "event":       "entity_router_hit",
+        "prompt_name": "entity_selector",
+        "entities":    route.entities,
+        "confidence":  route.confidence,
+        "neighbours":  route.neighbours,
+        "distance":    route.distance,
+        "lookup_ms":   int((time.monotonic() - t0) * 1000),
+    })
+    logger.info("entity_selected", source="router", entities=route.entities,
+                confidence=route.confidence, model=model)
+    return SelectionResult(visual_brief=route.visual_brief, entities=route.entities, model=model), embedding
+
+
 async def _select_entities(
     enriched_prompt: str,
     domain: str,
     conversation_context: str,
+    original_message: str = "",
 ) -> SelectionResult:
     """
     Entity selector call — picks 2–5 entities, writes visual_brief, recommends a model.
 
     Receives enriched_prompt from plan_and_classify. Does NOT re-enrich the question.
+    First turns try the local router on the raw question (original_message, or
+    enriched_prompt when that is the raw question, as for speculative selection)
+    and only call the LLM when it is not confident; the LLM's answer is then
+    stored for the router.
     """
+    route_message = (original_message or enriched_prompt) if not conversation_context else ""
+    routed, embedding = await _route_entities(route_message, domain)
+    if routed is not None:
+        return routed
+
     slim_index = _load_prompt("slim_index.md")
     selector_template = _load_prompt("entity_selector.md")
     selector_prompt = selector_template.replace("{{SLIM_INDEX}}", slim_index)
@@ -538,14 +648,18 @@ async def _select_entities(
         logger.info("llm_call", prompt="entity_selector", model=_model,
                     chars=len(selector_prompt) + len(user_msg), cache="no")
         raw, _usage = await entity_svc.make_system_user_request_async(
-            selector_prompt, user_msg, max_tokens=800
+            selector_prompt, user_msg, max_tokens=800, cache_task="entity_selector",
+            priority=Priority.INTERACTIVE,
         )
-        _accumulate_tokens(_usage or {})
+        _accumulate_tokens(_usage or {}, "entity_selector")
+        _cache_hit = bool((_usage or {}).get("cache_hit"))
         logger.info("llm_done", prompt="entity_selector", model=_model,
                     tokens=(_usage or {}).get("total_tokens", 0),
                     cache_read=(_usage or {}).get("cache_read_input_tokens", 0),
-                    cache_create=(_usage or {}).get("cache_creation_input_tokens", 0))
-        _log({"event": "llm_call", "prompt_name": "entity_selector", "model": _model, "usage": _usage or {}})
+                    cache_create=(_usage or {}).get("cache_creation_input_tokens", 0),
+                    cache_hit=_cache_hit)
+        _log({"event": "llm_call", "prompt_name": "entity_selector", "model": _model,
+              "usage": _usage or {}, "cache_hit": _cache_hit, "full_response": raw})
         if raw is None:
             return SelectionResult()
 
@@ -558,6 +672,8 @@ async def _select_entities(
             model = "claude-sonnet-4-6"
 
         logger.info("entity_selected", visual_brief=visual_brief[:80], entities=entities, model=model)
+        if embedding is not None:
+            entity_router.remember_later(route_message, embedding, domain, entities, visual_brief, model)
         return SelectionResult(visual_brief=visual_brief, entities=entities, model=model)
 
     except Exception as exc:
@@ -565,6 +681,72 @@ async def _select_entities(
         return SelectionResult()
 
 
+class SpeculativeSelection:
+    """
+    Entity selection started on the raw user message while plan_and_classify
+    is still running, so the selector's round-trip is hidden behind
+    classification (and search) instead of following it.
+
+    The caller start()s it with a domain guess — generate.py uses the domain
+    field of the streamed classifier output, which arrives first. resolve()
+    keeps the speculative result when the final domain matches the guess and
+    the selector returned entities; otherwise it is cancelled/discarded and
+    run_interactive_pipeline re-runs selection on the enriched prompt.
+    """
+
+    def __init__(self, message: str, conversation_context: str):
+        self._message  = message
+        self._context  = conversation_context
+        self.guess: str | None = None
+        self._task: asyncio.Task | None = None
+        self._started  = 0.0
+        self._finished: float | None = None
+
+    def start(self, domain_guess: str) -> None:
+        if self._task is not None:
+            return
+        self.guess    = domain_guess
+        self._started = time.monotonic()
+        self._task    = asyncio.create_task(
+            _select_entities(self._message, domain_guess, self._context))
+        self._task.add_done_callback(self._mark_finished)
+
+    def _mark_finished(self, _task: asyncio.Task) -> None:
+        self._finished = time.monotonic()
+
+    def cancel(self) -> None:
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+
+    async def resolve(self, domain: str) -> tuple[SelectionResult | None, dict]:
+        """
+        Return (selection, metrics). selection is None on a miss.
+        metrics is empty when speculation never started.
+
+        saved_ms on a hit is how much of the selector call ran before it was
+        needed; wasted_ms on a miss is how long the discarded call had run.
+        """
+        if self._task is None:
+            return None, {}
+        needed_at = time.monotonic()
+        selection: SelectionResult | None = None
+        if self.guess == domain:
+            selection = await self._task
+            if not selection.entities:
+                selection = None        # selector failed — not worth keeping
+        else:
+            self.cancel()
+        ran_until = min(self._finished or needed_at, needed_at)
+        metrics = {"hit": selection is not None, "guess": self.guess, "domain": domain}
+        if selection is not None:
+            metrics["saved_ms"]  = int((ran_until - self._started) * 1000)
+        else:
+            metrics["wasted_ms"] = int((ran_until - self._started) * 1000)
+        logger.info("speculative_selection", **metrics)
+        _log({"event": "speculative_selection", **metrics})
+        return selection, metrics
+
+
 async def _plan_scene(
     enriched_prompt: str,
     domain: str,
@@ -575,33 +757,23 @@ async def _plan_scene(
     visual_brief: str = "",
 ) -> SceneIR:
     """Call the planner LLM and parse the Scene IR. Injects research sources for [N] citations."""
-    base       = _load_prompt("base_planner.md")
-    domain_ctx = _load_domain_file(domain)
-
-    if selected_entities:
-        catalog = _build_catalog(selected_entities)
-    else:
-        catalog = _load_prompt("component_catalog.md")
-
-    system_prompt = "\n\n".join(filter(None, [base, domain_ctx, catalog]))
-
-    context_block = (
-        f"Conversation context:\n{conversation_context}\n\n"
-        if conversation_context else ""
-    )
-    sources_block = _build_sources_block(sources)
-    visual_brief_block = f"Visual brief: {visual_brief}\n\n" if visual_brief else ""
-    user_msg = f"{context_block}{sources_block}{visual_brief_block}USER QUESTION: {enriched_prompt}"
+    system_blocks = _planner_system_blocks(domain, selected_entities)
+    system_prompt = "".join(system_blocks)
 
     from services.llm_service import get_task_service
     svc = svc or get_task_service("scene_planner")
+    user_msg = _build_planner_user_msg(
+        system_blocks, enriched_prompt, conversation_context,
+        sources, visual_brief, getattr(svc.provider, "name", None),
+    )
     _model = getattr(svc.provider, "model", "unknown")
     logger.info("llm_call", prompt="scene_planner", model=_model,
-                chars=len(system_prompt) + len(user_msg), cache="no")
+                chars=len(system_prompt) + len(user_msg), cache="system_blocks")
     raw, _usage = await svc.make_system_user_request_async(
-        system_prompt, user_msg, max_tokens=SCENE_PLANNER_MAX_TOKENS
+        system_prompt, user_msg, max_tokens=SCENE_PLANNER_MAX_TOKENS,
+        priority=Priority.INTERACTIVE, system_blocks=system_blocks, task="scene_planner",
     )
-    _accumulate_tokens(_usage or {})
+    _accumulate_tokens(_usage or {}, "scene_planner")
     logger.info("llm_done", prompt="scene_planner", model=_model,
                 tokens=(_usage or {}).get("total_tokens", 0),
                 cache_read=(_usage or {}).get("cache_read_input_tokens", 0),
@@ -651,45 +823,57 @@ async def _stream_plan_scene(
     needs to know the difference.
     """
     # ── Build prompts (identical to _plan_scene) ──────────────────────────────
-    base       = _load_prompt("base_planner.md")
-    domain_ctx = _load_domain_file(domain)
-    catalog    = (_build_catalog(selected_entities) if selected_entities
-                  else _load_prompt("component_catalog.md"))
-    system_prompt = "\n\n".join(filter(None, [base, domain_ctx, catalog]))
-
-    context_block      = f"Conversation context:\n{conversation_context}\n\n" if conversation_context else ""
-    sources_block      = _build_sources_block(sources)
-    visual_brief_block = f"Visual brief: {visual_brief}\n\n" if visual_brief else ""
-    user_msg = f"{context_block}{sources_block}{visual_brief_block}USER QUESTION: {enriched_prompt}"
+    system_blocks = _planner_system_blocks(domain, selected_entities)
+    system_prompt = "".join(system_blocks)
 
     from services.llm_service import get_task_service
     svc    = svc or get_task_service("scene_planner")
+    user_msg = _build_planner_user_msg(
+        system_blocks, enriched_prompt, conversation_context,
+        sources, visual_brief, getattr(svc.provider, "name", None),
+    )
     _model = getattr(svc.provider, "model", "unknown")
     logger.info("llm_call", prompt="scene_planner_stream", model=_model,
-                chars=len(system_prompt) + len(user_msg), cache="no")
+                chars=len(system_prompt) + len(user_msg), cache="system_blocks")
 
     buf: str              = ""
     usage: dict           = {}
-    meta_emitted: bool    = False
-    scan_pos: int         = 0
+    parser                = _PlanStreamParser()
     emitted_blocks: list  = []
     stream_ok: bool       = False
 
     # ── Streaming path ────────────────────────────────────────────────────────
+    # The stream talks to the SDK directly, so admit it through the scheduler
+    # here; the ticket is settled from usage once the stream has finished.
+    _provider = getattr(svc.provider, "name", "unknown")
+    t_admit = time.monotonic()
+    ticket = await llm_scheduler.admit(
+        _model, _provider, Priority.INTERACTIVE,
+        llm_scheduler.estimate_tokens(
+            [{"content": system_prompt}, {"content": user_msg}], SCENE_PLANNER_MAX_TOKENS),
+    )
+    timer = llm_metrics.StreamTimer("scene_planner", _model, _provider)
+    llm_metrics.record_queue_wait("scene_planner", _model, _provider, timer.started - t_admit)
     try:
         if isinstance(svc.provider, ClaudeProvider):
             token_gen = _stream_tokens_anthropic(
-                svc, system_prompt, user_msg, usage, SCENE_PLANNER_MAX_TOKENS)
-        else:
+                svc, system_blocks, user_msg, usage, SCENE_PLANNER_MAX_TOKENS)
+        elif has_native_stream(svc.provider):
             token_gen = _stream_tokens_openai_compat(
                 svc, system_prompt, user_msg, usage, SCENE_PLANNER_MAX_TOKENS)
+        else:
+            # Hedged / replay providers stream through their own stream_async().
+            token_gen = scoped_stream(
+                svc.provider, "scene_planner",
+                [{"role": "system", "content": system_prompt}, {"role": "user", "content": user_msg}],
+                usage, priority=Priority.INTERACTIVE,
+                max_tokens=SCENE_PLANNER_MAX_TOKENS, system_blocks=system_blocks)
 
         async for token in token_gen:
+            timer.token()
             buf      += token
             stream_ok = True
-            events, meta_emitted, scan_pos = _extract_events_from_buffer(
-                buf, meta_emitted, scan_pos)
-            for event in events:
+            for event in parser.feed(token):
                 if event["type"] == "_block":
                     emitted_blocks.append(event["block"])
                 yield event
@@ -698,35 +882,28 @@ async def _stream_plan_scene(
         logger.warning("scene_planner_stream_failed", error=str(exc), model=_model)
         stream_ok = False
 
+    timer.done(dict(usage), ok=stream_ok)
+
+    if usage or not stream_ok:
+        ticket.settle(dict(usage))   # empty usage (failed stream) refunds the slot
+
     # ── Non-streaming fallback ────────────────────────────────────────────────
     if not stream_ok or not buf:
         logger.info("scene_planner_stream_fallback", model=_model)
         try:
             raw, usage = await svc.make_system_user_request_async(
-                system_prompt, user_msg, max_tokens=SCENE_PLANNER_MAX_TOKENS)
+                system_prompt, user_msg, max_tokens=SCENE_PLANNER_MAX_TOKENS,
+                priority=Priority.INTERACTIVE, system_blocks=system_blocks, task="scene_planner")
             buf = raw or ""
         except Exception as exc2:
             logger.error("scene_planner_fallback_failed", error=str(exc2))
             buf = ""
 
-        # Reset scan state — streaming may have left it partially advanced
-        meta_emitted = False
-        scan_pos     = 0
+        # Fresh parser — streaming may have left the old one partially advanced
         emitted_blocks = []
 
         if buf:
-            events, meta_emitted, scan_pos = _extract_events_from_buffer(
-                buf, False, 0)
-            # Drain: collect ALL blocks from the complete buffer
-            while True:
-                more_events, _, scan_pos = _extract_events_from_buffer(
-                    buf, meta_emitted, scan_pos)
-                if not more_events:
-                    break
-                events.extend(more_events)
-                meta_emitted = True   # already set after first pass
-
-            for event in events:
+            for event in _PlanStreamParser().feed(buf):
                 if event["type"] == "_block":
                     emitted_blocks.append(event["block"])
                 yield event
@@ -772,7 +949,7 @@ async def _stream_plan_scene(
         if not scene.follow_ups:
             logger.warning("scene_followups_empty", model=_model, buf_chars=len(buf))
 
-    _accumulate_tokens(usage)
+    _accumulate_tokens(usage, "scene_planner")
     logger.info("llm_done", prompt="scene_planner", model=_model,
                 tokens=usage.get("total_tokens", 0),
                 cache_read=usage.get("cache_read_input_tokens", 0),
@@ -806,6 +983,7 @@ async def run_interactive_pipeline(
     domain:               str = "general",
     sources:              list[dict] = None,
     enriched_prompt:      str = "",
+    speculative:          SpeculativeSelection | None = None,
 ) -> AsyncGenerator[dict, None]:
     """
     Main SSE generator for interactive mode.
@@ -815,6 +993,9 @@ async def run_interactive_pipeline(
                        for better widget choices. Falls back to original_message if empty.
     domain           — pre-computed by plan_and_classify (skip separate classify call)
     sources          — research sources from Tavily; injected into scene planner for [N] citations
+    speculative      — entity selection already started during classification; used
+                       instead of a fresh selector call when its domain guess holds.
+                       Hit/saved_ms metrics ride on the widgets stage_done event.
     """
     sources = sources or []
 
@@ -825,8 +1006,14 @@ async def run_interactive_pipeline(
     topic = _short_topic(entity_input)
     _t0 = time.monotonic()
     yield {"type": "stage", "stage": "widgets", "label": random.choice(_WIDGET_TEMPLATES).format(topic=topic)}
-    selection = await _select_entities(entity_input, domain, conversation_context)
-    yield {"type": "stage_done", "stage": "widgets", "duration_s": round(time.monotonic() - _t0, 1)}
+    selection, spec_metrics = (await speculative.resolve(domain)) if speculative else (None, {})
+    if selection is None:
+        selection = await _select_entities(entity_input, domain, conversation_context,
+                                           original_message=original_message)
+    widgets_done = {"type": "stage_done", "stage": "widgets", "duration_s": round(time.monotonic() - _t0, 1)}
+    if spec_metrics:
+        widgets_done["metrics"] = {"speculative": spec_metrics}
+    yield widgets_done
     yield {"type": "entities_selected", "entities": selection.entities}
 
     from services.llm_service import get_task_service
@@ -847,8 +1034,13 @@ async def run_interactive_pipeline(
     #
     # Internal event flow from _stream_plan_scene:
     #   _meta  → emit stage_done:planning + SSE meta (title, follow_ups, ...)
-    #   _block → run codegen if needed, then emit SSE block
+    #   _block → emit SSE block; widget blocks go out as placeholders (html=None)
+    #            and their codegen starts in the background
     #   _done  → capture SceneIR for persistence
+    #
+    # Planner events and finished codegen share one queue, so a widget's
+    # block_update goes out as soon as its HTML is ready — before, between or
+    # after the remaining blocks — without holding up the plan stream.
 
     plan_topic = _short_topic(entity_input.split(".")[0])
     _t0 = time.monotonic()
@@ -865,73 +1057,105 @@ async def run_interactive_pipeline(
         "freeform_html": "Building interactive widget…",
     }
 
-    async for event in _stream_plan_scene(
-        entity_input, domain, conversation_context,
-        selection.entities, sources,
-        svc=scene_planner_svc,
-        visual_brief=selection.visual_brief,
-    ):
-        # ── Internal _meta: close planning stage, emit SSE meta ───────────────
-        if event["type"] == "_meta":
-            if not planning_done_emitted:
-                planning_done_emitted = True
-                yield {"type": "stage_done", "stage": "planning",
-                       "duration_s": round(time.monotonic() - _t0, 1)}
-            yield {
-                "type":               "meta",
-                "title":              event.get("title", ""),
-                "follow_ups":         event.get("follow_ups", []),
-                "learning_objective": event.get("learning_objective"),
-            }
-
-        # ── Internal _block: optional codegen, then emit SSE block ────────────
-        elif event["type"] == "_block":
-            block = event["block"]
-            if block.type == "entity":
-                all_entity_block_types.append(block.entity_type or "")
-
-            if block.type == "entity" and block.entity_type in (
-                    "freeform_html", "p5_sketch", "slide_deck"):
-                spec     = block.props.get("spec", "an interactive widget")
-                stage_id = f"building_{block.id}"
-                _t_cg    = time.monotonic()
-                yield {"type": "stage", "stage": stage_id,
-                       "label": _CODEGEN_LABELS.get(block.entity_type, "Building widget…"),
-                       "entity_type": block.entity_type}
-                try:
-                    if block.entity_type == "p5_sketch":
-                        raw_html    = await _run_p5_codegen(spec, entity_input, svc=codegen_svc)
-                        block.html  = _wrap_in_sandbox(raw_html)
-                    elif block.entity_type == "slide_deck":
-                        raw_html    = await _run_slide_codegen(spec, entity_input, svc=codegen_svc)
-                        block.html  = raw_html
-                    else:
-                        raw_html    = await _run_codegen(spec, entity_input, svc=codegen_svc)
-                        block.html  = _wrap_in_sandbox(raw_html)
-                except Exception as exc:
-                    logger.error("codegen_failed", block=block.id, error=str(exc))
-                    block.html = _wrap_in_sandbox(
-                        "<p style='color:#f03e3e;font-family:system-ui'>"
-                        "Widget generation failed.</p>")
-                yield {"type": "stage_done", "stage": stage_id,
-                       "duration_s": round(time.monotonic() - _t_cg, 1)}
+    events: asyncio.Queue = asyncio.Queue()
+    codegen_sem = asyncio.Semaphore(CODEGEN_MAX_CONCURRENCY)
+    codegen_tasks: list[asyncio.Task] = []
+    widget_html: dict[str, str] = {}
 
-            yield {"type": "block", "block": block.dict()}
-
-        # ── Internal _done: capture complete SceneIR ──────────────────────────
-        elif event["type"] == "_done":
-            scene = event.get("scene")
-
-    # Emit stage_done:planning if _meta never arrived (extreme edge case)
-    if not planning_done_emitted:
-        yield {"type": "stage_done", "stage": "planning",
-               "duration_s": round(time.monotonic() - _t0, 1)}
-
-    # Emit blocks_planned summary now that we have the full count
-    if all_entity_block_types:
-        yield {"type": "blocks_planned",
-               "count": len(all_entity_block_types),
-               "block_types": all_entity_block_types}
+    async def _pump_plan() -> None:
+        try:
+            async for ev in _stream_plan_scene(
+                entity_input, domain, conversation_context,
+                selection.entities, sources,
+                svc=scene_planner_svc,
+                visual_brief=selection.visual_brief,
+            ):
+                await events.put(ev)
+        except Exception as exc:
+            await events.put({"type": "_plan_error", "error": exc})
+        finally:
+            await events.put({"type": "_plan_end"})
+
+    async def _codegen(block: SceneBlock) -> None:
+        t_cg = time.monotonic()
+        async with codegen_sem:
+            block.html = await _build_widget_html(block, entity_input, svc=codegen_svc)
+        await events.put({"type": "_codegen_done", "block": block,
+                          "duration_s": round(time.monotonic() - t_cg, 1)})
+
+    plan_task = asyncio.create_task(_pump_plan())
+    plan_open = True
+    codegen_pending = 0
+    try:
+        while plan_open or codegen_pending:
+            event = await events.get()
+
+            # ── Internal _meta: close planning stage, emit SSE meta ───────────
+            if event["type"] == "_meta":
+                if not planning_done_emitted:
+                    planning_done_emitted = True
+                    yield {"type": "stage_done", "stage": "planning",
+                           "duration_s": round(time.monotonic() - _t0, 1)}
+                yield {
+                    "type":               "meta",
+                    "title":              event.get("title", ""),
+                    "follow_ups":         event.get("follow_ups", []),
+                    "learning_objective": event.get("learning_objective"),
+                }
+
+            # ── Internal _block: emit SSE block, start codegen if needed ──────
+            elif event["type"] == "_block":
+                block = event["block"]
+                if block.type == "entity":
+                    all_entity_block_types.append(block.entity_type or "")
+
+                if block.type == "entity" and block.entity_type in _CODEGEN_ENTITY_TYPES:
+                    yield {"type": "stage", "stage": f"building_{block.id}",
+                           "label": _CODEGEN_LABELS.get(block.entity_type, "Building widget…"),
+                           "entity_type": block.entity_type}
+                    codegen_tasks.append(asyncio.create_task(_codegen(block)))
+                    codegen_pending += 1
+
+                yield {"type": "block", "block": block.dict()}
+
+            # ── Internal _codegen_done: widget HTML is ready ──────────────────
+            elif event["type"] == "_codegen_done":
+                block = event["block"]
+                codegen_pending -= 1
+                widget_html[block.id] = block.html
+                yield {"type": "stage_done", "stage": f"building_{block.id}",
+                       "duration_s": event["duration_s"]}
+                yield {"type": "block_update", "block": block.dict()}
+
+            # ── Internal _done: capture complete SceneIR ──────────────────────
+            elif event["type"] == "_done":
+                scene = event.get("scene")
+
+            elif event["type"] == "_plan_error":
+                raise event["error"]
+
+            elif event["type"] == "_plan_end":
+                plan_open = False
+                # Emit stage_done:planning if _meta never arrived (extreme edge case)
+                if not planning_done_emitted:
+                    planning_done_emitted = True
+                    yield {"type": "stage_done", "stage": "planning",
+                           "duration_s": round(time.monotonic() - _t0, 1)}
+                # Emit blocks_planned summary now that we have the full count
+                if all_entity_block_types:
+                    yield {"type": "blocks_planned",
+                           "count": len(all_entity_block_types),
+                           "block_types": all_entity_block_types}
+    finally:
+        for task in (plan_task, *codegen_tasks):
+            task.cancel()
+
+    # The final SceneIR is re-parsed from the full planner buffer; carry each
+    # widget's HTML over by block id so the persisted scene matches the stream.
+    if scene is not None:
+        for block in scene.blocks:
+            if block.id in widget_html:
+                block.html = widget_html[block.id]
 
     if scene is None:
         raise RuntimeError("Scene planning produced no valid output")
@@ -0,0 +1,209 @@
+"""
+Incremental scanner for a JSON object streamed by an LLM.
+
+JsonFieldStream is fed raw text chunks as they arrive and returns the
+top-level values each chunk completed, as (key, index, value) tuples:
+
+    ("domain", None, "physics")          — a top-level field is complete
+    ("search_queries", 0, "ITER ...")    — element 0 of a top-level array
+    ("search_queries", None, [...])      — ...and later the whole array
+
+Used by plan_and_classify (services/frame_generation/planner.py), which
+starts Tavily on each search query as soon as it closes, and by the scene
+planner (services/interactive/interactive_service.py), which emits every
+element of its `blocks` array as soon as it closes.
+
+Nesting depth, string/escape state and the text of the value being read
+carry over between calls, so every character is scanned once and total work
+is O(response length) however the text is chunked. Between structural
+characters the scan jumps ahead with a compiled regex.
+
+Text before the opening '{' (markdown fences, preamble) and after the
+matching '}' is skipped. Keys are only read in key position, so a key's name
+inside a string value is never mistaken for it. Values that fail to parse
+are dropped — a whole-response parse stays the authority.
+"""
+
+import json
+import re
+from typing import Any, Optional
+
+_OUTSIDE_STRING = re.compile(r'["{}\[\]:,]')   # the only characters that change scanner state
+_INSIDE_STRING  = re.compile(r'["\\]')
+_NON_SPACE      = re.compile(r"\S")
+_ROOT           = re.compile(r"\{")
+
+_DROPPED = object()
+
+
+class JsonFieldStream:
+    """Push scanner over one streamed JSON object; see the module docstring."""
+
+    def __init__(self) -> None:
+        self._started   = False
+        self._done      = False
+        self._depth     = 0         # 1 inside the root object, 2 inside a top-level value
+        self._in_string = False
+        self._escape    = False
+        self._expect_key = True
+        self._key: Optional[str] = None
+        # "value" after a top-level ':', "item" inside a top-level array.
+        self._await: Optional[str] = None
+        self._array     = False     # the current top-level value is an array
+        self._items: Optional[list] = None   # its parsed elements; None once one failed
+        self._item_index = 0
+        # Text of the key / value / element being read, when it spans chunks.
+        self._capture: Optional[list[str]] = None
+        self._capture_kind = ""     # "key", "value" or "item"
+
+    @property
+    def done(self) -> bool:
+        """True once the root object has closed."""
+        return self._done
+
+    @property
+    def open_array(self) -> Optional[str]:
+        """Key of the top-level array currently being streamed, if any."""
+        return self._key if self._array else None
+
+    def feed(self, chunk: str) -> list[tuple[str, Optional[int], Any]]:
+        out: list[tuple[str, Optional[int], Any]] = []
+        if self._done or not chunk:
+            return out
+        cap_from = 0 if self._capture is not None else None
+        i, n = 0, len(chunk)
+
+        while i < n:
+            if not self._started:
+                m = _ROOT.search(chunk, i)
+                if m is None:
+                    break
+                self._started, self._depth = True, 1
+                i = m.end()
+                continue
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                    i += 1
+                    continue
+                m = _INSIDE_STRING.search(chunk, i)
+                if m is None:
+                    break
+                j = m.start()
+                if chunk[j] == "\\":
+                    self._escape = j + 1 >= n
+                    i = j + 2
+                    continue
+                self._in_string = False
+                i = j + 1
+                if self._capture is not None and self._depth == self._capture_depth():
+                    self._close(self._text(chunk, cap_from, i), out)
+                    cap_from = None
+                continue
+
+            if self._await is not None:
+                m = _NON_SPACE.search(chunk, i)
+                if m is None:
+                    break
+                j = m.start()
+                c = chunk[j]
+                if self._await == "value":
+                    self._await = None
+                    if c == "[":
+                        self._array, self._items, self._await = True, [], "item"
+                        self._item_index = 0
+                        self._depth += 1
+                        i = j + 1
+                        continue
+                    cap_from = self._start_capture("value", j)
+                elif c != "]":
+                    self._await = None
+                    cap_from = self._start_capture("item", j)
+                else:
+                    self._await = None      # empty array; the ']' is handled below
+                i = j
+
+            m = _OUTSIDE_STRING.search(chunk, i)
+            if m is None:
+                break
+            j = m.start()
+            c = chunk[j]
+            i = j + 1
+
+            if c == '"':
+                self._in_string = True
+                if self._depth == 1 and self._expect_key:
+                    cap_from = self._start_capture("key", j)
+            elif c == ":":
+                if self._depth == 1 and self._expect_key:
+                    self._expect_key, self._await = False, "value"
+            elif c in "{[":
+                self._depth += 1
+            elif c in "}]":
+                self._depth -= 1
+                if self._capture is not None and self._depth < self._capture_depth():
+                    # A scalar ended by its container closing.
+                    self._close(self._text(chunk, cap_from, j), out)
+                    cap_from = None
+                elif self._capture is not None and self._depth == self._capture_depth():
+                    # The object / array being captured closed.
+                    self._close(self._text(chunk, cap_from, j + 1), out)
+                    cap_from = None
+                if self._depth == 1 and self._array:
+                    if self._items is not None:
+                        out.append((self._key, None, self._items))
+                    self._array, self._items = False, None
+                elif self._depth == 0:
+                    self._done = True
+                    break
+            else:   # ,
+                if self._capture is not None and self._depth == self._capture_depth():
+                    self._close(self._text(chunk, cap_from, j), out)
+                    cap_from = None
+                if self._depth == 1:
+                    self._expect_key = True
+                elif self._depth == 2 and self._array:
+                    self._await = "item"
+
+        if self._capture is not None and cap_from is not None:
+            self._capture.append(chunk[cap_from:])
+        return out
+
+    # ── Captures ──────────────────────────────────────────────────────────────
+
+    def _start_capture(self, kind: str, at: int) -> int:
+        self._capture, self._capture_kind = [], kind
+        return at
+
+    def _capture_depth(self) -> int:
+        """Depth a captured value sits at: 1 for top-level values, 2 for elements."""
+        return 2 if self._capture_kind == "item" else 1
+
+    def _text(self, chunk: str, cap_from: Optional[int], end: int) -> str:
+        return "".join(self._capture) + chunk[cap_from or 0:end]
+
+    def _close(self, text: str, out: list) -> None:
+        kind, self._capture, self._capture_kind = self._capture_kind, None, ""
+        value = _parse(text)
+        if kind == "key":
+            self._key = value if isinstance(value, str) else None
+            self._array = False
+        elif kind == "value":
+            if value is not _DROPPED and self._key is not None:
+                out.append((self._key, None, value))
+        else:
+            index, self._item_index = self._item_index, self._item_index + 1
+            if value is _DROPPED:
+                self._items = None
+            elif self._key is not None:
+                out.append((self._key, index, value))
+                if self._items is not None:
+                    self._items.append(value)
+
+
+def _parse(text: str) -> Any:
+    try:
+        return json.loads(text)
+    except ValueError:
+        return _DROPPED
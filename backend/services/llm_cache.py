@@ -0,0 +1,262 @@
+"""
+Content-addressed LLM response cache.
+
+Sits behind LLMService's async request methods. Only calls that opt in with
+cache_task=<name> (and whose task has a TTL in LLM_CACHE_TTL_SECS) are looked
+up or stored — everything else goes straight to the provider.
+
+Cache key = sha256(model + normalised messages + max_tokens + json_mode +
+tool_schema + any other provider kwargs such as temperature). LLMService uses
+the same key for single-flight, so calls that may share a cached response
+are exactly the ones that may share an in-flight one. Normalisation only folds line endings and strips surrounding
+whitespace per message, so semantically different prompts never collide.
+
+Backends (LLM_CACHE_BACKEND in config.py):
+  disk     — one JSON file per entry under LLM_CACHE_DIR/{key[:2]}/{key}.json.
+             mtime is bumped on every hit, so eviction by oldest mtime is LRU.
+  postgres — llm_response_cache table (created by init_db / migration 005),
+             shared across all workers; last_hit_at drives LRU eviction.
+  off      — lookups always miss, stores are dropped.
+
+A cache hit returns usage with every token count set to 0 and cache_hit=True;
+callers log the flag in the lifecycle entry so compute_session_cost reports
+the call as $0.
+
+Degrades gracefully: any backend error is logged and treated as a miss.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import structlog
+import time
+from pathlib import Path
+from typing import Any, Optional
+
+from core.config import (
+    LLM_CACHE_BACKEND,
+    LLM_CACHE_DIR,
+    LLM_CACHE_MAX_ENTRIES,
+    LLM_CACHE_TTL_SECS,
+)
+
+logger = structlog.get_logger(__name__)
+
+# Run LRU eviction once every N stores rather than on every write.
+_EVICT_EVERY = 50
+
+
+# ── Key derivation ────────────────────────────────────────────────────────────
+
+def _normalise_content(content: Any) -> Any:
+    if isinstance(content, str):
+        return content.replace("\r\n", "\n").strip()
+    return content
+
+
+def cache_key(
+    model: str,
+    messages: list[dict],
+    max_tokens: Optional[int] = None,
+    json_mode: bool = False,
+    tool_schema: Optional[dict] = None,
+    options: Optional[dict] = None,
+) -> str:
+    """Stable sha256 over everything that can change the model's output.
+    `options` holds any other provider kwargs (temperature, ...)."""
+    request = {
+        "model":       model,
+        "messages":    [
+            {"role": m.get("role"), "content": _normalise_content(m.get("content"))}
+            for m in messages
+        ],
+        "max_tokens":  max_tokens,
+        "json_mode":   bool(json_mode),
+        "tool_schema": tool_schema,
+    }
+    if options:
+        # Only when present, so keys of plain calls are unchanged.
+        request["options"] = options
+    payload = json.dumps(request, sort_keys=True, ensure_ascii=False, default=repr)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def ttl_for(task: str) -> int:
+    """TTL in seconds for a task; 0 means the task is not cached."""
+    if not task or LLM_CACHE_BACKEND == "off":
+        return 0
+    return max(0, LLM_CACHE_TTL_SECS.get(task, 0))
+
+
+def hit_usage() -> dict:
+    """Usage dict returned for a cache hit — zero billable tokens."""
+    return {
+        "prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0,
+        "cache_creation_input_tokens": 0, "cache_read_input_tokens": 0,
+        "cache_hit": True,
+    }
+
+
+# ── Disk backend ──────────────────────────────────────────────────────────────
+
+class _DiskBackend:
+    """One JSON file per entry; mtime doubles as the LRU clock."""
+
+    def __init__(self, root: Path, max_entries: int):
+        self.root = root
+        self.max_entries = max_entries
+        self._stores = 0
+
+    def _path(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}.json"
+
+    def _get_sync(self, key: str) -> Optional[dict]:
+        p = self._path(key)
+        try:
+            entry = json.loads(p.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return None
+        if entry.get("expires_at", 0) < time.time():
+            p.unlink(missing_ok=True)
+            return None
+        os.utime(p)  # LRU touch
+        return entry
+
+    def _set_sync(self, key: str, entry: dict) -> None:
+        p = self._path(key)
+        p.parent.mkdir(parents=True, exist_ok=True)
+        tmp = p.with_suffix(".tmp")
+        tmp.write_text(json.dumps(entry), encoding="utf-8")
+        os.replace(tmp, p)
+
+    def _evict_sync(self) -> int:
+        """Drop least-recently-used entries beyond max_entries. Expired entries
+        are removed lazily on lookup."""
+        live: list[tuple[float, Path]] = []
+        for f in self.root.glob("*/*.json"):
+            try:
+                live.append((f.stat().st_mtime, f))
+            except FileNotFoundError:
+                continue
+        overflow = len(live) - self.max_entries
+        if overflow <= 0:
+            return 0
+        live.sort()
+        for _, f in live[:overflow]:
+            f.unlink(missing_ok=True)
+        return overflow
+
+    async def get(self, key: str) -> Optional[dict]:
+        return await asyncio.to_thread(self._get_sync, key)
+
+    async def set(self, key: str, entry: dict) -> None:
+        await asyncio.to_thread(self._set_sync, key, entry)
+        self._stores += 1
+        if self._stores % _EVICT_EVERY == 0:
+            removed = await asyncio.to_thread(self._evict_sync)
+            if removed:
+                logger.info("llm_cache_evicted", backend="disk", removed=removed)
+
+
+# ── Postgres backend ──────────────────────────────────────────────────────────
+
+class _PostgresBackend:
+    """Shared llm_response_cache table; last_hit_at drives LRU eviction."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._stores = 0
+
+    async def get(self, key: str) -> Optional[dict]:
+        from core.db_async import get_async_db
+        async with get_async_db() as conn:
+            row = await conn.fetchrow(
+                "UPDATE llm_response_cache "
+                "SET last_hit_at = now(), hit_count = hit_count + 1 "
+                "WHERE key = $1 AND expires_at > now() "
+                "RETURNING response, usage, model",
+                key,
+            )
+        if not row:
+            return None
+        return {"response": row["response"], "usage": row["usage"] or {}, "model": row["model"]}
+
+    async def set(self, key: str, entry: dict) -> None:
+        from core.db_async import get_async_db
+        async with get_async_db() as conn:
+            await conn.execute(
+                "INSERT INTO llm_response_cache "
+                "(key, task, model, response, usage, created_at, expires_at, last_hit_at) "
+                "VALUES ($1, $2, $3, $4, $5, now(), to_timestamp($6), now()) "
+                "ON CONFLICT (key) DO UPDATE SET "
+                "response = EXCLUDED.response, usage = EXCLUDED.usage, "
+                "expires_at = EXCLUDED.expires_at, last_hit_at = now()",
+                key, entry["task"], entry["model"], entry["response"],
+                entry["usage"], entry["expires_at"],
+            )
+        self._stores += 1
+        if self._stores % _EVICT_EVERY == 0:
+            await self._evict()
+
+    async def _evict(self) -> None:
+        from core.db_async import get_async_db
+        async with get_async_db() as conn:
+            await conn.execute("DELETE FROM llm_response_cache WHERE expires_at <= now()")
+            await conn.execute(
+                "DELETE FROM llm_response_cache WHERE key IN ("
+                "  SELECT key FROM llm_response_cache "
+                "  ORDER BY last_hit_at DESC OFFSET $1"
+                ")",
+                self.max_entries,
+            )
+
+
+_backend = None
+
+
+def _get_backend():
+    global _backend
+    if _backend is None:
+        if LLM_CACHE_BACKEND == "postgres":
+            _backend = _PostgresBackend(LLM_CACHE_MAX_ENTRIES)
+        else:
+            _backend = _DiskBackend(LLM_CACHE_DIR, LLM_CACHE_MAX_ENTRIES)
+    return _backend
+
+
+# ── Public API ────────────────────────────────────────────────────────────────
+
+async def lookup(task: str, key: str) -> Optional[str]:
+    """Return the cached response text for key, or None on miss/error."""
+    if not ttl_for(task):
+        return None
+    try:
+        entry = await _get_backend().get(key)
+    except Exception as exc:
+        logger.warning("llm_cache_lookup_failed", task=task, error=str(exc))
+        return None
+    if entry is None:
+        logger.debug("llm_cache_miss", task=task, key=key[:12])
+        return None
+    logger.info("llm_cache_hit", task=task, key=key[:12])
+    return entry["response"]
+
+
+async def store(task: str, key: str, model: str, response: str, usage: dict) -> None:
+    """Persist a fresh provider response under key with the task's TTL."""
+    ttl = ttl_for(task)
+    if not ttl or response is None:
+        return
+    entry = {
+        "task":       task,
+        "model":      model,
+        "response":   response,
+        "usage":      usage or {},
+        "created_at": time.time(),
+        "expires_at": time.time() + ttl,
+    }
+    try:
+        await _get_backend().set(key, entry)
+    except Exception as exc:
+        logger.warning("llm_cache_store_failed", task=task, error=str(exc))
@@ -0,0 +1,161 @@
+"""
+Prometheus telemetry for LLM provider calls, served on /metrics (main.py).
+
+Every provider call is labelled by task, model and provider:
+
+  llm_request_duration_seconds        total latency of one provider call
+                                      (outcome="ok" | "error")
+  llm_time_to_first_token_seconds     streaming paths only
+  llm_output_tokens_per_second        completion_tokens / call duration
+  llm_cache_tokens                    prompt-cache tokens per call
+                                      (kind="read" | "write")
+  llm_queue_wait_seconds              time spent waiting for admission in
+                                      services/llm_scheduler.py
+  llm_retries_total                   provider-side retries
+                                      (reason="rate_limit" | "overloaded" | "error")
+
+Call sites:
+  - LLMService's async request methods and stream_single_prompt_async() record
+    automatically; the task label is their `task=` argument, else cache_task.
+  - Paths that talk to an SDK directly (_stream_plan_scene, synthesiser.stream)
+    use StreamTimer.
+  - Providers call record_retry(); the task label comes from the task_scope()
+    that LLMService opens around each provider call.
+
+Response-cache hits and coalesced followers never reach a provider and are
+not recorded. prometheus-client is optional — without it every function here
+is a no-op.
+"""
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+import structlog
+
+logger = structlog.get_logger(__name__)
+
+try:
+    from prometheus_client import Counter, Histogram
+except ImportError:  # pragma: no cover — exercised only without the package
+    Counter = Histogram = None
+    logger.warning("prometheus-client not installed — LLM metrics disabled")
+
+_LABELS = ("task", "model", "provider")
+
+if Histogram is not None:
+    _duration = Histogram(
+        "llm_request_duration_seconds", "Total latency of one LLM provider call.",
+        _LABELS + ("outcome",),
+        buckets=(0.25, 0.5, 1, 2, 4, 8, 16, 32, 64, 128),
+    )
+    _ttft = Histogram(
+        "llm_time_to_first_token_seconds", "Time from request to first streamed token.",
+        _LABELS, buckets=(0.1, 0.25, 0.5, 1, 2, 4, 8, 16, 32),
+    )
+    _tokens_per_s = Histogram(
+        "llm_output_tokens_per_second", "Output tokens per second of call duration.",
+        _LABELS, buckets=(5, 10, 20, 40, 80, 160, 320, 640),
+    )
+    _cache_tokens = Histogram(
+        "llm_cache_tokens", "Prompt-cache tokens per LLM call.",
+        _LABELS + ("kind",), buckets=(0, 256, 1024, 4096, 16384, 65536),
+    )
+    _queue_wait = Histogram(
+        "llm_queue_wait_seconds", "Time an LLM call waited for scheduler admission.",
+        _LABELS, buckets=(0.01, 0.05, 0.1, 0.5, 1, 2, 5, 10, 30),
+    )
+    _retries = Counter(
+        "llm_retries_total", "Provider-side retries of LLM calls.",
+        _LABELS + ("reason",),
+    )
+
+# Task label for provider calls made inside task_scope() — lets providers,
+# which never see the task, label their retries.
+_current_task: ContextVar[str] = ContextVar("llm_metrics_task", default="unknown")
+
+
+@contextmanager
+def task_scope(task: str) -> Iterator[None]:
+    token = _current_task.set(task or "unknown")
+    try:
+        yield
+    finally:
+        _current_task.reset(token)
+
+
+def current_task() -> str:
+    return _current_task.get()
+
+
+def record_call(
+    task: str,
+    model: str,
+    provider: str,
+    seconds: float,
+    usage: Optional[dict],
+    ok: bool = True,
+) -> None:
+    """One finished provider call: latency, throughput and cache tokens."""
+    if Histogram is None:
+        return
+    labels = (task or "unknown", model or "unknown", provider or "unknown")
+    _duration.labels(*labels, "ok" if ok else "error").observe(seconds)
+    usage = usage or {}
+    if not ok or usage.get("cache_hit"):
+        return
+    completion = usage.get("completion_tokens", 0)
+    if completion and seconds > 0:
+        _tokens_per_s.labels(*labels).observe(completion / seconds)
+    _cache_tokens.labels(*labels, "read").observe(usage.get("cache_read_input_tokens", 0) or 0)
+    _cache_tokens.labels(*labels, "write").observe(usage.get("cache_creation_input_tokens", 0) or 0)
+
+
+def record_ttft(task: str, model: str, provider: str, seconds: float) -> None:
+    if Histogram is None:
+        return
+    _ttft.labels(task or "unknown", model or "unknown", provider or "unknown").observe(seconds)
+
+
+def record_queue_wait(task: str, model: str, provider: str, seconds: float) -> None:
+    if Histogram is None:
+        return
+    _queue_wait.labels(task or "unknown", model or "unknown", provider or "unknown").observe(seconds)
+
+
+def record_retry(model: str, provider: str, reason: str) -> None:
+    """Called by providers before sleeping for a retry."""
+    if Counter is None:
+        return
+    _retries.labels(current_task(), model or "unknown", provider or "unknown", reason).inc()
+
+
+class StreamTimer:
+    """
+    Times one streamed call made outside LLMService:
+
+        timer = StreamTimer("scene_planner", model, provider)
+        async for token in stream:
+            timer.token()
+            ...
+        timer.done(usage, ok=True)
+    """
+
+    def __init__(self, task: str, model: str, provider: str):
+        self.task, self.model, self.provider = task, model, provider
+        self.started = time.monotonic()
+        self._first: Optional[float] = None
+        self._done = False
+
+    def token(self) -> None:
+        if self._first is None:
+            self._first = time.monotonic()
+            record_ttft(self.task, self.model, self.provider, self._first - self.started)
+
+    def done(self, usage: Optional[dict], ok: bool = True) -> None:
+        if self._done:
+            return
+        self._done = True
+        record_call(self.task, self.model, self.provider,
+                    time.monotonic() - self.started, usage, ok)
@@ -0,0 +1,265 @@
+"""
+Provider-aware LLM dispatch scheduler.
+
+Every async LLM call is admitted through here before it reaches the provider.
+Each model gets a lane with two token buckets — requests/min and tokens/min —
+sized from LLM_PROVIDER_RATE_LIMITS / LLM_MODEL_RATE_LIMITS in config.py. A
+call estimates its token cost up front (prompt chars / 4 + max_tokens) and
+waits until both buckets can cover it; once the response arrives, the ticket
+is settled against the real usage so over-estimates flow back into the bucket.
+
+When a lane is saturated, waiting calls are released strictly by priority:
+
+    INTERACTIVE  — interactive scene planning + first-block widget codegen
+    DEFAULT      — everything untagged (classification, synthesis, ...)
+    VIDEO        — video beat planning and frame/beat codegen
+    BULK         — deep-research gap analysis and other background work
+
+so latency-critical calls keep flowing during a burst while bulk work absorbs
+the queueing. A waiting call gains one priority level per
+LLM_SCHEDULER_AGING_S seconds so bulk work is never starved outright.
+
+Deep-research gap analysis is the only BULK caller today. The AutoImprov
+prompt-tuning scripts (AutoImprov/*/run.py) are out of scope: they run out of
+process with their own anthropic.Anthropic() clients and serialise their own
+calls, so no in-process scheduler can see them.
+
+Providers report 429/529 back via pause(): the lane stops admitting new calls
+for the retry-after window instead of letting every queued call collide with
+the same limit.
+
+Usage (LLMService does this for every async request; streaming call sites that
+talk to the SDK directly do it themselves):
+
+    ticket = await llm_scheduler.admit(model, provider, priority, est_tokens)
+    result, usage = await provider.complete_async(...)
+    ticket.settle(usage)
+
+Limits are per process — with N uvicorn workers, configure each worker with
+roughly 1/N of the account limits.
+"""
+
+import asyncio
+import itertools
+import structlog
+import time
+from enum import IntEnum
+from typing import Optional
+
+from core.config import (
+    LLM_MODEL_RATE_LIMITS,
+    LLM_PROVIDER_RATE_LIMITS,
+    LLM_SCHEDULER_AGING_S,
+    LLM_SCHEDULER_ENABLED,
+)
+from services.token_bucket import TokenBucket
+
+logger = structlog.get_logger(__name__)
+
+# Fallback output reservation when a call does not pass max_tokens.
+_DEFAULT_OUTPUT_TOKENS = 4096
+# Only log queue waits longer than this — sub-threshold waits are routine.
+_LOG_WAIT_S = 0.25
+
+
+class Priority(IntEnum):
+    """Lower value = dispatched first."""
+    INTERACTIVE = 0
+    DEFAULT     = 1
+    VIDEO       = 2
+    BULK        = 3
+
+
+def estimate_tokens(messages: list[dict], max_tokens: Optional[int] = None) -> int:
+    """Rough pre-dispatch token cost: ~4 chars per input token + output budget.
+    max_tokens=0 estimates the prompt alone; None assumes the default budget."""
+    chars = 0
+    for m in messages:
+        content = m.get("content")
+        if isinstance(content, str):
+            chars += len(content)
+        elif isinstance(content, list):
+            chars += sum(len(b.get("text", "")) for b in content if isinstance(b, dict))
+    return chars // 4 + (_DEFAULT_OUTPUT_TOKENS if max_tokens is None else max_tokens)
+
+
+def billable_tokens(usage: dict) -> int:
+    """Tokens that count against TPM. Cache reads are excluded (Anthropic does
+    not count them towards input-token rate limits)."""
+    usage = usage or {}
+    total = usage.get("total_tokens") or (
+        usage.get("prompt_tokens", 0) + usage.get("completion_tokens", 0)
+    )
+    return max(0, total - usage.get("cache_read_input_tokens", 0))
+
+
+# ── Per-model lane ────────────────────────────────────────────────────────────
+
+class _Waiter:
+    __slots__ = ("priority", "seq", "enqueued", "tokens", "future")
+
+    def __init__(self, priority: int, seq: int, tokens: int, future: asyncio.Future):
+        self.priority = priority
+        self.seq      = seq
+        self.enqueued = time.monotonic()
+        self.tokens   = tokens
+        self.future   = future
+
+    def rank(self, now: float) -> tuple[float, int]:
+        aged = int((now - self.enqueued) / LLM_SCHEDULER_AGING_S) if LLM_SCHEDULER_AGING_S > 0 else 0
+        return (self.priority - aged, self.seq)
+
+
+class _Lane:
+    def __init__(self, model: str, rpm: int, tpm: int):
+        self.model        = model
+        self.requests     = TokenBucket(rpm)
+        self.tokens       = TokenBucket(tpm)
+        self.paused_until = 0.0
+        self.waiters: list[_Waiter] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+    def _delay(self, tokens: int, now: float) -> float:
+        self.requests.refill(now)
+        self.tokens.refill(now)
+        return max(self.paused_until - now,
+                   self.requests.delay_for(1),
+                   self.tokens.delay_for(tokens))
+
+    def _take(self, tokens: int) -> None:
+        self.requests.level -= 1
+        self.tokens.level   -= tokens
+
+    def try_take(self, tokens: int) -> bool:
+        if self._delay(tokens, time.monotonic()) > 0:
+            return False
+        self._take(tokens)
+        return True
+
+    def refund(self, tokens: int) -> None:
+        self.tokens.level = min(self.tokens.capacity, self.tokens.level + tokens)
+        if self.waiters:
+            self.pump()
+
+    def pump(self) -> None:
+        """Release as many waiters as the buckets allow, best rank first."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        now = time.monotonic()
+        while self.waiters:
+            head = min(self.waiters, key=lambda w: w.rank(now))
+            if head.future.done():          # cancelled while queued
+                self.waiters.remove(head)
+                continue
+            delay = self._delay(head.tokens, now)
+            if delay > 0:
+                self._timer = asyncio.get_running_loop().call_later(delay, self.pump)
+                return
+            self._take(head.tokens)
+            self.waiters.remove(head)
+            head.future.set_result(None)
+
+
+_lanes: dict[str, _Lane] = {}
+_seq = itertools.count()
+
+
+def _limits_for(model: str, provider: str) -> dict[str, int]:
+    base = LLM_PROVIDER_RATE_LIMITS.get(provider) or {"rpm": 1000, "tpm": 200000}
+    return {**base, **LLM_MODEL_RATE_LIMITS.get(model, {})}
+
+
+def _lane(model: str, provider: str) -> _Lane:
+    lane = _lanes.get(model)
+    if lane is None:
+        limits = _limits_for(model, provider)
+        lane = _lanes[model] = _Lane(model, limits["rpm"], limits["tpm"])
+    return lane
+
+
+# ── Public API ────────────────────────────────────────────────────────────────
+
+class Ticket:
+    """Admission receipt. settle() reconciles the estimate with real usage;
+    a ticket that is never settled simply keeps its estimate."""
+
+    def __init__(self, lane: Optional[_Lane], tokens: int, waited_s: float = 0.0):
+        self._lane    = lane
+        self.tokens   = tokens
+        self.waited_s = waited_s
+
+    def settle(self, usage: Optional[dict]) -> None:
+        if self._lane is None:
+            return
+        lane, self._lane = self._lane, None
+        actual = billable_tokens(usage) if usage else 0
+        if not usage:
+            # Failed call — the provider never billed it; return the whole estimate.
+            lane.requests.level = min(lane.requests.capacity, lane.requests.level + 1)
+        lane.refund(self.tokens - actual)
+
+
+async def admit(
+    model: str,
+    provider: str,
+    priority: int = Priority.DEFAULT,
+    est_tokens: int = _DEFAULT_OUTPUT_TOKENS,
+) -> Ticket:
+    """Wait until model's buckets can cover est_tokens, honouring priority."""
+    if not LLM_SCHEDULER_ENABLED:
+        return Ticket(None, est_tokens)
+
+    lane   = _lane(model, provider)
+    tokens = int(min(est_tokens, lane.tokens.capacity))
+    if not lane.waiters and lane.try_take(tokens):
+        return Ticket(lane, tokens)
+
+    future = asyncio.get_running_loop().create_future()
+    waiter = _Waiter(int(priority), next(_seq), tokens, future)
+    lane.waiters.append(waiter)
+    lane.pump()
+    try:
+        await future
+    except asyncio.CancelledError:
+        if waiter in lane.waiters:
+            lane.waiters.remove(waiter)
+        elif future.done() and not future.cancelled():
+            lane.refund(tokens)     # admitted at the same moment we were cancelled
+        raise
+
+    waited = time.monotonic() - waiter.enqueued
+    if waited >= _LOG_WAIT_S:
+        logger.info("llm_scheduler_queued", model=model, priority=Priority(int(priority)).name,
+                    waited_ms=round(waited * 1000), est_tokens=tokens,
+                    queue_depth=len(lane.waiters))
+    return Ticket(lane, tokens, waited)
+
+
+def pause(model: str, seconds: float) -> None:
+    """Stop admitting calls for model for `seconds` (provider said 429/529)."""
+    lane = _lanes.get(model)
+    if lane is None or seconds <= 0:
+        return
+    lane.paused_until = max(lane.paused_until, time.monotonic() + seconds)
+    logger.info("llm_scheduler_paused", model=model, seconds=round(seconds, 1))
+
+
+def stats() -> dict[str, dict]:
+    """Snapshot of every lane — bucket levels and queue depth per priority."""
+    out = {}
+    for model, lane in _lanes.items():
+        now = time.monotonic()
+        lane.requests.refill(now)
+        lane.tokens.refill(now)
+        depth: dict[str, int] = {}
+        for w in lane.waiters:
+            name = Priority(w.priority).name
+            depth[name] = depth.get(name, 0) + 1
+        out[model] = {
+            "requests_available": int(lane.requests.level),
+            "tokens_available":   int(lane.tokens.level),
+            "paused_s":           round(max(0.0, lane.paused_until - now), 1),
+            "queued":             depth,
+        }
+    return out
@@ -6,6 +6,7 @@ Architecture:
   - OpenAIProvider      — calls OpenAI Chat Completions API
   - ClaudeProvider      — Anthropic Claude (default)
   - GeminiProvider      — Google Gemini via OpenAI-compatible endpoint
+  - HedgedProvider      — races a secondary model after the primary's p90 latency
   - LLMService          — thin wrapper used across the app; delegates to a provider
 
 To switch providers, change the `provider=` argument when constructing
@@ -16,11 +17,47 @@ Public API (unchanged — all callers continue to work):
   llm_service.make_single_prompt_request(prompt, cache_prefix="")
   llm_service.make_system_user_request(system_prompt, user_prompt)
 
-Prompt caching (Anthropic only):
+Prompt caching:
   Pass cache_prefix=<static_template_text> to make_single_prompt_request().
   When set, the message is split into two content blocks — the static prefix
   is marked cache_control=ephemeral so Anthropic reuses it at 10% cost.
-  Requires PROMPT_CACHE_ENABLED=true (default) in config.py.
+  For system/user requests pass system_blocks=[...] — the system prompt split
+  at its breakpoints, most-static first — and each block gets a breakpoint.
+  Requires PROMPT_CACHE_ENABLED=true (default) in config.py. OpenAI and Gemini
+  cache identical leading prefixes automatically; both kwargs are ignored
+  there, and their cached_tokens are reported as cache_read_input_tokens.
+
+Response caching (all providers, async methods only):
+  Pass cache_task=<task> to any make_*_request_async(). Byte-identical requests
+  for tasks listed in LLM_CACHE_TTL_SECS are served from services/llm_cache.py
+  without a provider round-trip. Hits report usage["cache_hit"] = True.
+
+Single-flight (all providers, async methods only):
+  Concurrent byte-identical requests share one provider call via
+  services/single_flight.py. Only the leader is billed; followers get
+  zero-token usage with cache_hit = coalesced = True.
+
+Metrics (all providers, async methods only):
+  Pass task=<name> to any make_*_request_async() (cache_task is used when
+  omitted). Latency, output tokens/sec, prompt-cache tokens, scheduler wait
+  and retries are exported to Prometheus by services/llm_metrics.py.
+
+Dispatch scheduling (all providers, async methods only):
+  Pass priority=Priority.<tier> to any make_*_request_async(). Calls are
+  admitted through services/llm_scheduler.py's per-model RPM/TPM buckets, and
+  higher-priority calls go first when a model is saturated. Providers report
+  429/529 back via llm_scheduler.pause().
+
+Streaming (all providers, async only):
+  llm_service.stream_single_prompt_async(prompt, usage_sink) yields text chunks
+  through provider.stream_async(). Same cache, single-flight (in-process; a
+  follower gets the leader's text as one chunk) and scheduler as above; providers
+  without a native stream yield their whole reply at once. HedgedProvider races
+  its two models on time to first chunk, then relays the winner's stream.
+
+Provider override:
+  set_provider_override(fn) makes every LLMService use fn(configured_provider)
+  instead — services/replay.py uses it to replay recorded responses offline.
 """
 
 import asyncio
@@ -29,13 +66,21 @@ import structlog
 import re
 import time
 from abc import ABC, abstractmethod
-from typing import Any, Dict, List, Optional
+from collections import deque
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+
+from services import llm_metrics, llm_scheduler, request_context
+from services.llm_scheduler import Priority
+from services.single_flight import SingleFlight
 
 logger = structlog.get_logger(__name__)
 
 # How many times to retry on rate-limit / overload before giving up
 _MAX_RETRIES = 3
 
+# Anthropic rejects requests with more cache_control breakpoints than this.
+_MAX_CACHE_BREAKPOINTS = 4
+
 # Regex to pull the suggested wait time out of OpenAI's error message:
 # "Please try again in 4.934s."
 _WAIT_RE = re.compile(r'try again in ([\d.]+)s', re.IGNORECASE)
@@ -53,12 +98,38 @@ _async_gemini_client = None
 
 _GEMINI_BASE_URL = "https://generativelanguage.googleapis.com/v1beta/openai/"
 
+# Process-wide single-flight table for async completions (see LLMService).
+# Providers report failure as (None, usage) rather than raising; such results
+# must not be handed to other workers as a shared answer.
+_llm_flight = SingleFlight("llm", cross_worker=True, failed=lambda value: value[0] is None)
+
+# When set, LLMService.provider returns _provider_override(configured_provider).
+_provider_override: Optional[Callable[["LLMProvider"], "LLMProvider"]] = None
+
+
+def _http_client(client_cls):
+    """
+    An SDK's DefaultHttpxClient / DefaultAsyncHttpxClient with explicit pool
+    limits and keep-alive (HTTP_POOL_* in config.py). Limits must come from
+    the httpx build the SDK uses (newer SDKs ship httpx2), so it is resolved
+    from the client class itself.
+    """
+    import importlib
+    from core.config import HTTP_KEEPALIVE_EXPIRY_S, HTTP_POOL_MAX_CONNECTIONS, HTTP_POOL_MAX_KEEPALIVE
+    base = next(c for c in client_cls.__mro__[1:] if c.__name__ in ("Client", "AsyncClient"))
+    httpx = importlib.import_module(base.__module__.split(".")[0])
+    return client_cls(limits=httpx.Limits(
+        max_connections=HTTP_POOL_MAX_CONNECTIONS,
+        max_keepalive_connections=HTTP_POOL_MAX_KEEPALIVE,
+        keepalive_expiry=HTTP_KEEPALIVE_EXPIRY_S,
+    ))
+
 
 def _get_openai_client():
     global _openai_client
     if _openai_client is None:
-        from openai import OpenAI
-        _openai_client = OpenAI()
+        from openai import DefaultHttpxClient, OpenAI
+        _openai_client = OpenAI(http_client=_http_client(DefaultHttpxClient))
     return _openai_client
 
 
@@ -66,15 +137,15 @@ def _get_anthropic_client():
     global _anthropic_client
     if _anthropic_client is None:
         import anthropic
-        _anthropic_client = anthropic.Anthropic()
+        _anthropic_client = anthropic.Anthropic(http_client=_http_client(anthropic.DefaultHttpxClient))
     return _anthropic_client
 
 
 def _get_async_openai_client():
     global _async_openai_client
     if _async_openai_client is None:
-        from openai import AsyncOpenAI
-        _async_openai_client = AsyncOpenAI()
+        from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+        _async_openai_client = AsyncOpenAI(http_client=_http_client(DefaultAsyncHttpxClient))
     return _async_openai_client
 
 
@@ -82,25 +153,27 @@ def _get_async_anthropic_client():
     global _async_anthropic_client
     if _async_anthropic_client is None:
         import anthropic
-        _async_anthropic_client = anthropic.AsyncAnthropic()
+        _async_anthropic_client = anthropic.AsyncAnthropic(http_client=_http_client(anthropic.DefaultAsyncHttpxClient))
     return _async_anthropic_client
 
 
 def _get_gemini_client():
     global _gemini_client
     if _gemini_client is None:
-        from openai import OpenAI
+        from openai import DefaultHttpxClient, OpenAI
         from core.config import GEMINI_API_KEY
-        _gemini_client = OpenAI(api_key=GEMINI_API_KEY, base_url=_GEMINI_BASE_URL)
+        _gemini_client = OpenAI(api_key=GEMINI_API_KEY, base_url=_GEMINI_BASE_URL,
+                                http_client=_http_client(DefaultHttpxClient))
     return _gemini_client
 
 
 def _get_async_gemini_client():
     global _async_gemini_client
     if _async_gemini_client is None:
-        from openai import AsyncOpenAI
+        from openai import AsyncOpenAI, DefaultAsyncHttpxClient
         from core.config import GEMINI_API_KEY
-        _async_gemini_client = AsyncOpenAI(api_key=GEMINI_API_KEY, base_url=_GEMINI_BASE_URL)
+        _async_gemini_client = AsyncOpenAI(api_key=GEMINI_API_KEY, base_url=_GEMINI_BASE_URL,
+                                           http_client=_http_client(DefaultAsyncHttpxClient))
     return _async_gemini_client
 
 
@@ -111,6 +184,9 @@ def _get_async_gemini_client():
 class LLMProvider(ABC):
     """Every provider must implement complete() and complete_async()."""
 
+    # Rate-limit family used by services/llm_scheduler.py (LLM_PROVIDER_RATE_LIMITS).
+    name: str = "unknown"
+
     @abstractmethod
     def complete(self, messages: List[Dict[str, str]], **kwargs) -> tuple[Optional[str], dict]:
         """
@@ -125,6 +201,99 @@ class LLMProvider(ABC):
         """Async version of complete() — uses native async SDK clients."""
         ...  # pragma: no cover
 
+    async def stream_async(
+        self, messages: List[Dict[str, str]], usage_sink: dict, **kwargs,
+    ) -> AsyncIterator[str]:
+        """
+        Yield the reply as text chunks; usage is written into usage_sink once
+        the stream ends. Errors propagate — callers fall back to complete_async().
+
+        The default delivers complete_async() as a single chunk, for providers
+        without native streaming.
+        """
+        result, usage = await self.complete_async(messages, **kwargs)
+        if result is None:
+            raise RuntimeError(f"{self.name} provider returned no result")
+        usage_sink.update(usage or {})
+        yield result
+
+
+def _chat_usage(usage) -> dict:
+    """
+    Usage dict for an OpenAI-compatible response. Automatic prefix-cache hits
+    (prompt_tokens_details.cached_tokens) are moved out of prompt_tokens into
+    cache_read_input_tokens, matching the Anthropic split core/cost.py prices.
+    """
+    if not usage:
+        return {}
+    details = getattr(usage, "prompt_tokens_details", None)
+    cached = (getattr(details, "cached_tokens", 0) or 0) if details else 0
+    prompt = getattr(usage, "prompt_tokens", 0) or 0
+    return {
+        "prompt_tokens":           prompt - cached,
+        "completion_tokens":       getattr(usage, "completion_tokens", 0) or 0,
+        "total_tokens":            getattr(usage, "total_tokens", 0) or 0,
+        "cache_read_input_tokens": cached,
+    }
+
+
+def _claude_system(system: Optional[str], system_blocks: Optional[List[str]]) -> Any:
+    """
+    The `system` argument for the Messages API. When system_blocks (the system
+    prompt split at its cache breakpoints, joining back to exactly `system`)
+    is given, each block ends with a cache_control breakpoint so the static
+    leading blocks are reused across requests that only differ further down.
+    """
+    from core.config import PROMPT_CACHE_ENABLED
+
+    blocks = [b for b in (system_blocks or []) if b]
+    if not system or not blocks or not PROMPT_CACHE_ENABLED or "".join(blocks) != system:
+        return system
+    # The API allows at most 4 breakpoints per request.
+    while len(blocks) > _MAX_CACHE_BREAKPOINTS:
+        blocks[0:2] = [blocks[0] + blocks[1]]
+    return [{"type": "text", "text": b, "cache_control": {"type": "ephemeral"}} for b in blocks]
+
+
+async def _create_chat_stream(client, create_kwargs: dict):
+    """
+    chat.completions.create(stream=True) with usage reporting. Only when the
+    endpoint rejects stream_options itself (a 400 naming it — not every
+    OpenAI-compatible endpoint supports it) is the request resent without it;
+    rate limits, auth errors and timeouts propagate untouched.
+    """
+    import openai
+    try:
+        return await client.chat.completions.create(**create_kwargs)
+    except openai.BadRequestError as exc:
+        if "stream_options" not in create_kwargs or "stream_options" not in str(exc):
+            raise
+        logger.info("stream_options_unsupported", model=create_kwargs.get("model"))
+        create_kwargs = {k: v for k, v in create_kwargs.items() if k != "stream_options"}
+        return await client.chat.completions.create(**create_kwargs)
+
+
+async def _stream_chat_completions(
+    client, model: str, messages: List[Dict[str, str]], usage_sink: dict, kwargs: dict,
+) -> AsyncIterator[str]:
+    """Shared streaming path for the OpenAI-compatible providers (OpenAI, Gemini)."""
+    kwargs.pop("cache_prefix", None)
+    kwargs.pop("system_blocks", None)
+    kwargs.pop("tool_schema", None)
+    if kwargs.pop("json_mode", False):
+        kwargs["response_format"] = {"type": "json_object"}
+
+    response = await _create_chat_stream(client, dict(
+        model=model, messages=messages, stream=True,
+        stream_options={"include_usage": True}, **kwargs,
+    ))
+
+    async for chunk in response:
+        if chunk.choices and chunk.choices[0].delta.content:
+            yield chunk.choices[0].delta.content
+        if getattr(chunk, "usage", None):
+            usage_sink.update(_chat_usage(chunk.usage))
+
 
 # ---------------------------------------------------------------------------
 # OpenAI provider
@@ -140,6 +309,8 @@ class OpenAIProvider(LLMProvider):
     Reads OPENAI_API_KEY from the environment (set in .env via python-dotenv).
     """
 
+    name = "openai"
+
     def __init__(self, model: str = None):
         from core.config import OPENAI_MODEL
         self.model = model or OPENAI_MODEL
@@ -150,6 +321,7 @@ class OpenAIProvider(LLMProvider):
 
         # These are Claude-only concepts — discard them silently for OpenAI
         kwargs.pop("cache_prefix", None)
+        kwargs.pop("system_blocks", None)
         kwargs.pop("tool_schema", None)
         json_mode: bool = kwargs.pop("json_mode", False)
 
@@ -163,12 +335,7 @@ class OpenAIProvider(LLMProvider):
                     messages=messages,
                     **kwargs,
                 )
-                usage = response.usage
-                usage_dict = {
-                    "prompt_tokens":     usage.prompt_tokens,
-                    "completion_tokens": usage.completion_tokens,
-                    "total_tokens":      usage.total_tokens,
-                } if usage else {}
+                usage_dict = _chat_usage(response.usage)
                 return response.choices[0].message.content, usage_dict
 
             except RateLimitError as e:
@@ -178,6 +345,7 @@ class OpenAIProvider(LLMProvider):
                 match = _WAIT_RE.search(str(e))
                 wait = (float(match.group(1)) + 0.5) if match else (5.0 * (attempt + 1))
                 logger.warning("openai_rate_limit_retry", wait_s=round(wait, 1), attempt=attempt + 1, max_retries=_MAX_RETRIES - 1)
+                llm_metrics.record_retry(self.model, self.name, "rate_limit")
                 time.sleep(wait)
 
             except Exception as e:
@@ -191,6 +359,7 @@ class OpenAIProvider(LLMProvider):
         client = _get_async_openai_client()
 
         kwargs.pop("cache_prefix", None)
+        kwargs.pop("system_blocks", None)
         kwargs.pop("tool_schema", None)
         json_mode: bool = kwargs.pop("json_mode", False)
 
@@ -204,12 +373,7 @@ class OpenAIProvider(LLMProvider):
                     messages=messages,
                     **kwargs,
                 )
-                usage = response.usage
-                usage_dict = {
-                    "prompt_tokens":     usage.prompt_tokens,
-                    "completion_tokens": usage.completion_tokens,
-                    "total_tokens":      usage.total_tokens,
-                } if usage else {}
+                usage_dict = _chat_usage(response.usage)
                 return response.choices[0].message.content, usage_dict
 
             except RateLimitError as e:
@@ -219,6 +383,8 @@ class OpenAIProvider(LLMProvider):
                 match = _WAIT_RE.search(str(e))
                 wait = (float(match.group(1)) + 0.5) if match else (5.0 * (attempt + 1))
                 logger.warning("openai_rate_limit_retry", wait_s=round(wait, 1), attempt=attempt + 1)
+                llm_metrics.record_retry(self.model, self.name, "rate_limit")
+                llm_scheduler.pause(self.model, wait)
                 await asyncio.sleep(wait)
 
             except Exception as e:
@@ -227,6 +393,13 @@ class OpenAIProvider(LLMProvider):
 
         return None, {}
 
+    async def stream_async(
+        self, messages: List[Dict[str, str]], usage_sink: dict, **kwargs,
+    ) -> AsyncIterator[str]:
+        async for text in _stream_chat_completions(
+                _get_async_openai_client(), self.model, messages, usage_sink, kwargs):
+            yield text
+
 
 # ---------------------------------------------------------------------------
 # Claude provider
@@ -244,6 +417,8 @@ class ClaudeProvider(LLMProvider):
         message into a cached block + dynamic block (10× cheaper on cache hits)
     """
 
+    name = "anthropic"
+
     def __init__(self, model: str = None):
         from core.config import CLAUDE_MODEL
         self.model = model or CLAUDE_MODEL
@@ -252,6 +427,7 @@ class ClaudeProvider(LLMProvider):
         from core.config import PROMPT_CACHE_ENABLED
 
         cache_prefix: str = kwargs.pop("cache_prefix", "")
+        system_blocks: Optional[List[str]] = kwargs.pop("system_blocks", None)
         tool_schema: Optional[dict] = kwargs.pop("tool_schema", None)
         kwargs.pop("json_mode", None)  # Claude uses tool_schema instead
 
@@ -303,7 +479,7 @@ class ClaudeProvider(LLMProvider):
             "messages":   processed_messages,
         }
         if system:
-            create_kwargs["system"] = system
+            create_kwargs["system"] = _claude_system(system, system_blocks)
         if tool_schema:
             create_kwargs["tools"]       = [tool_schema]
             create_kwargs["tool_choice"] = {"type": "tool", "name": tool_schema["name"]}
@@ -347,6 +523,7 @@ class ClaudeProvider(LLMProvider):
                     except Exception:
                         wait = 5.0 * (attempt + 1)
                     logger.warning("claude_rate_limit_retry", wait_s=round(wait, 1), attempt=attempt + 1, max_retries=_MAX_RETRIES - 1)
+                    llm_metrics.record_retry(self.model, self.name, "rate_limit")
                     time.sleep(wait)
                     continue
 
@@ -357,6 +534,7 @@ class ClaudeProvider(LLMProvider):
                             return None, {}
                         wait = 10.0 * (attempt + 1)
                         logger.warning("claude_overloaded_retry", wait_s=round(wait, 1), attempt=attempt + 1, max_retries=_MAX_RETRIES - 1)
+                        llm_metrics.record_retry(self.model, self.name, "overloaded")
                         time.sleep(wait)
                     else:
                         logger.error("claude_api_error", status=e.status_code, error=str(e))
@@ -375,6 +553,7 @@ class ClaudeProvider(LLMProvider):
         from core.config import PROMPT_CACHE_ENABLED
 
         cache_prefix: str = kwargs.pop("cache_prefix", "")
+        system_blocks: Optional[List[str]] = kwargs.pop("system_blocks", None)
         tool_schema: Optional[dict] = kwargs.pop("tool_schema", None)
         kwargs.pop("json_mode", None)
 
@@ -407,7 +586,7 @@ class ClaudeProvider(LLMProvider):
             "messages":   processed_messages,
         }
         if system:
-            create_kwargs["system"] = system
+            create_kwargs["system"] = _claude_system(system, system_blocks)
         if tool_schema:
             create_kwargs["tools"]       = [tool_schema]
             create_kwargs["tool_choice"] = {"type": "tool", "name": tool_schema["name"]}
@@ -443,6 +622,8 @@ class ClaudeProvider(LLMProvider):
                     except Exception:
                         wait = 5.0 * (attempt + 1)
                     logger.warning("claude_rate_limit_retry", wait_s=round(wait, 1), attempt=attempt + 1)
+                    llm_metrics.record_retry(self.model, self.name, "rate_limit")
+                    llm_scheduler.pause(self.model, wait)
                     await asyncio.sleep(wait)
                     continue
 
@@ -452,6 +633,8 @@ class ClaudeProvider(LLMProvider):
                         return None, {}
                     wait = 10.0 * (attempt + 1)
                     logger.warning("claude_overloaded_retry", wait_s=round(wait, 1), attempt=attempt + 1)
+                    llm_metrics.record_retry(self.model, self.name, "overloaded")
+                    llm_scheduler.pause(self.model, wait)
                     await asyncio.sleep(wait)
                 else:
                     logger.error("claude_request_failed", error=str(e))
@@ -459,6 +642,50 @@ class ClaudeProvider(LLMProvider):
 
         return None, {}
 
+    async def stream_async(
+        self, messages: List[Dict[str, str]], usage_sink: dict, **kwargs,
+    ) -> AsyncIterator[str]:
+        from core.config import PROMPT_CACHE_ENABLED
+
+        cache_prefix: str = kwargs.pop("cache_prefix", "")
+        system_blocks: Optional[List[str]] = kwargs.pop("system_blocks", None)
+        kwargs.pop("tool_schema", None)
+        kwargs.pop("json_mode", None)
+
+        system = next((m["content"] for m in messages if m["role"] == "system"), None)
+        user_messages = [dict(m) for m in messages if m["role"] != "system"]
+        first = user_messages[0] if user_messages else {}
+        if (cache_prefix and PROMPT_CACHE_ENABLED and first.get("role") == "user"
+                and isinstance(first.get("content"), str)
+                and first["content"].startswith(cache_prefix)):
+            dynamic = first["content"][len(cache_prefix):]
+            content: Any = [{"type": "text", "text": cache_prefix, "cache_control": {"type": "ephemeral"}}]
+            if dynamic:
+                content.append({"type": "text", "text": dynamic})
+            first["content"] = content
+
+        stream_kwargs: dict = {
+            "model":      self.model,
+            "max_tokens": kwargs.get("max_tokens", 4096),
+            "messages":   user_messages,
+        }
+        if system:
+            stream_kwargs["system"] = _claude_system(system, system_blocks)
+
+        client = _get_async_anthropic_client()
+        async with client.messages.stream(**stream_kwargs) as s:
+            async for text in s.text_stream:
+                yield text
+            msg = await s.get_final_message()
+            if msg.usage:
+                usage_sink.update({
+                    "prompt_tokens":              msg.usage.input_tokens,
+                    "completion_tokens":           msg.usage.output_tokens,
+                    "total_tokens":               msg.usage.input_tokens + msg.usage.output_tokens,
+                    "cache_creation_input_tokens": getattr(msg.usage, "cache_creation_input_tokens", 0),
+                    "cache_read_input_tokens":     getattr(msg.usage, "cache_read_input_tokens", 0),
+                })
+
 
 # ---------------------------------------------------------------------------
 # Gemini provider — OpenAI-compatible endpoint
@@ -473,12 +700,15 @@ class GeminiProvider(LLMProvider):
     Reads GEMINI_API_KEY from the environment (set in .env via python-dotenv).
     """
 
+    name = "gemini"
+
     def __init__(self, model: str = None):
         from core.config import GEMINI_MODEL
         self.model = model or GEMINI_MODEL
 
     def complete(self, messages: List[Dict[str, str]], **kwargs) -> tuple[Optional[str], dict]:
         kwargs.pop("cache_prefix", None)
+        kwargs.pop("system_blocks", None)
         kwargs.pop("tool_schema", None)
         json_mode: bool = kwargs.pop("json_mode", False)
         if json_mode:
@@ -492,24 +722,21 @@ class GeminiProvider(LLMProvider):
                     messages=messages,
                     **kwargs,
                 )
-                usage = response.usage
-                usage_dict = {
-                    "prompt_tokens":     usage.prompt_tokens,
-                    "completion_tokens": usage.completion_tokens,
-                    "total_tokens":      usage.total_tokens,
-                } if usage else {}
+                usage_dict = _chat_usage(response.usage)
                 return response.choices[0].message.content, usage_dict
 
             except Exception as e:
                 logger.error("gemini_request_failed", error=str(e), attempt=attempt + 1)
                 if attempt == _MAX_RETRIES - 1:
                     return None, {}
+                llm_metrics.record_retry(self.model, self.name, "error")
                 time.sleep(2.0 * (attempt + 1))
 
         return None, {}
 
     async def complete_async(self, messages: List[Dict[str, str]], **kwargs) -> tuple[Optional[str], dict]:
         kwargs.pop("cache_prefix", None)
+        kwargs.pop("system_blocks", None)
         kwargs.pop("tool_schema", None)
         json_mode: bool = kwargs.pop("json_mode", False)
         if json_mode:
@@ -523,22 +750,290 @@ class GeminiProvider(LLMProvider):
                     messages=messages,
                     **kwargs,
                 )
-                usage = response.usage
-                usage_dict = {
-                    "prompt_tokens":     usage.prompt_tokens,
-                    "completion_tokens": usage.completion_tokens,
-                    "total_tokens":      usage.total_tokens,
-                } if usage else {}
+                usage_dict = _chat_usage(response.usage)
                 return response.choices[0].message.content, usage_dict
 
             except Exception as e:
                 logger.error("gemini_request_failed", error=str(e), attempt=attempt + 1)
                 if attempt == _MAX_RETRIES - 1:
                     return None, {}
+                llm_metrics.record_retry(self.model, self.name, "error")
                 await asyncio.sleep(2.0 * (attempt + 1))
 
         return None, {}
 
+    async def stream_async(
+        self, messages: List[Dict[str, str]], usage_sink: dict, **kwargs,
+    ) -> AsyncIterator[str]:
+        async for text in _stream_chat_completions(
+                _get_async_gemini_client(), self.model, messages, usage_sink, kwargs):
+            yield text
+
+
+# ---------------------------------------------------------------------------
+# Hedged provider — primary + secondary racing for latency-critical tasks
+# ---------------------------------------------------------------------------
+
+# Rolling window of successful-call latencies per model, for the hedge delay.
+_LATENCY_WINDOW = 200
+_latencies: Dict[str, "deque[float]"] = {}
+
+
+def record_latency(model: str, seconds: float) -> None:
+    window = _latencies.get(model)
+    if window is None:
+        window = _latencies[model] = deque(maxlen=_LATENCY_WINDOW)
+    window.append(seconds)
+
+
+def hedge_delay(model: str) -> float:
+    """Seconds to wait on the primary before hedging: its observed p90."""
+    from core.config import HEDGE_DEFAULT_DELAY_S, HEDGE_MIN_DELAY_S, HEDGE_MIN_SAMPLES
+    window = _latencies.get(model)
+    if not window or len(window) < HEDGE_MIN_SAMPLES:
+        return HEDGE_DEFAULT_DELAY_S
+    ordered = sorted(window)
+    p90 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.9))]
+    return max(HEDGE_MIN_DELAY_S, p90)
+
+
+class _HedgeLeg:
+    """One side of a streamed hedge: the provider's stream and what it billed."""
+
+    def __init__(self, provider: LLMProvider, messages: List[Dict[str, str]], kwargs: dict):
+        self.provider = provider
+        self.model    = getattr(provider, "model", "unknown")
+        self.usage: dict = {}
+        self.stream   = provider.stream_async(messages, self.usage, **kwargs)
+        self.ticket: Optional[llm_scheduler.Ticket] = None
+        self.produced = False
+
+    async def first(self) -> Optional[str]:
+        """The stream's first chunk, or None when it ends without one."""
+        t0 = time.monotonic()
+        try:
+            text = await self.stream.__anext__()
+        except StopAsyncIteration:
+            return None
+        record_latency(_first_chunk_key(self.model), time.monotonic() - t0)
+        self.produced = True
+        return text
+
+    async def close(self) -> None:
+        await self.stream.aclose()
+        # Text without usage keeps the admission estimate, as in LLMService.
+        if self.ticket is not None and (self.usage or not self.produced):
+            self.ticket.settle(self.usage or None)
+
+
+def _first_chunk_key(model: str) -> str:
+    """Latency window for a model's time to first streamed chunk."""
+    return f"{model}:first_chunk"
+
+
+def _answered(task: asyncio.Task) -> bool:
+    return not task.cancelled() and task.exception() is None and task.result()[0] is not None
+
+
+class HedgedProvider(LLMProvider):
+    """
+    Sends a request to `primary`; if it has not answered within the primary
+    model's p90 latency (or it failed), the same request goes to `secondary`.
+    The first valid (non-None) answer wins and the other call is cancelled.
+    Streams hedge the same way on time to first chunk: once either side has
+    yielded, the other is cancelled and the winner's stream is relayed.
+
+    Built by get_task_service() for TASK_MODELS entries of the form
+    "primary|secondary". Async only — the sync path just uses the primary.
+    The secondary is admitted through llm_scheduler at the caller's
+    `priority`, which LLMService and scoped_stream() pass through.
+
+    The returned usage belongs to the winning call and carries a "hedge" dict
+    (fired, won, winner_model, extra_model, extra_usage). When a hedge fires,
+    an `llm_hedge` lifecycle entry records it so compute_session_cost can
+    bill the losing call too. A cancelled loser's cost is estimated as its
+    prompt tokens only.
+    """
+
+    def __init__(self, primary: LLMProvider, secondary: LLMProvider):
+        self.primary   = primary
+        self.secondary = secondary
+        self.model     = getattr(primary, "model", "unknown")
+        self.name      = getattr(primary, "name", "unknown")
+
+    def complete(self, messages: List[Dict[str, str]], **kwargs) -> tuple[Optional[str], dict]:
+        return self.primary.complete(messages, **kwargs)
+
+    async def _timed(self, provider: LLMProvider, messages, kwargs: dict) -> tuple[Optional[str], dict]:
+        t0 = time.monotonic()
+        result, usage = await provider.complete_async(messages, **kwargs)
+        if result is not None:
+            record_latency(getattr(provider, "model", "unknown"), time.monotonic() - t0)
+        return result, usage
+
+    async def _admit_secondary(self, messages, kwargs: dict, priority: int) -> llm_scheduler.Ticket:
+        sec = self.secondary
+        return await llm_scheduler.admit(
+            getattr(sec, "model", "unknown"), getattr(sec, "name", "unknown"),
+            priority,
+            llm_scheduler.estimate_tokens(messages, kwargs.get("max_tokens")),
+        )
+
+    async def _run_secondary(self, messages, kwargs: dict, priority: int) -> tuple[Optional[str], dict]:
+        ticket = await self._admit_secondary(messages, kwargs, priority)
+        usage = None
+        try:
+            result, usage = await self._timed(self.secondary, messages, kwargs)
+        finally:
+            ticket.settle(usage)
+        return result, usage
+
+    async def _open_secondary(self, leg: _HedgeLeg, messages, kwargs: dict, priority: int) -> tuple[Optional[str], None]:
+        leg.ticket = await self._admit_secondary(messages, kwargs, priority)
+        return await leg.first(), None
+
+    def _record_hedge(self, t0: float, delay: float, reason: str, hedge_won: bool,
+                      extra_model: str, extra_usage: dict) -> dict:
+        winner_model = getattr(self.secondary if hedge_won else self.primary, "model", "unknown")
+        outcome = {
+            "fired":        True,
+            "won":          hedge_won,
+            "reason":       reason,
+            "delay_ms":     int(delay * 1000),
+            "elapsed_ms":   int((time.monotonic() - t0) * 1000),
+            "winner_model": winner_model,
+            "extra_model":  extra_model,
+            "extra_usage":  extra_usage,
+        }
+        logger.info("llm_hedge", primary=self.model, secondary=self.secondary.model,
+                    won=hedge_won, reason=reason, delay_ms=outcome["delay_ms"],
+                    elapsed_ms=outcome["elapsed_ms"])
+        request_context.accumulate_tokens(extra_usage)
+        request_context.log({"event": "llm_hedge", **outcome})
+        return outcome
+
+    async def complete_async(
+        self, messages: List[Dict[str, str]], priority: int = Priority.DEFAULT, **kwargs,
+    ) -> tuple[Optional[str], dict]:
+        from core.config import HEDGING_ENABLED
+        if not HEDGING_ENABLED:
+            return await self.primary.complete_async(messages, **kwargs)
+
+        t0 = time.monotonic()
+        delay = hedge_delay(self.model)
+        primary = asyncio.create_task(self._timed(self.primary, messages, dict(kwargs)))
+        try:
+            done, _ = await asyncio.wait({primary}, timeout=delay)
+        except asyncio.CancelledError:
+            primary.cancel()
+            raise
+        if done:
+            result, usage = primary.result()
+            if result is not None:
+                return result, usage
+            reason = "primary_failed"
+        else:
+            reason = "primary_slow"
+
+        hedge = asyncio.create_task(self._run_secondary(messages, dict(kwargs), priority))
+        pending = {primary, hedge} - ({primary} if done else set())
+        winner: Optional[asyncio.Task] = None
+        try:
+            while pending and winner is None:
+                finished, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in finished:
+                    if winner is None and _answered(task):
+                        winner = task
+        finally:
+            for task in pending:
+                task.cancel()
+
+        hedge_won = winner is hedge
+        loser = primary if hedge_won or winner is None else hedge
+        loser_provider = self.primary if loser is primary else self.secondary
+        if loser.done() and not loser.cancelled() and loser.exception() is None:
+            extra_usage = loser.result()[1] or {}
+        else:
+            # Cancelled mid-flight — assume the prompt was billed, not the output.
+            extra_usage = {"prompt_tokens": llm_scheduler.estimate_tokens(messages, 0),
+                           "estimated": True}
+        outcome = self._record_hedge(t0, delay, reason, hedge_won,
+                                     getattr(loser_provider, "model", "unknown"), extra_usage)
+
+        if winner is None:
+            return None, {}
+        result, usage = winner.result()
+        return result, {**(usage or {}), "hedge": outcome}
+
+    async def stream_async(
+        self, messages: List[Dict[str, str]], usage_sink: dict,
+        priority: int = Priority.DEFAULT, **kwargs,
+    ) -> AsyncIterator[str]:
+        from core.config import HEDGING_ENABLED
+        if not HEDGING_ENABLED:
+            async for text in self.primary.stream_async(messages, usage_sink, **kwargs):
+                yield text
+            return
+
+        t0 = time.monotonic()
+        delay = hedge_delay(_first_chunk_key(self.model))
+        primary = _HedgeLeg(self.primary, messages, dict(kwargs))
+        # Each task resolves to (first chunk or None, None) so _answered() applies.
+        legs = {asyncio.ensure_future(_first_of(primary)): primary}
+        winner: Optional[_HedgeLeg] = None
+        first = ""
+        reason = ""
+        try:
+            done, _ = await asyncio.wait(legs, timeout=delay)
+            if done and _answered(next(iter(done))):
+                winner, first = primary, next(iter(done)).result()[0]
+            else:
+                reason = "primary_failed" if done else "primary_slow"
+                secondary = _HedgeLeg(self.secondary, messages, dict(kwargs))
+                legs[asyncio.ensure_future(
+                    self._open_secondary(secondary, messages, dict(kwargs), priority))] = secondary
+                pending = {task for task in legs if not task.done()}
+                while pending and winner is None:
+                    finished, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    for task in finished:
+                        if winner is None and _answered(task):
+                            winner, first = legs[task], task.result()[0]
+        finally:
+            losers = [(task, leg) for task, leg in legs.items() if leg is not winner]
+            for task, _leg in losers:
+                task.cancel()
+            await asyncio.gather(*(task for task, _leg in losers), return_exceptions=True)
+            for _task, leg in losers:
+                await leg.close()
+
+        outcome = None
+        if reason:
+            hedge_won = winner is not None and winner is not primary
+            loser_task, loser = losers[0]   # the primary when both failed
+            if loser.usage:
+                extra_usage = dict(loser.usage)
+            elif loser_task.cancelled() or loser_task.exception() is not None:
+                # Cancelled mid-flight — assume the prompt was billed, not the output.
+                extra_usage = {"prompt_tokens": llm_scheduler.estimate_tokens(messages, 0),
+                               "estimated": True}
+            else:
+                extra_usage = {}
+            outcome = self._record_hedge(t0, delay, reason, hedge_won, loser.model, extra_usage)
+
+        if winner is None:
+            raise RuntimeError(f"{self.name} hedged stream returned no result")
+        try:
+            yield first
+            async for text in winner.stream:
+                yield text
+        finally:
+            await winner.close()
+        usage_sink.update({**winner.usage, "hedge": outcome} if outcome else winner.usage)
+
+
+async def _first_of(leg: _HedgeLeg) -> tuple[Optional[str], None]:
+    return await leg.first(), None
+
 
 # ---------------------------------------------------------------------------
 # LLMService — thin wrapper used across the app
@@ -557,6 +1052,16 @@ class LLMService:
         # an expensive default (gpt-4.1) silently 10×'d cost on any miswiring.
         self.provider = provider or ClaudeProvider()
 
+    @property
+    def provider(self) -> LLMProvider:
+        if _provider_override is not None:
+            return _provider_override(self._provider)
+        return self._provider
+
+    @provider.setter
+    def provider(self, provider: LLMProvider) -> None:
+        self._provider = provider
+
     def make_completion_request(
         self,
         messages: List[Dict[str, str]],
@@ -610,13 +1115,78 @@ class LLMService:
         return self.provider.complete(messages, **kwargs)
 
     # -- Async variants — use these from async contexts to avoid thread-pool saturation --
+    #
+    # All three accept cache_task=<task name>. When the task has a TTL in
+    # LLM_CACHE_TTL_SECS the response cache (services/llm_cache.py) is consulted
+    # first; a hit returns llm_cache.hit_usage() (zero tokens, cache_hit=True).
+    # On a miss, concurrent identical calls are coalesced by _llm_flight, and the
+    # leader is admitted through services/llm_scheduler.py at `priority`.
+
+    async def _complete_async_cached(
+        self,
+        messages: List[Dict[str, str]],
+        cache_task: str = "",
+        priority: int = Priority.DEFAULT,
+        task: str = "",
+        **kwargs,
+    ) -> tuple[Optional[Any], dict]:
+        from services import llm_cache
+        ttl = llm_cache.ttl_for(cache_task)
+
+        model = getattr(self.provider, "model", "unknown")
+        provider_name = getattr(self.provider, "name", "unknown")
+        label = task or cache_task or "unknown"
+        key = _request_key(model, messages, kwargs)
+        if ttl:
+            cached = await llm_cache.lookup(cache_task, key)
+            if cached is not None:
+                return cached, llm_cache.hit_usage()
+
+        async def _call() -> tuple[Optional[Any], dict]:
+            t_admit = time.monotonic()
+            ticket = await llm_scheduler.admit(
+                model, provider_name, priority,
+                llm_scheduler.estimate_tokens(messages, kwargs.get("max_tokens")),
+            )
+            t0 = time.monotonic()
+            llm_metrics.record_queue_wait(label, model, provider_name, t0 - t_admit)
+            usage = None
+            result = None
+            try:
+                with llm_metrics.task_scope(label):
+                    provider = self.provider
+                    result, usage = await provider.complete_async(
+                        messages, **_provider_kwargs(provider, priority, kwargs))
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                llm_metrics.record_call(label, model, provider_name, time.monotonic() - t0, None, ok=False)
+                raise
+            else:
+                llm_metrics.record_call(label, model, provider_name, time.monotonic() - t0,
+                                        usage, ok=result is not None)
+            finally:
+                ticket.settle(usage)
+            if ttl and result is not None:
+                await llm_cache.store(cache_task, key, model, result, usage)
+            return result, usage
+
+        # Only responses the cache may keep are reused across workers once
+        # finished; creative tasks (ttl 0) just join a call still in flight.
+        (result, usage), shared = await _llm_flight.do(
+            key, _call, reuse_results=bool(ttl))
+        if shared:
+            # Another caller paid for this response — bill it like a cache hit.
+            return result, {**llm_cache.hit_usage(), "coalesced": True}
+        return result, usage
 
     async def make_completion_request_async(
         self,
         messages: List[Dict[str, str]],
+        cache_task: str = "",
         **kwargs,
     ) -> tuple[Optional[Any], dict]:
-        return await self.provider.complete_async(messages, **kwargs)
+        return await self._complete_async_cached(messages, cache_task=cache_task, **kwargs)
 
     async def make_single_prompt_request_async(
         self,
@@ -624,11 +1194,13 @@ class LLMService:
         cache_prefix: str = "",
         tool_schema: Optional[dict] = None,
         json_mode: bool = False,
+        cache_task: str = "",
         **kwargs,
     ) -> tuple[Optional[Any], dict]:
         messages = [{"role": "user", "content": prompt}]
-        return await self.provider.complete_async(
+        return await self._complete_async_cached(
             messages,
+            cache_task=cache_task,
             cache_prefix=cache_prefix,
             tool_schema=tool_schema,
             json_mode=json_mode,
@@ -639,13 +1211,149 @@ class LLMService:
         self,
         system_prompt: str,
         user_prompt: str,
+        cache_task: str = "",
         **kwargs,
     ) -> tuple[Optional[Any], dict]:
         messages = [
             {"role": "system", "content": system_prompt},
             {"role": "user", "content": user_prompt},
         ]
-        return await self.provider.complete_async(messages, **kwargs)
+        return await self._complete_async_cached(messages, cache_task=cache_task, **kwargs)
+
+    async def stream_single_prompt_async(
+        self,
+        prompt: str,
+        usage_sink: dict,
+        cache_task: str = "",
+        priority: int = Priority.DEFAULT,
+        task: str = "",
+        **kwargs,
+    ) -> AsyncIterator[str]:
+        """
+        Streaming variant of make_single_prompt_request_async(): yields text
+        chunks as they arrive and fills usage_sink when the stream ends.
+
+        Shares the response cache (a hit is yielded as one chunk with
+        hit_usage()) and the scheduler admission of the non-streaming path.
+        Identical concurrent streams are single-flighted in-process: a follower
+        waits for the leader's text and gets it as one chunk, billed like a
+        coalesced non-streaming call. Provider errors propagate so the caller
+        can fall back.
+        """
+        from services import llm_cache
+        messages = [{"role": "user", "content": prompt}]
+        ttl = llm_cache.ttl_for(cache_task)
+
+        model = getattr(self.provider, "model", "unknown")
+        key = _request_key(model, messages, kwargs)
+        if ttl:
+            cached = await llm_cache.lookup(cache_task, key)
+            if cached is not None:
+                usage_sink.update(llm_cache.hit_usage())
+                yield cached
+                return
+
+        provider_name = getattr(self.provider, "name", "unknown")
+        label = task or cache_task or "unknown"
+
+        async def _stream() -> AsyncIterator[str]:
+            t_admit = time.monotonic()
+            ticket = await llm_scheduler.admit(
+                model, provider_name, priority,
+                llm_scheduler.estimate_tokens(messages, kwargs.get("max_tokens")),
+            )
+            timer = llm_metrics.StreamTimer(label, model, provider_name)
+            llm_metrics.record_queue_wait(label, model, provider_name, timer.started - t_admit)
+            chunks: list[str] = []
+            try:
+                async for text in scoped_stream(self.provider, label, messages, usage_sink,
+                                                priority=priority, **kwargs):
+                    timer.token()
+                    chunks.append(text)
+                    yield text
+                timer.done(dict(usage_sink))
+            except Exception:
+                timer.done(None, ok=False)
+                raise
+            finally:
+                # No usage from a stream that produced text (endpoint without
+                # include_usage) keeps the estimate; a stream that failed before
+                # its first chunk refunds it.
+                if usage_sink or not chunks:
+                    ticket.settle(dict(usage_sink))
+            if ttl and chunks:
+                await llm_cache.store(cache_task, key, model, "".join(chunks), dict(usage_sink))
+
+        stream = _llm_flight.stream(key, _stream)
+        try:
+            async for text, shared in stream:
+                if shared:
+                    # Another caller paid for this response — bill it like a cache hit.
+                    usage_sink.update({**llm_cache.hit_usage(), "coalesced": True})
+                yield text
+        finally:
+            await stream.aclose()
+
+
+def _request_key(model: str, messages: List[Dict[str, str]], kwargs: dict) -> str:
+    """
+    Key for both the response cache and single-flight: llm_cache.cache_key()
+    over the messages and every provider kwarg that can change the output.
+    cache_prefix / system_blocks only place prompt-cache breakpoints.
+    """
+    from services import llm_cache
+    return llm_cache.cache_key(
+        model,
+        messages,
+        max_tokens=kwargs.get("max_tokens"),
+        json_mode=kwargs.get("json_mode", False),
+        tool_schema=kwargs.get("tool_schema"),
+        options={
+            k: v for k, v in kwargs.items()
+            if k not in ("max_tokens", "json_mode", "tool_schema", "cache_prefix", "system_blocks")
+        },
+    )
+
+
+def _provider_kwargs(provider: LLMProvider, priority: int, kwargs: dict) -> dict:
+    """kwargs for a provider call; a HedgedProvider also takes the caller's
+    priority, which its secondary is admitted at."""
+    if isinstance(provider, HedgedProvider):
+        return {**kwargs, "priority": priority}
+    return kwargs
+
+
+def set_provider_override(fn: Optional[Callable[[LLMProvider], LLMProvider]]) -> None:
+    """Route every LLMService through fn(configured_provider); None restores them."""
+    global _provider_override
+    _provider_override = fn
+
+
+def has_native_stream(provider: LLMProvider) -> bool:
+    """True when callers may stream from the provider's SDK client directly."""
+    return isinstance(provider, (ClaudeProvider, OpenAIProvider, GeminiProvider))
+
+
+async def scoped_stream(
+    provider: LLMProvider, task: str, messages: List[Dict[str, str]], usage_sink: dict,
+    priority: int = Priority.DEFAULT, **kwargs,
+) -> AsyncIterator[str]:
+    """
+    provider.stream_async() with llm_metrics.task_scope(task) active while the
+    provider runs — never across a yield, so the consumer's context is untouched.
+    `priority` is what the caller was admitted at (a hedge's secondary reuses it).
+    """
+    stream = provider.stream_async(messages, usage_sink, **_provider_kwargs(provider, priority, kwargs))
+    try:
+        while True:
+            with llm_metrics.task_scope(task):
+                try:
+                    text = await stream.__anext__()
+                except StopAsyncIteration:
+                    return
+            yield text
+    finally:
+        await stream.aclose()
 
 
 # ---------------------------------------------------------------------------
@@ -690,14 +1398,21 @@ def get_task_service(task: str) -> "LLMService":
     so we never create more than one client per model.
 
     Tasks: entity_selector, scene_planner, vocab_plan, svg_frame,
-           beat_planner, beat_codegen, synthesiser, codegen
+           beat_planner, beat_codegen, synthesiser, codegen, plan_and_classify
+
+    A "primary|secondary" entry returns a service backed by HedgedProvider.
     """
     from core.config import TASK_MODELS
     model_str = TASK_MODELS.get(task, "")
     if not model_str:
         return default_llm_service
     if model_str not in _service_cache:
-        _service_cache[model_str] = _make_service_for_model(model_str)
+        primary, _, secondary = model_str.partition("|")
+        svc = _make_service_for_model(primary)
+        if secondary:
+            svc = LLMService(provider=HedgedProvider(
+                svc.provider, _make_service_for_model(secondary).provider))
+        _service_cache[model_str] = svc
     return _service_cache[model_str]
 
 
@@ -0,0 +1,165 @@
+"""
+In-memory registry of prompt assets (services/**/prompts/**/*.md).
+
+Every template is read from disk once — load_all() runs at startup — and
+served from memory afterwards, so building a prompt costs no file I/O. Text
+derived from templates is memoized alongside them:
+
+  static_prefix(path, markers, replacements)
+      The cacheable instruction block of a template — everything before the
+      first split marker that occurs, with the small header placeholders
+      substituted. Returned as the same string object on every call, so the
+      prefix sent for provider prompt caching is byte-stable.
+
+  derived(key, build, deps)
+      Generic memo for assembled prompt text (e.g. the planner catalog per
+      entity set). `build` runs once per key; the oldest entries are evicted
+      past _DERIVED_MAX_ENTRIES.
+
+Hot reload (PROMPT_HOT_RELOAD, on outside ENV=production): each get() stats
+the file and re-reads it when its mtime changed; any reload clears the
+derived caches so nothing stale survives an edit, and derived() re-checks
+its `deps` for the same reason. In production files are never re-stat'ed.
+
+Paths are resolved before use, so the same file reached through different
+package paths shares one entry.
+"""
+
+import os
+import structlog
+import threading
+from pathlib import Path
+from typing import Callable, Hashable, Iterable, Optional, Union
+
+from core.config import PROMPT_HOT_RELOAD
+
+logger = structlog.get_logger(__name__)
+
+_SERVICES_DIR = Path(__file__).resolve().parent
+
+# Assembled variants are small, but entity sets are combinatorial.
+_DERIVED_MAX_ENTRIES = 1024
+
+_lock = threading.Lock()
+_texts: dict[Path, str] = {}
+_mtimes: dict[Path, float] = {}
+_missing: set[Path] = set()
+_derived: dict[Hashable, str] = {}
+
+
+def _key(path: Union[str, Path]) -> Path:
+    return Path(path).resolve()
+
+
+def _read(p: Path) -> Optional[str]:
+    try:
+        mtime = os.stat(p).st_mtime
+        text = p.read_text(encoding="utf-8")
+    except FileNotFoundError:
+        _texts.pop(p, None)
+        _mtimes.pop(p, None)
+        _missing.add(p)
+        return None
+    _texts[p] = text
+    _mtimes[p] = mtime
+    _missing.discard(p)
+    return text
+
+
+def _stale(p: Path) -> bool:
+    try:
+        return os.stat(p).st_mtime != _mtimes.get(p)
+    except FileNotFoundError:
+        return p not in _missing
+
+
+def load_all(root: Optional[Path] = None) -> int:
+    """Read every prompt asset under `root` (default: services/). Returns the file count."""
+    root = root or _SERVICES_DIR
+    files = sorted({p.resolve() for p in root.glob("**/prompts/**/*.md")})
+    with _lock:
+        for p in files:
+            _read(p)
+        _derived.clear()
+    logger.info("prompt_registry_loaded", files=len(files), hot_reload=PROMPT_HOT_RELOAD)
+    return len(files)
+
+
+def texts() -> Iterable[str]:
+    """Every loaded template's text."""
+    return list(_texts.values())
+
+
+def get(path: Union[str, Path], optional: bool = False) -> str:
+    """
+    Template text for `path`. A missing file raises FileNotFoundError, or
+    returns "" when optional=True (domain files and entity schemas are).
+    """
+    p = _key(path)
+    text = _texts.get(p)
+    if text is not None and not PROMPT_HOT_RELOAD:
+        return text
+    if text is None and p in _missing and not PROMPT_HOT_RELOAD:
+        if optional:
+            return ""
+        raise FileNotFoundError(str(p))
+
+    if (text is None and p not in _missing) or _stale(p):
+        with _lock:
+            had = p in _texts or p in _missing
+            text = _read(p)
+            if had:
+                _derived.clear()
+                logger.info("prompt_reloaded", path=str(p), exists=text is not None)
+    if text is None:
+        if optional:
+            return ""
+        raise FileNotFoundError(str(p))
+    return text
+
+
+def static_prefix(
+    path: Union[str, Path],
+    markers: tuple[str, ...],
+    replacements: Optional[dict[str, str]] = None,
+) -> str:
+    """
+    Text of the template before the first of `markers` found (tried in
+    order), with `replacements` applied. "" when no marker occurs.
+    """
+    template = get(path)
+    subs = tuple(sorted((replacements or {}).items()))
+
+    def _build() -> str:
+        for marker in markers:
+            idx = template.find(marker)
+            if idx != -1:
+                prefix = template[:idx]
+                for placeholder, value in subs:
+                    prefix = prefix.replace(placeholder, value)
+                return prefix
+        return ""
+
+    return derived(("prefix", _key(path), markers, subs), _build)
+
+
+def derived(
+    key: Hashable,
+    build: Callable[[], str],
+    deps: Iterable[Union[str, Path]] = (),
+) -> str:
+    """
+    Memoized `build()` for `key`; cleared whenever a template reloads. With
+    hot reload on, the templates in `deps` are re-checked first.
+    """
+    if PROMPT_HOT_RELOAD:
+        for dep in deps:
+            get(dep, optional=True)
+    text = _derived.get(key)
+    if text is None:
+        text = build()
+        with _lock:
+            if len(_derived) >= _DERIVED_MAX_ENTRIES and key not in _derived:
+                _derived.pop(next(iter(_derived)))
+            text = _derived.setdefault(key, text)
+    return text
@@ -0,0 +1,247 @@
+"""
+Record-and-replay LLM and Tavily providers for offline benchmarking.
+
+A generation run records everything needed to replay it in its lifecycle log
+(services/activity_log.py): llm_call entries carry full_response (and
+full_prompt where the call site has one string prompt), search_call /
+extract_call entries carry the raw Tavily results. install() seeds a
+Recording from such a log and reroutes the process onto it:
+
+  LLM     — every LLMService's provider is swapped for a ReplayProvider
+            (llm_service.set_provider_override), keeping the configured
+            model and rate-limit family so scheduling and cost stay realistic.
+  Tavily  — the search_provider.tavily singleton gets a ReplayTavilyClient in
+            place of its AsyncTavilyClient, so parsing, single-flight and the
+            Tavily governor still run.
+
+Responses are matched by exact prompt, then by task label (in recorded order),
+then by model; queues wrap around so a recording can be replayed repeatedly.
+Latency is simulated as REPLAY_LATENCY_S before the first token plus
+REPLAY_TOKENS_PER_S output cadence — set both to 0 to measure only our own
+overhead (parsing, DB writes, rendering, SSE framing).
+
+Run with LLM_CACHE_BACKEND=off so the response cache does not short-circuit
+the replayed calls.
+"""
+
+import asyncio
+import json
+import threading
+import time
+import structlog
+from typing import AsyncIterator, Dict, List, Optional
+
+from core.config import (
+    REPLAY_ACTIVITY_LOG,
+    REPLAY_LATENCY_S,
+    REPLAY_SEARCH_LATENCY_S,
+    REPLAY_TOKENS_PER_S,
+)
+from services import activity_log, llm_metrics
+from services.llm_service import LLMProvider, set_provider_override
+
+logger = structlog.get_logger(__name__)
+
+# Streamed replies are yielded in chunks of this many characters (~4 tokens).
+_CHUNK_CHARS = 16
+
+# Usage keys describing how the recorded call was served, not what it cost.
+_SERVING_KEYS = ("cache_hit", "coalesced", "hedge")
+
+
+class Recording:
+    """Replayable LLM responses and Tavily results from one lifecycle log."""
+
+    def __init__(self, entries: List[dict]):
+        self.llm_calls:   List[dict] = []
+        self._by_prompt:  Dict[str, dict] = {}
+        self._by_task:    Dict[str, List[dict]] = {}
+        self._by_model:   Dict[str, List[dict]] = {}
+        self.searches:    List[dict] = []
+        self._by_query:   Dict[str, dict] = {}
+        self._extracts:   Dict[str, str] = {}
+        self._cursors:    Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+        for e in entries:
+            event = e.get("event")
+            if event == "llm_call" and e.get("full_response"):
+                self.llm_calls.append(e)
+                if e.get("full_prompt"):
+                    self._by_prompt.setdefault(e["full_prompt"], e)
+                self._by_task.setdefault(e.get("task") or e.get("prompt_name", ""), []).append(e)
+                self._by_model.setdefault(e.get("model", ""), []).append(e)
+            elif event == "search_call" and "search_results" in e:
+                self.searches.append(e)
+                self._by_query.setdefault(e.get("query", ""), e)
+            elif event == "extract_call" and "extracted_content" in e:
+                self._extracts[e.get("url", "")] = e["extracted_content"]
+
+    @classmethod
+    def load(cls, path: str) -> "Recording":
+        """Read activity_log.ndjson.gz, or a legacy activity_log.json array."""
+        if str(path).endswith(".gz"):
+            return cls(list(activity_log.read(str(path))))
+        with open(path, encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    def rewind(self) -> None:
+        """Restart every queue from its first recorded entry."""
+        with self._lock:
+            self._cursors.clear()
+
+    def _next(self, key: str, queue: list) -> dict:
+        with self._lock:
+            i = self._cursors.get(key, 0)
+            self._cursors[key] = i + 1
+        return queue[i % len(queue)]
+
+    def take_llm(self, task: str, model: str, prompt: str = "") -> Optional[dict]:
+        if prompt and prompt in self._by_prompt:
+            return self._by_prompt[prompt]
+        if task in self._by_task:
+            return self._next(f"task:{task}", self._by_task[task])
+        if model in self._by_model:
+            return self._next(f"model:{model}", self._by_model[model])
+        if self.llm_calls:
+            return self._next("llm", self.llm_calls)
+        return None
+
+    def take_search(self, query: str) -> List[dict]:
+        entry = self._by_query.get(query)
+        if entry is None and self.searches:
+            entry = self._next("search", self.searches)
+        return entry["search_results"] if entry else []
+
+    def extract(self, url: str) -> str:
+        return self._extracts.get(url, "")
+
+
+class ReplayProvider(LLMProvider):
+    """Serves recorded responses with simulated latency and streaming cadence."""
+
+    def __init__(
+        self,
+        recording: Recording,
+        model: str,
+        name: str,
+        latency_s: float = REPLAY_LATENCY_S,
+        tokens_per_s: float = REPLAY_TOKENS_PER_S,
+    ):
+        self.recording    = recording
+        self.model        = model
+        self.name         = name
+        self.latency_s    = latency_s
+        self.tokens_per_s = tokens_per_s
+
+    def _take(self, messages: List[Dict[str, str]]) -> tuple[Optional[str], dict]:
+        prompt = next(
+            (m["content"] for m in reversed(messages)
+             if m.get("role") == "user" and isinstance(m.get("content"), str)),
+            "",
+        )
+        task = llm_metrics.current_task()
+        entry = self.recording.take_llm(task, self.model, prompt)
+        if entry is None:
+            logger.warning("replay_miss", task=task, model=self.model)
+            return None, {}
+        text  = entry["full_response"]
+        usage = {k: v for k, v in (entry.get("usage") or {}).items() if k not in _SERVING_KEYS}
+        if not usage:
+            completion = max(1, len(text) // 4)
+            usage = {"prompt_tokens": len(prompt) // 4, "completion_tokens": completion,
+                     "total_tokens": len(prompt) // 4 + completion}
+        return text, usage
+
+    def _generation_s(self, usage: dict) -> float:
+        if self.tokens_per_s <= 0:
+            return 0.0
+        return usage.get("completion_tokens", 0) / self.tokens_per_s
+
+    def complete(self, messages: List[Dict[str, str]], **kwargs) -> tuple[Optional[str], dict]:
+        text, usage = self._take(messages)
+        if text is not None:
+            time.sleep(self.latency_s + self._generation_s(usage))
+        return text, usage
+
+    async def complete_async(self, messages: List[Dict[str, str]], **kwargs) -> tuple[Optional[str], dict]:
+        text, usage = self._take(messages)
+        if text is not None:
+            await asyncio.sleep(self.latency_s + self._generation_s(usage))
+        return text, usage
+
+    async def stream_async(
+        self, messages: List[Dict[str, str]], usage_sink: dict, **kwargs,
+    ) -> AsyncIterator[str]:
+        text, usage = self._take(messages)
+        if text is None:
+            raise RuntimeError("replay provider has no recorded response")
+        await asyncio.sleep(self.latency_s)
+        per_char = self._generation_s(usage) / len(text)
+        for i in range(0, len(text), _CHUNK_CHARS):
+            chunk = text[i:i + _CHUNK_CHARS]
+            if per_char:
+                await asyncio.sleep(per_char * len(chunk))
+            yield chunk
+        usage_sink.update(usage)
+
+
+class ReplayTavilyClient:
+    """Stands in for tavily.AsyncTavilyClient: same search() / extract() response shapes."""
+
+    def __init__(self, recording: Recording, latency_s: float = REPLAY_SEARCH_LATENCY_S):
+        self.recording = recording
+        self.latency_s = latency_s
+
+    async def search(self, query: str, **kwargs) -> dict:
+        await asyncio.sleep(self.latency_s)
+        return {"query": query, "results": self.recording.take_search(query)}
+
+    async def extract(self, urls: List[str], **kwargs) -> dict:
+        await asyncio.sleep(self.latency_s)
+        return {"results": [
+            {"url": url, "raw_content": content}
+            for url in urls if (content := self.recording.extract(url))
+        ]}
+
+
+_saved_tavily_client = None
+
+
+def install(
+    path: str = REPLAY_ACTIVITY_LOG,
+    latency_s: float = REPLAY_LATENCY_S,
+    tokens_per_s: float = REPLAY_TOKENS_PER_S,
+    search_latency_s: float = REPLAY_SEARCH_LATENCY_S,
+) -> Recording:
+    """Serve all LLM and Tavily calls from the recording at `path`."""
+    global _saved_tavily_client
+    from services.research.search_provider import tavily
+
+    recording = Recording.load(path)
+    providers: Dict[tuple, ReplayProvider] = {}
+
+    def _replay(provider: LLMProvider) -> LLMProvider:
+        key = (getattr(provider, "name", "unknown"), getattr(provider, "model", "unknown"))
+        if key not in providers:
+            providers[key] = ReplayProvider(recording, key[1], key[0], latency_s, tokens_per_s)
+        return providers[key]
+
+    set_provider_override(_replay)
+    if not isinstance(tavily._client, ReplayTavilyClient):
+        _saved_tavily_client = tavily._client
+    tavily._client = ReplayTavilyClient(recording, search_latency_s)
+    logger.info("replay_installed", path=str(path), llm_calls=len(recording.llm_calls),
+                searches=len(recording.searches), latency_s=latency_s, tokens_per_s=tokens_per_s)
+    return recording
+
+
+def uninstall() -> None:
+    """Restore the configured providers."""
+    global _saved_tavily_client
+    from services.research.search_provider import tavily
+
+    set_provider_override(None)
+    if isinstance(tavily._client, ReplayTavilyClient):
+        tavily._client = _saved_tavily_client
+    _saved_tavily_client = None
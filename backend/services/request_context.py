@@ -0,0 +1,53 @@
+"""
+Per-request context shared by the LLM layer and the pipelines.
+
+routers/generate.py sets both ContextVars before each pipeline run:
+
+  request_log  — the lifecycle log (an ActivityLog); log() appends to it.
+  token_usage  — running token totals; accumulate_tokens() adds one call.
+
+They live here rather than in a pipeline module so services/llm_service.py
+can record what it spends (hedged calls) without importing a feature module.
+services/frame_generation/planner.py re-exports them as request_log,
+token_usage, _log and _accumulate_tokens.
+"""
+
+import time
+from contextvars import ContextVar
+
+# Per-request lifecycle log. routers/generate.py sets this before each pipeline run.
+request_log: ContextVar[list | None] = ContextVar("request_log", default=None)
+
+# Per-request token accumulator. routers/generate.py resets this before each pipeline run.
+# Holds prompt/completion/total token counts + Anthropic cache token counts.
+token_usage: ContextVar[dict | None] = ContextVar("token_usage", default=None)
+
+
+def log(entry: dict) -> None:
+    """Append a timestamped entry to the active request log (no-op if not set)."""
+    entries = request_log.get()
+    if entries is not None:
+        entries.append({"timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()), **entry})
+
+
+def accumulate_tokens(usage: dict, task: str = "") -> None:
+    """
+    Add one call's usage into the per-request running total. With `task`, the
+    input-side counters are also kept per task under acc["by_task"] for
+    cache_ratios().
+    """
+    acc = token_usage.get()
+    if acc is None or not usage:
+        return
+    acc["prompt_tokens"]              += usage.get("prompt_tokens", 0)
+    acc["completion_tokens"]          += usage.get("completion_tokens", 0)
+    acc["total_tokens"]               += usage.get("total_tokens", 0)
+    acc["cache_creation_input_tokens"] += usage.get("cache_creation_input_tokens", 0)
+    acc["cache_read_input_tokens"]     += usage.get("cache_read_input_tokens", 0)
+    if task and not usage.get("cache_hit"):
+        t = acc.setdefault("by_task", {}).setdefault(
+            task, {"calls": 0, "prompt_tokens": 0,
+                   "cache_creation_input_tokens": 0, "cache_read_input_tokens": 0})
+        t["calls"] += 1
+        for key in ("prompt_tokens", "cache_creation_input_tokens", "cache_read_input_tokens"):
+            t[key] += usage.get(key, 0)
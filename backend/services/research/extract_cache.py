@@ -0,0 +1,141 @@
+"""
+Shared cache of Tavily /extract page content, in the Postgres extract_cache
+table (created by init_db / migration 011), keyed by canonical URL.
+
+Sits in front of TavilyProvider.extract. canonical_url() lowercases scheme
+and host, drops a leading "www.", default ports, fragments, trailing slashes
+and tracking parameters (utm_*, gclid, fbclid, ...), and sorts the rest of the
+query string — so the same Wikipedia / MDN page reached from different search
+results shares one entry.
+
+Content is stored zlib-compressed with its fetched_at time. Freshness is
+decided at lookup time from the URL's domain (ttl_for_domain), so changing
+EXTRACT_CACHE_DOMAIN_TTL_S applies to rows already stored: reference sites
+keep pages for days, news sites for minutes, everything else for
+EXTRACT_CACHE_TTL_DEFAULT_S.
+
+last_hit_at drives LRU eviction down to EXTRACT_CACHE_MAX_ENTRIES, run once
+every _EVICT_EVERY stores. Hits and misses are counted in search_metrics.
+Degrades gracefully: any DB error is logged and treated as a miss.
+"""
+
+import asyncio
+import hashlib
+import structlog
+import zlib
+from typing import Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from core.config import (
+    EXTRACT_CACHE_DOMAIN_TTL_S,
+    EXTRACT_CACHE_ENABLED,
+    EXTRACT_CACHE_MAX_ENTRIES,
+    EXTRACT_CACHE_TTL_DEFAULT_S,
+)
+from services.research import search_metrics
+
+logger = structlog.get_logger(__name__)
+
+# Run LRU eviction once every N stores rather than on every write.
+_EVICT_EVERY = 50
+
+_TRACKING_PARAMS = frozenset({"gclid", "fbclid", "msclkid", "mc_cid", "mc_eid", "ref", "ref_src"})
+_DEFAULT_PORTS = {"http": 80, "https": 443}
+
+_stores = 0
+
+
+# ── Key derivation + TTL policy ───────────────────────────────────────────────
+
+def canonical_url(url: str) -> str:
+    parts = urlsplit(url.strip())
+    scheme = (parts.scheme or "https").lower()
+    host = (parts.hostname or "").lower().removeprefix("www.")
+    netloc = host if parts.port in (None, _DEFAULT_PORTS.get(scheme)) else f"{host}:{parts.port}"
+    path = parts.path.rstrip("/") or "/"
+    query = urlencode(sorted(
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if not k.lower().startswith("utm_") and k.lower() not in _TRACKING_PARAMS
+    ))
+    return urlunsplit((scheme, netloc, path, query, ""))
+
+
+def url_key(url: str) -> str:
+    return hashlib.sha256(canonical_url(url).encode()).hexdigest()
+
+
+def ttl_for_domain(domain: str) -> int:
+    """TTL of the longest EXTRACT_CACHE_DOMAIN_TTL_S suffix matching domain."""
+    domain = domain.lower().removeprefix("www.")
+    best, best_len = EXTRACT_CACHE_TTL_DEFAULT_S, -1
+    for suffix, ttl in EXTRACT_CACHE_DOMAIN_TTL_S.items():
+        if (domain == suffix or domain.endswith("." + suffix)) and len(suffix) > best_len:
+            best, best_len = ttl, len(suffix)
+    return best
+
+
+# ── Public API ────────────────────────────────────────────────────────────────
+
+async def lookup(url: str) -> Optional[str]:
+    """Cached page content for url if still fresh for its domain, else None."""
+    if not EXTRACT_CACHE_ENABLED:
+        return None
+    canonical = canonical_url(url)
+    ttl = ttl_for_domain(urlsplit(canonical).hostname or "")
+    from core.db_async import get_async_db
+    try:
+        async with get_async_db() as conn:
+            blob = await conn.fetchval(
+                "UPDATE extract_cache "
+                "SET last_hit_at = now(), hit_count = hit_count + 1 "
+                "WHERE url_key = $1 AND fetched_at > now() - make_interval(secs => $2) "
+                "RETURNING content",
+                url_key(url), float(ttl),
+            )
+        content = await asyncio.to_thread(zlib.decompress, blob) if blob is not None else None
+    except Exception as exc:
+        logger.warning("extract_cache_lookup_failed", url=url, error=str(exc))
+        content = None
+    search_metrics.record_cache("extract", "hit" if content is not None else "miss")
+    if content is None:
+        return None
+    logger.info("extract_cache_hit", url=canonical, chars=len(content))
+    return content.decode("utf-8")
+
+
+async def store(url: str, content: str) -> None:
+    """Persist freshly extracted content, compressed, stamped with fetched_at = now()."""
+    global _stores
+    if not EXTRACT_CACHE_ENABLED or not content:
+        return
+    canonical = canonical_url(url)
+    from core.db_async import get_async_db
+    try:
+        blob = await asyncio.to_thread(zlib.compress, content.encode("utf-8"), 6)
+        async with get_async_db() as conn:
+            await conn.execute(
+                "INSERT INTO extract_cache "
+                "(url_key, url, domain, content, content_chars, fetched_at, last_hit_at) "
+                "VALUES ($1, $2, $3, $4, $5, now(), now()) "
+                "ON CONFLICT (url_key) DO UPDATE SET content = EXCLUDED.content, "
+                "content_chars = EXCLUDED.content_chars, fetched_at = now(), last_hit_at = now()",
+                url_key(url), canonical[:2000], urlsplit(canonical).hostname or "",
+                blob, len(content),
+            )
+        _stores += 1
+        if _stores % _EVICT_EVERY == 0:
+            await _evict()
+    except Exception as exc:
+        logger.warning("extract_cache_store_failed", url=url, error=str(exc))
+
+
+async def _evict() -> None:
+    from core.db_async import get_async_db
+    async with get_async_db() as conn:
+        await conn.execute(
+            "DELETE FROM extract_cache WHERE url_key IN ("
+            "  SELECT url_key FROM extract_cache "
+            "  ORDER BY last_hit_at DESC OFFSET $1"
+            ")",
+            EXTRACT_CACHE_MAX_ENTRIES,
+        )
@@ -0,0 +1,111 @@
+"""
+Wall-clock budget for one request's search phase (routers/generate._search_phase).
+
+The streaming search pipeline asks the budget before every optional step and
+stops at the deadline with whatever it has — the sources ranked so far are
+always returned, extracted or not:
+
+  gap analysis   skipped unless the remaining time covers gap analysis plus
+                 another search round plus extraction
+  next round     skipped unless it covers a search round plus extraction;
+                 shrunk to fewer queries when it covers that less than twice
+  extract        skipped unless the remaining time covers one /extract call
+  deadline       pending searches / extracts / gap analysis are abandoned
+
+Step costs are estimates: an exponential moving average of observed
+latencies, shared by every request in the process (so a slow Tavily day
+tightens everyone's plans), seeded from _DEFAULT_ESTIMATES_S.
+
+Every decision is kept in .decisions and summarised by summary(), which the
+caller stores on the request's stages_log and lifecycle log.
+"""
+
+import structlog
+import time
+from typing import Callable, Optional
+
+logger = structlog.get_logger(__name__)
+
+# Seed latency estimates per step, seconds.
+_DEFAULT_ESTIMATES_S = {"search": 2.5, "gap": 3.0, "extract": 4.0}
+# Weight of the newest observation in the moving average.
+_EWMA_ALPHA = 0.2
+
+_estimates: dict[str, float] = dict(_DEFAULT_ESTIMATES_S)
+
+
+def observe(step: str, seconds: float) -> None:
+    """Fold one observed step latency into the process-wide estimate."""
+    prev = _estimates.get(step, seconds)
+    _estimates[step] = (1 - _EWMA_ALPHA) * prev + _EWMA_ALPHA * seconds
+
+
+def estimate(step: str) -> float:
+    return _estimates.get(step, 0.0)
+
+
+class SearchBudget:
+    """Tracks the remaining time of one search phase and records what it cut."""
+
+    def __init__(self, total_s: float, clock: Callable[[], float] = time.monotonic):
+        self.total_s   = total_s
+        self._clock    = clock
+        self._started  = clock()
+        self.decisions: list[dict] = []
+
+    def elapsed(self) -> float:
+        return self._clock() - self._started
+
+    def remaining(self) -> float:
+        return max(0.0, self.total_s - self.elapsed())
+
+    def timeout(self, cap: float) -> float:
+        """Per-call timeout: the call's own cap, or less when the budget is short."""
+        return max(0.1, min(cap, self.remaining()))
+
+    def _decide(self, action: str, **details) -> None:
+        entry = {"action": action, "at_s": round(self.elapsed(), 2),
+                 "remaining_s": round(self.remaining(), 2), **details}
+        self.decisions.append(entry)
+        logger.info("search_budget_decision", **entry)
+
+    # ── Decision points ───────────────────────────────────────────────────────
+
+    def allow_gap_analysis(self, round_n: int) -> bool:
+        needed = estimate("gap") + estimate("search") + estimate("extract")
+        if self.remaining() >= needed:
+            return True
+        self._decide("skip_gap_analysis", round=round_n + 1, needed_s=round(needed, 2))
+        return False
+
+    def plan_round(self, round_n: int, queries: list[str]) -> list[str]:
+        """The queries to run for round round_n (0-based) — possibly fewer, possibly none."""
+        needed = estimate("search") + estimate("extract")
+        remaining = self.remaining()
+        if remaining < needed:
+            self._decide("skip_round", round=round_n + 1, queries=len(queries), needed_s=round(needed, 2))
+            return []
+        if remaining < 2 * needed and len(queries) > 1:
+            keep = max(1, int(len(queries) * remaining / (2 * needed)))
+            if keep < len(queries):
+                self._decide("shrink_round", round=round_n + 1, queries=len(queries), kept=keep)
+                return queries[:keep]
+        return queries
+
+    def allow_extract(self, urls: int, phase: str) -> bool:
+        needed = estimate("extract")
+        if self.remaining() >= needed:
+            return True
+        self._decide("skip_extract", phase=phase, urls=urls, needed_s=round(needed, 2))
+        return False
+
+    def deadline(self, abandoned: dict[str, int]) -> None:
+        self._decide("deadline", abandoned={k: n for k, n in abandoned.items() if n})
+
+    def summary(self, extra: Optional[dict] = None) -> dict:
+        return {
+            "budget_s":  self.total_s,
+            "elapsed_s": round(self.elapsed(), 2),
+            "decisions": list(self.decisions),
+            **(extra or {}),
+        }
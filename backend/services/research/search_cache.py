@@ -0,0 +1,199 @@
+"""
+Shared cache of Tavily search responses, in the Postgres search_cache table
+(created by init_db / migration 010) so every user and worker reuses it.
+
+Sits in front of TavilyProvider.search. Cache key = sha256(normalised query +
+max_results + search_depth + topic + sorted include_domains); the query is
+NFKC-normalised, casefolded and whitespace-collapsed, with trailing
+punctuation dropped.
+
+TTL adapts to how fresh the results are (ttl_for):
+  newest published_date < SEARCH_CACHE_FRESH_DAYS old, or topic news/finance
+                                → SEARCH_CACHE_TTL_FRESH_S
+  newest < SEARCH_CACHE_RECENT_DAYS old
+                                → SEARCH_CACHE_TTL_RECENT_S
+  older, or no dates at all (evergreen reference pages)
+                                → SEARCH_CACHE_TTL_EVERGREEN_S
+
+Queries asking for the latest state of something ("latest", "today",
+"breaking", "price of", ...) and callers passing fresh=True bypass the lookup — see wants_fresh() — but their
+response is still stored for everyone else.
+
+last_hit_at drives LRU eviction down to SEARCH_CACHE_MAX_ENTRIES, run once
+every _EVICT_EVERY stores together with an expiry sweep. Hits, misses and
+bypasses are counted in search_metrics. Degrades gracefully: any DB error is
+logged and treated as a miss.
+"""
+
+import hashlib
+import json
+import re
+import structlog
+import time
+import unicodedata
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Optional
+
+from core.config import (
+    SEARCH_CACHE_ENABLED,
+    SEARCH_CACHE_FRESH_DAYS,
+    SEARCH_CACHE_MAX_ENTRIES,
+    SEARCH_CACHE_RECENT_DAYS,
+    SEARCH_CACHE_TTL_EVERGREEN_S,
+    SEARCH_CACHE_TTL_FRESH_S,
+    SEARCH_CACHE_TTL_RECENT_S,
+)
+from services.research import search_metrics
+
+logger = structlog.get_logger(__name__)
+
+# Run expiry + LRU eviction once every N stores rather than on every write.
+_EVICT_EVERY = 50
+
+_FRESH_TOPICS = frozenset({"news", "finance"})
+
+# "current" / "live" are deliberately absent — electrical current and live
+# cells are everyday physics and biology questions here.
+_FRESH_QUERY_RE = re.compile(
+    r"\b(latest|newest|today|tonight|yesterday|breaking|right now|as of now|"
+    r"this (?:week|month)|stock price|price of|forecast)\b",
+    re.IGNORECASE,
+)
+
+_stores = 0
+
+
+# ── Key derivation + TTL policy ───────────────────────────────────────────────
+
+def normalise_query(query: str) -> str:
+    text = " ".join(unicodedata.normalize("NFKC", query).casefold().split())
+    return text.rstrip("?!. ")
+
+
+def cache_key(
+    query: str,
+    max_results: int,
+    search_depth: str,
+    topic: str,
+    include_domains: Optional[list[str]] = None,
+) -> str:
+    payload = json.dumps(
+        {
+            "query":   normalise_query(query),
+            "max":     max_results,
+            "depth":   search_depth,
+            "topic":   topic,
+            "domains": sorted(d.lower() for d in include_domains or []),
+        },
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def wants_fresh(query: str) -> bool:
+    """Explicit "latest state" queries must never be served from cache."""
+    return bool(_FRESH_QUERY_RE.search(query))
+
+
+def _parse_date(value: str) -> Optional[datetime]:
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        try:
+            parsed = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def newest_age_days(results: list[dict], now: Optional[float] = None) -> Optional[float]:
+    """Age in days of the most recently published result; None when none are dated."""
+    now = time.time() if now is None else now
+    ages = [
+        (now - parsed.timestamp()) / 86400
+        for r in results
+        if isinstance(r.get("published_date"), str) and (parsed := _parse_date(r["published_date"]))
+    ]
+    return max(0.0, min(ages)) if ages else None
+
+
+def ttl_for(results: list[dict], topic: str = "general", now: Optional[float] = None) -> int:
+    if topic in _FRESH_TOPICS:
+        return SEARCH_CACHE_TTL_FRESH_S
+    age = newest_age_days(results, now)
+    if age is None:
+        return SEARCH_CACHE_TTL_EVERGREEN_S
+    if age < SEARCH_CACHE_FRESH_DAYS:
+        return SEARCH_CACHE_TTL_FRESH_S
+    if age < SEARCH_CACHE_RECENT_DAYS:
+        return SEARCH_CACHE_TTL_RECENT_S
+    return SEARCH_CACHE_TTL_EVERGREEN_S
+
+
+# ── Public API ────────────────────────────────────────────────────────────────
+
+async def lookup(key: str, query: str, bypass: bool = False) -> Optional[list[dict]]:
+    """Cached raw Tavily results for key, or None on miss / bypass / error."""
+    if not SEARCH_CACHE_ENABLED:
+        return None
+    if bypass:
+        search_metrics.record_cache("search", "bypass")
+        logger.info("search_cache_bypass", query=query[:80])
+        return None
+    from core.db_async import get_async_db
+    try:
+        async with get_async_db() as conn:
+            results = await conn.fetchval(
+                "UPDATE search_cache "
+                "SET last_hit_at = now(), hit_count = hit_count + 1 "
+                "WHERE key = $1 AND expires_at > now() "
+                "RETURNING results",
+                key,
+            )
+    except Exception as exc:
+        logger.warning("search_cache_lookup_failed", error=str(exc))
+        results = None
+    search_metrics.record_cache("search", "hit" if results is not None else "miss")
+    if results is not None:
+        logger.info("search_cache_hit", query=query[:80], key=key[:12])
+    return results
+
+
+async def store(key: str, query: str, topic: str, results: list[dict]) -> None:
+    """Persist a fresh Tavily response with its freshness-derived TTL."""
+    global _stores
+    if not SEARCH_CACHE_ENABLED or not results:
+        return
+    ttl = ttl_for(results, topic)
+    from core.db_async import get_async_db
+    try:
+        async with get_async_db() as conn:
+            await conn.execute(
+                "INSERT INTO search_cache "
+                "(key, query, topic, results, ttl_s, created_at, expires_at, last_hit_at) "
+                "VALUES ($1, $2, $3, $4, $5, now(), now() + make_interval(secs => $6), now()) "
+                "ON CONFLICT (key) DO UPDATE SET results = EXCLUDED.results, "
+                "ttl_s = EXCLUDED.ttl_s, created_at = now(), "
+                "expires_at = EXCLUDED.expires_at, last_hit_at = now()",
+                key, query[:500], topic, results, ttl, float(ttl),
+            )
+        _stores += 1
+        if _stores % _EVICT_EVERY == 0:
+            await _evict()
+    except Exception as exc:
+        logger.warning("search_cache_store_failed", error=str(exc))
+
+
+async def _evict() -> None:
+    from core.db_async import get_async_db
+    async with get_async_db() as conn:
+        await conn.execute("DELETE FROM search_cache WHERE expires_at <= now()")
+        await conn.execute(
+            "DELETE FROM search_cache WHERE key IN ("
+            "  SELECT key FROM search_cache "
+            "  ORDER BY last_hit_at DESC OFFSET $1"
+            ")",
+            SEARCH_CACHE_MAX_ENTRIES,
+        )
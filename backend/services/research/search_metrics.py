@@ -0,0 +1,53 @@
+"""
+Prometheus telemetry for Tavily search / extract, served on /metrics (main.py).
+
+  search_cache_requests_total   cache lookups by cache ("search" | "extract")
+                                and outcome ("hit" | "miss" | "bypass")
+  tavily_queue_wait_seconds     time a Tavily call waited for admission in
+                                services/research/tavily_governor.py, by op
+                                ("search" | "extract")
+  tavily_calls_in_flight        Tavily calls currently admitted
+  tavily_calls_queued           Tavily calls waiting for admission
+
+prometheus-client is optional — without it every function here is a no-op.
+"""
+
+import structlog
+
+logger = structlog.get_logger(__name__)
+
+try:
+    from prometheus_client import Counter, Gauge, Histogram
+except ImportError:  # pragma: no cover — exercised only without the package
+    Counter = Gauge = Histogram = None
+
+if Counter is not None:
+    _cache_requests = Counter(
+        "search_cache_requests_total", "Tavily result cache lookups.",
+        ("cache", "outcome"),
+    )
+    _queue_wait = Histogram(
+        "tavily_queue_wait_seconds", "Time a Tavily call waited for governor admission.",
+        ("op",), buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10),
+    )
+    _in_flight = Gauge("tavily_calls_in_flight", "Tavily calls currently admitted.")
+    _queued    = Gauge("tavily_calls_queued", "Tavily calls waiting for admission.")
+
+
+def record_cache(cache: str, outcome: str) -> None:
+    if Counter is None:
+        return
+    _cache_requests.labels(cache, outcome).inc()
+
+
+def record_queue_wait(op: str, seconds: float) -> None:
+    if Histogram is None:
+        return
+    _queue_wait.labels(op).observe(seconds)
+
+
+def set_occupancy(in_flight: int, queued: int) -> None:
+    if Gauge is None:
+        return
+    _in_flight.set(in_flight)
+    _queued.set(queued)
@@ -3,18 +3,57 @@ Tavily search + extract abstraction.
 
 All web access in the research pipeline flows through this module.
 Swap out TavilyProvider for a different class to change providers.
+
+Calls go through tavily's AsyncTavilyClient on one pooled keep-alive httpx
+client per worker, and every network call is admitted by the process-wide
+governor (services/research/tavily_governor.py) — so concurrency and rate
+limits hold across all streams, not per request. extract_many() fetches every
+uncached URL in one /extract request (up to TAVILY_EXTRACT_BATCH_MAX per
+request). A synchronous client swapped into _client (services/replay.py,
+tests) still works; its calls run in a worker thread.
+
+Identical concurrent search/extract calls (same query + options, same set of
+URLs) share one Tavily request via services/single_flight.py. Only the raw Tavily
+response is shared; each caller builds its own SearchResult objects, so the
+research pipeline can keep mutating them per request.
+
+Search responses are also kept in the shared Postgres search cache
+(services/research/search_cache.py) with a TTL that follows how recently the
+results were published, and extracted pages in the extract cache
+(services/research/extract_cache.py) by canonical URL with a per-domain TTL;
+hits are logged with cache_hit=True.
+
+Every answered call is recorded in the request's lifecycle log (search_call /
+extract_call entries with the raw Tavily results) so services/replay.py can
+serve the same run offline.
 """
 
 import asyncio
+import inspect
 import structlog
 from dataclasses import dataclass, field
 from typing import Optional
 from urllib.parse import urlparse
 
-from core.config import TAVILY_API_KEY
+from core.config import (
+    HTTP_KEEPALIVE_EXPIRY_S,
+    TAVILY_API_KEY,
+    TAVILY_EXTRACT_BATCH_MAX,
+    TAVILY_MAX_CONCURRENCY,
+)
+from services.research import extract_cache, search_cache, tavily_governor
+from services.single_flight import SingleFlight, flight_key
 
 logger = structlog.get_logger(__name__)
 
+_search_flight  = SingleFlight("tavily_search",  cross_worker=True)
+_extract_flight = SingleFlight("tavily_extract", cross_worker=True)
+
+
+def _log_call(event: str, **fields) -> None:
+    from services.frame_generation.planner import _log
+    _log({"event": event, **fields})
+
 
 @dataclass
 class SearchResult:
@@ -27,65 +66,130 @@ class SearchResult:
     published_date: Optional[str] = None
 
 
+def _to_results(raw_results: list[dict]) -> list[SearchResult]:
+    """Fresh SearchResult objects from raw Tavily results (never shared between callers)."""
+    results = []
+    for r in raw_results:
+        domain = urlparse(r.get("url", "")).netloc.lstrip("www.")
+        snippet = r.get("content") or ""
+        raw     = r.get("raw_content") or ""
+        # Use full page text when it's richer than the snippet; fall back to snippet.
+        content = raw if len(raw) > len(snippet) else snippet
+        results.append(SearchResult(
+            title=r.get("title", ""),
+            url=r.get("url", ""),
+            snippet=snippet,   # short AI-extracted excerpt — UI display + citations
+            content=content,   # full page text when available — LLM injection
+            domain=domain,
+            score=r.get("score", 0.0),
+            published_date=r.get("published_date"),
+        ))
+    return results
+
+
+def _http_client():
+    """Keep-alive pool sized to the governor — it never admits more calls."""
+    import httpx
+    return httpx.AsyncClient(
+        base_url="https://api.tavily.com",
+        limits=httpx.Limits(
+            max_connections=TAVILY_MAX_CONCURRENCY,
+            max_keepalive_connections=TAVILY_MAX_CONCURRENCY,
+            keepalive_expiry=HTTP_KEEPALIVE_EXPIRY_S,
+        ),
+    )
+
+
 class TavilyProvider:
     """
-    Wraps tavily-python for search and URL extraction.
-    Falls back gracefully when the API key is missing.
+    Wraps tavily-python's async client for search and URL extraction.
+    Falls back gracefully when the API key is missing. With a key, an SDK
+    that cannot be built (older than 0.7.23, which added client=) raises
+    instead of silently disabling search.
     """
 
     def __init__(self):
         self._client = None
+        self._http   = None
         if TAVILY_API_KEY:
-            try:
-                from tavily import TavilyClient
-                self._client = TavilyClient(api_key=TAVILY_API_KEY)
-            except Exception as e:
-                logger.warning("tavily_init_failed", error=str(e))
+            from tavily import AsyncTavilyClient
+            self._http   = _http_client()
+            self._client = AsyncTavilyClient(api_key=TAVILY_API_KEY, client=self._http)
 
     def _available(self) -> bool:
         return self._client is not None
 
+    async def ping(self) -> None:
+        """One authenticated, credit-free request (GET /usage) over the shared
+        pool, so it holds an open TLS connection before the first search."""
+        resp = await self._http.get("/usage", headers={"Authorization": f"Bearer {TAVILY_API_KEY}"})
+        resp.raise_for_status()
+
+    async def aclose(self) -> None:
+        """Close the keep-alive pool (app shutdown)."""
+        if self._http is not None:
+            await self._http.aclose()
+
+    async def _call(self, op: str, **kwargs) -> tuple[dict, float]:
+        """One governed Tavily request; returns (response, seconds queued)."""
+        method = getattr(self._client, op)
+        async with tavily_governor.slot(op) as waited:
+            if inspect.iscoroutinefunction(method):
+                return await method(**kwargs), waited
+            return await asyncio.to_thread(method, **kwargs), waited
+
     async def search(
         self,
         query: str,
         max_results: int = 5,
         timeout: float = 20.0,
         include_domains: list[str] | None = None,
+        search_depth: str = "basic",
+        topic: str = "general",
+        fresh: bool = False,
     ) -> list[SearchResult]:
+        """
+        Tavily search, served from the shared search cache when possible.
+        fresh=True (or a "latest …"-style query) skips the cache lookup.
+        """
         if not self._available():
             logger.warning("tavily_not_configured")
             return []
 
+        cache_key = search_cache.cache_key(query, max_results, search_depth, topic, include_domains)
+        cached = await search_cache.lookup(
+            cache_key, query, bypass=fresh or search_cache.wants_fresh(query))
+        if cached is not None:
+            _log_call("search_call", query=query, max_results=max_results,
+                      include_domains=include_domains or [], search_results=cached,
+                      cache_hit=True)
+            results = _to_results(cached)
+            logger.info("tavily_search_done", query=query[:80], results=len(results),
+                        urls=[r.url for r in results], cache_hit=True)
+            return results
+
         search_kwargs: dict = {
             "query": query,
             "max_results": max_results,
-            "search_depth": "basic",
+            "search_depth": search_depth,
+            "topic": topic,
             "include_raw_content": True,
         }
         if include_domains:
             search_kwargs["include_domains"] = include_domains
 
+        key = flight_key(query, max_results, search_depth, topic, sorted(include_domains or []))
         try:
-            response = await asyncio.wait_for(
-                asyncio.to_thread(self._client.search, **search_kwargs),
+            (response, waited), _ = await asyncio.wait_for(
+                _search_flight.do(key, lambda: self._call("search", **search_kwargs)),
                 timeout=timeout,
             )
-            results = []
-            for r in response.get("results", []):
-                domain = urlparse(r.get("url", "")).netloc.lstrip("www.")
-                snippet = r.get("content") or ""
-                raw     = r.get("raw_content") or ""
-                # Use full page text when it's richer than the snippet; fall back to snippet.
-                content = raw if len(raw) > len(snippet) else snippet
-                results.append(SearchResult(
-                    title=r.get("title", ""),
-                    url=r.get("url", ""),
-                    snippet=snippet,   # short AI-extracted excerpt — UI display + citations
-                    content=content,   # full page text when available — LLM injection
-                    domain=domain,
-                    score=r.get("score", 0.0),
-                    published_date=r.get("published_date"),
-                ))
+            raw_results = response.get("results", [])
+            _log_call("search_call", query=query, max_results=max_results,
+                      include_domains=include_domains or [],
+                      search_results=raw_results, queue_ms=round(waited * 1000))
+            await search_cache.store(cache_key, query, topic, raw_results)
+            results = _to_results(raw_results)
             logger.info("tavily_search_done", query=query[:80], results=len(results),
                         urls=[r.url for r in results])
             return results
@@ -97,24 +201,71 @@ class TavilyProvider:
             return []
 
     async def extract(self, url: str, timeout: float = 20.0) -> str:
-        """Fetch and extract the main content of a URL via Tavily /extract."""
-        if not self._available():
-            return ""
+        """Main content of one URL — see extract_many()."""
+        return (await self.extract_many([url], timeout=timeout))[0]
+
+    async def extract_many(self, urls: list[str], timeout: float = 20.0) -> list[str]:
+        """
+        Fetch and extract the main content of several URLs via Tavily /extract,
+        in input order ("" where extraction failed). Pages still fresh in the
+        shared extract cache are served from it; the rest go out together in
+        batches of up to TAVILY_EXTRACT_BATCH_MAX URLs.
+        """
+        if not self._available() or not urls:
+            return [""] * len(urls)
+
+        contents = [""] * len(urls)
+        cached = await asyncio.gather(*[extract_cache.lookup(u) for u in urls])
+        missing: dict[str, list[int]] = {}          # canonical URL → positions in urls
+        for i, (url, content) in enumerate(zip(urls, cached)):
+            if content is not None:
+                contents[i] = content
+                _log_call("extract_call", url=url, extracted_content=content, cache_hit=True)
+            else:
+                missing.setdefault(extract_cache.canonical_url(url), []).append(i)
+
+        canonical = list(missing)
+        batches = [canonical[i:i + TAVILY_EXTRACT_BATCH_MAX]
+                   for i in range(0, len(canonical), TAVILY_EXTRACT_BATCH_MAX)]
+        fetched = await asyncio.gather(*[
+            self._extract_batch([urls[missing[c][0]] for c in batch], timeout)
+            for batch in batches
+        ])
+        for found in fetched:
+            for canon, content in found.items():
+                for i in missing.get(canon, []):
+                    contents[i] = content
+        return contents
+
+    async def _extract_batch(self, urls: list[str], timeout: float) -> dict[str, str]:
+        """One /extract request for urls; returns canonical URL → content."""
+        key = flight_key(sorted(extract_cache.canonical_url(u) for u in urls))
         try:
-            response = await asyncio.wait_for(
-                asyncio.to_thread(self._client.extract, urls=[url]),
+            (response, waited), _ = await asyncio.wait_for(
+                _extract_flight.do(key, lambda: self._call("extract", urls=urls)),
                 timeout=timeout,
             )
-            results = response.get("results", [])
-            if results:
-                return results[0].get("raw_content", "")
-            return ""
         except asyncio.TimeoutError:
-            logger.warning("tavily_extract_timeout", timeout_s=timeout, url=url)
-            return ""
+            logger.warning("tavily_extract_timeout", timeout_s=timeout, urls=len(urls), url=urls[0])
+            return {}
         except Exception as e:
-            logger.error("tavily_extract_failed", url=url, error=str(e))
-            return ""
+            logger.error("tavily_extract_failed", urls=len(urls), url=urls[0], error=str(e))
+            return {}
+
+        by_url = {
+            extract_cache.canonical_url(r.get("url", "")): r.get("raw_content") or ""
+            for r in response.get("results", [])
+        }
+        found: dict[str, str] = {}
+        for url in urls:
+            canon = extract_cache.canonical_url(url)
+            content = by_url.get(canon, "")
+            _log_call("extract_call", url=url, extracted_content=content,
+                      batch_size=len(urls), queue_ms=round(waited * 1000))
+            await extract_cache.store(url, content)
+            found[canon] = content
+        logger.info("tavily_extract_done", urls=len(urls), extracted=sum(1 for c in found.values() if c))
+        return found
 
 
 # Module-level singleton
@@ -2,10 +2,14 @@
 Source ranking, deduplication, and token budget enforcement.
 """
 
+import bisect
 import structlog
 from urllib.parse import urlparse
 
-from core.config import DEEP_MAX_TOKENS_SOURCE
+from typing import Optional
+
+from core.config import DEEP_MAX_TOKENS_SOURCE, EVIDENCE_EXCERPT_MAX_TOKENS
+from services import token_budget
 from services.research.search_provider import SearchResult
 
 logger = structlog.get_logger(__name__)
@@ -56,6 +60,49 @@ def _domain_boost(domain: str, intent_domain: str = "") -> float:
     return 0.0
 
 
+class IncrementalRanker:
+    """
+    rank_and_deduplicate() fed one search response at a time, so the
+    streaming search pipeline can see the current top sources as soon as each
+    query returns. Same scoring and tie-breaking: first occurrence of a URL
+    wins, equal scores keep arrival order.
+    """
+
+    def __init__(self, intent_domain: str = ""):
+        self.intent_domain = intent_domain
+        self.total_input   = 0
+        self._by_url: dict[str, SearchResult] = {}
+        self._scores: dict[str, float] = {}
+        self._ranked: list[tuple[float, int, str]] = []   # (-score, arrival, url), sorted
+
+    def add(self, results: list[SearchResult]) -> list[SearchResult]:
+        """Add a batch; returns the results whose URL was not seen before."""
+        new = []
+        for r in results:
+            self.total_input += 1
+            if r.url in self._by_url:
+                continue
+            score = r.score + _domain_boost(r.domain, self.intent_domain)
+            self._by_url[r.url] = r
+            self._scores[r.url] = score
+            bisect.insort(self._ranked, (-score, len(self._by_url), r.url))
+            new.append(r)
+        return new
+
+    def score(self, r: SearchResult) -> float:
+        return self._scores[r.url]
+
+    def results(self) -> list[SearchResult]:
+        """Unique results in arrival order."""
+        return list(self._by_url.values())
+
+    def top(self, n: int) -> list[SearchResult]:
+        return [self._by_url[url] for _, _, url in self._ranked[:n]]
+
+    def __len__(self) -> int:
+        return len(self._by_url)
+
+
 def rank_and_deduplicate(
     results: list[SearchResult],
     max_sources: int,
@@ -68,46 +115,34 @@ def rank_and_deduplicate(
     Pass intent_domain to apply category-specific boosts (e.g. "economics"
     lifts financial data sources to the top).
     """
-    seen_urls: set[str] = set()
-    unique: list[SearchResult] = []
-    for r in results:
-        if r.url in seen_urls:
-            continue
-        seen_urls.add(r.url)
-        unique.append(r)
-
-    scored = sorted(
-        unique,
-        key=lambda r: r.score + _domain_boost(r.domain, intent_domain),
-        reverse=True,
-    )
-    top = scored[:max_sources]
+    ranker = IncrementalRanker(intent_domain)
+    ranker.add(results)
+    top = ranker.top(max_sources)
+    log_ranked(ranker, top)
+    return top
+
+
+def log_ranked(ranker: IncrementalRanker, top: list[SearchResult]) -> None:
     logger.info(
         "sources_ranked",
-        total_input=len(results),
-        after_dedup=len(unique),
-        dupes_dropped=len(results) - len(unique),
+        total_input=ranker.total_input,
+        after_dedup=len(ranker),
+        dupes_dropped=ranker.total_input - len(ranker),
         returned=len(top),
         top_sources=[{"domain": r.domain, "score": round(r.score, 3), "url": r.url} for r in top],
     )
-    return top
 
 
-def truncate_content(text: str, max_tokens: int = DEEP_MAX_TOKENS_SOURCE) -> str:
+def truncate_content(
+    text: str,
+    max_tokens: int = DEEP_MAX_TOKENS_SOURCE,
+    provider: Optional[str] = None,
+) -> str:
     """
-    Approximate token budget enforcement: 1 token ≈ 4 chars.
-    Truncates at a sentence boundary where possible.
+    Token budget enforcement via services/token_budget.py (counted for
+    `provider`'s tokenizer). Truncates at a sentence boundary where possible.
     """
-    max_chars = max_tokens * 4
-    if len(text) <= max_chars:
-        return text
-
-    truncated = text[:max_chars]
-    # Try to end at the last sentence boundary
-    last_period = max(truncated.rfind(". "), truncated.rfind(".\n"))
-    if last_period > max_chars * 0.7:
-        return truncated[:last_period + 1]
-    return truncated
+    return token_budget.truncate(text, max_tokens, provider)
 
 
 def source_summary(s: SearchResult) -> dict:
@@ -139,14 +174,14 @@ def source_full(s: SearchResult, full_content: bool = False) -> dict:
     }
 
 
-def build_evidence_table(sources: list[SearchResult]) -> str:
+def build_evidence_table(sources: list[SearchResult], provider: Optional[str] = None) -> str:
     """
     Format sources into a compact evidence table for the synthesis prompt.
     Each entry includes: [N] title | domain | key excerpt
     """
     lines: list[str] = ["## Evidence\n"]
     for i, s in enumerate(sources, 1):
-        excerpt = truncate_content(s.content or s.snippet, max_tokens=300)
+        excerpt = truncate_content(s.content or s.snippet, EVIDENCE_EXCERPT_MAX_TOKENS, provider)
         lines.append(f"[{i}] **{s.title}** ({s.domain})")
         lines.append(f"URL: {s.url}")
         lines.append(f"Excerpt: {excerpt}")
@@ -8,15 +8,24 @@ Streaming support:
   - ClaudeProvider  → native Anthropic async streaming
   - GeminiProvider  → OpenAI-compatible streaming (same SDK, custom base_url)
   - OpenAIProvider  → OpenAI streaming
+
+The system prompt is the static leading block of every request (marked as a
+cache breakpoint for Claude; OpenAI/Gemini cache the prefix automatically).
+Stream usage is recorded like any other call: scheduler ticket, token totals
+(task "synthesiser") and an llm_call lifecycle entry.
 """
 
 import asyncio
 import structlog
+import time
 from typing import AsyncGenerator, Optional
 
+from services.frame_generation.planner import _accumulate_tokens, _log
 from services.research.search_provider import SearchResult
 from services.research.source_processor import build_evidence_table
-from services.llm_service import LLMService
+from services import llm_metrics, llm_scheduler, token_budget
+from services.llm_scheduler import Priority
+from services.llm_service import LLMService, has_native_stream, scoped_stream
 
 logger = structlog.get_logger(__name__)
 
@@ -41,8 +50,18 @@ async def stream(
     """
     Async generator that yields synthesis tokens one by one.
     Falls back to a single non-streaming call if streaming fails.
+
+    The evidence table (per-source excerpts are already capped) is always sent;
+    prior conversation gets what is left of INPUT_TOKEN_BUDGETS["synthesiser"],
+    newest turns first.
     """
-    evidence = build_evidence_table(sources)
+    provider_name = getattr(llm_service.provider, "name", None)
+    evidence = build_evidence_table(sources, provider_name)
+    extra_context = token_budget.pack(
+        "synthesiser", provider_name, [query, evidence],
+        [token_budget.Section("context", extra_context, keep="tail")],
+        static=[_SYSTEM_PROMPT],
+    )["context"]
     context_block = f"Prior conversation:\n{extra_context}\n\n" if extra_context else ""
     user_msg = (
         f"{context_block}"
@@ -52,26 +71,60 @@ async def stream(
     )
 
     provider_class = llm_service.provider.__class__.__name__
+    model = getattr(llm_service.provider, "model", "unknown")
+
+    # Streaming bypasses LLMService, so take a scheduler slot here; it is
+    # settled from the stream's usage (an empty usage refunds it).
+    provider_name = getattr(llm_service.provider, "name", "unknown")
+    t_admit = time.monotonic()
+    ticket = await llm_scheduler.admit(
+        model,
+        provider_name,
+        Priority.DEFAULT,
+        llm_scheduler.estimate_tokens(
+            [{"content": _SYSTEM_PROMPT}, {"content": user_msg}], 4096),
+    )
+    timer = llm_metrics.StreamTimer("synthesiser", model, provider_name)
+    llm_metrics.record_queue_wait("synthesiser", model, provider_name, timer.started - t_admit)
 
-    # Try streaming — Claude natively, OpenAI/Gemini via compatible API
+    # Try streaming — Claude natively, OpenAI/Gemini via compatible API, any
+    # other provider (hedged, replay) through its own stream_async()
+    usage: dict = {}
+    chunks: list[str] = []
     try:
         if provider_class == "ClaudeProvider":
-            async for token in _stream_anthropic(llm_service, user_msg):
-                yield token
+            token_gen = _stream_anthropic(llm_service, user_msg, usage)
+        elif has_native_stream(llm_service.provider):
+            token_gen = _stream_openai_compat(llm_service, user_msg, usage)
         else:
-            async for token in _stream_openai_compat(llm_service, user_msg):
-                yield token
+            token_gen = scoped_stream(
+                llm_service.provider, "synthesiser",
+                [{"role": "system", "content": _SYSTEM_PROMPT}, {"role": "user", "content": user_msg}],
+                usage, priority=Priority.DEFAULT, max_tokens=4096, system_blocks=[_SYSTEM_PROMPT])
+        async for token in token_gen:
+            timer.token()
+            chunks.append(token)
+            yield token
+        timer.done(dict(usage))
+        if usage:   # without usage the ticket keeps its estimate
+            ticket.settle(dict(usage))
+        _record_usage(model, usage, "".join(chunks))
         return
     except Exception as e:
+        timer.done(None, ok=False)
+        ticket.settle(dict(usage))
         logger.warning("synthesis_stream_failed_fallback", provider=provider_class, error=str(e))
 
     # Fallback: single async call
     try:
-        raw, _ = await llm_service.make_system_user_request_async(
+        raw, fallback_usage = await llm_service.make_system_user_request_async(
             _SYSTEM_PROMPT,
             user_msg,
             max_tokens=4096,
+            system_blocks=[_SYSTEM_PROMPT],
+            task="synthesiser",
         )
+        _record_usage(model, fallback_usage or {}, raw or "")
         if raw:
             yield raw
     except Exception as e:
@@ -79,32 +132,54 @@ async def stream(
         yield "Unable to synthesise an answer at this time. Please try again."
 
 
-async def _stream_anthropic(llm_service: LLMService, user_msg: str) -> AsyncGenerator[str, None]:
+def _record_usage(model: str, usage: dict, text: str) -> None:
+    if not usage:
+        return
+    _accumulate_tokens(usage, "synthesiser")
+    _log({"event": "llm_call", "prompt_name": "synthesiser", "model": model, "usage": usage,
+          "full_response": text})
+
+
+async def _stream_anthropic(
+    llm_service: LLMService, user_msg: str, usage_sink: dict,
+) -> AsyncGenerator[str, None]:
     """Native async streaming via AsyncAnthropic — no thread or queue needed."""
-    from services.llm_service import _get_async_anthropic_client
+    from services.llm_service import _claude_system, _get_async_anthropic_client
     client = _get_async_anthropic_client()
     model  = getattr(llm_service.provider, "model", "claude-haiku-4-5-20251001")
 
     async with client.messages.stream(
         model=model,
         max_tokens=4096,
-        system=_SYSTEM_PROMPT,
+        system=_claude_system(_SYSTEM_PROMPT, [_SYSTEM_PROMPT]),
         messages=[{"role": "user", "content": user_msg}],
     ) as s:
         async for text in s.text_stream:
             yield text
-
-
-async def _stream_openai_compat(llm_service: LLMService, user_msg: str) -> AsyncGenerator[str, None]:
+        msg = await s.get_final_message()
+        if msg.usage:
+            usage_sink.update({
+                "prompt_tokens":              msg.usage.input_tokens,
+                "completion_tokens":           msg.usage.output_tokens,
+                "total_tokens":               msg.usage.input_tokens + msg.usage.output_tokens,
+                "cache_creation_input_tokens": getattr(msg.usage, "cache_creation_input_tokens", 0),
+                "cache_read_input_tokens":     getattr(msg.usage, "cache_read_input_tokens", 0),
+            })
+
+
+async def _stream_openai_compat(
+    llm_service: LLMService, user_msg: str, usage_sink: dict,
+) -> AsyncGenerator[str, None]:
     """Streaming for OpenAI or Gemini (both use the same OpenAI SDK interface)."""
     from services.llm_service import (
-        _get_async_openai_client, _get_async_gemini_client, GeminiProvider,
+        _chat_usage, _create_chat_stream, _get_async_openai_client, _get_async_gemini_client,
+        GeminiProvider,
     )
     provider = llm_service.provider
     client = _get_async_gemini_client() if isinstance(provider, GeminiProvider) else _get_async_openai_client()
     model  = getattr(provider, "model", "gpt-4.1")
 
-    response = await client.chat.completions.create(
+    create_kwargs: dict = dict(
         model=model,
         max_tokens=4096,
         messages=[
@@ -112,8 +187,11 @@ async def _stream_openai_compat(llm_service: LLMService, user_msg: str) -> Async
             {"role": "user",   "content": user_msg},
         ],
         stream=True,
+        stream_options={"include_usage": True},
     )
+    response = await _create_chat_stream(client, create_kwargs)
     async for chunk in response:
-        text = chunk.choices[0].delta.content
-        if text:
-            yield text
+        if chunk.choices and chunk.choices[0].delta.content:
+            yield chunk.choices[0].delta.content
+        if getattr(chunk, "usage", None):
+            usage_sink.update(_chat_usage(chunk.usage))
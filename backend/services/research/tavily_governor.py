@@ -0,0 +1,157 @@
+"""
+Process-wide admission control for Tavily calls.
+
+Every network call TavilyProvider makes — search or batched extract — is
+admitted here first, whichever stream or user it belongs to. Two limits apply
+together:
+
+  concurrency  at most TAVILY_MAX_CONCURRENCY calls in flight
+  rate         TAVILY_RPM calls started per minute (token bucket, so a quiet
+               worker can burst up to a minute's worth)
+
+Waiting calls are released strictly FIFO, so one deep-research stream firing
+a round of queries cannot starve the instant-mode searches queued behind it
+for long. Cache hits and coalesced single-flight followers never get here.
+
+Queue time is exported as tavily_queue_wait_seconds{op} together with the
+in-flight / queued gauges (services/research/search_metrics.py); waits longer
+than _LOG_WAIT_S are also logged.
+
+Usage:
+
+    async with tavily_governor.slot("search") as waited_s:
+        response = await client.search(...)
+
+Limits are per process — see TAVILY_* in config.py.
+"""
+
+import asyncio
+import structlog
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
+
+from core.config import TAVILY_MAX_CONCURRENCY, TAVILY_RPM
+from services.research import search_metrics
+from services.token_bucket import TokenBucket
+
+logger = structlog.get_logger(__name__)
+
+_LOG_WAIT_S = 0.25
+
+
+class _Waiter:
+    __slots__ = ("op", "enqueued", "future")
+
+    def __init__(self, op: str, future: asyncio.Future):
+        self.op       = op
+        self.enqueued = time.monotonic()
+        self.future   = future
+
+
+class Governor:
+    """Concurrency cap + request bucket shared by every Tavily call in the process."""
+
+    def __init__(self, max_concurrency: int, rpm: int):
+        self.max_concurrency = max(1, max_concurrency)
+        self.requests  = TokenBucket(rpm)
+        self.in_flight = 0
+        self.waiters: deque[_Waiter] = deque()
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+    def _can_start(self, now: float) -> float:
+        """0 when a call may start now; else seconds until the bucket allows it
+        (inf while every concurrency slot is taken)."""
+        if self.in_flight >= self.max_concurrency:
+            return float("inf")
+        self.requests.refill(now)
+        return self.requests.delay_for(1)
+
+    def _start(self) -> None:
+        self.requests.level -= 1
+        self.in_flight += 1
+
+    def _publish(self) -> None:
+        search_metrics.set_occupancy(self.in_flight, len(self.waiters))
+
+    def pump(self) -> None:
+        """Admit queued calls, oldest first, while both limits allow."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        while self.waiters:
+            head = self.waiters[0]
+            if head.future.done():          # cancelled while queued
+                self.waiters.popleft()
+                continue
+            delay = self._can_start(time.monotonic())
+            if delay == float("inf"):
+                break                       # release() pumps again
+            if delay > 0:
+                self._timer = asyncio.get_running_loop().call_later(delay, self.pump)
+                break
+            self._start()
+            self.waiters.popleft()
+            head.future.set_result(None)
+        self._publish()
+
+    async def acquire(self, op: str) -> float:
+        """Wait for admission; returns the seconds spent queued."""
+        if not self.waiters and self._can_start(time.monotonic()) == 0:
+            self._start()
+            self._publish()
+            search_metrics.record_queue_wait(op, 0.0)
+            return 0.0
+
+        waiter = _Waiter(op, asyncio.get_running_loop().create_future())
+        self.waiters.append(waiter)
+        self.pump()
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            if waiter in self.waiters:
+                self.waiters.remove(waiter)
+                self._publish()
+            elif waiter.future.done() and not waiter.future.cancelled():
+                self.release()              # admitted at the same moment we were cancelled
+            raise
+
+        waited = time.monotonic() - waiter.enqueued
+        search_metrics.record_queue_wait(op, waited)
+        if waited >= _LOG_WAIT_S:
+            logger.info("tavily_governor_queued", op=op, waited_ms=round(waited * 1000),
+                        in_flight=self.in_flight, queue_depth=len(self.waiters))
+        return waited
+
+    def release(self) -> None:
+        self.in_flight = max(0, self.in_flight - 1)
+        self.pump()
+
+    @asynccontextmanager
+    async def slot(self, op: str) -> AsyncIterator[float]:
+        waited = await self.acquire(op)
+        try:
+            yield waited
+        finally:
+            self.release()
+
+    def stats(self) -> dict:
+        self.requests.refill(time.monotonic())
+        return {
+            "in_flight":          self.in_flight,
+            "queued":             len(self.waiters),
+            "requests_available": int(self.requests.level),
+        }
+
+
+_governor = Governor(TAVILY_MAX_CONCURRENCY, TAVILY_RPM)
+
+
+def slot(op: str):
+    """Async context manager admitting one Tavily call; yields seconds queued."""
+    return _governor.slot(op)
+
+
+def stats() -> dict:
+    return _governor.stats()
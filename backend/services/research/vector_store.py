@@ -12,13 +12,18 @@ Why pgvector instead of the previous local ChromaDB:
   - Reuses the existing RDS Postgres + asyncpg pool — one fewer system to operate.
   - Cleanup on conversation delete is a trivial `DELETE WHERE conversation_id = ...`.
 
+Also hosts the semantic classify cache (`classify_cache` table): first-turn
+plan_and_classify results keyed by the embedding of the raw user message, so a
+paraphrase of a recent question can reuse its classification without an LLM call.
+
 Degrades gracefully: if the OpenAI embedding API or the DB/extension is unavailable,
 all functions no-op / return empty and log a warning — the pipeline continues
 without vector retrieval.
 
 These functions are ``async`` (asyncpg is native async). Call them directly with
 ``await`` — do NOT wrap them in ``asyncio.to_thread``. Only the OpenAI embedding
-call is synchronous, and it is offloaded internally via ``asyncio.to_thread``.
+call is synchronous, and it is offloaded internally via ``asyncio.to_thread``
+(through _embed_async, which coalesces identical concurrent batches).
 """
 
 import asyncio
@@ -27,14 +32,27 @@ import structlog
 import threading
 from typing import Optional
 
-from core.config import EMBEDDING_MODEL
+from core.config import (
+    CLASSIFY_SEMANTIC_CACHE_MAX_DIST,
+    CLASSIFY_SEMANTIC_CACHE_TTL_HOURS,
+    EMBEDDING_MODEL,
+)
 from core.db_async import get_async_db, get_async_db_read
+from services.single_flight import SingleFlight, flight_key
 
 logger = structlog.get_logger(__name__)
 
 _openai_client = None
 _openai_lock   = threading.Lock()
 
+# Embeddings are cheap enough that in-process coalescing is all we need.
+_embed_flight = SingleFlight("embed")
+
+# Delete classify_cache rows past CLASSIFY_SEMANTIC_CACHE_TTL_HOURS once every
+# N stores rather than on every write.
+_PRUNE_EVERY = 50
+_classify_stores = 0
+
 
 # ── OpenAI embedding client (lazy, thread-safe) ────────────────────────────────
 
@@ -71,6 +89,16 @@ def _embed(texts: list[str]) -> Optional[list[list[float]]]:
         return None
 
 
+async def _embed_async(texts: list[str]) -> Optional[list[list[float]]]:
+    """
+    Async wrapper around _embed. Concurrent requests embedding the same texts
+    (e.g. the same follow-up query from two tabs) share one API call.
+    """
+    key = flight_key(EMBEDDING_MODEL, texts)
+    embeddings, _ = await _embed_flight.do(key, lambda: asyncio.to_thread(_embed, texts))
+    return embeddings
+
+
 def _source_id(url: str) -> str:
     """Stable per-URL ID — gives upsert semantics for a repeated URL in a conversation."""
     return hashlib.sha256(url.encode()).hexdigest()[:16]
@@ -95,7 +123,7 @@ async def upsert_sources(conversation_id: str, sources: list[dict]) -> None:
         f"{s.get('title', '')} {(s.get('snippet', '') or '')[:500]}"
         for s in sources
     ]
-    embeddings = await asyncio.to_thread(_embed, texts)
+    embeddings = await _embed_async(texts)
     if not embeddings:
         return
 
@@ -151,7 +179,7 @@ async def retrieve_sources(
 
     Returns an empty list if embeddings are unavailable or nothing is stored yet.
     """
-    embeddings = await asyncio.to_thread(_embed, [query])
+    embeddings = await _embed_async([query])
     if not embeddings:
         return []
     q_emb = embeddings[0]
@@ -201,3 +229,94 @@ async def delete_conversation_embeddings(conversation_id: str) -> None:
             )
     except Exception as exc:
         logger.warning("pgvector_delete_failed", conv=conversation_id[:8], error=str(exc))
+
+
+# ── Semantic classify cache ───────────────────────────────────────────────────
+
+async def embed_query(message: str) -> Optional[list[float]]:
+    """The classify-cache embedding for a first-turn question, or None on failure."""
+    embeddings = await _embed_async([message])
+    return embeddings[0] if embeddings else None
+
+
+async def lookup_classification(
+    message: str,
+    q_emb: list[float],
+    research_mode: str,
+    video_enabled: bool,
+    max_distance: float = CLASSIFY_SEMANTIC_CACHE_MAX_DIST,
+) -> Optional[dict]:
+    """
+    Find a stored plan_and_classify result for a near-duplicate first-turn question.
+
+    q_emb is embed_query(message) — embedding is split out so the caller can
+    keep it for store_classification() even when it gives up on the lookup.
+    Only rows with the same (research_mode, video_enabled) and younger than
+    CLASSIFY_SEMANTIC_CACHE_TTL_HOURS are considered. Returns None on a miss.
+    """
+    try:
+        async with get_async_db_read() as conn:
+            row = await conn.fetchrow(
+                """
+                SELECT result, message, embedding <=> $1 AS distance
+                FROM classify_cache
+                WHERE research_mode = $2
+                  AND video_enabled = $3
+                  AND created_at > now() - make_interval(hours => $4)
+                ORDER BY embedding <=> $1
+                LIMIT 1
+                """,
+                q_emb, research_mode, video_enabled, CLASSIFY_SEMANTIC_CACHE_TTL_HOURS,
+            )
+    except Exception as exc:
+        logger.debug("classify_cache_lookup_skipped", error=str(exc))
+        return None
+
+    if row is None or row["distance"] is None or row["distance"] > max_distance:
+        return None
+
+    logger.info("classify_cache_hit", distance=round(float(row["distance"]), 4),
+                query=message[:60], matched=row["message"][:60])
+    result = dict(row["result"])
+    result["_semantic_distance"] = float(row["distance"])
+    return result
+
+
+async def store_classification(
+    message: str,
+    embedding: list[float],
+    research_mode: str,
+    video_enabled: bool,
+    result: dict,
+) -> None:
+    """Persist a fresh plan_and_classify result under its message embedding;
+    every _PRUNE_EVERY stores, rows past the TTL are deleted."""
+    global _classify_stores
+    if not embedding:
+        return
+    try:
+        async with get_async_db() as conn:
+            await conn.execute(
+                """
+                INSERT INTO classify_cache
+                    (message_hash, message, research_mode, video_enabled, result, embedding)
+                VALUES ($1, $2, $3, $4, $5, $6)
+                ON CONFLICT (message_hash, research_mode, video_enabled) DO UPDATE SET
+                    result     = EXCLUDED.result,
+                    embedding  = EXCLUDED.embedding,
+                    created_at = now()
+                """,
+                hashlib.sha256(message.encode()).hexdigest(),
+                message[:2000], research_mode, video_enabled, result, embedding,
+            )
+            _classify_stores += 1
+            if _classify_stores % _PRUNE_EVERY == 0:
+                # Expired rows are never served; keep them out of the HNSW scan.
+                pruned = await conn.execute(
+                    "DELETE FROM classify_cache "
+                    "WHERE created_at < now() - make_interval(hours => $1)",
+                    CLASSIFY_SEMANTIC_CACHE_TTL_HOURS,
+                )
+                logger.info("classify_cache_pruned", result=pruned)
+    except Exception as exc:
+        logger.warning("classify_cache_store_failed", error=str(exc))
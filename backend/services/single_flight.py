@@ -0,0 +1,318 @@
+"""
+Single-flight coalescing for identical in-flight calls.
+
+When several requests issue the same LLM prompt, Tavily query or embedding
+batch at the same moment, only the first caller (the leader) actually hits the
+provider; everyone else awaits the leader's future and receives the same
+value. Callers learn whether they were a follower via the returned `shared`
+flag — LLMService uses it to report zero billable tokens for followers, the
+same way llm_cache reports a cache hit.
+
+    flight = SingleFlight("tavily_search", cross_worker=True)
+    value, shared = await flight.do(key, lambda: fetch(...))
+
+The shared work runs in its own task and every caller awaits it through
+asyncio.shield(), so one caller timing out or disconnecting never cancels the
+call for the others.
+
+Streams (in-process only):
+    async for chunk, shared in flight.stream(key, lambda: provider_stream(...)):
+
+  The leader yields chunks as they arrive. A caller arriving mid-stream cannot
+  join it part-way, so it waits for the leader's joined text and gets it as a
+  single chunk — the same shape as a response-cache hit. When the leader fails
+  or is abandoned, waiting callers run the stream themselves.
+
+Cross-worker mode (SINGLE_FLIGHT_CROSS_WORKER=true, per-instance opt-in):
+  The in-process leader additionally coordinates with other uvicorn workers
+  through Postgres. In one short transaction under
+  pg_try_advisory_xact_lock(hash(namespace:key)) it either finds a fresh
+  result, finds another worker's "running" marker, or writes its own marker
+  and becomes the cross-worker leader. The connection goes back to the pool
+  before the call runs, so slow calls never pin pool connections. The leader
+  then writes the JSON-encoded value to single_flight_results; other workers
+  poll that table until the value appears (or the leader records a failure,
+  or the wait times out) and then fall back to running the call themselves.
+  A marker older than SINGLE_FLIGHT_WAIT_TIMEOUT_S is treated as abandoned.
+  Rows live for SINGLE_FLIGHT_RESULT_TTL_S seconds, so the table doubles as a
+  tiny double-submit cache — for callers that pass reuse_results=True only;
+  with reuse_results=False a finished row is ignored and another worker only
+  joins a call that is still running. Values must be JSON-serialisable in this mode;
+  values the flight's `failed` predicate rejects (e.g. a provider's
+  (None, {}) error result) are recorded as failures, never reused.
+
+Degrades gracefully: with no DB pool, or on any DB error, cross-worker mode
+silently falls back to in-process coalescing only.
+"""
+
+import asyncio
+import hashlib
+import asyncpg
+import structlog
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable, Optional
+
+from core.config import (
+    SINGLE_FLIGHT_CROSS_WORKER,
+    SINGLE_FLIGHT_ENABLED,
+    SINGLE_FLIGHT_RESULT_TTL_S,
+    SINGLE_FLIGHT_WAIT_TIMEOUT_S,
+)
+
+logger = structlog.get_logger(__name__)
+
+# How often a non-leader worker re-checks single_flight_results.
+_POLL_INTERVAL_S = 0.15
+# Prune expired result rows once every N leader stores.
+_PRUNE_EVERY = 100
+
+# Marker stored by a cross-worker leader whose call raised, so waiting workers
+# stop polling immediately and run the call themselves.
+_FAILED = {"__single_flight_failed__": True}
+# Marker claiming a key while the cross-worker leader's call is running.
+_RUNNING = {"__single_flight_running__": True}
+
+_DB_ERRORS = (asyncpg.PostgresError, asyncpg.InterfaceError, OSError, asyncio.TimeoutError)
+
+
+def flight_key(*parts: Any) -> str:
+    """sha256 over the repr of every part — convenience for call sites."""
+    return hashlib.sha256(repr(parts).encode()).hexdigest()
+
+
+def _advisory_lock_id(full_key: str) -> int:
+    """Map a key onto Postgres's signed 64-bit advisory-lock keyspace."""
+    return int.from_bytes(hashlib.sha256(full_key.encode()).digest()[:8], "big", signed=True)
+
+
+class SingleFlight:
+    """Per-namespace table of in-flight calls keyed by the caller's key."""
+
+    def __init__(
+        self,
+        namespace: str,
+        cross_worker: bool = False,
+        failed: Optional[Callable[[Any], bool]] = None,
+    ):
+        self.namespace = namespace
+        self.cross_worker = cross_worker
+        # Values for which failed(value) is true are not shared across workers.
+        self.failed = failed or (lambda value: False)
+        self._inflight: dict[str, asyncio.Task] = {}
+        self._streams: dict[str, asyncio.Future] = {}
+        self.leaders = 0
+        self.followers = 0
+
+    def inflight(self) -> int:
+        return len(self._inflight) + len(self._streams)
+
+    async def do(
+        self, key: str, fn: Callable[[], Awaitable[Any]], reuse_results: bool = True,
+    ) -> tuple[Any, bool]:
+        """Run fn() once per key across concurrent callers.
+
+        Returns (value, shared). shared is True when this caller did not
+        trigger the underlying call itself — either it joined an in-process
+        leader or the value came from another worker. reuse_results=False
+        keeps cross-worker sharing to calls still in flight: a value another
+        worker finished earlier is never handed out.
+        """
+        if not SINGLE_FLIGHT_ENABLED:
+            return await fn(), False
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self.followers += 1
+            logger.debug("single_flight_joined", namespace=self.namespace, key=key[:12])
+            value, _ = await asyncio.shield(task)
+            return value, True
+
+        self.leaders += 1
+        task = asyncio.create_task(self._run(key, fn, reuse_results))
+        self._inflight[key] = task
+        task.add_done_callback(lambda t: self._forget(key, t))
+        return await asyncio.shield(task)
+
+    async def stream(
+        self, key: str, fn: Callable[[], AsyncIterator[str]],
+    ) -> AsyncIterator[tuple[str, bool]]:
+        """Stream fn() once per key across concurrent callers.
+
+        Yields (chunk, shared). The leader yields fn()'s chunks with shared
+        False; followers get the leader's joined text as one chunk with shared
+        True, or run fn() themselves if the leader produced nothing.
+        """
+        if not SINGLE_FLIGHT_ENABLED:
+            async for chunk in fn():
+                yield chunk, False
+            return
+
+        joined = False
+        while (leader := self._streams.get(key)) is not None:
+            if not joined:
+                self.followers += 1
+                joined = True
+                logger.debug("single_flight_stream_joined", namespace=self.namespace, key=key[:12])
+            text = await asyncio.shield(leader)
+            if text is not None:
+                yield text, True
+                return
+
+        self.leaders += 1
+        flight = asyncio.get_running_loop().create_future()
+        self._streams[key] = flight
+        chunks: list[str] = []
+        try:
+            async for chunk in fn():
+                chunks.append(chunk)
+                yield chunk, False
+            flight.set_result("".join(chunks) if chunks else None)
+        finally:
+            # Failed or abandoned mid-stream: release followers to run their own.
+            if not flight.done():
+                flight.set_result(None)
+            if self._streams.get(key) is flight:
+                del self._streams[key]
+
+    def _forget(self, key: str, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Mark the exception retrieved even when every waiter was cancelled.
+        if not task.cancelled():
+            task.exception()
+
+    async def _run(
+        self, key: str, fn: Callable[[], Awaitable[Any]], reuse_results: bool,
+    ) -> tuple[Any, bool]:
+        if not (self.cross_worker and SINGLE_FLIGHT_CROSS_WORKER):
+            return await fn(), False
+        return await _cross_worker_do(f"{self.namespace}:{key}", fn, self.failed, reuse_results)
+
+
+# ── Cross-worker coordination ─────────────────────────────────────────────────
+
+_stores = 0
+
+
+async def _fetch_result(pool, full_key: str) -> Optional[Any]:
+    """A finished result (or _FAILED) for full_key; None while absent or running."""
+    async with pool.acquire(timeout=5.0) as conn:
+        row = await conn.fetchrow(
+            "SELECT result FROM single_flight_results "
+            "WHERE key = $1 AND created_at > now() - make_interval(secs => $2)",
+            full_key, float(SINGLE_FLIGHT_RESULT_TTL_S),
+        )
+    if row is None or row["result"] == _RUNNING:
+        return None
+    return row["result"]
+
+
+async def _claim(pool, full_key: str, reuse_results: bool = True) -> tuple[str, Any]:
+    """
+    One short transaction deciding this worker's role for full_key:
+    ("cached", value), ("follower", None) or ("leader", None). "cached" only
+    with reuse_results. The advisory lock is transaction-scoped, so the
+    connection is released on return.
+    """
+    async with pool.acquire(timeout=5.0) as conn:
+        async with conn.transaction():
+            if not await conn.fetchval("SELECT pg_try_advisory_xact_lock($1)",
+                                       _advisory_lock_id(full_key)):
+                return "follower", None         # another worker is claiming it right now
+            row = await conn.fetchrow(
+                "SELECT result, "
+                "       created_at > now() - make_interval(secs => $2) AS fresh, "
+                "       created_at > now() - make_interval(secs => $3) AS running "
+                "FROM single_flight_results WHERE key = $1",
+                full_key, float(SINGLE_FLIGHT_RESULT_TTL_S), float(SINGLE_FLIGHT_WAIT_TIMEOUT_S),
+            )
+            if row is not None:
+                if row["result"] == _RUNNING and row["running"]:
+                    return "follower", None
+                if reuse_results and row["result"] not in (_RUNNING, _FAILED) and row["fresh"]:
+                    return "cached", row["result"]
+            await _upsert_result(conn, full_key, _RUNNING)
+    return "leader", None
+
+
+async def _store_result(pool, full_key: str, value: Any) -> None:
+    try:
+        async with pool.acquire(timeout=5.0) as conn:
+            try:
+                await _upsert_result(conn, full_key, value)
+            except (TypeError, ValueError) as exc:
+                # Not JSON-encodable: the call itself succeeded, only sharing
+                # it is lost. Release waiting workers instead of leaving the
+                # running marker for them to poll.
+                logger.warning("single_flight_result_unencodable", key=full_key[:40], error=str(exc))
+                await _upsert_result(conn, full_key, _FAILED)
+    except _DB_ERRORS as exc:
+        logger.warning("single_flight_store_failed", key=full_key[:40], error=str(exc))
+
+
+async def _upsert_result(conn, full_key: str, value: Any) -> None:
+    global _stores
+    await conn.execute(
+        "INSERT INTO single_flight_results (key, result, created_at) "
+        "VALUES ($1, $2, now()) "
+        "ON CONFLICT (key) DO UPDATE SET result = EXCLUDED.result, created_at = now()",
+        full_key, value,
+    )
+    _stores += 1
+    if _stores % _PRUNE_EVERY == 0:
+        await conn.execute(
+            "DELETE FROM single_flight_results "
+            "WHERE created_at < now() - make_interval(secs => $1)",
+            float(max(SINGLE_FLIGHT_RESULT_TTL_S, SINGLE_FLIGHT_WAIT_TIMEOUT_S)),
+        )
+
+
+async def _cross_worker_do(
+    full_key: str,
+    fn: Callable[[], Awaitable[Any]],
+    failed: Callable[[Any], bool] = lambda value: False,
+    reuse_results: bool = True,
+) -> tuple[Any, bool]:
+    from core.db_async import _get_pool
+    try:
+        pool = _get_pool()
+    except RuntimeError:
+        return await fn(), False
+
+    try:
+        role, cached = await _claim(pool, full_key, reuse_results)
+    except _DB_ERRORS as exc:
+        logger.warning("single_flight_db_failed", key=full_key[:40], error=str(exc))
+        return await fn(), False
+
+    if role == "cached":
+        logger.info("single_flight_result_reused", key=full_key[:40])
+        return cached, True
+
+    if role == "leader":
+        try:
+            value = await fn()
+        except BaseException:
+            await _store_result(pool, full_key, _FAILED)
+            raise
+        await _store_result(pool, full_key, _FAILED if failed(value) else value)
+        return value, False
+
+    # Another worker holds the key — wait for its result.
+    deadline = time.monotonic() + SINGLE_FLIGHT_WAIT_TIMEOUT_S
+    started = time.monotonic()
+    while time.monotonic() < deadline:
+        await asyncio.sleep(_POLL_INTERVAL_S)
+        try:
+            cached = await _fetch_result(pool, full_key)
+        except _DB_ERRORS:
+            break
+        if cached == _FAILED:
+            break
+        if cached is not None:
+            logger.info("single_flight_cross_worker_joined", key=full_key[:40],
+                        waited_ms=round((time.monotonic() - started) * 1000))
+            return cached, True
+    logger.info("single_flight_cross_worker_fallback", key=full_key[:40],
+                waited_ms=round((time.monotonic() - started) * 1000))
+    return await fn(), False
@@ -0,0 +1,30 @@
+"""
+Token bucket shared by the process-wide rate limiters: the LLM scheduler's
+per-model request/token lanes (services/llm_scheduler.py) and the Tavily
+governor (services/research/tavily_governor.py).
+
+The bucket only does the arithmetic. Callers refill() it with the current
+monotonic time, ask delay_for() how long an amount would take, and spend by
+lowering `level` themselves (refunds raise it, capped at `capacity`).
+"""
+
+import time
+
+
+class TokenBucket:
+    """Classic token bucket refilled continuously at per_minute / 60 per second."""
+
+    def __init__(self, per_minute: int):
+        self.capacity = float(max(1, per_minute))
+        self.level    = self.capacity
+        self.rate     = self.capacity / 60.0
+        self._stamp   = time.monotonic()
+
+    def refill(self, now: float) -> None:
+        self.level  = min(self.capacity, self.level + (now - self._stamp) * self.rate)
+        self._stamp = now
+
+    def delay_for(self, amount: float) -> float:
+        """Seconds until `amount` is available (0 when it already is)."""
+        short = amount - self.level
+        return 0.0 if short <= 0 else short / self.rate
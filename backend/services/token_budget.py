@@ -0,0 +1,178 @@
+"""
+Token accounting and per-task input budgets for prompt assembly.
+
+Counting:
+  count_tokens(text, provider) uses tiktoken's o200k_base encoding — exact for
+  the OpenAI models we run, and scaled by a measured factor for Anthropic and
+  Gemini, whose tokenizers are not public. When tiktoken (or its encoding file)
+  is unavailable the count falls back to a per-provider chars-per-token ratio.
+  count_static() memoizes counts for prompt templates and other text that
+  repeats across requests; warm() pre-tokenizes the prompt registry at startup.
+
+Packing:
+  pack(task, provider, fixed, sections) fits variable prompt inputs into
+  INPUT_TOKEN_BUDGETS[task]. `static` (templates — counted once, memoized)
+  and `fixed` (the question, ...) are always sent; `sections` are taken in
+  priority order, each kept whole while it fits,
+  the first one that does not fit is truncated to the remaining budget and
+  everything after it is dropped. Conversation history is packed with
+  keep="tail" so the newest turns (and the text-selection excerpt appended
+  after them) survive.
+
+Usage:
+    packed = token_budget.pack(
+        "synthesiser", provider.name, [query],
+        [Section("source:1", s1), Section("context", ctx, keep="tail")],
+        static=[SYSTEM_PROMPT],
+    )
+"""
+
+import structlog
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Iterable, Optional
+
+from core.config import INPUT_TOKEN_BUDGETS
+
+logger = structlog.get_logger(__name__)
+
+# tiktoken o200k_base counts relative to each provider's own tokenizer.
+_TOKEN_SCALE = {"openai": 1.0, "gemini": 1.0, "anthropic": 1.15}
+# Fallback when no encoder is available.
+_CHARS_PER_TOKEN = {"openai": 4.0, "gemini": 4.0, "anthropic": 3.5}
+_DEFAULT_PROVIDER = "anthropic"
+
+# A section truncated below this many tokens is dropped instead — a few words of
+# a source or a conversation are noise, not context.
+_MIN_SECTION_TOKENS = 64
+
+_ENCODING = "o200k_base"
+_encoder = None
+_encoder_failed = False
+
+
+def _get_encoder():
+    global _encoder, _encoder_failed
+    if _encoder is None and not _encoder_failed:
+        try:
+            import tiktoken
+            _encoder = tiktoken.get_encoding(_ENCODING)
+        except Exception as exc:
+            # Not installed, or the encoding file cannot be fetched/cached.
+            _encoder_failed = True
+            logger.warning("token_budget_encoder_unavailable", error=str(exc),
+                           fallback="chars_per_token")
+    return _encoder
+
+
+def _family(provider: Optional[str]) -> str:
+    return provider if provider in _TOKEN_SCALE else _DEFAULT_PROVIDER
+
+
+def count_tokens(text: str, provider: Optional[str] = None) -> int:
+    """Input tokens `text` costs on `provider` (anthropic | openai | gemini)."""
+    if not text:
+        return 0
+    fam = _family(provider)
+    enc = _get_encoder()
+    if enc is None:
+        return int(len(text) / _CHARS_PER_TOKEN[fam]) + 1
+    return int(len(enc.encode(text, disallowed_special=())) * _TOKEN_SCALE[fam]) + 1
+
+
+@lru_cache(maxsize=512)
+def count_static(text: str, provider: Optional[str] = None) -> int:
+    """count_tokens() memoized — for templates and other repeated prompt text."""
+    return count_tokens(text, provider)
+
+
+def warm(texts: Iterable[str]) -> int:
+    """Pre-tokenize static prompt text for every provider family. Returns the count."""
+    n = 0
+    for text in texts:
+        for fam in _TOKEN_SCALE:
+            count_static(text, fam)
+        n += 1
+    logger.info("prompt_tokens_warmed", texts=n, exact=_get_encoder() is not None)
+    return n
+
+
+def truncate(text: str, max_tokens: int, provider: Optional[str] = None, keep: str = "head") -> str:
+    """
+    Cut `text` to at most max_tokens. keep="head" keeps the beginning (ending at
+    a sentence boundary where one is close), keep="tail" keeps the end (starting
+    at a line boundary).
+    """
+    if max_tokens <= 0:
+        return ""
+    if count_tokens(text, provider) <= max_tokens:
+        return text
+    fam = _family(provider)
+    enc = _get_encoder()
+    if enc is not None:
+        tokens = enc.encode(text, disallowed_special=())
+        n = max(1, int((max_tokens - 1) / _TOKEN_SCALE[fam]))
+        cut = enc.decode(tokens[:n] if keep == "head" else tokens[-n:])
+    else:
+        n = int((max_tokens - 1) * _CHARS_PER_TOKEN[fam])
+        cut = text[:n] if keep == "head" else text[-n:]
+
+    if keep == "head":
+        last_period = max(cut.rfind(". "), cut.rfind(".\n"))
+        if last_period > len(cut) * 0.7:
+            return cut[:last_period + 1]
+        return cut
+    first_newline = cut.find("\n")
+    if 0 <= first_newline < len(cut) * 0.3:
+        return cut[first_newline + 1:]
+    return cut
+
+
+@dataclass
+class Section:
+    """One variable prompt input competing for the task's budget."""
+    name: str
+    text: str
+    keep: str = "head"
+
+
+def pack(
+    task: str,
+    provider: Optional[str],
+    fixed: Iterable[str],
+    sections: list[Section],
+    static: Iterable[str] = (),
+    budget: Optional[int] = None,
+) -> dict[str, str]:
+    """
+    Fit `sections` (highest priority first) into the task's input budget after
+    the always-sent `static` and `fixed` parts. Returns {section name: text to
+    use}; a dropped section maps to "".
+    """
+    budget = budget if budget is not None else INPUT_TOKEN_BUDGETS.get(task)
+    if not budget:
+        return {s.name: s.text for s in sections}
+
+    fixed_tokens = (sum(count_static(t, _family(provider)) for t in static if t)
+                    + sum(count_tokens(t, provider) for t in fixed if t))
+    remaining = budget - fixed_tokens
+    packed: dict[str, str] = {}
+    trimmed: dict[str, list[int]] = {}
+    for sec in sections:
+        n = count_tokens(sec.text, provider)
+        if n <= remaining:
+            packed[sec.name] = sec.text
+            remaining -= n
+            continue
+        if remaining >= _MIN_SECTION_TOKENS:
+            packed[sec.name] = truncate(sec.text, remaining, provider, sec.keep)
+            trimmed[sec.name] = [n, remaining]
+        else:
+            packed[sec.name] = ""
+            trimmed[sec.name] = [n, 0]
+        remaining = 0
+
+    if trimmed:
+        logger.info("prompt_budget_trimmed", task=task, provider=provider, budget=budget,
+                    fixed_tokens=fixed_tokens, trimmed=trimmed)
+    return packed
@@ -15,6 +15,7 @@ Subtitle (caption text) is burned as a semi-transparent bar at the bottom.
 import json
 import structlog
 import os
+from functools import lru_cache
 from typing import Optional
 
 from PIL import Image, ImageDraw, ImageFont
@@ -46,15 +47,23 @@ _FONT_CANDIDATES = [
 ]
 
 
-def _load_font(size: int) -> ImageFont.FreeTypeFont:
-    """Load the best available TrueType font at the given size."""
+@lru_cache(maxsize=1)
+def font_path() -> Optional[str]:
+    """First usable font in _FONT_CANDIDATES — probed once per process."""
     for path in _FONT_CANDIDATES:
         if os.path.exists(path):
             try:
-                return ImageFont.truetype(path, size)
+                ImageFont.truetype(path, 12)
+                return path
             except Exception:
                 continue
-    return ImageFont.load_default()
+    return None
+
+
+def _load_font(size: int) -> ImageFont.FreeTypeFont:
+    """Load the best available TrueType font at the given size."""
+    path = font_path()
+    return ImageFont.truetype(path, size) if path else ImageFont.load_default()
 
 
 def _letterbox(img: Image.Image) -> Image.Image:
@@ -103,12 +103,14 @@ def _openai_tts_generate(text: str, out_path: str) -> bool:
     logged and return False immediately.
     """
     try:
-        from openai import OpenAI, RateLimitError  # type: ignore
+        from openai import RateLimitError  # type: ignore
     except ImportError:
         logger.error("openai_not_installed")
         return False
 
-    client = OpenAI(timeout=30.0)
+    # Shared pooled client — a new OpenAI() per clip paid TLS setup every time.
+    from services.llm_service import _get_openai_client
+    client = _get_openai_client().with_options(timeout=30.0)
 
     for attempt in range(_TTS_MAX_RETRIES):
         try:
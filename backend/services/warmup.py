@@ -0,0 +1,133 @@
+"""
+Per-worker warm-up, run from main.py's lifespan so the first request a worker
+serves does not pay for lazy initialisation.
+
+  warm_local()  — no network. Loads every prompt template into memory and
+                  pre-tokenizes it, probes the subtitle/slide fonts, and builds
+                  every provider SDK client — LLMs and Tavily — with its pooled
+                  httpx client.
+  preflight()   — one cheap authenticated request per configured provider
+                  (models.list for LLMs, GET /usage for Tavily), so each
+                  keep-alive pool holds an open TLS connection before the
+                  first user request. Skipped when
+                  WARMUP_PREFLIGHT=false or when replaying offline.
+
+/api/health reports 503 "warming" until is_ready(). A failed local warm-up or
+pre-flight still makes the worker ready — it is reported in status() and the
+work is redone lazily on first use.
+"""
+
+import asyncio
+import time
+import structlog
+
+from core.config import (
+    ANTHROPIC_API_KEY,
+    GEMINI_API_KEY,
+    OPENAI_API_KEY,
+    REPLAY_ACTIVITY_LOG,
+    TAVILY_API_KEY,
+    WARMUP_PREFLIGHT,
+    WARMUP_PREFLIGHT_TIMEOUT_S,
+)
+
+logger = structlog.get_logger(__name__)
+
+_status: dict = {"ready": False, "local": False, "local_error": None, "preflight": {}}
+
+
+def is_ready() -> bool:
+    return _status["ready"]
+
+
+def status() -> dict:
+    return {
+        "ready":       _status["ready"],
+        "local_error": _status.get("local_error"),
+        "preflight":   dict(_status["preflight"]),
+    }
+
+
+def preflight_enabled() -> bool:
+    return WARMUP_PREFLIGHT and not REPLAY_ACTIVITY_LOG
+
+
+def _warm_local_sync() -> None:
+    from services import llm_service, prompt_registry, token_budget
+
+    # Every prompt template in memory, then pre-tokenized so per-request
+    # budget packing only counts the variable parts.
+    prompt_registry.load_all()
+    token_budget.warm(prompt_registry.texts())
+
+    try:
+        from services.video_generation import frame_exporter
+        from services.frame_generation import slide_generator
+        frame_exporter.font_path()
+        slide_generator.font_path()
+    except Exception as exc:
+        logger.warning("warmup_fonts_failed", error=str(exc))
+
+    # Construction imports the SDKs and sizes the connection pools; clients
+    # for providers without a key are still built (they fail only on use).
+    for factory in (
+        llm_service._get_async_anthropic_client,
+        llm_service._get_async_openai_client,
+        llm_service._get_async_gemini_client,
+        llm_service._get_openai_client,      # TTS
+    ):
+        try:
+            factory()
+        except Exception as exc:
+            logger.warning("warmup_client_failed", client=factory.__name__, error=str(exc))
+
+    # The Tavily singleton builds its SDK client and shared pool on import.
+    from services.research import search_provider  # noqa: F401
+
+
+async def warm_local() -> None:
+    t0 = time.monotonic()
+    try:
+        await asyncio.to_thread(_warm_local_sync)
+        _status["local"] = True
+    except Exception as exc:
+        _status["local_error"] = str(exc)
+        raise
+    finally:
+        # Without pre-flight nothing else marks the worker ready.
+        if not preflight_enabled():
+            _status["ready"] = True
+    logger.info("warmup_local_done", ms=round((time.monotonic() - t0) * 1000))
+
+
+async def _ping(name: str, call) -> None:
+    t0 = time.monotonic()
+    try:
+        await asyncio.wait_for(call(), timeout=WARMUP_PREFLIGHT_TIMEOUT_S)
+        _status["preflight"][name] = True
+        logger.info("warmup_preflight_ok", provider=name, ms=round((time.monotonic() - t0) * 1000))
+    except Exception as exc:
+        _status["preflight"][name] = False
+        logger.warning("warmup_preflight_failed", provider=name, error=str(exc))
+
+
+async def preflight() -> None:
+    """Open one pooled connection per configured provider, then mark ready."""
+    from services import llm_service
+
+    pings = []
+    if ANTHROPIC_API_KEY:
+        pings.append(_ping("anthropic", lambda: llm_service._get_async_anthropic_client().models.list(limit=1)))
+    if OPENAI_API_KEY:
+        pings.append(_ping("openai", lambda: llm_service._get_async_openai_client().models.list()))
+        pings.append(_ping("openai_sync", lambda: asyncio.to_thread(
+            lambda: llm_service._get_openai_client().models.list())))
+    if GEMINI_API_KEY:
+        pings.append(_ping("gemini", lambda: llm_service._get_async_gemini_client().models.list()))
+    if TAVILY_API_KEY:
+        from services.research.search_provider import tavily
+        pings.append(_ping("tavily", tavily.ping))
+    try:
+        await asyncio.gather(*pings)
+    finally:
+        _status["ready"] = True
@@ -20,6 +20,9 @@ import pytest_asyncio
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 os.environ.setdefault("JWT_SECRET_KEY", "test-secret-key-at-least-32-chars-long!!")
+# Never read or write the real on-disk response cache under outputs/; tests
+# that exercise llm_cache point it at tmp_path themselves.
+os.environ.setdefault("LLM_CACHE_BACKEND", "off")
 
 _DB_AVAILABLE = bool(os.getenv("DATABASE_URL"))
 
@@ -0,0 +1,97 @@
+"""
+Tests for the streamed lifecycle log (services/activity_log.py).
+"""
+
+import pytest
+
+from core.cost import compute_session_cost
+from services import activity_log
+from services.activity_log import ActivityLog, full_entries
+
+
+def _llm_call(prompt: str, response: str) -> dict:
+    return {
+        "event": "llm_call", "model": "gpt-4.1",
+        "usage": {"prompt_tokens": 1000, "completion_tokens": 100},
+        "full_prompt": prompt, "full_response": response,
+    }
+
+
+def test_memory_keeps_summaries_and_disk_keeps_full_entries(tmp_path):
+    log = ActivityLog(str(tmp_path))
+    log.append(_llm_call("p" * 50_000, "r" * 20_000))
+    log.append({"event": "stage_start", "stage": "plan"})
+
+    assert "full_prompt" not in log[0] and "full_response" not in log[0]
+    assert log[0]["prompt_chars"] == 50_000 and log[0]["response_chars"] == 20_000
+    assert compute_session_cost(log) > 0
+
+    assert full_entries(log)[0]["full_response"] == "r" * 20_000   # readable before close
+    assert log.close() is True
+    entries = list(activity_log.read(log.path))
+    assert len(entries) == 2 and entries[0]["full_prompt"] == "p" * 50_000
+
+
+def test_unsampled_fields_keep_only_lengths(tmp_path, monkeypatch):
+    monkeypatch.setattr(activity_log, "ACTIVITY_LOG_PROMPT_SAMPLE_RATE", 0.0)
+    log = ActivityLog(str(tmp_path))
+    log.append(_llm_call("prompt", "response"))
+    log.close()
+
+    (entry,) = activity_log.read(log.path)
+    assert "full_prompt" not in entry and entry["prompt_chars"] == 6
+    assert entry["full_response"] == "response"
+
+
+def test_close_without_entries_writes_nothing(tmp_path):
+    log = ActivityLog(str(tmp_path))
+    assert log.close() is False
+    assert not (tmp_path / activity_log.FILENAME).exists()
+    log.append({"event": "late"})          # after close: summary only, no file
+    assert log == [{"event": "late"}]
+    assert full_entries([{"event": "x"}]) == [{"event": "x"}]
+
+
+def test_append_leaves_serialisation_to_the_writer_thread(tmp_path):
+    import threading
+
+    gate = threading.Event()
+    activity_log._writer.submit(gate.wait, 5)          # hold the writer busy
+    log = ActivityLog(str(tmp_path))
+    log.append(_llm_call("prompt", "response"))
+
+    assert log[0]["prompt_chars"] == 6                 # summary is immediate
+    assert log._fh is None                             # nothing serialised yet
+    gate.set()
+    assert log.close() is True
+    assert [e["full_response"] for e in activity_log.read(log.path)] == ["response"]
+
+
+def test_close_is_idempotent(tmp_path):
+    log = ActivityLog(str(tmp_path))
+    log.append(_llm_call("prompt", "response"))
+    assert log.close() is True
+    assert log.close() is True                         # shares the first result
+
+
+def test_extend_and_iadd_go_through_append(tmp_path):
+    log = ActivityLog(str(tmp_path))
+    log.extend([_llm_call("p" * 50_000, "r")])
+    log += [{"event": "stage_start", "stage": "plan"}]
+
+    assert "full_prompt" not in log[0] and log[0]["prompt_chars"] == 50_000
+    assert log.close() is True
+    assert len(list(activity_log.read(log.path))) == 2
+
+
+def test_entries_cannot_be_rewritten(tmp_path):
+    log = ActivityLog(str(tmp_path))
+    log.append({"event": "stage_start"})
+    with pytest.raises(TypeError):
+        log.insert(0, {"event": "x"})
+    with pytest.raises(TypeError):
+        log[0:1] = [{"event": "x"}]
+    with pytest.raises(TypeError):
+        del log[0]
+    assert log == [{"event": "stage_start"}]
+    log.close()
@@ -0,0 +1,29 @@
+"""
+Tests for the aggregation and regression check of scripts/bench_generate.py.
+"""
+
+from scripts.bench_generate import regressions, summarise
+
+
+def _run(done_s: float, thinking_s: float, error: str = None) -> dict:
+    return {"ttfb_s": 0.01, "ttf_block_s": done_s / 2, "done_s": done_s,
+            "stages": {"thinking": thinking_s}, "error": error}
+
+
+def test_summarise_ignores_failed_runs():
+    summary = summarise([_run(2.0, 0.4), _run(3.0, 0.6), _run(9.0, 9.0, error="boom")])
+
+    assert summary["runs"] == 3 and summary["errors"] == 1
+    assert summary["metrics"]["done_s"] == {"p50": 2.5, "p90": 3.0}
+    assert summary["stages"]["thinking"]["p50"] == 0.5
+
+
+def test_regressions_need_relative_and_absolute_slowdown():
+    baseline = {"modes": {"deep": summarise([_run(2.0, 0.40)])}}
+
+    assert regressions({"modes": {"deep": summarise([_run(2.2, 0.44)])}}, baseline, 0.15, 0.05) == []
+    found = regressions({"modes": {"deep": summarise([_run(3.0, 0.44), _run(3.0, 0.44, "x")])}},
+                        baseline, 0.15, 0.05)
+    assert found == ["deep.ttf_block_s: p50 1.000s → 1.500s",
+                     "deep.done_s: p50 2.000s → 3.000s",
+                     "deep: errors 0 → 1"]
@@ -0,0 +1,152 @@
+"""
+Tests for streaming plan_and_classify: the streamed classify call and the
+Tavily prefetch that consumes it. The field scanner itself is covered in
+test_json_stream.py.
+"""
+
+import asyncio
+import json
+
+import pytest
+
+from routers import generate
+from services import llm_cache
+from services.frame_generation import planner
+from services.frame_generation.planner import request_log
+from services.llm_service import LLMProvider, LLMService
+
+_REPLY = {
+    "domain": "physics",
+    "needs_search": True,
+    "search_queries": ["fusion net energy gain 2026", "ITER \"first plasma\" timeline"],
+    "enriched_prompt": "Summarise the state of fusion energy.",
+    "suggested_followups": ["a", "b", "c"],
+}
+
+
+class _StreamingProvider(LLMProvider):
+    name = "anthropic"
+    model = "claude-haiku-4-5-20251001"
+
+    def __init__(self, reply: str, fail_stream: bool = False):
+        self.reply = reply
+        self.fail_stream = fail_stream
+        self.completed = 0
+
+    def complete(self, messages, **kwargs):
+        raise AssertionError("sync path must not be used")
+
+    async def complete_async(self, messages, **kwargs):
+        self.completed += 1
+        return self.reply, {"prompt_tokens": 100, "completion_tokens": 50, "total_tokens": 150}
+
+    async def stream_async(self, messages, usage_sink, **kwargs):
+        if self.fail_stream:
+            raise RuntimeError("stream dropped")
+        for i in range(0, len(self.reply), 7):
+            yield self.reply[i:i + 7]
+        usage_sink.update({"prompt_tokens": 100, "completion_tokens": 50, "total_tokens": 150})
+
+
+@pytest.fixture()
+def lifecycle(monkeypatch):
+    monkeypatch.setattr(llm_cache, "LLM_CACHE_BACKEND", "off")
+    monkeypatch.setattr(planner, "CLASSIFY_SEMANTIC_CACHE_ENABLED", False)
+    log: list = []
+    token = request_log.set(log)
+    yield log
+    request_log.reset(token)
+
+
+async def test_stream_yields_queries_before_enriched_prompt(monkeypatch, lifecycle):
+    provider = _StreamingProvider(json.dumps(_REPLY))
+    monkeypatch.setattr(planner, "_classify_service", LLMService(provider=provider))
+
+    events = [e async for e in planner.plan_and_classify_stream("fusion?", "instant", False)]
+
+    kinds = [(e["type"], e.get("key")) for e in events]
+    assert kinds.index(("search_query", None)) < kinds.index(("field", "enriched_prompt"))
+    assert events[-1]["type"] == "intent"
+    assert events[-1]["intent"]["search_queries"] == _REPLY["search_queries"]
+    assert provider.completed == 0
+    calls = [e for e in lifecycle if e["event"] == "llm_call"]
+    assert len(calls) == 1 and calls[0]["usage"]["total_tokens"] == 150
+
+
+async def test_failed_stream_falls_back_to_complete(monkeypatch, lifecycle):
+    provider = _StreamingProvider(json.dumps(_REPLY), fail_stream=True)
+    monkeypatch.setattr(planner, "_classify_service", LLMService(provider=provider))
+
+    intent = await planner.plan_and_classify("fusion?", "instant", False)
+
+    assert intent["domain"] == "physics"
+    assert provider.completed == 1
+
+
+async def test_semantic_hit_wins_while_stream_is_idle(monkeypatch, lifecycle):
+    class _IdleProvider(_StreamingProvider):
+        async def stream_async(self, messages, usage_sink, **kwargs):
+            yield '{"domain": '
+            await asyncio.sleep(5)                      # e.g. a hedged, single-chunk reply
+            yield '"physics"}'
+
+    async def _embed(message):
+        return [0.1]
+
+    async def _lookup(*_a, **_kw):
+        return {"domain": "cached", "enriched_prompt": "x", "suggested_followups": [],
+                "_semantic_distance": 0.01}
+
+    monkeypatch.setattr(planner, "CLASSIFY_SEMANTIC_CACHE_ENABLED", True)
+    monkeypatch.setattr("services.research.vector_store.embed_query", _embed)
+    monkeypatch.setattr("services.research.vector_store.lookup_classification", _lookup)
+    monkeypatch.setattr(planner, "_classify_service", LLMService(provider=_IdleProvider("")))
+
+    intent = await asyncio.wait_for(planner.plan_and_classify("fusion?", "instant", False), 1)
+
+    assert intent["domain"] == "cached"
+    # The abandoned stream is still costed, from an estimate.
+    (call,) = [e for e in lifecycle if e["event"] == "llm_call"]
+    assert call["usage"]["estimated"] is True and call["usage"]["prompt_tokens"] > 0
+
+
+class _FakeTavily:
+    def __init__(self):
+        self.queries: list[str] = []
+
+    async def search(self, query, max_results=5, include_domains=None):
+        self.queries.append(query)
+        await asyncio.sleep(0)
+        return [query]
+
+
+async def test_prefetch_waits_for_needs_search_in_instant_mode(monkeypatch, lifecycle):
+    fake = _FakeTavily()
+    monkeypatch.setattr(generate, "tavily", fake)
+    prefetch = generate._SearchPrefetch("instant")
+
+    prefetch.observe({"type": "search_query", "index": 0, "query": "q0"})
+    await asyncio.sleep(0.01)
+    assert fake.queries == []
+
+    prefetch.observe({"type": "field", "key": "needs_search", "value": True})
+    prefetch.observe({"type": "search_query", "index": 1, "query": "q1"})
+    assert await prefetch.take("q0") == ["q0"]
+    prefetch.close()
+
+    assert sorted(fake.queries) == ["q0", "q1"]
+    entry = next(e for e in lifecycle if e["event"] == "search_prefetch")
+    assert entry["dispatched"] == 2 and entry["used"] == 1
+
+
+async def test_deep_research_prefetch_dispatches_immediately(monkeypatch, lifecycle):
+    fake = _FakeTavily()
+    monkeypatch.setattr(generate, "tavily", fake)
+    prefetch = generate._SearchPrefetch("deep_research")
+
+    prefetch.observe({"type": "search_query", "index": 0, "query": "q0"})
+    await asyncio.sleep(0.01)
+
+    assert fake.queries == ["q0"]
+    prefetch.close()
+    assert prefetch.take("q0") is None
@@ -0,0 +1,78 @@
+"""
+Tests for the widget codegen cache (services/interactive/codegen_cache.py) and
+its use in _run_codegen_with_prompt. The Postgres table is replaced by a dict
+and the codegen LLM by a local coroutine — no network, no DB.
+"""
+
+import os
+from types import SimpleNamespace
+
+import pytest
+
+from services import prompt_registry
+from services.frame_generation.planner import request_log
+from services.interactive import codegen_cache, interactive_service
+
+
+def test_key_ignores_whitespace_but_not_case():
+    a = codegen_cache.cache_key("canvas_codegen", "v1", "m", "A  slider\nfor Ohm's law ", "q")
+    b = codegen_cache.cache_key("canvas_codegen", "v1", "m", "A slider for Ohm's law", " q")
+    assert a == b
+    assert a != codegen_cache.cache_key("canvas_codegen", "v1", "m", "a slider for OHM'S LAW", "q")
+
+
+def test_key_varies_with_prompt_version_model_type_and_question():
+    base = codegen_cache.cache_key("canvas_codegen", "v1", "m", "spec", "q")
+    assert base != codegen_cache.cache_key("canvas_codegen", "v2", "m", "spec", "q")
+    assert base != codegen_cache.cache_key("canvas_codegen", "v1", "other", "spec", "q")
+    assert base != codegen_cache.cache_key("canvas_codegen_p5", "v1", "m", "spec", "q")
+    assert base != codegen_cache.cache_key("canvas_codegen", "v1", "m", "spec", "another q")
+
+
+def test_prompt_version_follows_template_edits(tmp_path, monkeypatch):
+    monkeypatch.setattr(prompt_registry, "PROMPT_HOT_RELOAD", True)
+    path = tmp_path / "canvas_codegen.md"
+    path.write_text("Build {{ENTITY_SPEC}}")
+    before = codegen_cache.prompt_version(str(path))
+
+    path.write_text("Build a better {{ENTITY_SPEC}}")
+    os.utime(path, (1, 1))
+    assert codegen_cache.prompt_version(str(path)) != before
+
+
+@pytest.fixture()
+def table(monkeypatch):
+    rows: dict[str, str] = {}
+
+    async def _lookup(key):
+        return rows.get(key)
+
+    async def _store(key, prompt_name, version, model, html, usage):
+        rows[key] = html
+
+    monkeypatch.setattr(codegen_cache, "lookup", _lookup)
+    monkeypatch.setattr(codegen_cache, "store", _store)
+    log: list = []
+    token = request_log.set(log)
+    yield rows, log
+    request_log.reset(token)
+
+
+async def test_repeated_spec_skips_the_llm(table):
+    rows, log = table
+    calls: list[str] = []
+
+    async def _complete(prompt, **kwargs):
+        calls.append(prompt)
+        return "```html\n<canvas></canvas>\n```", {"total_tokens": 3000}
+
+    svc = SimpleNamespace(provider=SimpleNamespace(model="gemini-2.5-flash", name="gemini"),
+                          make_single_prompt_request_async=_complete)
+
+    first = await interactive_service._run_codegen("A slider for Ohm's law", "q1", svc=svc)
+    second = await interactive_service._run_codegen("A slider  for Ohm's law", "q1", svc=svc)
+
+    assert first == second == "<canvas></canvas>"
+    assert len(calls) == 1 and len(rows) == 1
+    assert [e.get("cache_hit", False) for e in log] == [False, True]
+    assert log[1]["usage"]["total_tokens"] == 0
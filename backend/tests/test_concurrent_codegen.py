@@ -0,0 +1,95 @@
+"""
+Tests for background widget codegen in run_interactive_pipeline
+(services/interactive/interactive_service.py). The planner stream and the
+codegen call are replaced by local coroutines — no network.
+"""
+
+import asyncio
+import json
+
+import pytest
+
+from services.frame_generation.planner import request_llm_service, request_log
+from services.interactive import interactive_service
+from services.interactive.interactive_service import SelectionResult
+from services.interactive.scene_ir import SceneBlock, SceneIR
+
+_BLOCKS = [
+    {"id": "b1", "type": "text", "content": "Intro"},
+    {"id": "b2", "type": "entity", "entity_type": "freeform_html", "props": {"spec": "slow"}},
+    {"id": "b3", "type": "entity", "entity_type": "p5_sketch", "props": {"spec": "fast"}},
+    {"id": "b4", "type": "text", "content": "Outro"},
+]
+
+
+@pytest.fixture()
+def pipeline(monkeypatch):
+    state = {"running": 0, "peak": 0}
+
+    async def _fake_select(prompt, domain, conversation_context, **kwargs):
+        return SelectionResult(entities=["freeform_html", "p5_sketch"])
+
+    async def _fake_plan(*args, **kwargs):
+        yield {"type": "_meta", "title": "T", "follow_ups": ["next?"]}
+        for b in _BLOCKS:
+            await asyncio.sleep(0.01)
+            yield {"type": "_block", "block": SceneBlock(**b)}
+        await asyncio.sleep(0.01)
+        # The final scene is re-parsed from the buffer: fresh block objects, no html.
+        yield {"type": "_done", "scene": SceneIR(title="T", domain="physics", intent="general",
+                                                  blocks=[SceneBlock(**b) for b in _BLOCKS])}
+
+    async def _fake_build(block, user_prompt, svc=None):
+        state["running"] += 1
+        state["peak"] = max(state["peak"], state["running"])
+        await asyncio.sleep(0.2 if block.props["spec"] == "slow" else 0.05)
+        state["running"] -= 1
+        return f"<html>{block.id}</html>"
+
+    monkeypatch.setattr(interactive_service, "_select_entities", _fake_select)
+    monkeypatch.setattr(interactive_service, "_stream_plan_scene", _fake_plan)
+    monkeypatch.setattr(interactive_service, "_build_widget_html", _fake_build)
+    log_token = request_log.set([])
+    svc_token = request_llm_service.set(object())
+    yield state
+    request_llm_service.reset(svc_token)
+    request_log.reset(log_token)
+
+
+async def _run(output_dir) -> list[dict]:
+    return [e async for e in interactive_service.run_interactive_pipeline(
+        original_message="q", session_id="", output_dir=str(output_dir),
+        conversation_context="", domain="physics")]
+
+
+async def test_placeholders_stream_before_codegen_finishes(pipeline, tmp_path):
+    events = await _run(tmp_path)
+    kinds = [(e["type"], e.get("block", {}).get("id")) for e in events
+             if e["type"] in ("block", "block_update")]
+
+    # Every block goes out as planned; widget HTML follows in completion order.
+    assert kinds == [("block", "b1"), ("block", "b2"), ("block", "b3"), ("block", "b4"),
+                     ("block_update", "b3"), ("block_update", "b2")]
+    placeholders = {e["block"]["id"]: e["block"] for e in events if e["type"] == "block"}
+    assert placeholders["b2"]["html"] is None
+    updates = {e["block"]["id"]: e["block"] for e in events if e["type"] == "block_update"}
+    assert updates["b2"]["html"] == "<html>b2</html>"
+    assert pipeline["peak"] == 2
+
+    stages_done = [e["stage"] for e in events if e["type"] == "stage_done"]
+    assert stages_done.index("building_b3") < stages_done.index("building_b2")
+    assert events[-1]["type"] == "done"
+
+
+async def test_saved_scene_keeps_order_and_carries_html(pipeline, tmp_path):
+    await _run(tmp_path)
+
+    saved = json.loads((tmp_path / "scene_ir.json").read_text())
+    assert [b["id"] for b in saved["blocks"]] == ["b1", "b2", "b3", "b4"]
+    assert [b["html"] for b in saved["blocks"]] == [None, "<html>b2</html>", "<html>b3</html>", None]
+
+
+async def test_concurrency_is_bounded(pipeline, tmp_path, monkeypatch):
+    monkeypatch.setattr(interactive_service, "CODEGEN_MAX_CONCURRENCY", 1)
+    await _run(tmp_path)
+    assert pipeline["peak"] == 1
@@ -0,0 +1,143 @@
+"""
+Tests for the local entity router (services/interactive/entity_router.py) and
+its use in _select_entities. Embedding + k-NN lookup are replaced by local
+coroutines — no network, no DB.
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from scripts.train_entity_router import scene_entities, score
+from services.frame_generation.planner import request_llm_service, request_log
+from services.interactive import entity_router, interactive_service
+from services.interactive.entity_router import Neighbour, vote
+
+
+def _n(entities, distance, brief="", model=""):
+    return Neighbour(entities=entities, distance=distance, visual_brief=brief, model=model)
+
+
+def test_vote_agrees_on_shared_entities():
+    route = vote([
+        _n(["bar_chart", "timeline"], 0.03, brief="Show growth", model="gpt-4.1"),
+        _n(["bar_chart", "timeline"], 0.05),
+        _n(["bar_chart", "timeline", "map_viewer"], 0.08),
+    ], max_distance=0.15, min_confidence=0.8, min_neighbours=3)
+
+    assert route.entities == ["bar_chart", "timeline"]
+    assert route.confidence > 0.8 and route.neighbours == 3
+    assert (route.visual_brief, route.model) == ("Show growth", "gpt-4.1")
+
+
+def test_vote_declines_when_neighbours_disagree_or_are_far():
+    split = [_n(["bar_chart"], 0.02), _n(["molecule_viewer"], 0.03), _n(["timeline"], 0.04)]
+    assert vote(split, 0.15, 0.8, 3) is None
+
+    far = [_n(["bar_chart"], 0.02), _n(["bar_chart"], 0.30), _n(["bar_chart"], 0.40)]
+    assert vote(far, 0.15, 0.8, 3) is None
+
+
+def test_training_labels_and_report():
+    meta = {"blocks": [{"type": "text", "content": "x"},
+                       {"type": "entity", "entity_type": "chart"},
+                       {"type": "entity", "entity_type": "timeline"},
+                       {"type": "entity", "entity_type": "chart"}]}
+    assert scene_entities(meta) == ["chart", "timeline"]
+
+    agree = [_n(["chart"], 0.01), _n(["chart"], 0.02), _n(["chart"], 0.03)]
+    report = score([(["chart"], agree), (["timeline"], agree), (["chart"], [])], 0.8)
+    assert report["coverage"] == pytest.approx(0.6667, abs=1e-3)
+    assert report["exact"] == 0.5 and report["precision"] == 0.5
+
+
+@pytest.fixture()
+def selector(monkeypatch):
+    state = {"route": None, "route_delay": 0.0, "llm_calls": 0, "remembered": [], "routed": []}
+
+    async def _embed(message):
+        state["routed"].append(message)
+        return [0.1, 0.2]
+
+    async def _route(embedding, domain):
+        await asyncio.sleep(state["route_delay"])
+        return state["route"]
+
+    async def _complete(system, user, **kwargs):
+        state["llm_calls"] += 1
+        return '{"entities": ["timeline"], "visual_brief": "b", "model": "gpt-4.1"}', {}
+
+    monkeypatch.setattr(entity_router, "embed", _embed)
+    monkeypatch.setattr(entity_router, "route", _route)
+    monkeypatch.setattr(entity_router, "remember_later",
+                        lambda *args, **kwargs: state["remembered"].append(args))
+    svc = SimpleNamespace(provider=SimpleNamespace(model="m"), make_system_user_request_async=_complete)
+    log_token = request_log.set([])
+    svc_token = request_llm_service.set(svc)
+    yield state
+    request_llm_service.reset(svc_token)
+    request_log.reset(log_token)
+
+
+async def test_confident_route_skips_the_selector(selector):
+    selector["route"] = entity_router.Route(entities=["bar_chart"], confidence=0.9, neighbours=4,
+                                            distance=0.02, visual_brief="brief")
+
+    result = await interactive_service._select_entities(
+        "enriched spec", "economics", "", original_message="gdp of france")
+
+    assert result.entities == ["bar_chart"] and result.visual_brief == "brief"
+    assert selector["routed"] == ["gdp of france"] and selector["llm_calls"] == 0
+    assert request_log.get()[0]["event"] == "entity_router_hit"
+
+
+async def test_miss_calls_selector_and_remembers_answer(selector):
+    result = await interactive_service._select_entities(
+        "enriched spec", "history", "", original_message="fall of rome")
+
+    assert result.entities == ["timeline"] and selector["llm_calls"] == 1
+    (message, embedding, *rest), = selector["remembered"]
+    assert (message, await embedding, *rest) == ("fall of rome", [0.1, 0.2], "history", ["timeline"], "b", "gpt-4.1")
+
+
+async def test_slow_route_still_remembers_selector_answer(selector, monkeypatch):
+    monkeypatch.setattr(interactive_service, "ENTITY_ROUTER_TIMEOUT_S", 0.01)
+    selector["route_delay"] = 0.05
+
+    result = await interactive_service._select_entities(
+        "enriched spec", "history", "", original_message="fall of rome")
+
+    assert result.entities == ["timeline"] and selector["llm_calls"] == 1
+    (message, embedding, *rest), = selector["remembered"]
+    assert (message, await embedding, *rest) == ("fall of rome", [0.1, 0.2], "history", ["timeline"], "b", "gpt-4.1")
+
+
+async def test_follow_ups_are_not_routed(selector):
+    await interactive_service._select_entities("spec", "history", "earlier turns", original_message="more")
+    assert selector["routed"] == [] and selector["llm_calls"] == 1 and selector["remembered"] == []
+
+
+async def test_remember_caps_rows_per_domain(monkeypatch):
+    from contextlib import asynccontextmanager
+
+    statements: list[tuple[str, tuple]] = []
+
+    class _Conn:
+        async def execute(self, sql, *args):
+            statements.append((sql.split()[0], args))
+
+    @asynccontextmanager
+    async def _db():
+        yield _Conn()
+
+    monkeypatch.setattr("core.db_async.get_async_db", _db)
+    monkeypatch.setattr(entity_router, "_stores", 0)
+    monkeypatch.setattr(entity_router, "_PRUNE_EVERY", 2)
+    monkeypatch.setattr(entity_router, "ENTITY_ROUTER_MAX_ROWS", 100)
+
+    for i in range(2):
+        await entity_router.remember(f"q{i}", [0.1], "physics", ["bar_chart"])
+
+    assert [verb for verb, _ in statements] == ["INSERT", "INSERT", "DELETE"]
+    assert statements[-1][1] == ("physics", 100)
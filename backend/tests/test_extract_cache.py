@@ -0,0 +1,66 @@
+"""
+Tests for the Tavily extract content cache (services/research/extract_cache.py)
+and its use in TavilyProvider.extract. The Postgres table is replaced by a dict
+and TavilyClient by a local fake — no network, no DB.
+"""
+
+import pytest
+
+from services.research import extract_cache
+from services.research.search_provider import TavilyProvider
+
+
+def test_canonical_url_collapses_equivalent_urls():
+    canonical = extract_cache.canonical_url
+    base = canonical("https://en.wikipedia.org/wiki/Ohm%27s_law")
+    assert canonical("HTTPS://en.Wikipedia.org:443/wiki/Ohm%27s_law/#History") == base
+    assert canonical("https://en.wikipedia.org/wiki/Ohm%27s_law?utm_source=x&gclid=1") == base
+    assert canonical("https://www.example.com/a?b=2&a=1") == canonical("https://example.com/a?a=1&b=2")
+    assert canonical("https://example.com/a?page=2") != canonical("https://example.com/a?page=3")
+    assert canonical("http://example.com:8080/") != canonical("http://example.com/")
+
+
+def test_domain_ttl_uses_longest_suffix(monkeypatch):
+    monkeypatch.setattr(extract_cache, "EXTRACT_CACHE_DOMAIN_TTL_S",
+                        {"example.org": 100, "docs.example.org": 500, "news.com": 10})
+    monkeypatch.setattr(extract_cache, "EXTRACT_CACHE_TTL_DEFAULT_S", 60)
+
+    assert extract_cache.ttl_for_domain("docs.example.org") == 500
+    assert extract_cache.ttl_for_domain("api.docs.example.org") == 500
+    assert extract_cache.ttl_for_domain("www.example.org") == 100
+    assert extract_cache.ttl_for_domain("fakenews.com") == 60      # suffix, not substring
+    assert extract_cache.ttl_for_domain("unknown.net") == 60
+
+
+class _FakeClient:
+    def __init__(self):
+        self.calls = 0
+
+    def extract(self, urls, **kwargs):
+        self.calls += 1
+        return {"results": [{"url": urls[0], "raw_content": "Ohm's law states V = IR."}]}
+
+
+@pytest.fixture()
+def provider(monkeypatch):
+    table: dict[str, str] = {}
+
+    async def _lookup(url):
+        return table.get(extract_cache.url_key(url))
+
+    async def _store(url, content):
+        table[extract_cache.url_key(url)] = content
+
+    monkeypatch.setattr(extract_cache, "lookup", _lookup)
+    monkeypatch.setattr(extract_cache, "store", _store)
+    p = TavilyProvider()
+    p._client = _FakeClient()
+    return p
+
+
+async def test_repeat_extract_is_served_from_cache(provider):
+    first = await provider.extract("https://www.example.com/ohm?utm_campaign=a")
+    second = await provider.extract("https://example.com/ohm/")
+
+    assert first == second == "Ohm's law states V = IR."
+    assert provider._client.calls == 1
@@ -0,0 +1,186 @@
+"""
+Tests for HedgedProvider (services/llm_service.py) and hedge-aware session cost.
+"""
+
+import asyncio
+
+import pytest
+
+from core.cost import compute_session_cost
+from services import llm_cache, llm_scheduler, llm_service
+from services.llm_scheduler import Priority
+from services.llm_service import HedgedProvider, LLMProvider, LLMService
+from services.request_context import request_log
+
+
+class _Provider(LLMProvider):
+    def __init__(self, model: str, delay: float, result="ok"):
+        self.model = model
+        self.delay = delay
+        self.result = result
+        self.calls = 0
+        self.cancelled = False
+
+    def complete(self, messages, **kwargs):
+        raise AssertionError("sync path must not be used")
+
+    async def complete_async(self, messages, **kwargs):
+        self.calls += 1
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        if self.result is None:
+            return None, {}
+        return f"{self.result}:{self.model}", {
+            "prompt_tokens": 1000, "completion_tokens": 100, "total_tokens": 1100,
+        }
+
+
+class _StreamingProvider(_Provider):
+    """Waits `delay` before its first chunk, then streams three."""
+
+    async def stream_async(self, messages, usage_sink, **kwargs):
+        self.calls += 1
+        try:
+            await asyncio.sleep(self.delay)
+            for part in ("a", "b", "c"):
+                yield f"{part}:{self.model} "
+                await asyncio.sleep(0)
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        usage_sink.update({"prompt_tokens": 1000, "completion_tokens": 3, "total_tokens": 1003})
+
+
+@pytest.fixture(autouse=True)
+def isolated(monkeypatch):
+    monkeypatch.setattr(llm_cache, "LLM_CACHE_BACKEND", "off")
+    monkeypatch.setattr(llm_service, "_latencies", {})
+    monkeypatch.setattr("core.config.HEDGE_DEFAULT_DELAY_S", 0.05)
+    monkeypatch.setattr("core.config.HEDGE_MIN_DELAY_S", 0.01)
+    log: list = []
+    token = request_log.set(log)
+    yield log
+    request_log.reset(token)
+
+
+async def test_fast_primary_never_hedges(isolated):
+    primary = _Provider("claude-haiku-4-5-20251001", 0.0)
+    secondary = _Provider("gpt-4.1-mini", 0.0)
+    svc = LLMService(provider=HedgedProvider(primary, secondary))
+
+    result, usage = await svc.make_single_prompt_request_async("q")
+
+    assert result == "ok:claude-haiku-4-5-20251001"
+    assert "hedge" not in usage
+    assert secondary.calls == 0
+    assert not [e for e in isolated if e["event"] == "llm_hedge"]
+
+
+async def test_slow_primary_is_hedged_and_cancelled(isolated):
+    primary = _Provider("claude-haiku-4-5-20251001", 1.0)
+    secondary = _Provider("gpt-4.1-mini", 0.0)
+    svc = LLMService(provider=HedgedProvider(primary, secondary))
+
+    result, usage = await svc.make_single_prompt_request_async("q" * 400)
+    await asyncio.sleep(0)
+
+    assert result == "ok:gpt-4.1-mini"
+    assert usage["hedge"]["won"] is True
+    assert usage["hedge"]["winner_model"] == "gpt-4.1-mini"
+    assert primary.cancelled
+    hedges = [e for e in isolated if e["event"] == "llm_hedge"]
+    assert len(hedges) == 1
+    assert hedges[0]["extra_model"] == "claude-haiku-4-5-20251001"
+    # The cancelled loser is billed its prompt only (~4 chars/token), no output budget.
+    assert hedges[0]["extra_usage"] == {"prompt_tokens": 100, "estimated": True}
+
+
+async def test_failed_primary_falls_back_to_secondary(isolated):
+    primary = _Provider("claude-haiku-4-5-20251001", 0.0, result=None)
+    secondary = _Provider("gpt-4.1-mini", 0.0)
+    svc = LLMService(provider=HedgedProvider(primary, secondary))
+
+    result, usage = await svc.make_single_prompt_request_async("q")
+
+    assert result == "ok:gpt-4.1-mini"
+    assert usage["hedge"]["reason"] == "primary_failed"
+
+
+async def test_secondary_is_admitted_at_callers_priority(isolated, monkeypatch):
+    admitted = []
+    real_admit = llm_scheduler.admit
+
+    async def _admit(model, provider, priority=Priority.DEFAULT, est_tokens=0):
+        admitted.append((model, priority))
+        return await real_admit(model, provider, priority, est_tokens)
+
+    monkeypatch.setattr(llm_scheduler, "admit", _admit)
+    primary = _Provider("claude-haiku-4-5-20251001", 1.0)
+    secondary = _Provider("gpt-4.1-mini", 0.0)
+    svc = LLMService(provider=HedgedProvider(primary, secondary))
+
+    await svc.make_single_prompt_request_async("q", priority=Priority.BULK)
+
+    assert ("gpt-4.1-mini", Priority.BULK) in admitted
+
+
+async def test_streamed_hedge_relays_the_first_stream(isolated):
+    primary = _StreamingProvider("claude-haiku-4-5-20251001", 1.0)
+    secondary = _StreamingProvider("gpt-4.1-mini", 0.0)
+    svc = LLMService(provider=HedgedProvider(primary, secondary))
+    usage: dict = {}
+
+    chunks = [c async for c in svc.stream_single_prompt_async("q" * 400, usage)]
+
+    # Still streamed chunk by chunk, not collapsed into one complete_async() reply.
+    assert chunks == ["a:gpt-4.1-mini ", "b:gpt-4.1-mini ", "c:gpt-4.1-mini "]
+    assert primary.cancelled
+    assert usage["completion_tokens"] == 3
+    assert usage["hedge"]["won"] is True
+    hedges = [e for e in isolated if e["event"] == "llm_hedge"]
+    assert hedges[0]["extra_usage"] == {"prompt_tokens": 100, "estimated": True}
+
+
+async def test_fast_stream_never_hedges(isolated):
+    primary = _StreamingProvider("claude-haiku-4-5-20251001", 0.0)
+    secondary = _StreamingProvider("gpt-4.1-mini", 0.0)
+    svc = LLMService(provider=HedgedProvider(primary, secondary))
+    usage: dict = {}
+
+    chunks = [c async for c in svc.stream_single_prompt_async("q", usage)]
+
+    assert len(chunks) == 3
+    assert "hedge" not in usage
+    assert secondary.calls == 0
+
+
+def test_hedge_delay_tracks_p90(monkeypatch):
+    monkeypatch.setattr("core.config.HEDGE_MIN_SAMPLES", 10)
+    for i in range(1, 11):
+        llm_service.record_latency("m", i / 10)
+    assert llm_service.hedge_delay("m") == pytest.approx(1.0)
+
+
+def test_session_cost_prices_hedge_winner_and_loser():
+    log = [
+        {"event": "llm_call", "model": "claude-haiku-4-5-20251001",
+         "usage": {"prompt_tokens": 1_000_000, "completion_tokens": 0,
+                   "hedge": {"winner_model": "gpt-4.1-mini"}}},
+        {"event": "llm_hedge", "extra_model": "claude-haiku-4-5-20251001",
+         "extra_usage": {"prompt_tokens": 1_000_000}},
+    ]
+    # 0.40 for the gpt-4.1-mini winner + 0.80 for the cancelled Haiku primary.
+    assert compute_session_cost(log) == pytest.approx(1.20)
+
+
+def test_task_service_builds_hedged_provider(monkeypatch):
+    monkeypatch.setattr("core.config.TASK_MODELS",
+                        {"plan_and_classify": "claude-haiku-4-5-20251001|gpt-4.1-mini"})
+    monkeypatch.setattr(llm_service, "_service_cache", {})
+    svc = llm_service.get_task_service("plan_and_classify")
+    assert isinstance(svc.provider, HedgedProvider)
+    assert svc.provider.model == "claude-haiku-4-5-20251001"
+    assert svc.provider.secondary.model == "gpt-4.1-mini"
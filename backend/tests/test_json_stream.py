@@ -0,0 +1,130 @@
+"""
+Unit tests for services/json_stream.py — the resumable scanner over streamed
+LLM JSON — and its two consumers: the plan_and_classify field events and
+_PlanStreamParser's scene-planner meta and block events.
+"""
+
+import json
+
+import pytest
+
+from services.interactive.interactive_service import _PlanStreamParser
+from services.json_stream import JsonFieldStream
+
+_REPLY = {
+    "domain": "physics",
+    "needs_search": True,
+    "search_queries": ["fusion net energy gain 2026", "ITER \"first plasma\" timeline"],
+    "enriched_prompt": "Summarise the state of fusion energy.",
+    "suggested_followups": ["a", "b", "c"],
+}
+
+
+def _fields(text: str, step: int = 1) -> list[tuple]:
+    fields = JsonFieldStream()
+    out = []
+    for i in range(0, len(text), step):
+        out.extend(fields.feed(text[i:i + step]))
+    return out
+
+
+def test_fields_and_array_items_stream_in_order():
+    events = _fields(json.dumps(_REPLY, indent=2))
+    assert events[:4] == [
+        ("domain", None, "physics"),
+        ("needs_search", None, True),
+        ("search_queries", 0, "fusion net energy gain 2026"),
+        ("search_queries", 1, 'ITER "first plasma" timeline'),
+    ]
+    assert ("enriched_prompt", None, _REPLY["enriched_prompt"]) in events
+    assert events[-1] == ("suggested_followups", None, ["a", "b", "c"])
+
+
+def test_preamble_is_skipped_and_nested_values_parse():
+    text = 'Sure:\n```json\n{"n": 3, "items": [{"k": "}"}, 2], "flag": false}\n```'
+    events = _fields(text, step=4)
+    assert events == [
+        ("n", None, 3),
+        ("items", 0, {"k": "}"}),
+        ("items", 1, 2),
+        ("items", None, [{"k": "}"}, 2]),
+        ("flag", None, False),
+    ]
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, 64, 10_000])
+def test_fields_are_the_same_for_any_chunking(size):
+    reply = {**_REPLY, "empty": [], "obj": {"a": {"b": "]}\\"}}, "n": -1.5e3, "none": None}
+    text = json.dumps(reply, indent=2) + " trailing {junk"
+    assert _fields(text, size) == _fields(text, len(text))
+    assert {k: v for k, i, v in _fields(text, size) if i is None} == reply
+
+
+def test_key_names_inside_strings_are_not_keys():
+    events = _fields('{"title": "\\"domain\\": [", "domain": "math"}', step=3)
+    assert events == [("title", None, '"domain": ['), ("domain", None, "math")]
+
+
+def test_unparseable_element_drops_the_whole_array():
+    events = _fields('{"q": ["a", tru, "c"], "d": 1}', step=2)
+    assert ("q", 0, "a") in events and ("q", 2, "c") in events
+    assert not [e for e in events if e[0] == "q" and e[1] is None]
+    assert events[-1] == ("d", None, 1)
+
+
+# ── _PlanStreamParser ─────────────────────────────────────────────────────────
+
+_PLAN = {
+    "title": 'The "blocks": [ of a circuit',
+    "intent": "explain",
+    "follow_ups": ["Why {braces}?", "And \\ backslashes?"],
+    "blocks": [
+        {"id": "b1", "type": "text", "content": 'Quote \\" brace } bracket ] done'},
+        {"id": "b2", "type": "entity", "entity_type": "bar_chart",
+         "props": {"series": [{"x": 1, "y": [2, 3]}], "note": "nested {\"a\": 1}"}},
+        {"id": "b3", "type": "text", "content": "Unicode é and →"},
+    ],
+}
+
+
+def _feed(text: str, size: int) -> list[dict]:
+    parser = _PlanStreamParser()
+    events: list[dict] = []
+    for i in range(0, len(text), size):
+        events.extend(parser.feed(text[i:i + size]))
+    return events
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, 64, 10_000])
+def test_same_events_for_any_chunking(size):
+    text = "```json\n" + json.dumps(_PLAN, indent=2) + "\n```\ntrailing {junk"
+    events = _feed(text, size)
+
+    assert [e["type"] for e in events] == ["_meta", "_block", "_block", "_block"]
+    assert events[0]["title"] == _PLAN["title"]
+    assert events[0]["follow_ups"] == _PLAN["follow_ups"]
+    assert [e["block"].id for e in events[1:]] == ["b1", "b2", "b3"]
+    assert events[1]["block"].content == _PLAN["blocks"][0]["content"]
+    assert events[2]["block"].props == _PLAN["blocks"][1]["props"]
+
+
+def test_blocks_stream_as_each_one_closes():
+    text = json.dumps(_PLAN)
+    cut = text.index('"id": "b2"')
+    parser = _PlanStreamParser()
+
+    first = parser.feed(text[:cut])
+    rest = parser.feed(text[cut:])
+
+    assert [e["type"] for e in first] == ["_meta", "_block"]
+    assert [e["block"].id for e in rest] == ["b2", "b3"]
+
+
+def test_invalid_block_is_skipped():
+    text = '{"title": "t", "blocks": [{"id": "x", "type": "text"}, {"id": "ok", "type": "text", "content": "c"}]}'
+    events = _feed(text, 5)
+    assert [e["block"].id for e in events if e["type"] == "_block"] == ["ok"]
+
+
+def test_no_blocks_key_emits_nothing():
+    assert _feed('{"title": "t", "sections": [{"id": "a"}]}', 4) == []
@@ -0,0 +1,115 @@
+"""
+Tests for services/llm_cache.py and its wiring into LLMService.
+
+Uses the disk backend rooted in a tmp dir — no DB or network needed.
+"""
+
+import pytest
+
+from services import llm_cache
+from services.llm_service import LLMService, LLMProvider
+
+
+class _CountingProvider(LLMProvider):
+    def __init__(self):
+        self.model = "claude-haiku-4-5-20251001"
+        self.calls = 0
+
+    def complete(self, messages, **kwargs):
+        raise AssertionError("sync path must not be used")
+
+    async def complete_async(self, messages, **kwargs):
+        self.calls += 1
+        return '{"ok": true}', {"prompt_tokens": 100, "completion_tokens": 20, "total_tokens": 120}
+
+
+@pytest.fixture(autouse=True)
+def disk_backend(tmp_path, monkeypatch):
+    backend = llm_cache._DiskBackend(tmp_path, max_entries=3)
+    monkeypatch.setattr(llm_cache, "_backend", backend)
+    monkeypatch.setattr(llm_cache, "LLM_CACHE_BACKEND", "disk")
+    monkeypatch.setattr(llm_cache, "LLM_CACHE_TTL_SECS", {"plan_and_classify": 60})
+    return backend
+
+
+def test_key_ignores_surrounding_whitespace_and_line_endings():
+    a = llm_cache.cache_key("m", [{"role": "user", "content": "hi\r\nthere  "}], 100)
+    b = llm_cache.cache_key("m", [{"role": "user", "content": "hi\nthere"}], 100)
+    assert a == b
+
+
+def test_key_varies_with_model_tokens_and_json_mode():
+    msgs = [{"role": "user", "content": "q"}]
+    base = llm_cache.cache_key("m", msgs, 100)
+    assert base != llm_cache.cache_key("other", msgs, 100)
+    assert base != llm_cache.cache_key("m", msgs, 200)
+    assert base != llm_cache.cache_key("m", msgs, 100, json_mode=True)
+    assert base != llm_cache.cache_key("m", msgs, 100, tool_schema={"name": "t"})
+    assert base != llm_cache.cache_key("m", msgs, 100, options={"temperature": 0.2})
+    assert base == llm_cache.cache_key("m", msgs, 100, options={})
+
+
+async def test_second_identical_call_is_served_from_cache():
+    provider = _CountingProvider()
+    svc = LLMService(provider=provider)
+
+    r1, u1 = await svc.make_single_prompt_request_async(
+        "classify this", max_tokens=50, json_mode=True, cache_task="plan_and_classify")
+    r2, u2 = await svc.make_single_prompt_request_async(
+        "classify this", max_tokens=50, json_mode=True, cache_task="plan_and_classify")
+
+    assert r1 == r2
+    assert provider.calls == 1
+    assert not u1.get("cache_hit")
+    assert u2["cache_hit"] is True
+    assert u2["total_tokens"] == 0
+
+
+async def test_different_temperature_is_not_served_from_cache():
+    provider = _CountingProvider()
+    svc = LLMService(provider=provider)
+
+    for temperature in (0.0, 0.9):
+        _, usage = await svc.make_single_prompt_request_async(
+            "classify this", cache_task="plan_and_classify", temperature=temperature)
+        assert not usage.get("cache_hit")
+    assert provider.calls == 2
+
+
+async def test_uncached_task_always_hits_provider():
+    provider = _CountingProvider()
+    svc = LLMService(provider=provider)
+    for _ in range(2):
+        await svc.make_system_user_request_async("sys", "user", cache_task="scene_planner")
+    await svc.make_system_user_request_async("sys", "user")
+    assert provider.calls == 3
+
+
+async def test_expired_entry_is_a_miss(disk_backend):
+    key = llm_cache.cache_key("m", [{"role": "user", "content": "q"}])
+    await llm_cache.store("plan_and_classify", key, "m", "old", {})
+    entry = disk_backend._get_sync(key)
+    entry["expires_at"] = 0
+    disk_backend._set_sync(key, entry)
+    assert await llm_cache.lookup("plan_and_classify", key) is None
+
+
+def test_lru_eviction_keeps_most_recent(disk_backend, tmp_path):
+    import os
+    keys = [f"{i:064x}" for i in range(5)]
+    for i, k in enumerate(keys):
+        disk_backend._set_sync(k, {"response": k, "expires_at": 1e12})
+        os.utime(disk_backend._path(k), (1000 + i, 1000 + i))
+    assert disk_backend._evict_sync() == 2
+    remaining = {p.stem for p in tmp_path.glob("*/*.json")}
+    assert remaining == set(keys[2:])
+
+
+def test_session_cost_ignores_cache_hits():
+    from core.cost import compute_session_cost
+    usage = {"prompt_tokens": 1_000_000, "completion_tokens": 0}
+    log = [
+        {"event": "llm_call", "model": "gpt-4.1-mini", "usage": usage},
+        {"event": "llm_call", "model": "gpt-4.1-mini", "usage": usage, "cache_hit": True},
+    ]
+    assert compute_session_cost(log) == pytest.approx(0.40)
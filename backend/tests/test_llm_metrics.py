@@ -0,0 +1,80 @@
+"""
+Tests for the Prometheus LLM telemetry (services/llm_metrics.py) as recorded
+by LLMService's async paths. Uses a local provider — no network.
+"""
+
+import pytest
+
+pytest.importorskip("prometheus_client")
+from prometheus_client import REGISTRY
+
+from services import llm_cache, llm_metrics
+from services.llm_service import LLMProvider, LLMService
+
+_USAGE = {"prompt_tokens": 100, "completion_tokens": 40, "total_tokens": 140,
+          "cache_read_input_tokens": 900, "cache_creation_input_tokens": 0}
+
+
+def _sample(name: str, **labels) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+class _Provider(LLMProvider):
+    name = "anthropic"
+
+    def __init__(self, model: str, fail: bool = False):
+        self.model = model
+        self.fail = fail
+
+    def complete(self, messages, **kwargs):
+        raise AssertionError("sync path must not be used")
+
+    async def complete_async(self, messages, **kwargs):
+        if self.fail:
+            llm_metrics.record_retry(self.model, self.name, "overloaded")
+            return None, {}
+        return "ok", dict(_USAGE)
+
+    async def stream_async(self, messages, usage_sink, **kwargs):
+        for chunk in ("o", "k"):
+            yield chunk
+        usage_sink.update(_USAGE)
+
+
+@pytest.fixture(autouse=True)
+def _no_response_cache(monkeypatch):
+    monkeypatch.setattr(llm_cache, "LLM_CACHE_BACKEND", "off")
+
+
+async def test_completed_call_records_latency_throughput_and_cache_tokens():
+    labels = {"task": "metrics_test", "model": "m-ok", "provider": "anthropic"}
+    svc = LLMService(provider=_Provider("m-ok"))
+
+    await svc.make_single_prompt_request_async("hi", task="metrics_test")
+
+    assert _sample("llm_request_duration_seconds_count", **labels, outcome="ok") == 1
+    assert _sample("llm_output_tokens_per_second_count", **labels) == 1
+    assert _sample("llm_cache_tokens_sum", **labels, kind="read") == 900
+    assert _sample("llm_queue_wait_seconds_count", **labels) == 1
+
+
+async def test_failed_call_and_retries_are_labelled_by_task():
+    labels = {"task": "metrics_fail", "model": "m-fail", "provider": "anthropic"}
+    svc = LLMService(provider=_Provider("m-fail", fail=True))
+
+    await svc.make_single_prompt_request_async("hi", task="metrics_fail")
+
+    assert _sample("llm_request_duration_seconds_count", **labels, outcome="error") == 1
+    assert _sample("llm_retries_total", **labels, reason="overloaded") == 1
+
+
+async def test_stream_records_time_to_first_token():
+    labels = {"task": "metrics_stream", "model": "m-stream", "provider": "anthropic"}
+    svc = LLMService(provider=_Provider("m-stream"))
+    usage: dict = {}
+
+    chunks = [c async for c in svc.stream_single_prompt_async("hi", usage, task="metrics_stream")]
+
+    assert "".join(chunks) == "ok"
+    assert _sample("llm_time_to_first_token_seconds_count", **labels) == 1
+    assert _sample("llm_request_duration_seconds_count", **labels, outcome="ok") == 1
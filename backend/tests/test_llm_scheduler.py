@@ -0,0 +1,91 @@
+"""
+Tests for services/llm_scheduler.py — token buckets, priority ordering,
+settlement and 429 pauses. Pure asyncio, no network.
+"""
+
+import asyncio
+
+import pytest
+
+from services import llm_scheduler
+from services.llm_scheduler import Priority
+
+
+@pytest.fixture(autouse=True)
+def fresh_lanes(monkeypatch):
+    monkeypatch.setattr(llm_scheduler, "_lanes", {})
+    monkeypatch.setattr(llm_scheduler, "LLM_SCHEDULER_ENABLED", True)
+    monkeypatch.setattr(llm_scheduler, "LLM_SCHEDULER_AGING_S", 0)
+
+
+def _limit(monkeypatch, rpm: int, tpm: int):
+    monkeypatch.setattr(llm_scheduler, "LLM_MODEL_RATE_LIMITS", {"m": {"rpm": rpm, "tpm": tpm}})
+
+
+def test_estimate_counts_prompt_chars_and_output_budget():
+    msgs = [{"role": "system", "content": "x" * 400}, {"role": "user", "content": "y" * 400}]
+    assert llm_scheduler.estimate_tokens(msgs, max_tokens=100) == 300
+
+
+def test_billable_tokens_exclude_cache_reads():
+    usage = {"total_tokens": 1000, "cache_read_input_tokens": 600}
+    assert llm_scheduler.billable_tokens(usage) == 400
+
+
+async def test_admits_immediately_under_limits(monkeypatch):
+    _limit(monkeypatch, rpm=600, tpm=100_000)
+    ticket = await asyncio.wait_for(llm_scheduler.admit("m", "anthropic", est_tokens=1000), 0.1)
+    assert ticket.waited_s == 0
+
+
+async def test_saturated_lane_releases_by_priority(monkeypatch):
+    # 600 rpm → one request slot refills every 0.1 s.
+    _limit(monkeypatch, rpm=600, tpm=1_000_000)
+    lane = llm_scheduler._lane("m", "anthropic")
+    lane.requests.level = 0
+
+    order: list[str] = []
+
+    async def call(name: str, prio: Priority):
+        await llm_scheduler.admit("m", "anthropic", prio, est_tokens=10)
+        order.append(name)
+
+    tasks = [asyncio.create_task(call("bulk", Priority.BULK))]
+    await asyncio.sleep(0)
+    tasks.append(asyncio.create_task(call("video", Priority.VIDEO)))
+    await asyncio.sleep(0)
+    tasks.append(asyncio.create_task(call("interactive", Priority.INTERACTIVE)))
+    await asyncio.wait_for(asyncio.gather(*tasks), 2)
+
+    assert order == ["interactive", "video", "bulk"]
+
+
+async def test_settle_refunds_overestimate(monkeypatch):
+    _limit(monkeypatch, rpm=600, tpm=10_000)
+    ticket = await llm_scheduler.admit("m", "openai", est_tokens=8000)
+    lane = llm_scheduler._lanes["m"]
+    assert lane.tokens.level == pytest.approx(2000, abs=5)
+    ticket.settle({"total_tokens": 1000})
+    assert lane.tokens.level == pytest.approx(9000, abs=5)
+
+
+async def test_pause_blocks_new_admissions(monkeypatch):
+    _limit(monkeypatch, rpm=600, tpm=100_000)
+    await llm_scheduler.admit("m", "anthropic", est_tokens=10)
+    llm_scheduler.pause("m", 0.15)
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    await llm_scheduler.admit("m", "anthropic", est_tokens=10)
+    assert loop.time() - start >= 0.12
+
+
+async def test_cancelled_waiter_leaves_queue(monkeypatch):
+    _limit(monkeypatch, rpm=60, tpm=100_000)
+    lane = llm_scheduler._lane("m", "anthropic")
+    lane.requests.level = 0
+    task = asyncio.create_task(llm_scheduler.admit("m", "anthropic", est_tokens=10))
+    await asyncio.sleep(0.01)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    assert lane.waiters == []
@@ -0,0 +1,79 @@
+"""
+Guard: render/interactive pipeline modules must only use the async LLM path.
+
+A blocking call_llm() / provider.complete() wrapped in asyncio.to_thread holds
+one of the default executor's threads for the whole LLM round-trip, starving
+S3 uploads, TTS and ffmpeg under concurrent video generation. This test parses
+every pipeline module (no imports, so optional deps like manim/cairosvg are not
+needed) and fails if any of them reaches for the sync client.
+"""
+
+import ast
+from pathlib import Path
+
+import pytest
+
+_BACKEND = Path(__file__).resolve().parent.parent
+
+_PIPELINE_ROOTS = [
+    _BACKEND / "services" / "Frame_generation",
+    _BACKEND / "services" / "frame_generation",
+    _BACKEND / "services" / "interactive",
+    _BACKEND / "services" / "generation_service.py",
+]
+
+# Names that only exist on the synchronous side of services/llm_service.py.
+_SYNC_IMPORTS = {
+    "call_llm",
+    "_get_openai_client", "_get_anthropic_client", "_get_gemini_client",
+    "OpenAI", "Anthropic",
+}
+_SYNC_METHODS = {
+    "complete",
+    "make_completion_request",
+    "make_single_prompt_request",
+    "make_system_user_request",
+}
+# planner.py defines call_llm itself (kept for scripts); it must not call it.
+_DEFINES_SYNC = {"planner.py"}
+
+
+def _pipeline_files() -> list[Path]:
+    seen: dict[Path, Path] = {}
+    for root in _PIPELINE_ROOTS:
+        files = [root] if root.is_file() else sorted(root.rglob("*.py"))
+        for f in files:
+            seen.setdefault(f.resolve(), f)
+    return sorted(seen.values())
+
+
+def _violations(path: Path) -> list[str]:
+    tree = ast.parse(path.read_text(encoding="utf-8"), filename=str(path))
+    found = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.ImportFrom):
+            for alias in node.names:
+                if alias.name in _SYNC_IMPORTS:
+                    found.append(f"line {node.lineno}: imports {alias.name}")
+        elif isinstance(node, ast.Call):
+            func = node.func
+            if isinstance(func, ast.Attribute) and func.attr in _SYNC_METHODS:
+                found.append(f"line {node.lineno}: calls .{func.attr}()")
+            elif (isinstance(func, ast.Name) and func.id == "call_llm"
+                  and path.name not in _DEFINES_SYNC):
+                found.append(f"line {node.lineno}: calls call_llm()")
+    if path.name in _DEFINES_SYNC:
+        # The sync helper may call the sync service method; nothing else may.
+        found = [v for v in found if "make_single_prompt_request" not in v]
+    return found
+
+
+def test_pipeline_files_are_discovered():
+    names = {p.name for p in _pipeline_files()}
+    assert {"svg_generator.py", "beat_generator.py", "beat_planner.py",
+            "manim_generator_legacy.py", "interactive_service.py"} <= names
+
+
+@pytest.mark.parametrize("path", _pipeline_files(), ids=lambda p: str(p.relative_to(_BACKEND)))
+def test_pipeline_module_uses_async_llm_only(path):
+    assert _violations(path) == []
@@ -0,0 +1,113 @@
+"""
+Tests for cache-aligned prompt assembly: Claude system-block breakpoints,
+OpenAI cached-token accounting, the scene planner's static leading block and
+the per-task cached-token ratios.
+"""
+
+from types import SimpleNamespace
+
+import httpx
+import openai
+import pytest
+
+from core.cost import cost_for_usage
+from services.frame_generation.planner import _accumulate_tokens, cache_ratios, token_usage
+from services.interactive.interactive_service import _planner_system_blocks
+from services.llm_service import _chat_usage, _claude_system, _create_chat_stream
+
+
+def test_claude_system_marks_a_breakpoint_per_block():
+    blocks = ["static " * 10, "domain", "schemas"]
+    system = _claude_system("".join(blocks), blocks)
+    assert [b["text"] for b in system] == blocks
+    assert all(b["cache_control"] == {"type": "ephemeral"} for b in system)
+
+
+def test_claude_system_falls_back_to_plain_string():
+    assert _claude_system("abc", ["ab", "x"]) == "abc"      # blocks do not rebuild the prompt
+    assert _claude_system("abc", None) == "abc"
+
+
+def test_claude_system_merges_leading_blocks_past_the_limit():
+    blocks = list("abcdef")
+    system = _claude_system("abcdef", blocks)
+    assert [b["text"] for b in system] == ["abc", "d", "e", "f"]
+
+
+def test_chat_usage_splits_out_cached_tokens():
+    usage = SimpleNamespace(prompt_tokens=1000, completion_tokens=50, total_tokens=1050,
+                            prompt_tokens_details=SimpleNamespace(cached_tokens=768))
+    assert _chat_usage(usage) == {
+        "prompt_tokens": 232, "completion_tokens": 50, "total_tokens": 1050,
+        "cache_read_input_tokens": 768,
+    }
+    no_details = SimpleNamespace(prompt_tokens=10, completion_tokens=1, total_tokens=11)
+    assert _chat_usage(no_details)["cache_read_input_tokens"] == 0
+    # Cached OpenAI input is billed at the model's cache_read rate.
+    assert cost_for_usage("gpt-4.1", _chat_usage(usage)) < cost_for_usage("gpt-4.1", {"prompt_tokens": 1000, "completion_tokens": 50})
+
+
+def _api_error(cls, status: int, message: str):
+    response = httpx.Response(status, request=httpx.Request("POST", "https://api.example/v1/chat"))
+    return cls(message, response=response, body=None)
+
+
+class _Completions:
+    def __init__(self, *errors):
+        self.errors, self.calls = list(errors), []
+
+    async def create(self, **kwargs):
+        self.calls.append(kwargs)
+        if self.errors:
+            raise self.errors.pop(0)
+        return "stream"
+
+
+def _client(completions):
+    return SimpleNamespace(chat=SimpleNamespace(completions=completions))
+
+
+async def test_chat_stream_retries_without_rejected_stream_options():
+    completions = _Completions(_api_error(openai.BadRequestError, 400, "Unrecognized request argument: stream_options"))
+    kwargs = {"model": "m", "stream": True, "stream_options": {"include_usage": True}}
+    assert await _create_chat_stream(_client(completions), kwargs) == "stream"
+    assert [("stream_options" in c) for c in completions.calls] == [True, False]
+
+
+async def test_chat_stream_does_not_retry_other_errors():
+    for error in (_api_error(openai.RateLimitError, 429, "stream_options quota"),
+                  _api_error(openai.BadRequestError, 400, "context length exceeded")):
+        completions = _Completions(error)
+        with pytest.raises(type(error)):
+            await _create_chat_stream(_client(completions), {"model": "m", "stream_options": {}})
+        assert len(completions.calls) == 1
+
+
+def test_planner_static_block_is_shared_across_domains_and_entity_sets():
+    a = _planner_system_blocks("physics", ["flashcard_deck", "chart"])
+    b = _planner_system_blocks("economics", ["chart"])
+    c = _planner_system_blocks("physics", ["chart", "flashcard_deck"])
+
+    assert a[0] is b[0]
+    assert a == c
+    assert "## Component Catalog" in a[0] and "## chart" not in a[0]
+    assert a[-1].lstrip("\n-").startswith("## chart")
+
+
+def test_cache_ratios_per_task():
+    acc = {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0,
+           "cache_creation_input_tokens": 0, "cache_read_input_tokens": 0}
+    token = token_usage.set(acc)
+    try:
+        _accumulate_tokens({"prompt_tokens": 200, "cache_creation_input_tokens": 800}, "scene_planner")
+        _accumulate_tokens({"prompt_tokens": 200, "cache_read_input_tokens": 800}, "scene_planner")
+        _accumulate_tokens({"prompt_tokens": 0, "cache_hit": True}, "scene_planner")
+        _accumulate_tokens({"prompt_tokens": 100}, "synthesiser")
+    finally:
+        token_usage.reset(token)
+
+    ratios = cache_ratios(acc)
+    assert ratios["scene_planner"] == {"calls": 2, "input_tokens": 2000,
+                                       "cached_tokens": 800, "cached_ratio": 0.4}
+    assert ratios["synthesiser"]["cached_ratio"] == 0.0
+    assert acc["prompt_tokens"] == 500
@@ -0,0 +1,70 @@
+"""
+Tests for services/prompt_registry.py and the memoized planner catalog.
+"""
+
+import os
+
+import pytest
+
+from services import prompt_registry
+from services.interactive import interactive_service
+
+
+@pytest.fixture()
+def prompts(tmp_path, monkeypatch):
+    for name in ("_texts", "_mtimes", "_derived"):
+        monkeypatch.setattr(prompt_registry, name, {})
+    monkeypatch.setattr(prompt_registry, "_missing", set())
+    monkeypatch.setattr(prompt_registry, "PROMPT_HOT_RELOAD", False)
+    root = tmp_path / "svc" / "prompts"
+    root.mkdir(parents=True)
+    (root / "plan.md").write_text("Intent {{INTENT_TYPE}}.\nRules.\n{{CONVERSATION_CONTEXT}}Q: {{USER_PROMPT}}")
+    return tmp_path, root
+
+
+def test_load_all_serves_from_memory(prompts):
+    tmp_path, root = prompts
+    assert prompt_registry.load_all(tmp_path) == 1
+
+    (root / "plan.md").unlink()
+
+    assert prompt_registry.get(root / "plan.md").startswith("Intent")
+    assert prompt_registry.get(root / "nope.md", optional=True) == ""
+    with pytest.raises(FileNotFoundError):
+        prompt_registry.get(root / "nope.md")
+
+
+def test_static_prefix_is_memoized_per_variant(prompts):
+    tmp_path, root = prompts
+    prompt_registry.load_all(tmp_path)
+    markers = ("{{CONVERSATION_CONTEXT}}", "{{USER_PROMPT}}")
+
+    a = prompt_registry.static_prefix(root / "plan.md", markers, {"{{INTENT_TYPE}}": "math"})
+    b = prompt_registry.static_prefix(root / "plan.md", markers, {"{{INTENT_TYPE}}": "math"})
+    c = prompt_registry.static_prefix(root / "plan.md", markers, {"{{INTENT_TYPE}}": "process"})
+
+    assert a == "Intent math.\nRules.\n" and a is b
+    assert c == "Intent process.\nRules.\n"
+
+
+def test_hot_reload_picks_up_edits_and_clears_derived(prompts, monkeypatch):
+    tmp_path, root = prompts
+    monkeypatch.setattr(prompt_registry, "PROMPT_HOT_RELOAD", True)
+    path = root / "plan.md"
+    prompt_registry.load_all(tmp_path)
+    built = prompt_registry.derived("k", lambda: prompt_registry.get(path)[:6], [path])
+    assert built == "Intent"
+
+    path.write_text("Edited {{USER_PROMPT}}")
+    stat = os.stat(path)
+    os.utime(path, (stat.st_atime, stat.st_mtime + 5))
+
+    assert prompt_registry.derived("k", lambda: prompt_registry.get(path)[:6], [path]) == "Edited"
+
+
+def test_catalog_is_identical_for_any_entity_order(monkeypatch):
+    monkeypatch.setattr(prompt_registry, "_derived", {})
+    first = interactive_service._build_catalog(["flashcard_deck", "chart"])
+    second = interactive_service._build_catalog(["chart", "flashcard_deck", "chart"])
+    assert first is second
+    assert first.index("## flashcard_deck") > first.index("## chart")
@@ -0,0 +1,71 @@
+"""
+Tests for the record-and-replay providers (services/replay.py), seeded from a
+streamed lifecycle log. No network.
+"""
+
+import pytest
+
+from services import llm_cache, replay
+from services.activity_log import ActivityLog
+from services.llm_service import ClaudeProvider, LLMService
+from services.research.search_provider import tavily
+
+_USAGE = {"prompt_tokens": 50, "completion_tokens": 20, "total_tokens": 70, "cache_hit": True}
+
+
+@pytest.fixture()
+def recording(tmp_path, monkeypatch):
+    monkeypatch.setattr(llm_cache, "LLM_CACHE_BACKEND", "off")
+    log = ActivityLog(str(tmp_path))
+    log.append({"event": "llm_call", "prompt_name": "vocab_plan.md", "task": "vocab_plan",
+                "model": "claude-haiku-4-5", "full_prompt": "plan this", "full_response": "PLAN",
+                "usage": _USAGE})
+    for i in range(2):
+        log.append({"event": "llm_call", "prompt_name": "scene_planner", "model": "claude-sonnet-4-6",
+                    "full_response": f'{{"blocks": [{i}]}}', "usage": _USAGE})
+    log.append({"event": "search_call", "query": "ohm's law", "max_results": 5, "include_domains": [],
+                "search_results": [{"title": "Ohm", "url": "https://www.example.com/ohm",
+                                    "content": "V = IR", "raw_content": "", "score": 0.8}]})
+    log.append({"event": "extract_call", "url": "https://example.com/a", "extracted_content": "page"})
+    log.close()
+
+    rec = replay.install(log.path, latency_s=0, tokens_per_s=0, search_latency_s=0)
+    yield rec
+    replay.uninstall()
+
+
+async def test_llm_calls_match_by_prompt_then_task(recording):
+    svc = LLMService(provider=ClaudeProvider(model="claude-sonnet-4-6"))
+
+    text, usage = await svc.make_single_prompt_request_async("plan this", task="anything")
+    assert text == "PLAN"
+    assert "cache_hit" not in usage and usage["completion_tokens"] == 20
+
+    first, _  = await svc.make_system_user_request_async("sys", "q", task="scene_planner")
+    second, _ = await svc.make_system_user_request_async("sys", "q", task="scene_planner")
+    third, _  = await svc.make_system_user_request_async("sys", "q", task="scene_planner")
+    assert (first, second, third) == ('{"blocks": [0]}', '{"blocks": [1]}', '{"blocks": [0]}')
+    assert svc.provider.model == "claude-sonnet-4-6"
+
+
+async def test_stream_replays_in_chunks(recording):
+    svc = LLMService(provider=ClaudeProvider(model="claude-haiku-4-5"))
+    usage: dict = {}
+
+    chunks = [c async for c in svc.stream_single_prompt_async("other", usage, task="vocab_plan")]
+
+    assert "".join(chunks) == "PLAN" and usage["total_tokens"] == 70
+
+
+async def test_tavily_search_and_extract_replay(recording):
+    results = await tavily.search("ohm's law")
+    assert [(r.title, r.domain, r.content) for r in results] == [("Ohm", "example.com", "V = IR")]
+    assert await tavily.extract("https://example.com/a") == "page"
+    assert await tavily.extract("https://example.com/missing") == ""
+
+
+def test_uninstall_restores_configured_provider(recording):
+    replay.uninstall()
+    svc = LLMService(provider=ClaudeProvider(model="claude-haiku-4-5"))
+    assert isinstance(svc.provider, ClaudeProvider)
+    assert not isinstance(tavily._client, replay.ReplayTavilyClient)
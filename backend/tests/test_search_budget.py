@@ -0,0 +1,52 @@
+"""
+Tests for the search-phase wall-clock budget (services/research/search_budget.py),
+driven by a fake clock.
+"""
+
+import pytest
+
+from services.research import search_budget
+from services.research.search_budget import SearchBudget
+
+
+@pytest.fixture()
+def clock(monkeypatch):
+    monkeypatch.setattr(search_budget, "_estimates", {"search": 2.0, "gap": 3.0, "extract": 4.0})
+    now = [100.0]
+    return now
+
+
+def test_later_rounds_shrink_then_skip(clock):
+    budget = SearchBudget(20.0, clock=lambda: clock[0])
+    queries = ["a", "b", "c", "d"]
+
+    assert budget.allow_gap_analysis(0)                       # 20 s left ≥ 3 + 2 + 4
+    assert budget.plan_round(1, queries) == queries           # ≥ 2 × (2 + 4)
+
+    clock[0] += 12.0                                          # 8 s left
+    assert budget.plan_round(1, queries) == ["a", "b"]        # int(4 × 8 / 12)
+    assert not budget.allow_gap_analysis(1)
+
+    clock[0] += 3.0                                           # 5 s left
+    assert budget.plan_round(2, queries) == []
+    assert budget.allow_extract(3, "final")
+    clock[0] += 2.0
+    assert not budget.allow_extract(3, "final")
+
+    assert [d["action"] for d in budget.decisions] == [
+        "shrink_round", "skip_gap_analysis", "skip_round", "skip_extract"]
+    assert budget.decisions[0] == {"action": "shrink_round", "at_s": 12.0, "remaining_s": 8.0,
+                                   "round": 2, "queries": 4, "kept": 2}
+
+
+def test_timeouts_never_exceed_the_budget(clock):
+    budget = SearchBudget(5.0, clock=lambda: clock[0])
+    assert budget.timeout(20.0) == 5.0
+    clock[0] += 10.0
+    assert budget.remaining() == 0.0 and budget.timeout(20.0) == 0.1
+
+
+def test_estimates_follow_observed_latency(clock):
+    for _ in range(20):
+        search_budget.observe("search", 0.5)
+    assert search_budget.estimate("search") == pytest.approx(0.5, abs=0.05)
@@ -0,0 +1,93 @@
+"""
+Tests for the shared Tavily search cache (services/research/search_cache.py)
+and its use in TavilyProvider.search. The Postgres table is replaced by a dict
+and TavilyClient by a local fake — no network, no DB.
+"""
+
+import time
+
+import pytest
+
+from services.research import search_cache
+from services.research.search_provider import TavilyProvider
+
+_DAY = 86400
+_NOW = time.mktime((2026, 10, 16, 12, 0, 0, 0, 0, 0))
+
+
+def test_key_normalises_query_and_domain_order():
+    a = search_cache.cache_key("  Ohm's LAW? ", 5, "basic", "general", ["b.org", "a.com"])
+    b = search_cache.cache_key("ohm's law", 5, "basic", "general", ["A.com", "b.org"])
+    assert a == b
+    assert a != search_cache.cache_key("ohm's law", 5, "advanced", "general", ["a.com", "b.org"])
+    assert a != search_cache.cache_key("ohm's law", 5, "basic", "news", ["a.com", "b.org"])
+
+
+@pytest.mark.parametrize("query, fresh", [
+    ("latest iPhone release", True),
+    ("what happened today in markets", True),
+    ("stock price of NVIDIA", True),
+    ("how does electric current flow", False),
+    ("mitochondria in live cells", False),
+])
+def test_latest_style_queries_bypass(query, fresh):
+    assert search_cache.wants_fresh(query) is fresh
+
+
+def test_ttl_follows_newest_published_date():
+    ttl = lambda results, topic="general": search_cache.ttl_for(results, topic, now=_NOW)
+    fresh, recent, evergreen = (search_cache.SEARCH_CACHE_TTL_FRESH_S,
+                                search_cache.SEARCH_CACHE_TTL_RECENT_S,
+                                search_cache.SEARCH_CACHE_TTL_EVERGREEN_S)
+
+    assert ttl([{"published_date": "2026-10-15T08:00:00Z"}, {"published_date": "2019-01-01"}]) == fresh
+    assert ttl([{"published_date": "Mon, 21 Sep 2026 10:00:00 GMT"}]) == recent
+    assert ttl([{"published_date": "2020-05-01"}]) == evergreen
+    assert ttl([{"title": "undated"}, {"published_date": "not a date"}]) == evergreen
+    assert ttl([{"title": "undated"}], topic="news") == fresh
+
+
+class _FakeClient:
+    def __init__(self):
+        self.calls = 0
+
+    def search(self, query, **kwargs):
+        self.calls += 1
+        return {"results": [{"title": "Ohm", "url": "https://www.example.com/ohm",
+                             "content": "V = IR", "raw_content": "", "score": 0.9}]}
+
+
+@pytest.fixture()
+def provider(monkeypatch):
+    table: dict[str, list] = {}
+    outcomes: list[str] = []
+
+    async def _lookup(key, query, bypass=False):
+        outcomes.append("bypass" if bypass else ("hit" if key in table else "miss"))
+        return None if bypass else table.get(key)
+
+    async def _store(key, query, topic, results):
+        table[key] = results
+
+    monkeypatch.setattr(search_cache, "lookup", _lookup)
+    monkeypatch.setattr(search_cache, "store", _store)
+    p = TavilyProvider()
+    p._client = _FakeClient()
+    return p, outcomes
+
+
+async def test_repeat_search_is_served_from_cache(provider):
+    p, outcomes = provider
+    first = await p.search("Ohm's law")
+    second = await p.search("ohm's law?")
+
+    assert p._client.calls == 1 and outcomes == ["miss", "hit"]
+    assert [r.domain for r in second] == ["example.com"]
+    assert first[0] is not second[0]            # callers never share result objects
+
+
+async def test_fresh_queries_skip_lookup_but_refresh_cache(provider):
+    p, outcomes = provider
+    await p.search("latest resistor standards")
+    await p.search("latest resistor standards", fresh=True)
+    assert p._client.calls == 2 and outcomes == ["bypass", "bypass"]
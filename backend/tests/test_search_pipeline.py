@@ -0,0 +1,147 @@
+"""
+Tests for the streaming search pipeline in routers/generate._search_phase and
+the IncrementalRanker behind it. Tavily and gap analysis are replaced by local
+coroutines — no network, no LLM.
+"""
+
+import asyncio
+
+import pytest
+
+from routers import generate
+from services.frame_generation.planner import request_log
+from services.research import search_budget
+from services.research.search_provider import SearchResult
+from services.research.source_processor import IncrementalRanker, rank_and_deduplicate
+
+
+def _r(url: str, score: float, domain: str = "example.com") -> SearchResult:
+    return SearchResult(title=url, url=url, snippet="s", content="c", domain=domain, score=score)
+
+
+def test_incremental_ranker_matches_batch_ranking():
+    batches = [[_r("a", 0.5), _r("b", 0.9)], [_r("c", 0.7, "nasa.gov"), _r("a", 0.99)], [_r("d", 0.5)]]
+    ranker = IncrementalRanker()
+    new = [len(ranker.add(b)) for b in batches]
+
+    flat = [r for b in batches for r in b]
+    assert new == [2, 1, 1]
+    assert [r.url for r in ranker.top(3)] == [r.url for r in rank_and_deduplicate(flat, 3)] == ["b", "c", "a"]
+    assert ranker.score(ranker.top(1)[0]) == 0.9 and ranker.total_input == 5
+
+
+class _Tavily:
+    """Searches answer after a per-query delay; extracts take 200 ms."""
+
+    def __init__(self, delays: dict[str, float], scores: dict[str, float]):
+        self.delays, self.scores = delays, scores
+        self.trace: list[str] = []
+
+    async def search(self, query, max_results=5, include_domains=None, timeout=20.0):
+        await asyncio.sleep(self.delays.get(query, 0.01))
+        self.trace.append(f"search:{query}")
+        return [_r(f"https://{query}.org/page", self.scores.get(query, 0.5))]
+
+    async def extract_many(self, urls, timeout=20.0):
+        self.trace.append("extract_start:" + ",".join(sorted(u.split("//")[1].split(".")[0] for u in urls)))
+        await asyncio.sleep(0.2)
+        self.trace.append("extract_done")
+        return [f"full text of {u}" for u in urls]
+
+
+@pytest.fixture()
+def pipeline(monkeypatch):
+    log: list = []
+    token = request_log.set(log)
+    fake = _Tavily(delays={"slow": 0.1}, scores={"fast": 0.9, "slow": 0.6, "gap1": 0.8})
+    gap_rounds = [["gap1"], []]
+
+    async def _gap(message, results, prev_queries):
+        fake.trace.append("gap")
+        return gap_rounds.pop(0)
+
+    monkeypatch.setattr(generate, "tavily", fake)
+    monkeypatch.setattr(generate, "_gap_analysis", _gap)
+    monkeypatch.setattr(search_budget, "_estimates", dict(search_budget._DEFAULT_ESTIMATES_S))
+    yield fake, log
+    request_log.reset(token)
+
+
+async def _run(mode: str, budget_s: float | None = None) -> list[dict]:
+    return [e async for e in generate._search_phase(
+        intent={"search_queries": ["fast", "slow"], "domain": "physics"},
+        message="q", research_mode=mode, conversation_id="conv-1",
+        file_paths=[], extra_urls=[], output_dir="/tmp", budget_s=budget_s,
+    )]
+
+
+async def test_high_scoring_source_is_extracted_before_the_round_ends(pipeline):
+    fake, _ = pipeline
+    events = await _run("instant")
+
+    # "fast" (0.9) goes to /extract before "slow" has answered; "slow" (0.6) is
+    # below the early threshold and is extracted once searching is over.
+    assert fake.trace[:3] == ["search:fast", "extract_start:fast", "search:slow"]
+    assert fake.trace[3] == "extract_start:slow"
+    final = events[-1]
+    assert final["type"] == "_sources_ready"
+    assert [s["snippet"] for s in final["sources_for_llm"]] == [
+        "full text of https://fast.org/page", "full text of https://slow.org/page"]
+
+
+async def test_gap_analysis_overlaps_extraction(pipeline):
+    fake, log = pipeline
+    events = await _run("deep_research")
+
+    assert fake.trace.index("extract_start:fast") < fake.trace.index("gap") < fake.trace.index("extract_done")
+    assert [e["round"] for e in events if e["type"] == "stage" and e["stage"] == "searching"] == [1, 2]
+    assert [e["stage"] for e in events if e["type"] == "stage_done"] == ["searching", "searching", "reading"]
+
+    summary = next(e for e in log if e["event"] == "search_pipeline")
+    assert summary["rounds"] == 2 and summary["queries"] == 3
+    assert (summary["extracted_early"], summary["extracted_late"]) == (2, 1)
+
+
+async def test_deadline_returns_sources_found_so_far(pipeline):
+    fake, _ = pipeline
+    fake.delays["slow"] = 1.0
+
+    events = await _run("deep_research", budget_s=0.2)
+
+    final = events[-1]
+    assert [s["url"] for s in final["sources_for_llm"]] == ["https://fast.org/page"]
+    assert [d["action"] for d in final["budget"]["decisions"]] == ["skip_extract", "deadline"]
+    assert final["budget"]["decisions"][-1]["abandoned"] == {"search": 1}
+    assert final["budget"]["elapsed_s"] < 0.5
+    assert [e["stage"] for e in events if e["type"] == "stage_done"] == ["searching"]
+    assert "search:slow" not in fake.trace
+
+
+async def test_gap_analysis_logs_a_full_llm_call(monkeypatch):
+    from services import llm_cache, llm_service
+    from services.llm_service import LLMProvider, LLMService
+
+    class _Provider(LLMProvider):
+        model = "claude-haiku-4-5-20251001"
+
+        def complete(self, messages, **kwargs):
+            raise AssertionError("sync path must not be used")
+
+        async def complete_async(self, messages, **kwargs):
+            return '{"new_queries": ["q2"]}', {"prompt_tokens": 50, "completion_tokens": 5,
+                                              "total_tokens": 55}
+
+    monkeypatch.setattr(llm_cache, "LLM_CACHE_BACKEND", "off")
+    monkeypatch.setattr(llm_service, "get_task_service", lambda task: LLMService(provider=_Provider()))
+    log: list = []
+    token = request_log.set(log)
+    try:
+        queries = await generate._gap_analysis("why is the sky blue", [_r("a", 0.9)], ["q1"])
+    finally:
+        request_log.reset(token)
+
+    assert queries == ["q2"]
+    (entry,) = [e for e in log if e["event"] == "llm_call"]
+    assert entry["prompt_name"] == entry["task"] == "gap_analysis"
+    assert "why is the sky blue" in entry["full_prompt"]
+    assert entry["usage"]["total_tokens"] == 55
@@ -0,0 +1,253 @@
+"""
+Tests for services/single_flight.py and its wiring into LLMService.
+
+Cross-worker coordination runs against an in-memory stand-in for the
+single_flight_results table and the asyncpg pool.
+"""
+
+import asyncio
+import json
+from contextlib import asynccontextmanager
+
+import pytest
+
+from services import llm_cache
+from services.llm_service import LLMService, LLMProvider
+from services import single_flight
+from services.single_flight import SingleFlight
+
+
+class _SlowProvider(LLMProvider):
+    def __init__(self):
+        self.model = "claude-haiku-4-5-20251001"
+        self.calls = 0
+
+    def complete(self, messages, **kwargs):
+        raise AssertionError("sync path must not be used")
+
+    async def complete_async(self, messages, **kwargs):
+        self.calls += 1
+        await asyncio.sleep(0.05)
+        return "answer", {"prompt_tokens": 100, "completion_tokens": 20, "total_tokens": 120}
+
+    async def stream_async(self, messages, usage_sink, **kwargs):
+        self.calls += 1
+        for chunk in ("ans", "wer"):
+            await asyncio.sleep(0.02)
+            yield chunk
+        usage_sink.update({"prompt_tokens": 100, "completion_tokens": 20, "total_tokens": 120})
+
+
+@pytest.fixture(autouse=True)
+def no_response_cache(monkeypatch):
+    monkeypatch.setattr(llm_cache, "LLM_CACHE_BACKEND", "off")
+
+
+async def test_concurrent_identical_calls_share_one_execution():
+    flight = SingleFlight("test")
+    calls = 0
+
+    async def work():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.02)
+        return {"v": 1}
+
+    results = await asyncio.gather(*(flight.do("k", work) for _ in range(5)))
+
+    assert calls == 1
+    assert [v for v, _ in results] == [{"v": 1}] * 5
+    assert sorted(shared for _, shared in results) == [False, True, True, True, True]
+    assert flight.inflight() == 0
+
+
+async def test_sequential_calls_are_not_coalesced():
+    flight = SingleFlight("test")
+    calls = 0
+
+    async def work():
+        nonlocal calls
+        calls += 1
+        return calls
+
+    assert await flight.do("k", work) == (1, False)
+    assert await flight.do("k", work) == (2, False)
+
+
+async def test_error_propagates_to_every_waiter():
+    flight = SingleFlight("test")
+
+    async def boom():
+        await asyncio.sleep(0.01)
+        raise ValueError("nope")
+
+    results = await asyncio.gather(flight.do("k", boom), flight.do("k", boom),
+                                   return_exceptions=True)
+    assert all(isinstance(r, ValueError) for r in results)
+    assert flight.inflight() == 0
+
+
+async def test_cancelled_leader_does_not_cancel_followers():
+    flight = SingleFlight("test")
+
+    async def work():
+        await asyncio.sleep(0.05)
+        return "done"
+
+    leader = asyncio.create_task(flight.do("k", work))
+    await asyncio.sleep(0)
+    follower = asyncio.create_task(flight.do("k", work))
+    await asyncio.sleep(0.01)
+    leader.cancel()
+
+    assert await follower == ("done", True)
+
+
+async def test_llm_followers_are_billed_as_cache_hits():
+    provider = _SlowProvider()
+    svc = LLMService(provider=provider)
+
+    (r1, u1), (r2, u2) = await asyncio.gather(
+        svc.make_system_user_request_async("sys", "same question"),
+        svc.make_system_user_request_async("sys", "same question"),
+    )
+
+    assert provider.calls == 1
+    assert r1 == r2 == "answer"
+    billed = [u for u in (u1, u2) if not u.get("cache_hit")]
+    coalesced = [u for u in (u1, u2) if u.get("coalesced")]
+    assert len(billed) == 1 and billed[0]["total_tokens"] == 120
+    assert len(coalesced) == 1 and coalesced[0]["total_tokens"] == 0
+
+
+async def test_concurrent_identical_streams_make_one_provider_call():
+    provider = _SlowProvider()
+    svc = LLMService(provider=provider)
+
+    async def consume():
+        usage: dict = {}
+        chunks = [c async for c in svc.stream_single_prompt_async("same question", usage)]
+        return chunks, usage
+
+    (c1, u1), (c2, u2) = await asyncio.gather(consume(), consume())
+
+    assert provider.calls == 1
+    assert "".join(c1) == "".join(c2) == "answer"
+    assert sorted([c1, c2], key=len) == [["answer"], ["ans", "wer"]]   # follower gets one chunk
+    assert sorted(u["total_tokens"] for u in (u1, u2)) == [0, 120]
+    assert [u.get("coalesced") for u in (u1, u2)].count(True) == 1
+
+
+async def test_llm_calls_with_different_kwargs_are_not_coalesced():
+    provider = _SlowProvider()
+    svc = LLMService(provider=provider)
+
+    await asyncio.gather(
+        svc.make_system_user_request_async("sys", "q", max_tokens=100),
+        svc.make_system_user_request_async("sys", "q", max_tokens=200),
+    )
+    assert provider.calls == 2
+
+
+class _Conn:
+    def __init__(self, table: dict):
+        self.table = table
+
+    @asynccontextmanager
+    async def transaction(self):
+        yield
+
+    async def fetchval(self, sql, *args):
+        assert "pg_try_advisory_xact_lock" in sql        # session locks would outlive the checkout
+        return True
+
+    async def fetchrow(self, sql, key, *args):
+        if key not in self.table:
+            return None
+        return {"result": json.loads(self.table[key]), "fresh": True, "running": True}
+
+    async def execute(self, sql, *args):
+        if sql.startswith("INSERT"):
+            key, value = args
+            self.table[key] = json.dumps(value)          # JSONB codec: TypeError if unencodable
+
+
+class _Pool:
+    def __init__(self):
+        self.table: dict[str, str] = {}
+        self.checked_out = 0
+
+    @asynccontextmanager
+    async def acquire(self, timeout=None):
+        self.checked_out += 1
+        try:
+            yield _Conn(self.table)
+        finally:
+            self.checked_out -= 1
+
+
+@pytest.fixture()
+def pool(monkeypatch):
+    from core import db_async
+    p = _Pool()
+    monkeypatch.setattr(single_flight, "SINGLE_FLIGHT_CROSS_WORKER", True)
+    monkeypatch.setattr(db_async, "_get_pool", lambda: p)
+    return p
+
+
+async def test_cross_worker_leader_releases_connection_while_running(pool):
+    flight = SingleFlight("t", cross_worker=True)
+
+    async def _call():
+        assert pool.checked_out == 0
+        return ["answer", {"total_tokens": 5}]
+
+    assert await flight.do("k", _call) == (["answer", {"total_tokens": 5}], False)
+    assert await flight.do("k", _call) == (["answer", {"total_tokens": 5}], True)   # reused by key
+
+
+async def test_cross_worker_finished_result_not_reused_without_reuse_results(pool):
+    flight = SingleFlight("t", cross_worker=True)
+    calls = []
+
+    async def _call():
+        calls.append(1)
+        return ["answer", {}]
+
+    assert await flight.do("k", _call, reuse_results=False) == (["answer", {}], False)
+    assert await flight.do("k", _call, reuse_results=False) == (["answer", {}], False)
+    assert len(calls) == 2
+
+
+async def test_cross_worker_uncacheable_llm_task_is_not_reused(pool):
+    provider = _SlowProvider()
+    svc = LLMService(provider=provider)
+
+    await svc.make_system_user_request_async("sys", "q", cache_task="scene_planner")
+    _, usage = await svc.make_system_user_request_async("sys", "q", cache_task="scene_planner")
+
+    assert provider.calls == 2 and not usage.get("coalesced")
+
+
+async def test_cross_worker_failed_result_is_not_shared(pool):
+    flight = SingleFlight("t", cross_worker=True, failed=lambda value: value[0] is None)
+    calls = []
+
+    async def _call():
+        calls.append(1)
+        return [None, {}]
+
+    assert await flight.do("k", _call) == ([None, {}], False)
+    assert await flight.do("k", _call) == ([None, {}], False)
+    assert len(calls) == 2 and json.loads(pool.table["t:k"]) == single_flight._FAILED
+
+
+async def test_cross_worker_unencodable_value_still_returns(pool):
+    flight = SingleFlight("t", cross_worker=True)
+    value = {"at": object()}
+
+    async def _call():
+        return value
+
+    assert await flight.do("k", _call) == (value, False)
+    assert json.loads(pool.table["t:k"]) == single_flight._FAILED   # waiting workers fall back
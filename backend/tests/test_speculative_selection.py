@@ -0,0 +1,79 @@
+"""
+Tests for SpeculativeSelection (services/interactive/interactive_service.py).
+The selector LLM call is replaced by a local coroutine — no network.
+"""
+
+import asyncio
+
+import pytest
+
+from services.frame_generation.planner import request_log
+from services.interactive import interactive_service
+from services.interactive.interactive_service import SelectionResult, SpeculativeSelection
+
+
+@pytest.fixture()
+def selector(monkeypatch):
+    calls: list[tuple[str, str]] = []
+    state = {"cancelled": False, "entities": ["bar_chart"]}
+
+    async def _fake_select(prompt, domain, conversation_context):
+        calls.append((prompt, domain))
+        try:
+            await asyncio.sleep(0.05)
+        except asyncio.CancelledError:
+            state["cancelled"] = True
+            raise
+        return SelectionResult(visual_brief="brief", entities=state["entities"])
+
+    monkeypatch.setattr(interactive_service, "_select_entities", _fake_select)
+    log: list = []
+    token = request_log.set(log)
+    yield calls, state, log
+    request_log.reset(token)
+
+
+async def test_matching_domain_keeps_speculative_selection(selector):
+    calls, _, log = selector
+    spec = SpeculativeSelection("why is the sky blue", "")
+    spec.start("physics")
+    await asyncio.sleep(0.08)
+
+    selection, metrics = await spec.resolve("physics")
+
+    assert selection.entities == ["bar_chart"]
+    assert calls == [("why is the sky blue", "physics")]
+    assert metrics["hit"] is True and metrics["saved_ms"] >= 40
+    assert [e["event"] for e in log] == ["speculative_selection"]
+
+
+async def test_domain_mismatch_discards_and_cancels(selector):
+    _, state, _ = selector
+    spec = SpeculativeSelection("supply and demand", "")
+    spec.start("general")
+    await asyncio.sleep(0.01)
+
+    selection, metrics = await spec.resolve("economics")
+    await asyncio.sleep(0)
+
+    assert selection is None
+    assert metrics["hit"] is False and "wasted_ms" in metrics
+    assert state["cancelled"]
+
+
+async def test_empty_speculative_selection_is_a_miss(selector):
+    _, state, _ = selector
+    state["entities"] = []
+    spec = SpeculativeSelection("q", "")
+    spec.start("cs")
+
+    selection, metrics = await spec.resolve("cs")
+
+    assert selection is None and metrics["hit"] is False
+
+
+async def test_unstarted_speculation_reports_nothing(selector):
+    _, _, log = selector
+    selection, metrics = await SpeculativeSelection("q", "").resolve("cs")
+    assert selection is None and metrics == {}
+    assert log == []
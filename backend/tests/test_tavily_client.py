@@ -0,0 +1,108 @@
+"""
+Tests for the process-wide Tavily governor (services/research/tavily_governor.py)
+and batched extraction in TavilyProvider. Tavily is replaced by local async
+fakes and the extract cache by a dict — no network, no DB.
+"""
+
+import asyncio
+
+import pytest
+
+from services.research import extract_cache
+from services.research.search_provider import TavilyProvider
+from services.research.tavily_governor import Governor
+
+
+async def test_concurrency_cap_is_shared_and_fifo():
+    gov = Governor(max_concurrency=2, rpm=6000)
+    active, peak, order = 0, 0, []
+
+    async def _call(i: int) -> float:
+        nonlocal active, peak
+        async with gov.slot("search") as waited:
+            order.append(i)
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.02)
+            active -= 1
+            return waited
+
+    waits = await asyncio.gather(*[_call(i) for i in range(6)])
+
+    assert peak == 2 and order == list(range(6))
+    assert waits[0] == 0.0 and waits[-1] >= 0.03
+    assert gov.stats()["in_flight"] == 0 and gov.stats()["queued"] == 0
+
+
+async def test_rate_bucket_delays_calls_beyond_the_burst():
+    gov = Governor(max_concurrency=10, rpm=60)          # one call per second after the burst
+    gov.requests.level = 1.0
+
+    async with gov.slot("search") as first:
+        pass
+    task = asyncio.create_task(gov.acquire("extract"))
+    await asyncio.sleep(0.05)
+    assert not task.done() and gov.stats()["queued"] == 1
+
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    assert first == 0.0 and gov.stats() == {"in_flight": 0, "queued": 0, "requests_available": 0}
+
+
+class _AsyncClient:
+    def __init__(self):
+        self.extract_calls: list[list[str]] = []
+
+    async def extract(self, urls, **kwargs):
+        self.extract_calls.append(list(urls))
+        return {"results": [{"url": u, "raw_content": f"page {u.rsplit('/', 1)[-1]}"}
+                            for u in urls if "missing" not in u]}
+
+
+@pytest.fixture()
+def provider(monkeypatch):
+    table = {extract_cache.url_key("https://example.com/cached"): "cached page"}
+
+    async def _lookup(url):
+        return table.get(extract_cache.url_key(url))
+
+    async def _store(url, content):
+        table[extract_cache.url_key(url)] = content
+
+    monkeypatch.setattr(extract_cache, "lookup", _lookup)
+    monkeypatch.setattr(extract_cache, "store", _store)
+    p = TavilyProvider()
+    p._client = _AsyncClient()
+    return p
+
+
+def test_constructor_accepts_the_pooled_http_client(monkeypatch):
+    """Guards the requirements.txt pin: the installed SDK must accept client=."""
+    from services.research import search_provider
+    monkeypatch.setattr(search_provider, "TAVILY_API_KEY", "tvly-test")
+
+    p = TavilyProvider()
+
+    assert p._client is not None and p._http is not None
+
+
+async def test_extract_many_batches_uncached_urls(provider):
+    urls = ["https://example.com/a", "https://example.com/cached", "https://www.example.com/a/",
+            "https://example.com/b", "https://example.com/missing"]
+
+    contents = await provider.extract_many(urls)
+
+    assert contents == ["page a", "cached page", "page a", "page b", ""]
+    assert provider._client.extract_calls == [
+        ["https://example.com/a", "https://example.com/b", "https://example.com/missing"]]
+
+
+async def test_extract_many_splits_into_api_sized_batches(provider, monkeypatch):
+    from services.research import search_provider
+    monkeypatch.setattr(search_provider, "TAVILY_EXTRACT_BATCH_MAX", 2)
+
+    contents = await provider.extract_many([f"https://example.com/{i}" for i in range(5)])
+
+    assert contents == [f"page {i}" for i in range(5)]
+    assert [len(c) for c in provider._client.extract_calls] == [2, 2, 1]
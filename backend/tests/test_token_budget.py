@@ -0,0 +1,66 @@
+"""
+Tests for services/token_budget.py. Forces the chars-per-token fallback so the
+numbers do not depend on whether tiktoken's encoding file is available.
+"""
+
+import pytest
+
+from services import token_budget
+from services.token_budget import Section
+
+
+@pytest.fixture(autouse=True)
+def _no_encoder(monkeypatch):
+    monkeypatch.setattr(token_budget, "_encoder", None)
+    monkeypatch.setattr(token_budget, "_encoder_failed", True)
+    token_budget.count_static.cache_clear()
+    yield
+    token_budget.count_static.cache_clear()
+
+
+def test_count_tokens_scales_by_provider():
+    text = "x" * 700
+    assert token_budget.count_tokens(text, "openai") == 176
+    assert token_budget.count_tokens(text, "anthropic") == 201
+    assert token_budget.count_tokens("", "openai") == 0
+
+
+def test_truncate_keeps_head_at_sentence_and_tail_at_line():
+    text = ("One sentence here. " * 40).strip()
+    head = token_budget.truncate(text, 50, "openai")
+    assert head.endswith(".") and token_budget.count_tokens(head, "openai") <= 50
+
+    turns = "\n".join(f"turn {i}: " + "y" * 30 for i in range(40))
+    tail = token_budget.truncate(turns, 50, "openai", keep="tail")
+    assert tail.startswith("turn ") and tail.endswith("turn 39: " + "y" * 30)
+
+
+def test_pack_fills_sections_in_priority_order():
+    fixed = "q" * 400                       # 101 tokens
+    sources = [Section(f"source:{i}", "s" * 800) for i in range(1, 4)]   # 201 each
+    context = Section("context", "\n".join("c" * 79 for _ in range(20)), keep="tail")
+
+    packed = token_budget.pack("t", "openai", [fixed], sources + [context], budget=600)
+
+    assert packed["source:1"] == sources[0].text
+    assert packed["source:2"] == sources[1].text
+    # 600 - 101 - 402 = 97 tokens left: source 3 is truncated, context dropped.
+    assert 0 < len(packed["source:3"]) < len(sources[2].text)
+    assert packed["context"] == ""
+
+
+def test_pack_drops_section_below_minimum_and_passes_through_without_budget():
+    sections = [Section("a", "a" * 400), Section("b", "b" * 4000)]
+    packed = token_budget.pack("t", "openai", [], sections, budget=101 + 20)
+    assert packed == {"a": "a" * 400, "b": ""}
+
+    unbounded = token_budget.pack("no_such_task", "openai", [], sections)
+    assert unbounded == {"a": "a" * 400, "b": "b" * 4000}
+
+
+def test_static_counts_are_memoized():
+    template = "static template " * 50
+    token_budget.pack("t", "anthropic", [], [], static=[template], budget=1000)
+    token_budget.pack("t", "anthropic", [], [], static=[template], budget=1000)
+    info = token_budget.count_static.cache_info()
+    assert info.misses == 1 and info.hits == 1
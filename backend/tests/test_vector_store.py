@@ -62,3 +62,133 @@ async def test_retrieve_sources_empty_without_embeddings():
     with patch("services.research.vector_store._get_openai", return_value=None):
         from services.research.vector_store import retrieve_sources
         assert await retrieve_sources("conv123", "some query") == []
+
+
+@pytest.mark.asyncio
+async def test_embed_query_is_none_without_openai():
+    with patch("services.research.vector_store._get_openai", return_value=None):
+        from services.research.vector_store import embed_query
+        assert await embed_query("how does TLS work") is None
+
+
+@pytest.mark.asyncio
+async def test_plan_and_classify_reuses_semantic_cache_hit(monkeypatch):
+    """A semantic hit that lands mid-stream replaces the LLM's classification."""
+    import asyncio
+    from services import llm_cache
+    from services.frame_generation import planner
+
+    monkeypatch.setattr(llm_cache, "LLM_CACHE_BACKEND", "off")
+
+    cached = {"domain": "cs", "enriched_prompt": "TLS 1.3 handshake", "suggested_followups": [],
+              "needs_search": False, "search_queries": [], "_semantic_distance": 0.03}
+
+    async def _embed(*_a, **_kw):
+        return [0.0] * 1536
+
+    async def _lookup(*_a, **_kw):
+        return dict(cached)
+
+    async def _slow_stream(*_a, **_kw):
+        for chunk in ('{"domain": "physics", ', '"enriched_prompt": "x"}'):
+            await asyncio.sleep(0.02)
+            yield chunk
+
+    async def _no_fallback(*_a, **_kw):
+        raise AssertionError("stream was abandoned for the hit — fallback must not run")
+
+    with patch("services.research.vector_store.embed_query", _embed), \
+         patch("services.research.vector_store.lookup_classification", _lookup), \
+         patch.object(planner, "call_llm_stream_async", _slow_stream), \
+         patch.object(planner, "call_llm_async", _no_fallback):
+        result = await planner.plan_and_classify("explain TLS handshake", "instant", False)
+
+    assert result["domain"] == "cs"
+    assert "_semantic_distance" not in result
+
+
+@pytest.mark.asyncio
+async def test_plan_and_classify_stores_after_lookup_timeout(monkeypatch):
+    """A slow embedding times the lookup out but is still used to store the result."""
+    import asyncio
+    from services import llm_cache
+    from services.frame_generation import planner
+
+    monkeypatch.setattr(llm_cache, "LLM_CACHE_BACKEND", "off")
+    monkeypatch.setattr(planner, "CLASSIFY_SEMANTIC_CACHE_TIMEOUT_S", 0.01)
+    stored = []
+
+    async def _slow_embed(*_a, **_kw):
+        await asyncio.sleep(0.05)
+        return [0.5] * 1536
+
+    async def _lookup(*_a, **_kw):
+        raise AssertionError("lookup must not run once the timeout fired")
+
+    async def _store(message, q_emb, *_a):
+        stored.append((message, q_emb[0]))
+
+    async def _stream(*_a, **_kw):
+        yield '{"domain": "physics", "enriched_prompt": "x"}'
+
+    with patch("services.research.vector_store.embed_query", _slow_embed), \
+         patch("services.research.vector_store.lookup_classification", _lookup), \
+         patch("services.research.vector_store.store_classification", _store), \
+         patch.object(planner, "call_llm_stream_async", _stream):
+        result = await planner.plan_and_classify("why is the sky blue", "instant", False)
+        await asyncio.gather(*planner._BACKGROUND_TASKS)
+
+    assert result["domain"] == "physics"
+    assert stored == [("why is the sky blue", 0.5)]
+
+
+@pytest.mark.asyncio
+async def test_plan_and_classify_skips_semantic_cache_with_context(monkeypatch):
+    from services import llm_cache
+    from services.frame_generation import planner
+
+    monkeypatch.setattr(llm_cache, "LLM_CACHE_BACKEND", "off")
+
+    async def _embed(*_a, **_kw):
+        raise AssertionError("semantic cache must not be consulted for follow-ups")
+
+    # plan_and_classify streams; the non-streaming call is only its fallback.
+    async def _stream(*_a, **_kw):
+        yield '{"domain": "physics", '
+        yield '"enriched_prompt": "x"}'
+
+    async def _no_fallback(*_a, **_kw):
+        raise AssertionError("stream succeeded — fallback must not run")
+
+    with patch("services.research.vector_store.embed_query", _embed), \
+         patch.object(planner, "call_llm_stream_async", _stream), \
+         patch.object(planner, "call_llm_async", _no_fallback):
+        result = await planner.plan_and_classify(
+            "and why?", "instant", False, conversation_context="Prior turn: gravity")
+
+    assert result["domain"] == "physics"
+
+
+@pytest.mark.asyncio
+async def test_store_classification_prunes_expired_rows(monkeypatch):
+    from contextlib import asynccontextmanager
+    import services.research.vector_store as vs
+
+    statements: list[str] = []
+
+    class _Conn:
+        async def execute(self, sql, *args):
+            statements.append(sql.split()[0])
+
+    @asynccontextmanager
+    async def _db():
+        yield _Conn()
+
+    monkeypatch.setattr(vs, "get_async_db", _db)
+    monkeypatch.setattr(vs, "_classify_stores", 0)
+    monkeypatch.setattr(vs, "_PRUNE_EVERY", 2)
+
+    for i in range(4):
+        await vs.store_classification(f"q{i}", [0.1], "instant", False, {})
+
+    assert statements == ["INSERT", "INSERT", "DELETE", "INSERT", "INSERT", "DELETE"]
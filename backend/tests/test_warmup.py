@@ -0,0 +1,81 @@
+"""
+Tests for per-worker warm-up (services/warmup.py) and its readiness gate.
+"""
+
+import pytest
+
+from services import llm_service, prompt_registry, warmup
+
+
+@pytest.fixture(autouse=True)
+def _fresh_status(monkeypatch):
+    monkeypatch.setattr(warmup, "_status",
+                        {"ready": False, "local": False, "local_error": None, "preflight": {}})
+
+
+async def test_local_warmup_is_ready_without_preflight(monkeypatch):
+    monkeypatch.setattr(warmup, "WARMUP_PREFLIGHT", False)
+
+    await warmup.warm_local()
+
+    assert warmup.is_ready()
+    assert prompt_registry.texts()
+    assert llm_service._async_anthropic_client is not None
+
+
+async def test_failed_local_warmup_still_becomes_ready(monkeypatch):
+    monkeypatch.setattr(warmup, "WARMUP_PREFLIGHT", False)
+
+    def _load_all():
+        raise OSError("disk gone")
+
+    monkeypatch.setattr(prompt_registry, "load_all", _load_all)
+
+    with pytest.raises(OSError):
+        await warmup.warm_local()
+
+    assert warmup.is_ready()
+    assert warmup.status()["local_error"] == "disk gone"
+
+
+async def test_preflight_gates_readiness_and_records_failures(monkeypatch):
+    monkeypatch.setattr(warmup, "WARMUP_PREFLIGHT", True)
+    monkeypatch.setattr(warmup, "REPLAY_ACTIVITY_LOG", "")
+    monkeypatch.setattr(warmup, "ANTHROPIC_API_KEY", "key")
+    monkeypatch.setattr(warmup, "OPENAI_API_KEY", "")
+    monkeypatch.setattr(warmup, "GEMINI_API_KEY", "")
+    monkeypatch.setattr(warmup, "TAVILY_API_KEY", "")
+
+    class _Models:
+        async def list(self, **kwargs):
+            raise ConnectionError("offline")
+
+    class _Client:
+        models = _Models()
+
+    monkeypatch.setattr(llm_service, "_get_async_anthropic_client", lambda: _Client())
+
+    await warmup.warm_local()
+    assert not warmup.is_ready()
+
+    await warmup.preflight()
+    assert warmup.is_ready()
+    assert warmup.status()["preflight"] == {"anthropic": False}
+
+
+async def test_preflight_pings_tavily_over_its_shared_pool(monkeypatch):
+    from services.research import search_provider
+    monkeypatch.setattr(warmup, "ANTHROPIC_API_KEY", "")
+    monkeypatch.setattr(warmup, "OPENAI_API_KEY", "")
+    monkeypatch.setattr(warmup, "GEMINI_API_KEY", "")
+    monkeypatch.setattr(warmup, "TAVILY_API_KEY", "tvly-key")
+    pinged = []
+
+    async def _ping():
+        pinged.append(True)
+
+    monkeypatch.setattr(search_provider.tavily, "ping", _ping)
+
+    await warmup.preflight()
+
+    assert pinged and warmup.status()["preflight"] == {"tavily": True}
@@ -86,6 +86,11 @@ export const SSE_REDUCERS = {
       : [...(s.completedBeats ?? []), e.beat_index],
   }),
   block:             (s, e) => ({ ...s, blocks:           [...(s.blocks ?? []), e.block] }),
+  // Widget HTML arrives after its placeholder block; swap it in by id.
+  block_update:      (s, e) => ({
+    ...s,
+    blocks: (s.blocks ?? []).map(b => b.id === e.block.id ? e.block : b),
+  }),
   entities_selected: (s, e) => ({ ...s, selectedEntities: e.entities ?? [] }),
   blocks_planned:    (s, e) => ({ ...s, blockCount: e.count ?? 0 }),
 }